@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Persisted incremental rollup index for AnalyticsEngine's load metrics.
+
+weeklyTrainingLoads, fatigue and form rescan every session for every week they
+report. This index keeps per-day rollups instead — duration, distance,
+training-load term, HR sum/count, run/walk split and active energy — so adding
+a session touches exactly one day bucket, and a rolling 7-day window is the
+sum of seven day buckets whatever the history size.
+
+Days are UTC days on the Apple reference clock (day = startDate // 86400).
+Rolling windows that end at a day boundary (as_of_day) cover whole buckets and
+match AnalyticsEngine evaluated at that instant exactly (up to float rounding);
+windows ending mid-day need per-session data and are out of scope.
+
+The index remembers where in sessions.json it stopped reading, so `update`
+after inject_test_session.py has appended sessions parses only the new bytes.
+If the file was rewritten instead (e.g. DataManager re-saved it), the guard
+bytes no longer match and the index is rebuilt. `verify` rebuilds nothing: it
+recomputes every metric from scratch with analytics_reference.py and compares.
+
+Usage:
+    python3 tests/analytics_index.py build sessions.json analytics_index.json
+    python3 tests/analytics_index.py update sessions.json analytics_index.json
+    python3 tests/analytics_index.py show analytics_index.json --as-of 2026-01-01
+    python3 tests/analytics_index.py verify sessions.json --index analytics_index.json
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from analytics_reference import (
+    DAY,
+    SessionColumns,
+    fitness_from_loads,
+    hr_intensity,
+    segment_totals,
+    status_for_form,
+    weekly_trend,
+    weekly_training_loads,
+)
+from atomic_io import commit_temp, temp_sibling
+from inject_test_session import to_apple_timestamp
+from session_io import iter_sessions, locate_array_tail
+
+INDEX_VERSION = 1
+
+# Order of the values stored in every day bucket
+ROLLUP_FIELDS = (
+    "count", "duration", "distance", "load", "hrSum", "hrCount",
+    "runningDuration", "walkingDuration",
+    "runningCalories", "runningCaloriesCount", "walkingCalories", "walkingCaloriesCount",
+)
+_F = {name: i for i, name in enumerate(ROLLUP_FIELDS)}
+
+# Bytes before the resume offset that must be unchanged for an incremental update
+GUARD_BYTES = 4096
+
+# Relative tolerance for verify(); buckets are summed in file order, the
+# reference with fsum
+VERIFY_REL_TOL = 1e-9
+
+
+def session_rollup(session: dict) -> list:
+    """One session's contribution to a bucket, in ROLLUP_FIELDS order."""
+    avg_hr = session.get("averageHeartRate")
+    run_d, walk_d, run_e, walk_e = segment_totals(session)
+    has_hr = avg_hr is not None
+    return [
+        1,
+        session["duration"],
+        session.get("distance") or 0.0,
+        session["duration"] / 60.0 * hr_intensity(avg_hr if has_hr else math.nan),
+        avg_hr if has_hr else 0.0,
+        1 if has_hr else 0,
+        run_d,
+        walk_d,
+        run_e if run_e == run_e else 0.0,
+        1 if run_e == run_e else 0,
+        walk_e if walk_e == walk_e else 0.0,
+        1 if walk_e == walk_e else 0,
+    ]
+
+
+class AggregateIndex:
+    """Day rollups plus the resume point in the source file."""
+
+    def __init__(self):
+        self.days = {}
+        self.session_count = 0
+        self.source = None  # {"path", "offset", "guard"} once synced to a file
+
+    def add(self, session: dict):
+        """Fold one new session into its day bucket — O(1)."""
+        values = session_rollup(session)
+        day = int(session["startDate"] // DAY)
+        bucket = self.days.get(day)
+        if bucket is None:
+            self.days[day] = values
+        else:
+            for i, v in enumerate(values):
+                bucket[i] += v
+        self.session_count += 1
+
+    def window(self, first_day: int, end_day: int) -> list:
+        """Sum of the day buckets in [first_day, end_day)."""
+        total = [0.0] * len(ROLLUP_FIELDS)
+        for day in range(first_day, end_day):
+            bucket = self.days.get(day)
+            if bucket is not None:
+                for i, v in enumerate(bucket):
+                    total[i] += v
+        return total
+
+    # MARK: - AnalyticsEngine equivalents at a day boundary
+
+    def weekly_training_load(self, as_of_day: int) -> float:
+        return min(self.window(as_of_day - 7, as_of_day)[_F["load"]], 100.0)
+
+    def weekly_training_loads(self, as_of_day: int, weeks: int = 6) -> list:
+        return [self.weekly_training_load(as_of_day - 7 * offset) for offset in reversed(range(weeks))]
+
+    def fitness_score(self, as_of_day: int) -> float:
+        return fitness_from_loads(self.weekly_training_loads(as_of_day, 6))
+
+    def fatigue(self, as_of_day: int) -> float:
+        return self.weekly_training_load(as_of_day)
+
+    def form(self, as_of_day: int) -> float:
+        return self.fitness_score(as_of_day) - self.fatigue(as_of_day)
+
+    def recovery_status(self, as_of_day: int) -> str:
+        return status_for_form(self.form(as_of_day))
+
+    def weekly_trend(self, as_of_day: int, weeks: int = 6) -> list:
+        trend = []
+        for offset in reversed(range(weeks)):
+            end = as_of_day - 7 * offset
+            w = self.window(end - 7, end)
+            trend.append({
+                "weekStartDate": (end - 7) * DAY,
+                "totalDuration": w[_F["duration"]],
+                "totalDistance": w[_F["distance"]],
+                "sessionCount": int(w[_F["count"]]),
+                "averageHeartRate": w[_F["hrSum"]] / w[_F["hrCount"]] if w[_F["hrCount"]] else None,
+                "trainingLoad": min(w[_F["load"]], 100.0),
+                "runningDuration": w[_F["runningDuration"]],
+                "walkingDuration": w[_F["walkingDuration"]],
+                "runningCalories": w[_F["runningCalories"]] if w[_F["runningCaloriesCount"]] else None,
+                "walkingCalories": w[_F["walkingCalories"]] if w[_F["walkingCaloriesCount"]] else None,
+            })
+        return trend
+
+    def summary(self, as_of_day: int) -> dict:
+        return {
+            "asOf": as_of_day * DAY,
+            "sessions": self.session_count,
+            "weeklyTrainingLoad": self.weekly_training_load(as_of_day),
+            "weeklyTrainingLoads": self.weekly_training_loads(as_of_day),
+            "fitnessScore": self.fitness_score(as_of_day),
+            "fatigue": self.fatigue(as_of_day),
+            "form": self.form(as_of_day),
+            "recoveryStatus": self.recovery_status(as_of_day),
+            "weeklyTrend": self.weekly_trend(as_of_day),
+        }
+
+    # MARK: - Persistence
+
+    def to_json(self) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "fields": list(ROLLUP_FIELDS),
+            "sessions": self.session_count,
+            "source": self.source,
+            "days": {str(k): v for k, v in sorted(self.days.items())},
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "AggregateIndex":
+        if data.get("version") != INDEX_VERSION or tuple(data.get("fields", ())) != ROLLUP_FIELDS:
+            raise ValueError("unsupported analytics index version")
+        index = cls()
+        index.session_count = data["sessions"]
+        index.source = data.get("source")
+        index.days = {int(k): v for k, v in data["days"].items()}
+        return index
+
+    def save(self, path: str):
+        """Write the index atomically."""
+        fd, tmp = temp_sibling(path)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.to_json(), f, separators=(",", ":"))
+            commit_temp(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "AggregateIndex":
+        with open(path) as f:
+            return cls.from_json(json.load(f))
+
+
+# MARK: - Syncing with a sessions file
+
+
+def _resume_point(path: str) -> tuple:
+    """(offset just past the last element or '[', size) for a sessions file."""
+    offset, is_empty = locate_array_tail(path)
+    return (offset + 1 if is_empty else offset), os.path.getsize(path)
+
+
+def _guard(f, offset: int) -> str:
+    start = max(0, offset - GUARD_BYTES)
+    f.seek(start)
+    return hashlib.blake2b(f.read(offset - start), digest_size=16).hexdigest()
+
+
+def build_index(sessions_file: str) -> AggregateIndex:
+    """Full build from a sessions file."""
+    index = AggregateIndex()
+    for session in iter_sessions(sessions_file):
+        index.add(session)
+    offset, _ = _resume_point(sessions_file)
+    with open(sessions_file, "rb") as f:
+        index.source = {"path": os.path.abspath(sessions_file), "offset": offset,
+                        "guard": _guard(f, offset)}
+    return index
+
+
+def update_index(index: AggregateIndex, sessions_file: str) -> tuple:
+    """Bring ``index`` up to date with ``sessions_file``.
+
+    Parses only what was appended since the last sync when the bytes in front of
+    the resume point are unchanged; otherwise rebuilds. Returns
+    ``(index, added, rebuilt)``.
+    """
+    src = index.source
+    offset, size = _resume_point(sessions_file)
+    if src and src["path"] == os.path.abspath(sessions_file) and src["offset"] <= offset <= size:
+        with open(sessions_file, "rb") as f:
+            if _guard(f, src["offset"]) == src["guard"]:
+                f.seek(src["offset"])
+                appended = f.read(offset - src["offset"]).decode("utf-8").strip()
+                new_sessions = json.loads("[" + appended.lstrip(",") + "]") if appended else []
+                for session in new_sessions:
+                    index.add(session)
+                index.source = {**src, "offset": offset, "guard": _guard(f, offset)}
+                return index, len(new_sessions), False
+    rebuilt = build_index(sessions_file)
+    return rebuilt, rebuilt.session_count, True
+
+
+# MARK: - Verification
+
+
+def _close(a, b) -> bool:
+    if a is None or b is None:
+        return a is b
+    if isinstance(a, str) or isinstance(b, str):
+        return a == b
+    return math.isclose(a, b, rel_tol=VERIFY_REL_TOL, abs_tol=1e-9)
+
+
+def verify_index(index: AggregateIndex, sessions_files: list, days: int = 90) -> list:
+    """Compare the index with a full recomputation at every day boundary.
+
+    Checks the last ``days`` days up to the day after the newest session, using
+    analytics_reference.py as the independent oracle. Returns a list of
+    mismatch descriptions (empty when the index is correct).
+    """
+    cols = SessionColumns.load(*sessions_files)
+    problems = []
+    if len(cols) != index.session_count:
+        problems.append(f"session count: index {index.session_count}, files {len(cols)}")
+    if not len(cols):
+        return problems
+    last_day = int(cols.sorted_starts[-1] // DAY) + 1
+    for day in range(last_day - days + 1, last_day + 1):
+        now = day * DAY
+        expected_loads = weekly_training_loads(cols, now, 6)
+        got_loads = index.weekly_training_loads(day)
+        for week, (e, g) in enumerate(zip(expected_loads, got_loads)):
+            if not _close(e, g):
+                problems.append(f"day {day}: weekly load[{week}] expected {e}, index {g}")
+        checks = (
+            ("fitnessScore", fitness_from_loads(expected_loads), index.fitness_score(day)),
+            ("recoveryStatus",
+             status_for_form(fitness_from_loads(expected_loads) - expected_loads[-1]),
+             index.recovery_status(day)),
+        )
+        for name, e, g in checks:
+            if not _close(e, g):
+                problems.append(f"day {day}: {name} expected {e}, index {g}")
+        for week, (e, g) in enumerate(zip(weekly_trend(cols, now), index.weekly_trend(day))):
+            for key, value in e.items():
+                if not _close(value, g[key]):
+                    problems.append(f"day {day}: weeklyTrend[{week}].{key} expected {value}, index {g[key]}")
+    return problems
+
+
+def _parse_day(value: str) -> int:
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(to_apple_timestamp(dt) // DAY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental rollup index for AnalyticsEngine metrics")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Build the index from scratch")
+    build.add_argument("sessions_file")
+    build.add_argument("index_file")
+
+    update = sub.add_parser("update", help="Fold newly appended sessions into the index")
+    update.add_argument("sessions_file")
+    update.add_argument("index_file")
+
+    show = sub.add_parser("show", help="Print load metrics as of a day boundary")
+    show.add_argument("index_file")
+    show.add_argument("--as-of", type=_parse_day,
+                      help="Date (UTC midnight) to evaluate at (default: tomorrow)")
+
+    verify = sub.add_parser("verify", help="Check the index against a full recomputation")
+    verify.add_argument("sessions_file", nargs="+")
+    verify.add_argument("--index", dest="index_file", required=True)
+    verify.add_argument("--days", type=int, default=90, help="Day boundaries to check (default: 90)")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        t0 = time.perf_counter()
+        index = build_index(args.sessions_file)
+        index.save(args.index_file)
+        print(f"Indexed {index.session_count} sessions into {len(index.days)} days "
+              f"in {time.perf_counter() - t0:.2f} s")
+    elif args.command == "update":
+        index = AggregateIndex.load(args.index_file) if os.path.exists(args.index_file) else AggregateIndex()
+        t0 = time.perf_counter()
+        index, added, rebuilt = update_index(index, args.sessions_file)
+        index.save(args.index_file)
+        how = "rebuilt" if rebuilt else "appended"
+        print(f"{how}: {added} sessions ({index.session_count} total) in {time.perf_counter() - t0:.3f} s")
+    elif args.command == "show":
+        index = AggregateIndex.load(args.index_file)
+        as_of = args.as_of
+        if as_of is None:
+            as_of = int(to_apple_timestamp(datetime.now(timezone.utc)) // DAY) + 1
+        json.dump(index.summary(as_of), sys.stdout, indent=2)
+        print()
+    elif args.command == "verify":
+        index = AggregateIndex.load(args.index_file)
+        problems = verify_index(index, args.sessions_file, args.days)
+        if problems:
+            for problem in problems[:50]:
+                print(f"  ❌ {problem}")
+            print(f"❌ Index does not match a full recomputation ({len(problems)} mismatches)")
+            sys.exit(1)
+        print(f"✅ Index matches a full recomputation over {args.days} day boundaries "
+              f"({index.session_count} sessions)")
+
+
+if __name__ == "__main__":
+    main()
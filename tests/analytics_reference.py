@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Python reference implementation of AnalyticsEngine over large session sets.
+
+AnalyticsEngine (ShuttlX/Services/AnalyticsEngine.swift) recomputes every
+metric from the full [TrainingSession] on each call, filtering the whole list
+once per week. This module loads sessions.json / sessions_archive.json into
+array-backed columns once and computes the same metrics with whole-column
+passes: sessions are indexed by start date, so each week is a bisect plus a
+slice instead of a scan.
+
+It is meant as (1) a correctness oracle — the formulas, thresholds and quirks
+are mirrored from the Swift as-is, including `distance` being treated as km by
+personalRecords/cooperVO2Max and the fastest-km fallback depending on session
+order — and (2) a scaling baseline (`bench`).
+
+Differences from Swift: sums use math.fsum, so totals may differ from Swift's
+left-to-right reduce in the last few ulps; Calendar day arithmetic is taken as
+fixed 86400 s days (no DST shifts). Compare with a relative tolerance.
+
+Usage:
+    python3 tests/analytics_reference.py metrics sessions.json --archive sessions_archive.json
+    python3 tests/analytics_reference.py bench --sizes 100,1k,10k,100k
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+from inject_test_session import SEEDED_END_DATE, iter_bulk_sessions, parse_sizes, to_apple_timestamp
+from session_io import iter_sessions
+
+DAY = 86400.0
+WEEK = 7 * DAY
+NAN = float("nan")
+
+FITNESS_WEIGHTS = (0.05, 0.08, 0.12, 0.15, 0.25, 0.35)
+PACE_ZONES = ("Easy", "Moderate", "Tempo", "Threshold", "Interval")
+
+
+def pace_zone_name(seconds_per_km: float) -> str:
+    """AnalyticsEngine.paceZoneName."""
+    if seconds_per_km < 240:
+        return "Interval"
+    if seconds_per_km < 285:
+        return "Threshold"
+    if seconds_per_km < 330:
+        return "Tempo"
+    if seconds_per_km < 390:
+        return "Moderate"
+    return "Easy"
+
+
+def hr_intensity(avg_hr: float) -> float:
+    """Per-session HR intensity used by computeTrainingLoad (NaN = no HR)."""
+    if avg_hr == avg_hr and avg_hr > 0:
+        return min(max((avg_hr - 60) / 140.0, 0.1), 1.0)
+    return 0.5
+
+
+def _opt(value) -> float:
+    return NAN if value is None else float(value)
+
+
+def _present(values) -> list:
+    return [v for v in values if v == v]
+
+
+def segment_totals(session: dict) -> tuple:
+    """Running/walking duration and active energy (NaN = none) of one session."""
+    run_d = walk_d = 0.0
+    run_e, walk_e = [], []
+    for seg in session.get("segments") or []:
+        kind = seg.get("activityType")
+        if kind not in ("running", "walking"):
+            continue
+        end = seg.get("endDate")
+        # An open segment's duration is "until now" in Swift; fixtures never have one
+        seg_duration = (end - seg["startDate"]) if end is not None else 0.0
+        energy = seg.get("activeEnergyCalories")
+        if kind == "running":
+            run_d += seg_duration
+            if energy is not None:
+                run_e.append(energy)
+        else:
+            walk_d += seg_duration
+            if energy is not None:
+                walk_e.append(energy)
+    return (run_d, walk_d,
+            math.fsum(run_e) if run_e else NAN,
+            math.fsum(walk_e) if walk_e else NAN)
+
+
+class SessionColumns:
+    """Sessions as parallel typed arrays, in file order, plus a start-date index.
+
+    Route-derived numbers (ascent/descent/peak altitude) and segment rollups
+    (run/walk duration and active energy) are reduced per session at load, so
+    routes and segments are never kept in memory.
+    """
+
+    SCALARS = ("start", "duration", "avg_hr", "max_hr", "distance",
+               "run_duration", "walk_duration", "run_energy", "walk_energy",
+               "ascent", "descent", "peak_altitude", "load_term")
+
+    def __init__(self):
+        for name in self.SCALARS:
+            setattr(self, name, array("d"))
+        self.elevation = array("b")        # 1 if the route has >= 2 altitudes
+        self.split_times = array("d")      # every km split, flattened
+        self.split_offsets = array("Q", [0])
+        self.by_start = None
+        self.sorted_starts = None
+
+    def __len__(self):
+        return len(self.start)
+
+    def add(self, session: dict):
+        """Reduce one session dict into the columns."""
+        self.start.append(session["startDate"])
+        self.duration.append(session["duration"])
+        avg_hr = _opt(session.get("averageHeartRate"))
+        self.avg_hr.append(avg_hr)
+        self.max_hr.append(_opt(session.get("maxHeartRate")))
+        self.distance.append(_opt(session.get("distance")))
+        self.load_term.append(session["duration"] / 60.0 * hr_intensity(avg_hr))
+
+        run_d, walk_d, run_e, walk_e = segment_totals(session)
+        self.run_duration.append(run_d)
+        self.walk_duration.append(walk_d)
+        self.run_energy.append(run_e)
+        self.walk_energy.append(walk_e)
+
+        altitudes = [p["altitude"] for p in session.get("route") or () if p.get("altitude") is not None]
+        if len(altitudes) >= 2:
+            diffs = [b - a for a, b in zip(altitudes, altitudes[1:])]
+            self.ascent.append(math.fsum(d for d in diffs if d > 0))
+            self.descent.append(math.fsum(-d for d in diffs if d <= 0))
+            self.peak_altitude.append(max(altitudes))
+            self.elevation.append(1)
+        else:
+            self.ascent.append(0.0)
+            self.descent.append(0.0)
+            self.peak_altitude.append(NAN)
+            self.elevation.append(0)
+
+        splits = session.get("kmSplits") or ()
+        self.split_times.extend(s["splitTime"] for s in splits)
+        self.split_offsets.append(len(self.split_times))
+
+    def finish(self):
+        """Build the start-date index; call once after the last add()."""
+        start = self.start
+        self.by_start = array("Q", sorted(range(len(start)), key=start.__getitem__))
+        self.sorted_starts = array("d", (start[i] for i in self.by_start))
+        return self
+
+    @classmethod
+    def from_sessions(cls, sessions):
+        cols = cls()
+        for session in sessions:
+            cols.add(session)
+        return cols.finish()
+
+    @classmethod
+    def load(cls, *paths):
+        """Stream one or more sessions.json-shaped files into columns."""
+        cols = cls()
+        for path in paths:
+            for session in iter_sessions(path):
+                cols.add(session)
+        return cols.finish()
+
+    def window(self, start: float, end: float):
+        """Indexes (file order positions) of sessions with start <= t < end."""
+        a = bisect_left(self.sorted_starts, start)
+        b = bisect_left(self.sorted_starts, end)
+        return self.by_start[a:b]
+
+
+# MARK: - Training load / fitness
+
+
+def training_load(cols: SessionColumns, idx) -> float:
+    """computeTrainingLoad for the sessions at ``idx``."""
+    return min(math.fsum(cols.load_term[i] for i in idx), 100.0)
+
+
+def weekly_training_load(cols: SessionColumns, now: float) -> float:
+    """weeklyTrainingLoad: every session started in the last 7 days."""
+    a = bisect_left(cols.sorted_starts, now - WEEK)
+    return training_load(cols, cols.by_start[a:])
+
+
+def weekly_training_loads(cols: SessionColumns, now: float, weeks: int) -> list:
+    return [
+        training_load(cols, cols.window(now - offset * WEEK - WEEK, now - offset * WEEK))
+        for offset in reversed(range(weeks))
+    ]
+
+
+def fitness_from_loads(loads: list) -> float:
+    """Weighted average of weekly loads (oldest first), as in fitnessScore."""
+    recent = loads[-len(FITNESS_WEIGHTS):]
+    weights = FITNESS_WEIGHTS[len(FITNESS_WEIGHTS) - len(recent):]
+    total = sum(weights)
+    return sum(l * w for l, w in zip(recent, weights)) / total if total > 0 else 0.0
+
+
+def fitness_score(cols: SessionColumns, now: float) -> float:
+    return fitness_from_loads(weekly_training_loads(cols, now, 6))
+
+
+def fatigue(cols: SessionColumns, now: float) -> float:
+    return weekly_training_load(cols, now)
+
+
+def form(cols: SessionColumns, now: float) -> float:
+    return fitness_score(cols, now) - fatigue(cols, now)
+
+
+def status_for_form(value: float) -> str:
+    """recoveryStatus label for a form value."""
+    if value > 10:
+        return "Fresh"
+    if value > -5:
+        return "Normal"
+    if value > -20:
+        return "Fatigued"
+    return "Needs rest"
+
+
+def recovery_status(cols: SessionColumns, now: float) -> str:
+    return status_for_form(form(cols, now))
+
+
+# MARK: - Weekly trend
+
+
+def weekly_trend(cols: SessionColumns, now: float, weeks: int = 6) -> list:
+    """weeklyTrend: one summary dict per week, oldest first."""
+    trend = []
+    for offset in reversed(range(weeks)):
+        week_end = now - offset * WEEK
+        week_start = week_end - WEEK
+        idx = cols.window(week_start, week_end)
+        hrs = _present(cols.avg_hr[i] for i in idx)
+        run_e = _present(cols.run_energy[i] for i in idx)
+        walk_e = _present(cols.walk_energy[i] for i in idx)
+        trend.append({
+            "weekStartDate": week_start,
+            "totalDuration": math.fsum(cols.duration[i] for i in idx),
+            "totalDistance": math.fsum(_present(cols.distance[i] for i in idx)),
+            "sessionCount": len(idx),
+            "averageHeartRate": math.fsum(hrs) / len(hrs) if hrs else None,
+            "trainingLoad": training_load(cols, idx),
+            "runningDuration": math.fsum(cols.run_duration[i] for i in idx),
+            "walkingDuration": math.fsum(cols.walk_duration[i] for i in idx),
+            "runningCalories": math.fsum(run_e) if run_e else None,
+            "walkingCalories": math.fsum(walk_e) if walk_e else None,
+        })
+    return trend
+
+
+# MARK: - Records, zones, elevation, VO2max
+
+
+def personal_records(cols: SessionColumns) -> dict:
+    """personalRecords, scanning sessions in file order like the Swift loop."""
+    rec = dict.fromkeys((
+        "fastestKmPace", "fastestKmDate", "longestDuration", "longestDurationDate",
+        "highestAvgHR", "highestAvgHRDate", "mostDistance", "mostDistanceDate",
+    ))
+    offsets, splits = cols.split_offsets, cols.split_times
+    for i in range(len(cols)):
+        a, b = offsets[i], offsets[i + 1]
+        if a < b:
+            best = min(splits[a:b])
+            if rec["fastestKmPace"] is None or best < rec["fastestKmPace"]:
+                rec["fastestKmPace"], rec["fastestKmDate"] = best, cols.start[i]
+        if rec["fastestKmPace"] is None:
+            dist = cols.distance[i]
+            if dist == dist and dist > 0.5:
+                rec["fastestKmPace"], rec["fastestKmDate"] = cols.duration[i] / dist, cols.start[i]
+
+    # The remaining records are order-independent maxima (first wins on ties)
+    def first_max(column):
+        best = None
+        for i, v in enumerate(column):
+            if v == v and (best is None or v > column[best]):
+                best = i
+        return best
+
+    for key, column in (("longestDuration", cols.duration),
+                        ("highestAvgHR", cols.avg_hr),
+                        ("mostDistance", cols.distance)):
+        i = first_max(column)
+        if i is not None:
+            rec[key], rec[key + "Date"] = column[i], cols.start[i]
+    return rec
+
+
+def pace_zones(cols: SessionColumns) -> list:
+    totals = dict.fromkeys(PACE_ZONES, 0.0)
+    offsets, splits = cols.split_offsets, cols.split_times
+    for i in range(len(cols)):
+        a, b = offsets[i], offsets[i + 1]
+        if a < b:
+            for split in splits[a:b]:
+                totals[pace_zone_name(split)] += split
+        else:
+            dist = cols.distance[i]
+            if dist == dist and dist > 0.1:
+                totals[pace_zone_name(cols.duration[i] / dist)] += cols.duration[i]
+    grand = sum(totals.values())
+    if grand <= 0:
+        return []
+    return [
+        {"zone": zone, "duration": totals[zone], "percentage": totals[zone] / grand * 100}
+        for zone in PACE_ZONES if totals[zone] > 0
+    ]
+
+
+def elevation_summary(cols: SessionColumns):
+    idx = [i for i, ok in enumerate(cols.elevation) if ok]
+    if not idx:
+        return None
+    ascent = math.fsum(cols.ascent[i] for i in idx)
+    return {
+        "totalAscent": ascent,
+        "totalDescent": math.fsum(cols.descent[i] for i in idx),
+        "highestPoint": max(cols.peak_altitude[i] for i in idx),
+        "averageAscent": ascent / len(idx),
+        "sessionCount": len(idx),
+    }
+
+
+def estimated_vo2max(cols: SessionColumns):
+    best = 0.0
+    for dist_km, duration in zip(cols.distance, cols.duration):
+        if not (dist_km == dist_km and dist_km > 0):
+            continue
+        if 600 <= duration <= 900:
+            best = max(best, dist_km * 1000 * (720 / duration))
+        elif duration > 900:
+            best = max(best, dist_km * 1000 / duration * 720)
+    if best > 500:
+        cooper = (best - 504.9) / 44.73
+        if 15 < cooper < 90:
+            return cooper
+
+    max_hrs = _present(cols.max_hr)
+    if not max_hrs or max(max_hrs) <= 100:
+        return None
+    avg_hrs = [v for v in _present(cols.avg_hr) if v > 40]
+    if not avg_hrs:
+        return None
+    vo2 = 15.3 * (max(max_hrs) / max(min(avg_hrs) * 0.65, 50))
+    return vo2 if 15 < vo2 < 90 else None
+
+
+METRICS = {
+    "weeklyTrend": lambda cols, now: weekly_trend(cols, now),
+    "weeklyTrainingLoad": weekly_training_load,
+    "fitnessScore": fitness_score,
+    "fatigue": fatigue,
+    "form": form,
+    "recoveryStatus": recovery_status,
+    "personalRecords": lambda cols, now: personal_records(cols),
+    "paceZones": lambda cols, now: pace_zones(cols),
+    "elevationSummary": lambda cols, now: elevation_summary(cols),
+    "estimatedVO2Max": lambda cols, now: estimated_vo2max(cols),
+}
+
+
+def compute_all(cols: SessionColumns, now: float) -> dict:
+    return {name: fn(cols, now) for name, fn in METRICS.items()}
+
+
+# MARK: - Benchmark
+
+
+def benchmark(sizes, seed: int = 0, route_interval: float = 300, repeat: int = 3,
+              workers: int = 1) -> list:
+    """Time column load and every metric at each size; returns one row per size."""
+    now = to_apple_timestamp(SEEDED_END_DATE)
+    rows = []
+    for size in sizes:
+        # ~1 session a day, at least a year, so recent weeks are populated
+        span_days = max(365, size / 1.2)
+        sessions = iter_bulk_sessions(size, span_days, seed, SEEDED_END_DATE, route_interval, workers)
+        t0 = time.perf_counter()
+        cols = SessionColumns.from_sessions(sessions)
+        row = {"sessions": size, "columnsSeconds": None, "metrics": {}}
+        row["columnsSeconds"] = time.perf_counter() - t0  # includes generation
+        for name, fn in METRICS.items():
+            best = math.inf
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                fn(cols, now)
+                best = min(best, time.perf_counter() - t0)
+            row["metrics"][name] = best
+        rows.append(row)
+    return rows
+
+
+def print_benchmark(rows: list):
+    names = list(METRICS)
+    print("\n" + "=" * 60)
+    print("  ANALYTICS REFERENCE — best of N, milliseconds")
+    print("=" * 60)
+    print(f"  {'metric':<20}" + "".join(f"{r['sessions']:>10}" for r in rows))
+    for name in names:
+        print(f"  {name:<20}" + "".join(f"{r['metrics'][name] * 1000:>10.2f}" for r in rows))
+    print(f"  {'(generate+load s)':<20}" + "".join(f"{r['columnsSeconds']:>10.1f}" for r in rows))
+    print("=" * 60)
+
+
+def _parse_now(value: str) -> float:
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return to_apple_timestamp(dt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AnalyticsEngine reference metrics and benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    metrics = sub.add_parser("metrics", help="Compute every metric for a sessions file")
+    metrics.add_argument("sessions_file")
+    metrics.add_argument("--archive", help="Also load this sessions_archive.json")
+    metrics.add_argument("--now", type=_parse_now,
+                         help="ISO date/time to evaluate at (default: now)")
+
+    bench = sub.add_parser("bench", help="Time every metric at several history sizes")
+    bench.add_argument("--sizes", type=parse_sizes, default=parse_sizes("100,1k,10k,100k"),
+                       help="Session counts (default: 100,1k,10k,100k)")
+    bench.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    bench.add_argument("--route-interval", type=float, default=300,
+                       help="Seconds between generated route points (default: 300)")
+    bench.add_argument("--repeat", type=int, default=3, help="Timing repeats (default: 3)")
+    bench.add_argument("--workers", type=int, default=1, help="Generator processes (default: 1)")
+    bench.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    args = parser.parse_args()
+
+    if args.command == "metrics":
+        now = args.now if args.now is not None else to_apple_timestamp(datetime.now(timezone.utc))
+        paths = [args.sessions_file] + ([args.archive] if args.archive else [])
+        cols = SessionColumns.load(*paths)
+        json.dump({"sessions": len(cols), "now": now, **compute_all(cols, now)}, sys.stdout, indent=2)
+        print()
+    else:
+        rows = benchmark(args.sizes, args.seed, args.route_interval, args.repeat, args.workers)
+        if args.json:
+            json.dump(rows, sys.stdout, indent=2)
+            print()
+        else:
+            print_benchmark(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Atomic file replacement shared by the tools that rewrite files in place.
+
+Output goes to a temp file in the target's directory and replaces the target
+with os.replace() once it is complete, the same all-or-nothing semantics as
+Data.write(options: .atomic): a reader sees either the old file or the new
+one, never a half-written mix.
+
+Usage:
+    fd, tmp = temp_sibling(path)
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    commit_temp(tmp, path)
+"""
+
+import os
+import shutil
+import tempfile
+
+
+def temp_sibling(path: str):
+    """Create a temp file next to ``path`` so os.replace() stays on one filesystem."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    return fd, tmp_path
+
+
+def commit_temp(tmp_path: str, path: str):
+    """Atomically move a finished temp file over ``path``, keeping its mode."""
+    if os.path.exists(path):
+        shutil.copymode(path, tmp_path)
+    else:
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+    os.replace(tmp_path, path)
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Hot-path benchmark suite over generated sessions.json fixtures.
+
+Times Python reference versions of the app's heavy data paths on standard
+fixture tiers, so a change to the data format, the generator or one of the
+algorithms shows up as a number rather than as a slow launch on device:
+
+    decode        JSONDecoder().decode([TrainingSession].self) of sessions.json
+    validate      session_schema over the same file (what the decode enforces)
+    encode        JSONEncoder().encode(sessions), as saveSessionsToAppGroup does
+    mergeFirst    DataManager.mergeLoadedSessions into an empty list (fast path)
+    mergeUpdate   mergeLoadedSessions into a list already holding the newest tenth
+    archive       archiveOldestBeyondCap + appendToArchive (cap 500); only
+                  timed on tiers with more sessions than the cap
+    analytics     SessionColumns + every AnalyticsEngine metric
+    routeRender   RouteMapView polylines/km markers + ElevationProfileView data,
+                  for every session
+
+Tiers scale session count and route density together (route-interval is the
+generator's seconds between route points). Fixtures are generated once per
+(tier, seed, generator version) into --cache-dir and reused.
+
+Timings are best of --repeat. Every run also times a fixed pure-Python
+calibration workload; `compare` divides by it, so a baseline recorded on a
+laptop can gate a slower or faster Linux CI runner. A metric regresses when
+its normalised ratio exceeds --threshold and it got slower by more than
+--min-delta-ms; fixture bytes per session regress past --size-threshold.
+`run --baseline` and `compare` exit 1 on any regression.
+
+Usage:
+    python3 tests/bench_suite.py run --tiers S,M -o bench.json
+    python3 tests/bench_suite.py run --tiers S,M --baseline bench_baseline.json
+    python3 tests/bench_suite.py compare bench.json bench_baseline.json --threshold 1.3
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+from analytics_reference import SessionColumns, compute_all
+from atomic_io import commit_temp, temp_sibling
+from inject_test_session import (SEEDED_END_DATE, bulk_jobs, encode_job_session, run_jobs,
+                                 to_apple_timestamp)
+from session_io import SessionArrayWriter
+from session_schema import compile_models, validate_file
+
+FORMAT_VERSION = 1
+SESSION_CAP = 500  # DataManager.sessionCap
+
+# name -> (sessions, route interval seconds)
+TIERS = {
+    "S": (100, 300),
+    "M": (1000, 60),
+    "L": (5000, 15),
+    "XL": (20000, 30),
+}
+
+METRIC_NAMES = ("decode", "validate", "encode", "mergeFirst", "mergeUpdate",
+                "archive", "analytics", "routeRender")
+
+EARTH_RADIUS_KM = 6371.0
+
+
+# MARK: - Fixtures
+
+
+def generator_fingerprint(seed: int) -> str:
+    """Short hash of a few generated sessions, so a generator change misses the cache."""
+    jobs = bulk_jobs(3, 7, seed, SEEDED_END_DATE, 60)
+    sample = "".join(encode_job_session((job, False))[0] for job in jobs)
+    return hashlib.blake2b(sample.encode(), digest_size=4).hexdigest()
+
+
+def fixture_path(cache_dir: str, tier: str, seed: int) -> str:
+    count, interval = TIERS[tier]
+    return os.path.join(cache_dir, f"sessions-{tier}-n{count}-r{interval:g}-s{seed}-{generator_fingerprint(seed)}.json")
+
+
+def ensure_fixture(cache_dir: str, tier: str, seed: int, workers: int = 1) -> tuple:
+    """Generate the tier's fixture unless cached; returns ``(path, seconds)``.
+
+    ``seconds`` is 0 for a cache hit.
+    """
+    path = fixture_path(cache_dir, tier, seed)
+    if os.path.exists(path):
+        return path, 0.0
+    os.makedirs(cache_dir, exist_ok=True)
+    count, interval = TIERS[tier]
+    # ~1 session a day, at least a year (as analytics_reference.benchmark)
+    jobs = bulk_jobs(count, max(365, count / 1.2), seed, SEEDED_END_DATE, interval)
+    t0 = time.perf_counter()
+    with SessionArrayWriter(path) as writer:
+        for text, _ in run_jobs(encode_job_session, [(job, False) for job in jobs], workers):
+            writer.write_encoded(text)
+    return path, time.perf_counter() - t0
+
+
+# MARK: - Reference pipelines
+
+
+def merge_loaded_sessions(sessions: list, processed: set, loaded: list) -> tuple:
+    """DataManager.mergeLoadedSessions; returns the new ``(sessions, processed)``."""
+    if not loaded:
+        return sessions, processed
+    existing_ids = {s["id"] for s in sessions}
+    if not existing_ids:
+        return loaded, {s["id"] for s in loaded}
+    sessions = list(sessions)
+    for session in loaded:
+        processed.add(session["id"])
+        if session["id"] not in existing_ids:
+            sessions.append(session)
+    return sessions, processed
+
+
+def archive_oldest_beyond_cap(sessions: list, archive_path: str, cap: int = SESSION_CAP) -> list:
+    """DataManager.archiveOldestBeyondCap + appendToArchive; returns the kept list."""
+    if len(sessions) <= cap:
+        return sessions
+    overflow = len(sessions) - cap
+    evicted = sorted(sessions, key=lambda s: s["startDate"])[:overflow]
+    evicted_ids = {s["id"] for s in evicted}
+    kept = [s for s in sessions if s["id"] not in evicted_ids]
+
+    archived = []
+    if os.path.exists(archive_path):
+        with open(archive_path, encoding="utf-8") as f:
+            archived = json.load(f)
+    archived.extend(evicted)
+    data = json.dumps(archived, separators=(",", ":")).encode()
+    fd, tmp = temp_sibling(archive_path)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    commit_temp(tmp, archive_path)
+    return kept
+
+
+def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    d_lat = math.radians(lat2 - lat1)
+    d_lon = math.radians(lon2 - lon1)
+    a = (math.sin(d_lat / 2) ** 2
+         + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lon / 2) ** 2)
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def route_render_inputs(session: dict, now: float) -> tuple:
+    """What RouteMapView and ElevationProfileView derive from one session.
+
+    Mirrors the Swift as written, including the per-segment filter over the
+    whole route. Returns ``(polylines, km_markers, elevation_points)``.
+    """
+    route = session.get("route") or []
+    segments = session.get("segments") or []
+    coords = lambda points: [(p["latitude"], p["longitude"]) for p in points]
+
+    polylines = []
+    if segments and len(route) >= 2:
+        for segment in segments:
+            start = segment["startDate"]
+            end = segment.get("endDate")
+            end = now if end is None else end
+            points = [p for p in route if start <= p["timestamp"] <= end]
+            if len(points) >= 2:
+                polylines.append((segment["activityType"], coords(points)))
+    if not polylines:
+        polylines = [("running", coords(route))]
+
+    markers = []
+    splits = session.get("kmSplits") or []
+    if splits and len(route) >= 2:
+        cumulative = 0.0
+        index = 1
+        for split in splits:
+            target = float(split["kmNumber"])
+            while index < len(route) and cumulative < target:
+                prev, cur = route[index - 1], route[index]
+                cumulative += _haversine_km(prev["latitude"], prev["longitude"],
+                                            cur["latitude"], cur["longitude"])
+                index += 1
+            point = route[min(index - 1, len(route) - 1)]
+            seconds = int(split["splitTime"])
+            markers.append((split["kmNumber"], point["latitude"], point["longitude"],
+                            f"{seconds // 60}:{seconds % 60:02d}/km"))
+
+    elevation = []
+    if len(route) >= 2:
+        cumulative = 0.0
+        for i, point in enumerate(route):
+            altitude = point.get("altitude")
+            if altitude is None:
+                continue
+            if i > 0:
+                prev = route[i - 1]
+                cumulative += _haversine_km(prev["latitude"], prev["longitude"],
+                                            point["latitude"], point["longitude"])
+            elevation.append((cumulative, altitude))
+    return polylines, markers, elevation
+
+
+# MARK: - Timing
+
+
+def best_of(fn, repeat: int) -> float:
+    """Best wall time of ``repeat`` calls, with the GC paused as timeit does."""
+    best = math.inf
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        finally:
+            gc.enable()
+    return best
+
+
+def calibrate(repeat: int = 5) -> float:
+    """Seconds for a fixed decode/encode/sort workload: the machine speed unit."""
+    doc = json.dumps([{"id": f"{i:032X}", "startDate": i * 61.5, "values": list(range(i % 50))}
+                      for i in range(20000)])
+
+    def work():
+        items = json.loads(doc)
+        items.sort(key=lambda item: -item["startDate"])
+        json.dumps(items)
+        {item["id"] for item in items}
+
+    return best_of(work, repeat)
+
+
+def run_tier(tier: str, cache_dir: str, seed: int = 0, repeat: int = 3, workers: int = 1,
+             log=print) -> dict:
+    """Time every pipeline on one tier."""
+    path, generate_s = ensure_fixture(cache_dir, tier, seed, workers)
+    now = to_apple_timestamp(SEEDED_END_DATE)
+    metrics = {}
+
+    def load():
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    metrics["decode"] = best_of(load, repeat)
+    sessions = load()
+    points = sum(len(s.get("route") or []) for s in sessions)
+    log(f"  {tier}: {len(sessions)} sessions, {points} route points, "
+        f"{os.path.getsize(path) / 1e6:.1f} MB" + (f" (generated in {generate_s:.1f} s)" if generate_s else ""))
+
+    checkers = compile_models()
+    metrics["validate"] = best_of(lambda: validate_file(path, checkers=checkers), repeat)
+    metrics["encode"] = best_of(lambda: json.dumps(sessions, separators=(",", ":")).encode(), repeat)
+    metrics["mergeFirst"] = best_of(lambda: merge_loaded_sessions([], set(), sessions), repeat)
+    recent = sessions[-max(1, len(sessions) // 10):]
+    metrics["mergeUpdate"] = best_of(
+        lambda: merge_loaded_sessions(recent, {s["id"] for s in recent}, sessions), repeat)
+
+    # Below the cap archiveOldestBeyondCap returns before touching the disk,
+    # so a timing there would only measure a length check.
+    if len(sessions) > SESSION_CAP:
+        work_dir = tempfile.mkdtemp(prefix="bench-archive-")
+        archive_path = os.path.join(work_dir, "sessions_archive.json")
+
+        def archive():
+            if os.path.exists(archive_path):
+                os.unlink(archive_path)
+            archive_oldest_beyond_cap(sessions, archive_path)
+
+        try:
+            metrics["archive"] = best_of(archive, repeat)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    metrics["analytics"] = best_of(lambda: compute_all(SessionColumns.from_sessions(sessions), now), repeat)
+    metrics["routeRender"] = best_of(lambda: [route_render_inputs(s, now) for s in sessions], repeat)
+
+    size = os.path.getsize(path)
+    return {
+        "sessions": len(sessions),
+        "routeInterval": TIERS[tier][1],
+        "routePoints": points,
+        "bytes": size,
+        "bytesPerSession": size / max(len(sessions), 1),
+        "generateSeconds": generate_s,
+        "metrics": metrics,
+    }
+
+
+def run_suite(tiers: list, cache_dir: str, seed: int = 0, repeat: int = 3, workers: int = 1,
+              log=print) -> dict:
+    calibration = calibrate()
+    log(f"  calibration: {calibration * 1000:.1f} ms")
+    results = {
+        "formatVersion": FORMAT_VERSION,
+        "seed": seed,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "calibrationSeconds": calibration,
+        "tiers": {},
+    }
+    for tier in tiers:
+        results["tiers"][tier] = run_tier(tier, cache_dir, seed, repeat, workers, log)
+    return results
+
+
+# MARK: - Regression check
+
+
+def compare(current: dict, baseline: dict, threshold: float = 1.5, min_delta: float = 0.005,
+            size_threshold: float = 1.1, normalize: bool = True) -> list:
+    """One row per (tier, metric) present in both result sets.
+
+    Rows are dicts with ``tier``, ``metric``, ``baseline``, ``current``,
+    ``ratio`` and ``regressed``. Tiers or metrics missing from either side
+    are skipped.
+    """
+    scale = 1.0
+    if normalize and baseline.get("calibrationSeconds") and current.get("calibrationSeconds"):
+        scale = current["calibrationSeconds"] / baseline["calibrationSeconds"]
+
+    rows = []
+    for tier, cur in current["tiers"].items():
+        base = baseline["tiers"].get(tier)
+        if base is None:
+            continue
+        if base["sessions"] != cur["sessions"] or base["routeInterval"] != cur["routeInterval"]:
+            rows.append({"tier": tier, "metric": "tier", "baseline": None, "current": None,
+                         "ratio": None, "regressed": True,
+                         "note": "tier definition differs from the baseline"})
+            continue
+        ratio = cur["bytesPerSession"] / base["bytesPerSession"]
+        rows.append({"tier": tier, "metric": "bytesPerSession", "baseline": base["bytesPerSession"],
+                     "current": cur["bytesPerSession"], "ratio": ratio,
+                     "regressed": ratio > size_threshold})
+        for name, seconds in cur["metrics"].items():
+            before = base["metrics"].get(name)
+            if before is None:
+                continue
+            expected = before * scale
+            ratio = seconds / expected if expected else math.inf
+            rows.append({"tier": tier, "metric": name, "baseline": before, "current": seconds,
+                         "ratio": ratio,
+                         "regressed": ratio > threshold and seconds - expected > min_delta})
+    return rows
+
+
+# MARK: - Output
+
+
+def print_results(results: dict):
+    tiers = list(results["tiers"])
+    print("\n" + "=" * 60)
+    print("  HOT-PATH BENCHMARK — best of N, milliseconds")
+    print("=" * 60)
+    print(f"  {'tier':<14}" + "".join(f"{t:>11}" for t in tiers))
+    print(f"  {'sessions':<14}" + "".join(f"{results['tiers'][t]['sessions']:>11}" for t in tiers))
+    print(f"  {'route points':<14}" + "".join(f"{results['tiers'][t]['routePoints']:>11}" for t in tiers))
+    print(f"  {'MB':<14}" + "".join(f"{results['tiers'][t]['bytes'] / 1e6:>11.1f}" for t in tiers))
+    for name in METRIC_NAMES:
+        cells = [results["tiers"][t]["metrics"].get(name) for t in tiers]
+        print(f"  {name:<14}" + "".join(f"{'n/a':>11}" if c is None else f"{c * 1000:>11.1f}"
+                                        for c in cells))
+    print(f"  calibration: {results['calibrationSeconds'] * 1000:.1f} ms on "
+          f"{results['implementation']} {results['python']}, {results['platform']}")
+    print("=" * 60)
+
+
+def print_comparison(rows: list, threshold: float):
+    regressions = [r for r in rows if r["regressed"]]
+    print("\n" + "=" * 60)
+    print(f"  REGRESSION CHECK (threshold {threshold:g}x, machine-normalised)")
+    print("=" * 60)
+    for r in rows:
+        icon = "❌" if r["regressed"] else "✅"
+        if r["ratio"] is None:
+            print(f"  {icon} {r['tier']:<3} {r['note']}")
+        else:
+            print(f"  {icon} {r['tier']:<3} {r['metric']:<16} {r['ratio']:>6.2f}x")
+    if not rows:
+        print("  ⚠️  no tiers in common with the baseline")
+    print("=" * 60)
+    print(f"  {'❌' if regressions else '✅'} {len(regressions)} regression(s) in {len(rows)} checks")
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        results = json.load(f)
+    if results.get("formatVersion") != FORMAT_VERSION:
+        print(f"❌ {path}: not a version {FORMAT_VERSION} benchmark result")
+        sys.exit(2)
+    return results
+
+
+def _parse_tiers(value: str) -> list:
+    tiers = [t.strip().upper() for t in value.split(",") if t.strip()]
+    unknown = [t for t in tiers if t not in TIERS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown tier(s) {', '.join(unknown)}; choose from {', '.join(TIERS)}")
+    return tiers
+
+
+def _add_threshold_args(parser):
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="Slowdown ratio that counts as a regression (default: 1.5)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                        help="Ignore slowdowns smaller than this (default: 5)")
+    parser.add_argument("--size-threshold", type=float, default=1.1,
+                        help="Fixture bytes-per-session growth that counts as a regression (default: 1.1)")
+    parser.add_argument("--no-normalize", action="store_true",
+                        help="Compare raw seconds instead of calibration-scaled ones")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the app's data hot paths on generated fixtures")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Time every pipeline on the chosen tiers")
+    run.add_argument("--tiers", type=_parse_tiers, default=["S", "M"],
+                     help=f"Comma-separated tiers from {','.join(TIERS)} (default: S,M)")
+    run.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    run.add_argument("--repeat", type=int, default=3, help="Timing repeats (default: 3)")
+    run.add_argument("--workers", type=int, default=1, help="Fixture generator processes (default: 1)")
+    run.add_argument("--cache-dir", default=os.path.join(tempfile.gettempdir(), "shuttlx-bench"),
+                     help="Where generated fixtures are kept")
+    run.add_argument("-o", "--output", help="Write the results JSON here")
+    run.add_argument("--baseline", help="Results JSON to check for regressions against")
+    run.add_argument("--json", action="store_true", help="Print results as JSON")
+    _add_threshold_args(run)
+
+    cmp = sub.add_parser("compare", help="Check a results JSON against a baseline")
+    cmp.add_argument("results")
+    cmp.add_argument("baseline")
+    cmp.add_argument("--json", action="store_true", help="Print the comparison as JSON")
+    _add_threshold_args(cmp)
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        log = (lambda *a, **k: print(*a, file=sys.stderr, **k)) if args.json else print
+        results = run_suite(args.tiers, args.cache_dir, args.seed, args.repeat, args.workers, log)
+        if args.output:
+            fd, tmp = temp_sibling(args.output)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            commit_temp(tmp, args.output)
+        if args.json and not args.baseline:
+            json.dump(results, sys.stdout, indent=2)
+            print()
+        elif not args.json:
+            print_results(results)
+        if not args.baseline:
+            return
+        baseline = _load(args.baseline)
+    else:
+        results, baseline = _load(args.results), _load(args.baseline)
+
+    rows = compare(results, baseline, args.threshold, args.min_delta_ms / 1000,
+                   args.size_threshold, not args.no_normalize)
+    if args.json:
+        json.dump({"results": results, "comparison": rows}, sys.stdout, indent=2)
+        print()
+    else:
+        print_comparison(rows, args.threshold)
+    sys.exit(1 if any(r["regressed"] for r in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -274,167 +274,10 @@ launch_app() {
     fi
 }
 
-# Auto-add missing Swift files to iOS project target
+# Add Swift files that no target compiles and drop dangling project entries
 auto_fix_missing_files() {
-    echo "🔍 Checking for missing Swift files in iOS project target..."
-    
-    PROJECT_FILE="ShuttlX.xcodeproj/project.pbxproj"
-    # Removed backup file creation - direct modifications only
-    
-    # Find all Swift files in the ShuttlX/ directory (excluding test files)
-    local missing_files=()
-    while IFS= read -r file; do
-        filename=$(basename "$file")
-        # Skip backup files and test files
-        if [[ "$filename" == *"backup"* ]] || [[ "$file" == *"Test"* ]]; then
-            continue
-        fi
-        
-        # Check if file is already referenced in project.pbxproj
-        if ! grep -q "$filename" "$PROJECT_FILE"; then
-            missing_files+=("$file")
-        fi
-    done < <(find ShuttlX -name "*.swift" -type f)
-    
-    if [ ${#missing_files[@]} -eq 0 ]; then
-        echo "✅ All Swift files are already included in iOS project target"
-        return 0
-    fi
-    
-    echo "📋 Found ${#missing_files[@]} Swift files missing from iOS project target:"
-    for file in "${missing_files[@]}"; do
-        echo "  - $file"
-    done
-    
-    echo "🔧 Automatically adding missing files to iOS project target..."
-    
-    # No backup created - direct modifications only
-    echo "� Modifying project file directly (no backup)"
-    
-    # Generate unique IDs for new files
-    local base_id_num=5923520  # Start after likely existing IDs
-    local file_ref_ids=()
-    local build_file_ids=()
-    
-    # Generate IDs for each missing file
-    local file_index=0
-    for file in "${missing_files[@]}"; do
-        local file_ref_id="A${base_id_num}"
-        local build_file_id="A$((base_id_num + 1000))"
-        
-        file_ref_ids+=("$file_ref_id")
-        build_file_ids+=("$build_file_id")
-        
-        ((base_id_num++))
-        ((file_index++))
-    done
-    
-    # Create temporary file for modifications
-    local temp_file=$(mktemp)
-    cp "$PROJECT_FILE" "$temp_file"
-    
-    echo "📝 Adding PBXBuildFile entries..."
-    
-    # Build the PBXBuildFile entries
-    local build_file_entries=""
-    local file_index=0
-    for file in "${missing_files[@]}"; do
-        local filename=$(basename "$file")
-        build_file_entries+="\t\t${build_file_ids[$file_index]} /* $filename in Sources */ = {isa = PBXBuildFile; fileRef = ${file_ref_ids[$file_index]} /* $filename */; };\n"
-        ((file_index++))
-    done
-    
-    # Insert build file entries after existing PBXBuildFile entries
-    if grep -q "A5923502.*ContentView.swift in Sources" "$temp_file"; then
-        sed -i '' "/A5923502.*ContentView.swift in Sources.*fileRef.*A5923508.*ContentView.swift/a\\
-$build_file_entries" "$temp_file"
-    else
-        echo "⚠️  Could not find expected PBXBuildFile insertion point"
-        rm "$temp_file"
-        return 1
-    fi
-    
-    echo "📁 Adding PBXFileReference entries..."
-    
-    # Build the PBXFileReference entries
-    local file_ref_entries=""
-    local file_index=0
-    for file in "${missing_files[@]}"; do
-        local filename=$(basename "$file")
-        local relative_path=$(echo "$file" | sed 's|^ShuttlX/||')  # Remove ShuttlX/ prefix
-        file_ref_entries+="\t\t${file_ref_ids[$file_index]} /* $filename */ = {isa = PBXFileReference; lastKnownFileType = sourcecode.swift; path = \"$relative_path\"; sourceTree = \"<group>\"; };\n"
-        ((file_index++))
-    done
-    
-    # Insert file reference entries after existing PBXFileReference entries
-    if grep -q "A5923508.*ContentView.swift.*PBXFileReference" "$temp_file"; then
-        sed -i '' "/A5923508.*ContentView.swift.*PBXFileReference.*sourcecode.swift.*path = ContentView.swift/a\\
-$file_ref_entries" "$temp_file"
-    else
-        echo "⚠️  Could not find expected PBXFileReference insertion point"
-        rm "$temp_file"
-        return 1
-    fi
-    
-    echo "⚡ Adding files to iOS Sources build phase..."
-    
-    # Build the Sources build phase entries
-    local sources_entries=""
-    local file_index=0
-    for file in "${missing_files[@]}"; do
-        local filename=$(basename "$file")
-        sources_entries+="\t\t\t${build_file_ids[$file_index]} /* $filename in Sources */,\n"
-        ((file_index++))
-    done
-    
-    # Insert into iOS Sources build phase (A59234DA)
-    if grep -q "A5923502.*ContentView.swift in Sources.*," "$temp_file"; then
-        sed -i '' "/A5923502.*ContentView.swift in Sources.*,/a\\
-$sources_entries" "$temp_file"
-    else
-        echo "⚠️  Could not find expected Sources build phase insertion point"
-        rm "$temp_file"
-        return 1
-    fi
-    
-    echo "📂 Adding files to group structure..."
-    
-    # Build the group entries
-    local group_entries=""
-    local file_index=0
-    for file in "${missing_files[@]}"; do
-        local filename=$(basename "$file")
-        group_entries+="\t\t\t${file_ref_ids[$file_index]} /* $filename */,\n"
-        ((file_index++))
-    done
-    
-    # Insert into group structure (after ContentView.swift in group)
-    if grep -q "A5923508.*ContentView.swift.*," "$temp_file"; then
-        sed -i '' "/A5923508.*ContentView.swift.*,/a\\
-$group_entries" "$temp_file"
-    else
-        echo "⚠️  Could not find expected group insertion point"
-        rm "$temp_file"
-        return 1
-    fi
-    
-    # Validate the modified project file by checking basic syntax
-    if grep -q "// !\\$\\*UTF8\\*\\$!" "$temp_file" && grep -q "archiveVersion = 1;" "$temp_file"; then
-        # Replace original file with modified version
-        mv "$temp_file" "$PROJECT_FILE"
-        echo "✅ Successfully added ${#missing_files[@]} Swift files to iOS project target!"
-        
-        echo "📋 Files added:"
-        for file in "${missing_files[@]}"; do
-            echo "  ✅ $file"
-        done
-        
-        return 0
-    else
-        echo "❌ Project file validation failed"
-        rm "$temp_file"
-        return 1
-    fi
+    echo "🔍 Checking project integrity (missing Swift files, dangling references)..."
+    python3 "${SCRIPT_DIR}/pbxproj_integrity.py" --fix
 }
 
 # Helper: Boot simulators and pair watch to phone
@@ -470,6 +313,19 @@ boot_and_pair_simulators() {
 
 function run_preflight_checks() {
     echo "🔍 Running preflight checks..."
+
+    # A running preflight daemon (tests/preflight_daemon.py start) already
+    # knows whether the tree is clean; only fall through to the scripts if not
+    if [ -f "$SCRIPT_DIR/preflight_daemon.py" ] && python3 "$SCRIPT_DIR/preflight_daemon.py" status --quiet; then
+        echo "  - ✅ Preflight daemon reports a clean tree, skipping checks"
+        echo "✅ Preflight checks completed"
+        echo ""
+        return 0
+    fi
+
+    # Each script appends its phase timings (instrument.py) for this run
+    export SHUTTLX_TIMINGS="$PROJECT_ROOT/build/.preflight/timings.jsonl"
+    export SHUTTLX_RUN_ID="preflight-$(date +%Y%m%dT%H%M%S)-$$"
     
     # Check for Info.plist resources in Copy Bundle Resources
     if [ -f "$SCRIPT_DIR/remove_infoplist_from_resources.py" ]; then
@@ -486,6 +342,11 @@ function run_preflight_checks() {
     else
         echo "  - ⚠️ Script fix_watchkit_infoplist_keys.py not found, skipping check"
     fi
+
+    if [ -f "$SCRIPT_DIR/instrument.py" ] && [ -f "$SHUTTLX_TIMINGS" ]; then
+        python3 "$SCRIPT_DIR/instrument.py" summary "$SHUTTLX_TIMINGS" --run "$SHUTTLX_RUN_ID"
+    fi
+    unset SHUTTLX_TIMINGS SHUTTLX_RUN_ID
     
     echo "✅ Preflight checks completed"
     echo ""
@@ -526,12 +387,7 @@ if [ "$BUILD" = true ]; then
         
         # Automatically fix missing Swift files before building
         if ! auto_fix_missing_files; then
-            echo "⚠️  Advanced project file manipulation failed, trying Python alternative..."
-            if command -v python3 >/dev/null 2>&1; then
-                python3 "${SCRIPT_DIR}/auto_fix_files.py"
-            else
-                echo "💡 Alternative: Run 'python3 ${SCRIPT_DIR}/auto_fix_files.py' to get detailed manual instructions"
-            fi
+            echo "⚠️  Project file has integrity issues that need manual attention (see above)"
         fi
         
         if build_target "ShuttlX" "iphonesimulator" "platform=iOS Simulator,name=iPhone 17 Pro,OS=26.2" "iOS"; then
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Build matched sessions.json + sessions_archive.json fixture pairs.
+
+DataManager keeps the newest `sessionCap` (500) sessions in sessions.json and
+moves the overflow, oldest first, into sessions_archive.json
+(archiveOldestBeyondCap / appendToArchive). Long histories hit that path on
+every save, and it fully decodes and re-encodes the archive each time. This
+script produces a repeatable local corpus for measuring and regression-testing
+it, one directory per archive size and variant:
+
+    <out>/archive-<size>/clean/            newest `--active` sessions + `size` archived
+    <out>/archive-<size>/corrupt-archive/  same active file, archive truncated mid-object
+    <out>/archive-<size>/duplicate-ids/    ~1% of archived sessions re-archived with a
+                                           later modifiedDate and re-sent into the
+                                           active file (watch re-delivery)
+
+Each variant directory also has a manifest.json with the seed, counts, the
+duplicated IDs and what DataManager should end up with (unique IDs for
+processedSessionIds). Sessions come from inject_test_session.py's seeded
+generator, so the same --seed always rebuilds the same bytes.
+
+Usage:
+    python3 tests/build_archive_corpus.py --out /tmp/corpus
+    python3 tests/build_archive_corpus.py --out /tmp/corpus --sizes 1000,10000,100000 --workers 8
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import time
+
+from inject_test_session import (
+    SEEDED_END_DATE,
+    build_job_session,
+    bulk_jobs,
+    derive_seed,
+    encode_job_session,
+    parse_sizes,
+    run_jobs,
+)
+from session_io import SessionArrayWriter, append_sessions, locate_array_tail
+
+# Mirrors DataManager.sessionCap
+SESSION_CAP = 500
+
+# Archived sessions are mostly read for totals, so keep routes sparse by default
+CORPUS_ROUTE_INTERVAL_S = 120
+
+VARIANTS = ("clean", "corrupt-archive", "duplicate-ids")
+
+
+def write_manifest(directory: str, manifest: dict):
+    """Write a variant's manifest.json."""
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def build_clean(directory: str, jobs: list, archived: int, workers: int):
+    """Stream one generated history into an archive/active pair.
+
+    The first ``archived`` jobs (oldest) go to sessions_archive.json, the rest
+    to sessions.json — the split archiveOldestBeyondCap() would have made.
+    """
+    results = run_jobs(encode_job_session, [(job, False) for job in jobs], workers)
+    archive_path = os.path.join(directory, "sessions_archive.json")
+    active_path = os.path.join(directory, "sessions.json")
+    with SessionArrayWriter(archive_path) as archive, SessionArrayWriter(active_path) as active:
+        for index, (text, _) in enumerate(results):
+            (archive if index < archived else active).write_encoded(text)
+    return archive_path, active_path
+
+
+def build_corrupt(directory: str, clean_dir: str, seed: int) -> dict:
+    """Copy the clean pair, then truncate the archive partway through an object."""
+    shutil.copyfile(os.path.join(clean_dir, "sessions.json"), os.path.join(directory, "sessions.json"))
+    archive_path = os.path.join(directory, "sessions_archive.json")
+    shutil.copyfile(os.path.join(clean_dir, "sessions_archive.json"), archive_path)
+
+    size = os.path.getsize(archive_path)
+    rng = random.Random(derive_seed(seed, "corrupt"))
+    cut = int(size * rng.uniform(0.3, 0.7))
+    with open(archive_path, "r+b") as f:
+        f.truncate(cut)
+    return {"truncatedAtByte": cut, "originalArchiveBytes": size}
+
+
+def build_duplicates(directory: str, clean_dir: str, jobs: list, archived: int, seed: int) -> dict:
+    """Copy the clean pair, then duplicate a sample of archived sessions.
+
+    Each sampled session is appended to the archive again with a later
+    modifiedDate (a double archive) and to the active file (a watch re-send
+    that must be deduplicated against processedSessionIds).
+    """
+    active_path = os.path.join(directory, "sessions.json")
+    archive_path = os.path.join(directory, "sessions_archive.json")
+    shutil.copyfile(os.path.join(clean_dir, "sessions.json"), active_path)
+    shutil.copyfile(os.path.join(clean_dir, "sessions_archive.json"), archive_path)
+
+    rng = random.Random(derive_seed(seed, "duplicates"))
+    picked = sorted(rng.sample(range(archived), max(1, archived // 100)))
+    sessions = [build_job_session(jobs[i]) for i in picked]
+    for session in sessions:
+        session["modifiedDate"] += 60
+    append_sessions(archive_path, sessions)
+    append_sessions(active_path, sessions)
+    return {
+        "duplicateIds": [s["id"] for s in sessions],
+        "duplicateArchiveIndexes": picked,
+    }
+
+
+def build_size(out_dir: str, archived: int, active: int, seed: int, span_days: float,
+               route_interval: float, workers: int):
+    """Build every variant for one archive size; returns the size's root directory."""
+    root = os.path.join(out_dir, f"archive-{archived}")
+    dirs = {variant: os.path.join(root, variant) for variant in VARIANTS}
+    for d in dirs.values():
+        os.makedirs(d, exist_ok=True)
+
+    size_seed = derive_seed(seed, f"archive-{archived}")
+    jobs = bulk_jobs(archived + active, span_days, size_seed, SEEDED_END_DATE, route_interval)
+    build_clean(dirs["clean"], jobs, archived, workers)
+
+    base = {
+        "seed": seed,
+        "sizeSeed": size_seed,
+        "archived": archived,
+        "active": active,
+        "sessionCap": SESSION_CAP,
+        "routeInterval": route_interval,
+        "expectedUniqueIds": archived + active,
+    }
+    write_manifest(dirs["clean"], {**base, "variant": "clean"})
+
+    corrupt = build_corrupt(dirs["corrupt-archive"], dirs["clean"], size_seed)
+    write_manifest(dirs["corrupt-archive"], {**base, "variant": "corrupt-archive", **corrupt})
+
+    dups = build_duplicates(dirs["duplicate-ids"], dirs["clean"], jobs, archived, size_seed)
+    write_manifest(dirs["duplicate-ids"], {**base, "variant": "duplicate-ids", **dups})
+    return root
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build sessions.json + sessions_archive.json fixture pairs"
+    )
+    parser.add_argument("--out", required=True, help="Corpus output directory")
+    parser.add_argument(
+        "--sizes",
+        type=parse_sizes,
+        default=parse_sizes("1k,10k,100k"),
+        help="Archived session counts, comma-separated (default: 1k,10k,100k)",
+    )
+    parser.add_argument(
+        "--active",
+        type=int,
+        default=SESSION_CAP,
+        help=f"Sessions in the active file (default: sessionCap, {SESSION_CAP}); "
+             "more than the cap exercises the eviction path on next save",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed (default: 0)")
+    parser.add_argument(
+        "--span-days",
+        type=float,
+        default=10 * 365,
+        help="Days of history each size is spread over (default: 3650)",
+    )
+    parser.add_argument(
+        "--route-interval",
+        type=float,
+        default=CORPUS_ROUTE_INTERVAL_S,
+        help=f"Seconds between route points, 0 for none (default: {CORPUS_ROUTE_INTERVAL_S})",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1)")
+    args = parser.parse_args()
+
+    if any(size < 1 for size in args.sizes):
+        print("ERROR: archive sizes must be positive")
+        sys.exit(1)
+
+    print(f"Building archive corpus in {args.out} (seed {args.seed})")
+    for size in args.sizes:
+        t0 = time.perf_counter()
+        root = build_size(args.out, size, args.active, args.seed, args.span_days,
+                          args.route_interval, args.workers)
+        archive_mb = os.path.getsize(os.path.join(root, "clean", "sessions_archive.json")) / 1e6
+        # Sanity-check the streamed output ends like an array
+        locate_array_tail(os.path.join(root, "clean", "sessions_archive.json"))
+        print(f"  archive-{size}: {archive_mb:.1f} MB archive, {args.active} active, "
+              f"{time.perf_counter() - t0:.1f} s")
+    print("Done.")
+
+
+if __name__ == "__main__":
+    main()
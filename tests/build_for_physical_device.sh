@@ -22,20 +22,35 @@ echo "========================================"
 # Run preflight checks first
 echo -e "${YELLOW}🔍 Running preflight checks...${NC}"
 
-# Check for conflicting WatchKit keys in Info.plist
-if [ -f "$SCRIPT_DIR/fix_watchkit_infoplist_keys.py" ]; then
-    echo "  - Checking for conflicting WatchKit keys in Info.plist..."
-    python3 "$SCRIPT_DIR/fix_watchkit_infoplist_keys.py"
+# A running preflight daemon (tests/preflight_daemon.py start) already knows
+# whether the tree is clean; only run the scripts if it is absent or not clean
+if [ -f "$SCRIPT_DIR/preflight_daemon.py" ] && python3 "$SCRIPT_DIR/preflight_daemon.py" status --quiet; then
+    echo "  - ✅ Preflight daemon reports a clean tree, skipping checks"
 else
-    echo "  - ⚠️ Script fix_watchkit_infoplist_keys.py not found, skipping check"
-fi
+    # Each script appends its phase timings (instrument.py) for this run
+    export SHUTTLX_TIMINGS="$PROJECT_DIR/build/.preflight/timings.jsonl"
+    export SHUTTLX_RUN_ID="preflight-$(date +%Y%m%dT%H%M%S)-$$"
 
-# Check for Info.plist resources in Copy Bundle Resources
-if [ -f "$SCRIPT_DIR/remove_infoplist_from_resources.py" ]; then
-    echo "  - Checking for Info.plist duplication in resources..."
-    python3 "$SCRIPT_DIR/remove_infoplist_from_resources.py"
-else
-    echo "  - ⚠️ Script remove_infoplist_from_resources.py not found, skipping check"
+    # Check for conflicting WatchKit keys in Info.plist
+    if [ -f "$SCRIPT_DIR/fix_watchkit_infoplist_keys.py" ]; then
+        echo "  - Checking for conflicting WatchKit keys in Info.plist..."
+        python3 "$SCRIPT_DIR/fix_watchkit_infoplist_keys.py"
+    else
+        echo "  - ⚠️ Script fix_watchkit_infoplist_keys.py not found, skipping check"
+    fi
+
+    # Check for Info.plist resources in Copy Bundle Resources
+    if [ -f "$SCRIPT_DIR/remove_infoplist_from_resources.py" ]; then
+        echo "  - Checking for Info.plist duplication in resources..."
+        python3 "$SCRIPT_DIR/remove_infoplist_from_resources.py"
+    else
+        echo "  - ⚠️ Script remove_infoplist_from_resources.py not found, skipping check"
+    fi
+
+    if [ -f "$SCRIPT_DIR/instrument.py" ] && [ -f "$SHUTTLX_TIMINGS" ]; then
+        python3 "$SCRIPT_DIR/instrument.py" summary "$SHUTTLX_TIMINGS" --run "$SHUTTLX_RUN_ID"
+    fi
+    unset SHUTTLX_TIMINGS SHUTTLX_RUN_ID
 fi
 
 echo -e "${GREEN}✅ Preflight checks completed${NC}"
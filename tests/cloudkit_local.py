@@ -0,0 +1,614 @@
+#!/usr/bin/env python3
+"""
+Local CloudKit stand-in for exercising CloudKitSyncManager's batching offline.
+
+LocalRecordStore behaves like the private database's default zone as far as
+CloudKitSyncManager uses it:
+
+- modify() takes at most 400 records per operation (limitExceeded above that)
+  and honours the save policies: `.ifServerRecordUnchanged` fails a record with
+  serverRecordChanged (carrying the server copy and its change tag) when the
+  client's tag is missing or stale, as it is for every freshly built CKRecord.
+- query() pages with cursors, sorted by startDate descending, with the app's
+  `modifiedDate > since` predicate evaluated on the record field.
+- fetch_changes() pages through server change tokens (what a
+  CKFetchRecordZoneChangesOperation would return), for comparison.
+- Each operation is charged a modelled latency (round trip + per record +
+  asset bytes over bandwidth, with jitter) on a simulated clock, and an
+  optional token bucket answers requestRateLimited with a retryAfter.
+
+SyncClient mirrors CloudKitSyncManager.performFullSync: pull (200-record
+pages), merge newest-wins by modifiedDate ?? startDate, push every local
+session the pull did not return in `--batch`-sized modify operations, retry
+serverRecordChanged records once with the server record, then store the
+fetch start as the next pull's `since`. With mode "tokens" it instead pulls
+by change token and pushes only sessions saved since the last push.
+
+Two subcommands report what matters for tuning:
+
+- bench: for each corpus size and batch size, an initial sync against a
+  server another device already populated, then an incremental sync after a
+  few new local sessions and remote edits. Per-batch and per-page latency,
+  conflicts, retry operations and total simulated sync time.
+- debounce: a stream of saves (e.g. a watch backlog draining) drives
+  DataManager.debouncedCloudSync for each debounce interval: syncs run,
+  syncs dropped by the isSyncing guard, records pushed and save→cloud
+  staleness.
+
+Sessions come from inject_test_session's seeded generator (or --corpus files);
+only the fields CloudKitSyncManager puts on the record plus the asset size are
+kept, so 50k sessions fit comfortably in memory.
+
+Usage:
+    python3 tests/cloudkit_local.py bench --sizes 1k,10k,50k --batch 100,200,400 --workers 8
+    python3 tests/cloudkit_local.py bench --sizes 5k --mode tokens --json
+    python3 tests/cloudkit_local.py debounce --sessions 500 --interval 2 --debounce 1,3,10
+"""
+
+import argparse
+import bisect
+import json
+import random
+import sys
+import time
+
+from inject_test_session import (SEEDED_END_DATE, derive_seed, iter_bulk_sessions, parse_sizes,
+                                 to_apple_timestamp)
+from session_io import encode_session, iter_sessions
+
+BATCH_LIMIT = 400        # CKModifyRecordsOperation records per operation
+PULL_PAGE_SIZE = 200     # pullSessions resultsLimit
+CHANGES_PAGE_SIZE = 400
+DEBOUNCE_S = 3.0         # DataManager.debouncedCloudSync
+RECORD_TYPE = "TrainingSession"
+
+
+class CKError(Exception):
+    """A CloudKit error; ``code`` follows CKError.Code names."""
+
+    def __init__(self, code: str, message: str = "", server_record=None, retry_after: float = None):
+        super().__init__(f"{code}: {message}" if message else code)
+        self.code = code
+        self.server_record = server_record
+        self.retry_after = retry_after
+
+
+class Record:
+    """A CKRecord: fields plus the server-assigned change tag."""
+
+    __slots__ = ("name", "fields", "change_tag", "size")
+
+    def __init__(self, name: str, fields: dict, change_tag: str = None, size: int = 0):
+        self.name, self.fields, self.change_tag, self.size = name, fields, change_tag, size
+
+    def copy(self) -> "Record":
+        return Record(self.name, dict(self.fields), self.change_tag, self.size)
+
+
+class LatencyModel:
+    """Seconds per operation: round trip + per-record cost + bytes over bandwidth, with jitter."""
+
+    def __init__(self, rtt: float = 0.15, per_record: float = 0.004, bandwidth: float = 4_000_000.0,
+                 jitter: float = 0.2):
+        self.rtt, self.per_record, self.bandwidth, self.jitter = rtt, per_record, bandwidth, jitter
+
+    def cost(self, records: int, nbytes: int, rng: random.Random) -> float:
+        base = self.rtt + records * self.per_record + nbytes / self.bandwidth
+        return base * max(0.1, rng.gauss(1.0, self.jitter))
+
+
+class LocalRecordStore:
+    """In-memory stand-in for the private database's default zone."""
+
+    def __init__(self, latency: LatencyModel = None, seed: int = 0, rate_limit: float = None,
+                 batch_limit: int = BATCH_LIMIT):
+        self.latency = latency or LatencyModel()
+        self.rng = random.Random(derive_seed(seed, "cloudkit_local"))
+        self.batch_limit = batch_limit
+        self.records = {}
+        self.seq = 0
+        self._order = []       # sorted (-startDate, name) for queries
+        self._log_seqs = []    # change log: server sequence numbers, ascending
+        self._log_names = []
+        self._saved_seq = {}   # name -> sequence of its latest save
+        self.clock = 0.0       # simulated seconds
+        self.rate_limit = rate_limit
+        self._tokens = rate_limit or 0.0
+        self._tokens_at = 0.0
+        self.ops = []          # (kind, records, seconds)
+
+    # MARK: - Accounting
+
+    def _charge(self, kind: str, records: int, nbytes: int) -> float:
+        if self.rate_limit:
+            self._tokens = min(self.rate_limit, self._tokens + (self.clock - self._tokens_at) * self.rate_limit)
+            self._tokens_at = self.clock
+            if self._tokens < 1.0:
+                retry_after = (1.0 - self._tokens) / self.rate_limit
+                self.clock += self.latency.rtt
+                self.ops.append((kind + "RateLimited", 0, self.latency.rtt))
+                raise CKError("requestRateLimited", retry_after=retry_after)
+            self._tokens -= 1.0
+        seconds = self.latency.cost(records, nbytes, self.rng)
+        self.clock += seconds
+        self.ops.append((kind, records, seconds))
+        return seconds
+
+    # MARK: - Writes
+
+    def _store(self, record: Record) -> Record:
+        self.seq += 1
+        old = self.records.get(record.name)
+        saved = record.copy()
+        saved.change_tag = f"{self.seq:x}"
+        if old is None or old.fields.get("startDate") != saved.fields.get("startDate"):
+            if old is not None:
+                key = (-old.fields.get("startDate", 0.0), old.name)
+                del self._order[bisect.bisect_left(self._order, key)]
+            bisect.insort(self._order, (-saved.fields.get("startDate", 0.0), saved.name))
+        self.records[record.name] = saved
+        self._saved_seq[record.name] = self.seq
+        self._log_seqs.append(self.seq)
+        self._log_names.append(record.name)
+        return saved
+
+    def modify(self, records: list, policy: str = "ifServerRecordUnchanged") -> tuple:
+        """Save up to ``batch_limit`` records.
+
+        Returns ``(saved, errors)``: the saved server copies and a dict of
+        record name -> CKError for records that failed individually. Raises
+        CKError for operation-level failures (limitExceeded,
+        requestRateLimited).
+        """
+        if len(records) > self.batch_limit:
+            raise CKError("limitExceeded", f"{len(records)} records > {self.batch_limit} per operation")
+        self._charge("modify", len(records), sum(r.size for r in records))
+        saved, errors = [], {}
+        for record in records:
+            server = self.records.get(record.name)
+            if (policy == "ifServerRecordUnchanged" and server is not None
+                    and record.change_tag != server.change_tag):
+                errors[record.name] = CKError("serverRecordChanged", server_record=server.copy())
+                continue
+            saved.append(self._store(record))
+        return saved, errors
+
+    def touch(self, name: str, **fields) -> Record:
+        """A write from another device: update fields server-side, bumping the tag."""
+        record = self.records[name].copy()
+        record.fields.update(fields)
+        return self._store(record)
+
+    # MARK: - Reads
+
+    def query(self, modified_after: float = None, limit: int = PULL_PAGE_SIZE, cursor=None) -> tuple:
+        """One page of TrainingSession records, newest startDate first.
+
+        ``modified_after`` is the app's `modifiedDate > since` predicate.
+        Returns ``(records, cursor)``; the cursor is None on the last page.
+        """
+        if cursor is not None:
+            modified_after, position = cursor
+        else:
+            position = None
+        start = 0 if position is None else bisect.bisect_right(self._order, position)
+        page = []
+        order = self._order
+        records = self.records
+        i = start
+        while i < len(order) and len(page) < limit:
+            record = records[order[i][1]]
+            if modified_after is None or record.fields.get("modifiedDate", 0.0) > modified_after:
+                page.append(record.copy())
+            i += 1
+        self._charge("query", len(page), sum(r.size for r in page))
+        more = i < len(order)
+        return page, ((modified_after, order[i - 1]) if more else None)
+
+    def fetch_changes(self, token: int = None, limit: int = CHANGES_PAGE_SIZE) -> tuple:
+        """Records changed since ``token``, oldest change first.
+
+        Returns ``(records, new_token, more_coming)``; only each record's latest
+        change is returned.
+        """
+        since = token or 0
+        i = bisect.bisect_right(self._log_seqs, since)
+        page = []
+        last = since
+        while i < len(self._log_seqs) and len(page) < limit:
+            seq, name = self._log_seqs[i], self._log_names[i]
+            if self._saved_seq.get(name) == seq:
+                page.append(self.records[name].copy())
+            last = seq
+            i += 1
+        self._charge("fetchChanges", len(page), sum(r.size for r in page))
+        return page, last, i < len(self._log_seqs)
+
+
+# MARK: - Client
+
+class SessionSummary:
+    """What CloudKitSyncManager puts on a record, plus the jsonData asset size."""
+
+    __slots__ = ("id", "start", "duration", "modified", "size")
+
+    def __init__(self, sid: str, start: float, duration: float, modified: float, size: int):
+        self.id, self.start, self.duration, self.modified, self.size = sid, start, duration, modified, size
+
+    @classmethod
+    def from_session(cls, session: dict) -> "SessionSummary":
+        return cls(session["id"], session["startDate"], session.get("duration", 0.0),
+                   session.get("modifiedDate"), len(encode_session(session)))
+
+    @property
+    def effective_date(self) -> float:
+        return self.start if self.modified is None else self.modified
+
+    def record(self, change_tag: str = None) -> Record:
+        fields = {"uuid": self.id, "startDate": self.start, "duration": self.duration,
+                  "modifiedDate": self.effective_date}
+        return Record(self.id, fields, change_tag, self.size)
+
+    @classmethod
+    def from_record(cls, record: Record) -> "SessionSummary":
+        f = record.fields
+        return cls(f["uuid"], f["startDate"], f["duration"], f["modifiedDate"], record.size)
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"p50": pick(0.5), "p90": pick(0.9), "max": ordered[-1], "mean": sum(ordered) / len(ordered)}
+
+
+class SyncClient:
+    """CloudKitSyncManager's pull/merge/push cycle against a LocalRecordStore.
+
+    ``local`` maps session ID -> SessionSummary (DataManager.sessions).
+    """
+
+    def __init__(self, store: LocalRecordStore, local: dict = None, batch_size: int = BATCH_LIMIT,
+                 page_size: int = PULL_PAGE_SIZE, mode: str = "app", epoch: float = None):
+        self.store = store
+        self.local = local if local is not None else {}
+        self.batch_size = batch_size
+        self.page_size = page_size
+        self.mode = mode
+        self.epoch = to_apple_timestamp(SEEDED_END_DATE) if epoch is None else epoch
+        self.pull_since = None     # pullSinceDate
+        self.change_token = None
+        self.dirty = set(self.local)  # tokens mode: saved since the last successful push
+        self.is_syncing = False
+
+    def now(self) -> float:
+        """The device clock as an Apple timestamp."""
+        return self.epoch + self.store.clock
+
+    def save(self, session: SessionSummary):
+        self.local[session.id] = session
+        self.dirty.add(session.id)
+
+    def pull(self, report: dict) -> list:
+        store = self.store
+        remote = []
+        if self.mode == "tokens":
+            more = True
+            while more:
+                before = store.clock
+                records, self.change_token, more = store.fetch_changes(self.change_token)
+                report["pages"].append(store.clock - before)
+                remote.extend(records)
+            return remote
+        fetch_started_at = self.now()
+        before = store.clock
+        records, cursor = store.query(self.pull_since, self.page_size)
+        report["pages"].append(store.clock - before)
+        remote.extend(records)
+        while cursor is not None:
+            before = store.clock
+            records, cursor = store.query(limit=self.page_size, cursor=cursor)
+            report["pages"].append(store.clock - before)
+            remote.extend(records)
+        self.pull_since = fetch_started_at
+        return remote
+
+    def push(self, sessions: list, report: dict):
+        """pushSessions: fixed-size batches, one conflict retry per batch."""
+        store = self.store
+        for i in range(0, len(sessions), self.batch_size):
+            chunk = sessions[i:i + self.batch_size]
+            by_name = {s.id: s for s in chunk}
+            before = store.clock
+            saved, errors = store.modify([s.record() for s in chunk])
+            batch = {"records": len(chunk), "seconds": store.clock - before, "conflicts": 0, "retrySeconds": 0.0}
+            retry = []
+            for name, error in errors.items():
+                if error.code == "serverRecordChanged":
+                    server = error.server_record
+                    server.fields.update(by_name[name].record().fields)
+                    retry.append(server)
+                else:
+                    report["failed"] += 1
+            batch["conflicts"] = len(retry)
+            if retry:
+                report["retryOps"] += 1
+                before = store.clock
+                retried, retry_errors = store.modify(retry)
+                batch["retrySeconds"] = store.clock - before
+                saved += retried
+                report["failed"] += len(retry_errors)
+            report["batches"].append(batch)
+            report["pushed"] += len(saved)
+
+    def perform_full_sync(self) -> dict:
+        """One performFullSync; returns its report (simulated seconds, not wall time)."""
+        store = self.store
+        report = {"mode": self.mode, "pages": [], "batches": [], "pulled": 0, "newFromRemote": 0,
+                  "pushed": 0, "retryOps": 0, "failed": 0, "error": None}
+        started = store.clock
+        self.is_syncing = True
+        try:
+            remote = [SessionSummary.from_record(r) for r in self.pull(report)]
+            report["pulled"] = len(remote)
+            remote_ids = set()
+            for session in remote:
+                remote_ids.add(session.id)
+                existing = self.local.get(session.id)
+                if existing is None:
+                    report["newFromRemote"] += 1
+                    self.local[session.id] = session
+                elif session.effective_date > existing.effective_date:
+                    self.local[session.id] = session
+            if self.mode == "tokens":
+                to_push = [self.local[s] for s in self.dirty if s not in remote_ids]
+            else:
+                to_push = [s for s in self.local.values() if s.id not in remote_ids]
+            self.push(to_push, report)
+            self.dirty.clear()
+        except CKError as e:
+            report["error"] = e.code
+        finally:
+            self.is_syncing = False
+        report["seconds"] = store.clock - started
+        report["conflicts"] = sum(b["conflicts"] for b in report["batches"])
+        return report
+
+
+def summarize_sync(report: dict) -> dict:
+    batches = report.pop("batches")
+    pages = report.pop("pages")
+    report["batchCount"] = len(batches)
+    report["batchSeconds"] = percentiles([b["seconds"] + b["retrySeconds"] for b in batches])
+    report["pageCount"] = len(pages)
+    report["pageSeconds"] = percentiles(pages)
+    return report
+
+
+# MARK: - Corpus
+
+def load_corpus(count: int, seed: int, route_interval: float, workers: int = 1, paths=None) -> list:
+    """SessionSummary list from --corpus files, or ``count`` generated sessions."""
+    if paths:
+        return [SessionSummary.from_session(s) for path in paths for s in iter_sessions(path)][:count or None]
+    span_days = max(365.0, count / 1.5)
+    return [SessionSummary.from_session(s)
+            for s in iter_bulk_sessions(count, span_days, seed, SEEDED_END_DATE, route_interval, workers)]
+
+
+def seed_remote(store: LocalRecordStore, sessions: list, share: float, rng: random.Random) -> int:
+    """Another device already pushed ``share`` of the sessions; returns how many."""
+    picked = [s for s in sessions if rng.random() < share]
+    other = SyncClient(store, {s.id: s for s in picked})
+    other.push(picked, {"batches": [], "pushed": 0, "retryOps": 0, "failed": 0})
+    return len(picked)
+
+
+# MARK: - Scenarios
+
+def bench(corpus: list, batch_sizes: list, mode: str = "app", seed: int = 0, remote_share: float = 0.1,
+          new_sessions: float = 0.01, remote_edits: float = 0.01, latency: LatencyModel = None,
+          rate_limit: float = None) -> list:
+    """Initial + incremental sync per batch size; one row per batch size."""
+    rows = []
+    for batch_size in batch_sizes:
+        rng = random.Random(derive_seed(seed, f"bench:{len(corpus)}:{batch_size}"))
+        store = LocalRecordStore(latency, seed, rate_limit)
+        n_new = int(len(corpus) * new_sessions)
+        existing, fresh = corpus[:len(corpus) - n_new], corpus[len(corpus) - n_new:]
+        remote = seed_remote(store, existing, remote_share, rng)
+        store.ops.clear()
+        store.clock = store._tokens_at = 0.0
+        store._tokens = rate_limit or 0.0
+        client = SyncClient(store, {s.id: s for s in existing}, batch_size, mode=mode)
+
+        wall = time.perf_counter()
+        initial = summarize_sync(client.perform_full_sync())
+        initial["wallSeconds"] = time.perf_counter() - wall
+
+        store.clock += 3600.0
+        names = list(store.records)
+        for name in rng.sample(names, min(len(names), int(len(names) * remote_edits))):
+            store.touch(name, modifiedDate=client.now())
+        for session in fresh:
+            client.save(session)
+        wall = time.perf_counter()
+        incremental = summarize_sync(client.perform_full_sync())
+        incremental["wallSeconds"] = time.perf_counter() - wall
+
+        rows.append({"sessions": len(corpus), "batchSize": batch_size, "mode": mode,
+                     "remoteSeeded": remote, "initial": initial, "incremental": incremental})
+    return rows
+
+
+def debounce_sweep(corpus: list, debounces: list, interval: float, mode: str = "app", seed: int = 0,
+                   latency: LatencyModel = None, batch_size: int = BATCH_LIMIT, preloaded: int = 0) -> list:
+    """Drive debouncedCloudSync with a save stream for each debounce interval.
+
+    The first ``preloaded`` sessions are already local and in the cloud;
+    the rest arrive one save at a time with exponential gaps averaging
+    ``interval`` seconds. A debounce that fires while a sync is running is
+    dropped, as performFullSync's isSyncing guard does.
+    """
+    rows = []
+    base, arriving = corpus[:preloaded], corpus[preloaded:]
+    for debounce in debounces:
+        rng = random.Random(derive_seed(seed, f"debounce:{debounce}"))
+        store = LocalRecordStore(latency, seed)
+        client = SyncClient(store, {s.id: s for s in base}, batch_size, mode=mode)
+        if base:
+            client.perform_full_sync()
+        arrivals = []
+        t = 0.0
+        for _ in arriving:
+            t += rng.expovariate(1.0 / interval) if interval > 0 else 0.0
+            arrivals.append(t)
+
+        saved_at = {}
+        in_cloud = {}
+        runs = skipped = pushed = 0
+        sync_seconds = 0.0
+        busy_until = 0.0
+        deadline = None
+        i = 0
+
+        def fire(at):
+            nonlocal runs, skipped, pushed, sync_seconds, busy_until
+            if at < busy_until:
+                skipped += 1
+                return
+            store.clock = at
+            report = client.perform_full_sync()
+            runs += 1
+            pushed += sum(b["records"] for b in report["batches"])
+            sync_seconds += report["seconds"]
+            busy_until = store.clock
+            for sid, when in saved_at.items():
+                if sid not in in_cloud and when <= at:
+                    in_cloud[sid] = busy_until
+
+        while i < len(arriving) or deadline is not None:
+            next_save = arrivals[i] if i < len(arriving) else None
+            if deadline is not None and (next_save is None or deadline <= next_save):
+                fire(deadline)
+                deadline = None
+                continue
+            store.clock = max(store.clock, next_save)
+            client.save(arriving[i])
+            saved_at[arriving[i].id] = next_save
+            deadline = next_save + debounce
+            i += 1
+
+        staleness = [in_cloud[s] - saved_at[s] for s in in_cloud]
+        rows.append({
+            "debounce": debounce, "saves": len(arriving), "syncs": runs, "skippedWhileSyncing": skipped,
+            "recordsPushed": pushed, "syncSeconds": sync_seconds,
+            "neverSynced": len(saved_at) - len(in_cloud),
+            "staleness": percentiles(staleness),
+        })
+    return rows
+
+
+# MARK: - Output
+
+def _fmt(p: dict, unit: str = "s") -> str:
+    return " / ".join(f"{p[k]:.2f}{unit}" for k in ("p50", "p90", "max")) if p else "n/a"
+
+
+def print_bench(rows: list):
+    print("\n" + "=" * 78)
+    print("  CLOUDKIT SYNC — simulated seconds (batch latency p50 / p90 / max)")
+    print("=" * 78)
+    for row in rows:
+        print(f"  {row['sessions']} sessions, batch {row['batchSize']}, {row['mode']} mode "
+              f"({row['remoteSeeded']} already on server)")
+        for phase in ("initial", "incremental"):
+            r = row[phase]
+            print(f"    {phase:<12} {r['seconds']:8.1f}s  pulled {r['pulled']:>6} in {r['pageCount']:>4} pages, "
+                  f"pushed {r['pushed']:>6} in {r['batchCount']:>4} batches, "
+                  f"{r['conflicts']} conflicts / {r['retryOps']} retries / {r['failed']} failed"
+                  + (f", ERROR {r['error']}" if r["error"] else ""))
+            print(f"    {'':<12} batch {_fmt(r['batchSeconds'])}, page {_fmt(r['pageSeconds'])}, "
+                  f"wall {r['wallSeconds'] * 1000:.0f} ms")
+    print("=" * 78)
+
+
+def print_debounce(rows: list):
+    print("\n" + "=" * 78)
+    print("  DEBOUNCED CLOUD SYNC — save→cloud staleness p50 / p90 / max")
+    print("=" * 78)
+    for r in rows:
+        print(f"  debounce {r['debounce']:>5.1f}s: {r['syncs']:>4} syncs, {r['skippedWhileSyncing']:>4} dropped "
+              f"while syncing, {r['recordsPushed']:>7} records pushed, {r['syncSeconds']:.0f}s syncing, "
+              f"{r['neverSynced']} never synced, staleness {_fmt(r['staleness'])}")
+    print("=" * 78)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local CloudKit stand-in for CloudKitSyncManager")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def common(p):
+        p.add_argument("--mode", choices=("app", "tokens"), default="app",
+                       help="app = CloudKitSyncManager as shipped; tokens = change tokens + dirty push")
+        p.add_argument("--corpus", nargs="*", help="sessions.json files to use instead of generated sessions")
+        p.add_argument("--seed", type=int, default=0, help="Seed (default: 0)")
+        p.add_argument("--route-interval", type=float, default=300, help="Generated route spacing (default: 300)")
+        p.add_argument("--workers", type=int, default=1, help="Generator processes (default: 1)")
+        p.add_argument("--rtt", type=float, default=0.15, help="Seconds per operation round trip (default: 0.15)")
+        p.add_argument("--per-record", type=float, default=0.004, help="Seconds per record (default: 0.004)")
+        p.add_argument("--bandwidth", type=float, default=4e6, help="Asset bytes per second (default: 4e6)")
+        p.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    b = sub.add_parser("bench", help="Initial + incremental sync per corpus size and batch size")
+    common(b)
+    b.add_argument("--sizes", type=parse_sizes, default=parse_sizes("1k,10k,50k"), help="Session counts (default: 1k,10k,50k)")
+    b.add_argument("--batch", type=lambda v: [int(x) for x in v.split(",")], default=[BATCH_LIMIT],
+                   help=f"Batch sizes, at most {BATCH_LIMIT} (default: {BATCH_LIMIT})")
+    b.add_argument("--remote-share", type=float, default=0.1, help="Fraction another device already pushed (default: 0.1)")
+    b.add_argument("--rate-limit", type=float, help="Operations per second before requestRateLimited")
+
+    d = sub.add_parser("debounce", help="Sweep the debouncedCloudSync interval over a save stream")
+    common(d)
+    d.add_argument("--sessions", type=int, default=500, help="Saves in the stream (default: 500)")
+    d.add_argument("--preloaded", type=int, default=0, help="Sessions already local and synced (default: 0)")
+    d.add_argument("--interval", type=float, default=2.0, help="Mean seconds between saves (default: 2)")
+    d.add_argument("--debounce", type=lambda v: [float(x) for x in v.split(",")], default=[1.0, DEBOUNCE_S, 10.0],
+                   help=f"Debounce intervals to try (default: 1,{DEBOUNCE_S:g},10)")
+    d.add_argument("--batch", type=int, default=BATCH_LIMIT, help=f"Batch size (default: {BATCH_LIMIT})")
+
+    args = parser.parse_args()
+    latency = LatencyModel(args.rtt, args.per_record, args.bandwidth)
+
+    if args.command == "bench":
+        if any(not 0 < size <= BATCH_LIMIT for size in args.batch):
+            print(f"❌ batch sizes must be between 1 and {BATCH_LIMIT}")
+            sys.exit(2)
+        rows = []
+        for size in args.sizes:
+            t0 = time.perf_counter()
+            corpus = load_corpus(size, args.seed, args.route_interval, args.workers, args.corpus)
+            generate_s = time.perf_counter() - t0
+            for row in bench(corpus, args.batch, args.mode, args.seed, args.remote_share, latency=latency,
+                             rate_limit=args.rate_limit):
+                row["generateSeconds"] = generate_s
+                rows.append(row)
+        if args.json:
+            json.dump(rows, sys.stdout, indent=2)
+            print()
+        else:
+            print_bench(rows)
+    else:
+        corpus = load_corpus(args.sessions + args.preloaded, args.seed, args.route_interval, args.workers, args.corpus)
+        rows = debounce_sweep(corpus, args.debounce, args.interval, args.mode, args.seed, latency, args.batch,
+                              args.preloaded)
+        if args.json:
+            json.dump(rows, sys.stdout, indent=2)
+            print()
+        else:
+            print_debounce(rows)
+
+
+if __name__ == "__main__":
+    main()
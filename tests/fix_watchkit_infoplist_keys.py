@@ -7,116 +7,236 @@ the "WatchKit app has both WKApplication and WKWatchKitApp Info.plist keys" erro
 
 Usage:
     python3 fix_watchkit_infoplist_keys.py
+    python3 fix_watchkit_infoplist_keys.py "ShuttlX Watch App/Info.plist"
+    python3 fix_watchkit_infoplist_keys.py --no-cache --workers 8
+    python3 fix_watchkit_infoplist_keys.py --timings - --profile /tmp/fix.folded
 
 The script will automatically:
 1. Find all Info.plist files in watchOS app directories
 2. Check for conflicting WKApplication and WKWatchKitApp keys
 3. Remove the WKWatchKitApp key if both are present (keeping the modern WKApplication key)
-4. Make a backup of any modified files
+4. Rewrite the file in place, atomically and keeping its formatting
+
+The tree walk skips VCS, build output and asset directories (PRUNE_DIRS,
+PRUNE_SUFFIXES) and plists are checked on a thread pool. A scan cache in
+build/.preflight/ remembers each directory's listing (reused while the
+directory's mtime is unchanged) and each checked plist's mtime, size and
+content hash, so a warm run only stats the tree and re-checks plists that
+actually changed.
+
+Each run is split into phases (cache load, tree walk, plist checks, cache
+save) timed by instrument.py; --timings and --profile report where the time
+went.
 
 Author: GitHub Copilot
 Date: July 9, 2025
 """
 
+import argparse
+import hashlib
+import json
 import os
-import sys
-import re
-import shutil
-import subprocess
-import datetime
-import plistlib
-
-def find_infoplist_files(base_dir):
-    """Find all Info.plist files in the project"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from instrument import Instrumentation, add_arguments
+from plist_rules import KeyConflictRule, process_file
+
+# Directory names never searched for Info.plist files
+PRUNE_DIRS = {
+    ".git", ".svn", ".hg", "build", "DerivedData", ".build", "Pods", "Carthage",
+    "node_modules", "xcuserdata", ".swiftpm", "__pycache__", ".venv", "venv",
+    "assets", "marketing", "design", "docs", "fastlane",
+}
+
+# Bundle-like directories that are build products or asset catalogs
+PRUNE_SUFFIXES = (".xcassets", ".xcodeproj", ".xcworkspace", ".app", ".appex",
+                  ".framework", ".dSYM", ".xcresult", ".xcarchive")
+
+# Applied to every plist in a Watch app directory, whatever its target type
+WATCHKIT_RULES = (KeyConflictRule("WKApplication", "WKWatchKitApp"),)
+
+CACHE_VERSION = 1
+DEFAULT_CACHE = os.path.join("build", ".preflight", "infoplist_scan_cache.json")
+
+# Files modified this close to the last scan may have changed again within the
+# same mtime tick, so they are re-hashed rather than trusted
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def is_pruned(name):
+    """True if a directory should not be searched"""
+    return name in PRUNE_DIRS or name.endswith(PRUNE_SUFFIXES)
+
+
+def load_cache(cache_path):
+    """Load the scan cache, or an empty one if missing, stale or unreadable"""
+    empty = {"version": CACHE_VERSION, "dirs": {}, "files": {}}
+    if not cache_path or not os.path.exists(cache_path):
+        return empty
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return empty
+    return cache if cache.get("version") == CACHE_VERSION else empty
+
+
+def save_cache(cache_path, cache):
+    """Write the scan cache atomically"""
+    if not cache_path:
+        return
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f, separators=(",", ":"))
+    os.replace(tmp_path, cache_path)
+
+
+def find_infoplist_files(base_dir, cache=None):
+    """Find all Info.plist files in the project
+
+    Pruned directories are never entered. With a cache, a directory whose
+    mtime is unchanged since the last run reuses its recorded listing
+    instead of being read again.
+    """
     info_plist_files = []
     watch_dirs = []
-    
-    for root, dirs, files in os.walk(base_dir):
-        for file in files:
-            if file == 'Info.plist':
-                # Check if this is in a Watch directory
-                if 'Watch' in root:
-                    watch_dirs.append(root)
-                info_plist_files.append(os.path.join(root, file))
-    
+    dir_cache = cache["dirs"] if cache is not None else {}
+    seen = {}
+
+    stack = [base_dir]
+    while stack:
+        root = stack.pop()
+        rel = os.path.relpath(root, base_dir)
+        try:
+            mtime = os.stat(root).st_mtime_ns
+        except OSError:
+            continue
+        cached = dir_cache.get(rel)
+        if cached is not None and cached["mtime"] == mtime:
+            subdirs, has_plist = cached["dirs"], cached["plist"]
+        else:
+            subdirs, has_plist = [], False
+            try:
+                with os.scandir(root) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not is_pruned(entry.name):
+                                subdirs.append(entry.name)
+                        elif entry.name == 'Info.plist':
+                            has_plist = True
+            except OSError:
+                continue
+            subdirs.sort()
+        seen[rel] = {"mtime": mtime, "dirs": subdirs, "plist": has_plist}
+
+        if has_plist:
+            # Check if this is in a Watch directory
+            if 'Watch' in root:
+                watch_dirs.append(root)
+            info_plist_files.append(os.path.join(root, 'Info.plist'))
+        stack.extend(os.path.join(root, d) for d in reversed(subdirs))
+
+    if cache is not None:
+        cache["dirs"] = seen
+    info_plist_files.sort()
+    watch_dirs.sort()
     return info_plist_files, watch_dirs
 
-def is_binary_plist(file_path):
-    """Check if the plist file is in binary format"""
-    with open(file_path, 'rb') as f:
-        header = f.read(8)
-        return header[:6] == b'bplist'
 
-def check_and_fix_watchkit_keys(plist_file):
-    """Check for and fix conflicting WatchKit keys in an Info.plist file"""
-    try:
-        # Check if the file is a binary plist
-        if is_binary_plist(plist_file):
-            # Use plistlib for binary plists
-            with open(plist_file, 'rb') as f:
-                try:
-                    plist_data = plistlib.load(f)
-                    
-                    # Check if both keys exist
-                    has_wkapplication = 'WKApplication' in plist_data
-                    has_wkwatchkitapp = 'WKWatchKitApp' in plist_data
-                    
-                    if has_wkapplication and has_wkwatchkitapp:
-                        print(f"⚠️ Found both WKApplication and WKWatchKitApp keys in {plist_file}")
-                        
-                        # Create a backup
-                        backup_file = f"{plist_file}.watchkit_keys_backup"
-                        shutil.copy2(plist_file, backup_file)
-                        print(f"📄 Created backup at {backup_file}")
-                        
-                        # Remove the WKWatchKitApp key
-                        del plist_data['WKWatchKitApp']
-                        
-                        # Write back the modified plist
-                        with open(plist_file, 'wb') as out_f:
-                            plistlib.dump(plist_data, out_f)
-                        
-                        print(f"✅ Removed WKWatchKitApp key from {plist_file}")
-                        return True
-                except Exception as e:
-                    print(f"⚠️ Error processing binary plist {plist_file}: {e}")
-                    return False
-        else:
-            # Handle XML plists using regex
-            with open(plist_file, 'r', encoding='utf-8', errors='ignore') as f:
-                try:
-                    content = f.read()
-                    
-                    # Check if both keys exist
-                    has_wkapplication = '<key>WKApplication</key>' in content
-                    has_wkwatchkitapp = '<key>WKWatchKitApp</key>' in content
-                    
-                    if has_wkapplication and has_wkwatchkitapp:
-                        print(f"⚠️ Found both WKApplication and WKWatchKitApp keys in {plist_file}")
-                        
-                        # Create a backup
-                        backup_file = f"{plist_file}.watchkit_keys_backup"
-                        shutil.copy2(plist_file, backup_file)
-                        print(f"📄 Created backup at {backup_file}")
-                        
-                        # Remove the WKWatchKitApp key and value (typically <true/>)
-                        pattern = r'\s*<key>WKWatchKitApp</key>\s*\n\s*<true/>'
-                        new_content = re.sub(pattern, '', content)
-                        
-                        with open(plist_file, 'w', encoding='utf-8') as out_f:
-                            out_f.write(new_content)
-                        
-                        print(f"✅ Removed WKWatchKitApp key from {plist_file}")
-                        return True
-                except Exception as e:
-                    print(f"⚠️ Error processing XML plist {plist_file}: {e}")
-                    return False
-    except Exception as e:
-        print(f"⚠️ Error processing file {plist_file}: {e}")
+def file_digest(path):
+    """Content hash used to tell a touched file from a changed one"""
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def is_unchanged(plist_file, cache, scan_start_ns):
+    """True if the cache proves the file is the one last checked clean"""
+    entry = cache["files"].get(plist_file)
+    if entry is None:
         return False
-    
+    st = os.stat(plist_file)
+    if (st.st_mtime_ns == entry["mtime"] and st.st_size == entry["size"]
+            and entry["mtime"] < entry["checked"] - RACY_WINDOW_NS):
+        return True
+    # Touched or racy: fall back to the content hash
+    if st.st_size == entry["size"] and file_digest(plist_file) == entry["hash"]:
+        entry.update(mtime=st.st_mtime_ns, checked=scan_start_ns)
+        return True
+    return False
+
+
+def remember(plist_file, cache, scan_start_ns):
+    """Record a file's state after it was checked (and possibly fixed)"""
+    st = os.stat(plist_file)
+    cache["files"][plist_file] = {
+        "mtime": st.st_mtime_ns,
+        "size": st.st_size,
+        "hash": file_digest(plist_file),
+        "checked": scan_start_ns,
+    }
+
+
+def check_files(plist_files, workers, cache=None):
+    """Check plists on a thread pool; returns (fixed count, skipped count)
+
+    Each file's messages are buffered and printed in file order once every
+    check has finished, so output does not interleave.
+    """
+    scan_start_ns = time.time_ns()
+    todo = [p for p in plist_files if cache is None or not is_unchanged(p, cache, scan_start_ns)]
+
+    def run(plist_file):
+        lines = []
+        try:
+            fixed = check_and_fix_watchkit_keys(plist_file, log=lines.append)
+        except Exception as e:
+            lines.append(f"❌ Error processing {plist_file}: {str(e)}")
+            fixed = None
+        return plist_file, fixed, lines
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(run, todo))
+
+    fixed_files = 0
+    for plist_file, fixed, lines in results:
+        for line in lines:
+            print(line)
+        if fixed:
+            fixed_files += 1
+        if cache is not None and fixed is not None:
+            remember(plist_file, cache, scan_start_ns)
+    if cache is not None:
+        # Forget files that disappeared
+        present = set(plist_files)
+        cache["files"] = {p: e for p, e in cache["files"].items() if p in present}
+    return fixed_files, len(plist_files) - len(todo)
+
+
+def check_and_fix_watchkit_keys(plist_file, log=print):
+    """Check for and fix conflicting WatchKit keys in an Info.plist file
+
+    Runs the WatchKit key-conflict rule from plist_rules.py: binary and XML
+    plists are parsed properly, WKWatchKitApp is removed whatever its value,
+    the rest of the file keeps its formatting and the write is atomic.
+
+    Returns True if the file was fixed, False if it was already clean and
+    None if it could not be processed (so it is never cached as clean).
+    """
+    report = process_file(plist_file, WATCHKIT_RULES)
+    if "error" in report:
+        log(f"⚠️ Error processing file {plist_file}: {report['error']}")
+        return None
+
+    if any(f["fixed"] for f in report["findings"]):
+        log(f"⚠️ Found both WKApplication and WKWatchKitApp keys in {plist_file}")
+        log(f"✅ Removed WKWatchKitApp key from {plist_file}")
+        return True
+
     return False
 
+
 def check_specific_file(file_path):
     """Check and fix a specific Info.plist file"""
     if not os.path.exists(file_path):
@@ -126,60 +246,94 @@ def check_specific_file(file_path):
     print(f"🔍 Checking specific file: {file_path}")
     return check_and_fix_watchkit_keys(file_path)
 
+
 def main():
     """Main function to check and fix WatchKit Info.plist keys"""
     # Get the project root directory
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_dir = os.path.dirname(script_dir)  # Assumes script is in /tests directory
-    
+
+    parser = argparse.ArgumentParser(description="Check and fix WatchKit Info.plist keys")
+    parser.add_argument("file", nargs="?", help="Check only this Info.plist")
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1),
+                        help="Threads used to check plists")
+    parser.add_argument("--cache", default=os.path.join(project_dir, DEFAULT_CACHE),
+                        help="Scan cache location")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the scan cache")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with Instrumentation.from_args("fix_watchkit_infoplist_keys", args) as inst:
+        return run(args, project_dir, inst)
+
+
+def run(args, project_dir, inst):
+    """Check the given file, or every Watch app Info.plist under project_dir"""
     # Check if a specific file was provided as an argument
-    if len(sys.argv) > 1:
-        file_path = sys.argv[1]
+    if args.file:
+        file_path = args.file
         # If a relative path is provided, make it absolute
         if not os.path.isabs(file_path):
             file_path = os.path.abspath(os.path.join(project_dir, file_path))
-        return check_specific_file(file_path)
-    
+        with inst.phase("check"):
+            return check_specific_file(file_path)
+
     print(f"🔍 Searching for Info.plist files in {project_dir}...")
-    
+
     try:
-        info_plist_files, watch_dirs = find_infoplist_files(project_dir)
-        
+        cache_path = None if args.no_cache else args.cache
+        with inst.phase("cache.load"):
+            cache = None if args.no_cache else load_cache(cache_path)
+        with inst.phase("walk"):
+            info_plist_files, watch_dirs = find_infoplist_files(project_dir, cache)
+        inst.count("infoPlists", len(info_plist_files))
+        if cache is not None:
+            inst.count("dirs", len(cache["dirs"]))
+
         if not watch_dirs:
             print("❓ No Watch app directories found.")
+            with inst.phase("cache.save"):
+                save_cache(cache_path, cache)
             return
-        
+
         print(f"📱 Found {len(watch_dirs)} Watch app directories:")
         for watch_dir in watch_dirs:
             print(f"  - {os.path.relpath(watch_dir, project_dir)}")
-        
+
         # Focus on ShuttlXWatch Watch App Watch App/Info.plist first
         main_watch_app_plist = os.path.join(project_dir, "ShuttlXWatch Watch App Watch App", "Info.plist")
         if os.path.exists(main_watch_app_plist):
             print(f"🎯 Checking main watchOS app Info.plist first: {main_watch_app_plist}")
-            check_and_fix_watchkit_keys(main_watch_app_plist)
-        
-        fixed_files = 0
-        
-        for plist_file in info_plist_files:
-            if any(watch_dir in plist_file for watch_dir in watch_dirs):
-                if plist_file != main_watch_app_plist:  # Skip if already processed
-                    try:
-                        if check_and_fix_watchkit_keys(plist_file):
-                            fixed_files += 1
-                    except Exception as e:
-                        print(f"❌ Error processing {plist_file}: {str(e)}")
-        
+            with inst.phase("check.main"):
+                check_and_fix_watchkit_keys(main_watch_app_plist)
+
+        watch_plists = [
+            plist_file for plist_file in info_plist_files
+            if any(watch_dir in plist_file for watch_dir in watch_dirs)
+            and plist_file != main_watch_app_plist  # Skip if already processed
+        ]
+        with inst.phase("check"):
+            fixed_files, skipped = check_files(watch_plists, args.workers, cache)
+        with inst.phase("cache.save"):
+            save_cache(cache_path, cache)
+        inst.count("watchPlists", len(watch_plists))
+        inst.count("skipped", skipped)
+        inst.count("fixed", fixed_files)
+        if skipped:
+            print(f"⏭️  Skipped {skipped} unchanged Info.plist files (scan cache)")
+
         if fixed_files > 0:
             print(f"✅ Fixed {fixed_files} Info.plist files with conflicting WatchKit keys")
         else:
             print("✅ No additional conflicting WatchKit keys found in Info.plist files")
-        
+
         print("✅ Operation completed successfully")
         return True
     except Exception as e:
+        inst.exit_code = 1
         print(f"❌ Error during execution: {str(e)}")
         return False
 
+
 if __name__ == "__main__":
     main()
@@ -6,20 +6,45 @@ This writes directly to sessions.json in the shared container, simulating what
 WatchConnectivity would deliver after a real workout. The iPhone app picks up
 new sessions from App Group on foreground via DataManager.loadSessionsFromAppGroup().
 
+Bulk mode (--count > 1) generates a multi-year history for load-testing the
+load path and the sessionCap archive path. Every generator works on whole
+columns (durations, angles, noise, timestamps) rather than point by point.
+
 Usage:
     python3 tests/inject_test_session.py --duration-min 110 --distance-km 13
     python3 tests/inject_test_session.py  # defaults: 110 min, 13 km
+    python3 tests/inject_test_session.py --count 2000 --span-days 3650 --output /tmp/sessions.json
+    python3 tests/inject_test_session.py --count 10000 --seed 42 --workers 8 --output /tmp/sessions.json --replace
+
+Generation is seeded per session (--seed), so bulk runs can fan out over a
+process pool (--workers) and still write byte-identical output.
+
+sessions.json is never re-parsed: new sessions are streamed in by patching the
+array's closing bracket (see session_io.py), written compact unless --pretty.
+
+--timings and --profile (instrument.py) report the generate, inject (write),
+route export and foreground phases separately.
 """
 
 import argparse
-import json
+import hashlib
 import math
+import multiprocessing
 import os
 import random
 import subprocess
 import sys
+import time
 import uuid
+from array import array
+from bisect import bisect_left
 from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+from instrument import Instrumentation, add_arguments
+from route_analysis import DIST_EPS, RouteArrays, km_split_dicts, profile_km_splits, step_distances
+from route_columns import export_routes
+from session_io import SessionArrayWriter, append_sessions, encode_session, locate_array_tail
 
 # Apple reference date: Jan 1, 2001 00:00:00 UTC
 APPLE_REF = datetime(2001, 1, 1, tzinfo=timezone.utc)
@@ -33,83 +58,142 @@ APP_GROUP_PATH = (
 SESSIONS_FILE = os.path.join(APP_GROUP_PATH, "sessions.json")
 BUNDLE_ID = "com.shuttlx.ShuttlX"
 
+# Where a seeded history ends unless --end-date says otherwise, so the same
+# seed reproduces the same bytes on any day
+SEEDED_END_DATE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+# Seconds between generated GPS points (real watch tracks are ~1 Hz)
+ROUTE_INTERVAL_S = 30
+
+# Time constant of the simulated GPS position error
+GPS_NOISE_CORRELATION_S = 60
+
 
 def to_apple_timestamp(dt: datetime) -> float:
     """Convert datetime to Apple's timeIntervalSinceReferenceDate."""
     return (dt - APPLE_REF).total_seconds()
 
 
-def gen_uuid() -> str:
-    """Generate an uppercase UUID string matching Swift's UUID encoding."""
-    return str(uuid.uuid4()).upper()
+def gen_uuid(rng=None) -> str:
+    """Generate an uppercase UUID string matching Swift's UUID encoding.
 
+    With an explicit ``rng`` the UUID is drawn from it (still a valid v4 UUID),
+    so seeded generators produce stable IDs.
+    """
+    if rng is None:
+        return str(uuid.uuid4()).upper()
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4)).upper()
 
-def generate_segments(start: datetime, duration_min: float, distance_km: float):
-    """Generate alternating run/walk segments totaling the given duration."""
-    segments = []
-    elapsed = 0.0
-    total_seconds = duration_min * 60
-    total_distance_m = distance_km * 1000
-    segment_count = 0
 
-    while elapsed < total_seconds:
-        # Alternate run/walk, starting with running
-        is_run = segment_count % 2 == 0
-        activity = "running" if is_run else "walking"
+def uniform_column(rng, n: int, lo: float, hi: float) -> list:
+    """Draw ``n`` uniform samples in [lo, hi) in one pass."""
+    span = hi - lo
+    draw = rng.random
+    return [lo + span * draw() for _ in range(n)]
 
-        # Segment duration: 2-8 min for runs, 1-4 min for walks
-        if is_run:
-            seg_dur = random.uniform(3 * 60, 8 * 60)
-        else:
-            seg_dur = random.uniform(1 * 60, 4 * 60)
-
-        # Clamp to remaining time
-        seg_dur = min(seg_dur, total_seconds - elapsed)
-        if seg_dur < 10:
-            break
-
-        seg_start = start + timedelta(seconds=elapsed)
-        seg_end = start + timedelta(seconds=elapsed + seg_dur)
-
-        # Distribute distance proportionally, with runs getting more per second
-        run_speed_factor = 2.5 if is_run else 1.0
-        seg_distance = None  # Will be set after all segments generated
-
-        seg = {
-            "id": gen_uuid(),
-            "activityType": activity,
-            "startDate": to_apple_timestamp(seg_start),
-            "endDate": to_apple_timestamp(seg_end),
-            "_duration": seg_dur,
-            "_is_run": is_run,
-        }
-        segments.append(seg)
 
-        elapsed += seg_dur
-        segment_count += 1
+def gauss_column(rng, n: int, mu: float, sigma: float) -> list:
+    """Draw ``n`` normal samples in one pass."""
+    draw = rng.gauss
+    return [draw(mu, sigma) for _ in range(n)]
 
-    # Distribute distance across segments weighted by speed
-    total_weight = sum(
-        s["_duration"] * (2.5 if s["_is_run"] else 1.0) for s in segments
-    )
-    for seg in segments:
-        weight = seg["_duration"] * (2.5 if seg["_is_run"] else 1.0)
-        seg_dist = (weight / total_weight) * total_distance_m
-        seg["distance"] = round(seg_dist, 1)
-        seg["steps"] = int(seg_dist / (0.85 if seg["_is_run"] else 0.65))
-        # Clean up internal keys
-        del seg["_duration"]
-        del seg["_is_run"]
 
-    return segments
+def correlated_column(samples: list, rho: float) -> list:
+    """AR(1)-smooth i.i.d. zero-mean samples, keeping their variance.
+
+    GPS error drifts rather than jumping independently at every fix; with
+    raw noise a 1 Hz route would zigzag and measure far longer than it is.
+    """
+    keep, fresh = rho, math.sqrt(1 - rho * rho)
+    out = []
+    e = samples[0] if samples else 0.0
+    for x in samples:
+        e = keep * e + fresh * x
+        out.append(e)
+    return out
+
 
+def fit_distances(weights: list, total_m: float) -> list:
+    """Split ``total_m`` in proportion to ``weights``, rounded to 0.1 m.
 
-def generate_route_points(start: datetime, duration_min: float, distance_km: float):
-    """Generate GPS route points along a loop path (one point every ~30s)."""
-    points = []
+    Rounding is done in whole decimetres with the remainder on the last
+    element, so the parts add up to ``total_m`` exactly.
+    """
+    tenths = round(total_m * 10)
+    scale = tenths / sum(weights) if sum(weights) > 0 else 0.0
+    parts = [round(w * scale) for w in weights]
+    if parts:
+        parts[-1] += tenths - sum(parts)
+    return [p / 10 for p in parts]
+
+
+def generate_segments(start: datetime, duration_min: float, distance_km: float, rng=random):
+    """Generate alternating run/walk segments totaling the given duration.
+
+    Durations are drawn as one column (runs 3-8 min, walks 1-4 min), then
+    boundaries, distances and steps are derived from it with whole-column passes.
+    """
+    total_seconds = duration_min * 60
+    total_distance_m = distance_km * 1000
+    start_ts = to_apple_timestamp(start)
+
+    # Enough draws to cover the session even if every segment is a short walk
+    max_segments = int(total_seconds / 60) + 2
+    runs = uniform_column(rng, max_segments, 3 * 60, 8 * 60)
+    walks = uniform_column(rng, max_segments, 1 * 60, 4 * 60)
+    raw = [runs[i] if i % 2 == 0 else walks[i] for i in range(max_segments)]
+
+    # Cut the column where it covers the session; clamp the last segment and
+    # drop it if the remainder is under 10s
+    cumulative = list(accumulate(raw))
+    cut = bisect_left(cumulative, total_seconds)
+    durations = raw[:cut]
+    remainder = total_seconds - (cumulative[cut - 1] if cut else 0.0)
+    if remainder >= 10:
+        durations.append(remainder)
+
+    n = len(durations)
+    if n == 0:
+        return []
+    ends = list(accumulate(durations))
+    starts = [0.0] + ends[:-1]
+    is_run = [i % 2 == 0 for i in range(n)]
+
+    # Distribute distance across segments weighted by speed (runs ~2.5x walks)
+    weights = [d * (2.5 if r else 1.0) for d, r in zip(durations, is_run)]
+    distances = fit_distances(weights, total_distance_m)
+    ids = [gen_uuid(rng) for _ in range(n)]
+
+    return [
+        {
+            "id": ids[i],
+            "activityType": "running" if is_run[i] else "walking",
+            "startDate": start_ts + starts[i],
+            "endDate": start_ts + ends[i],
+            "distance": distances[i],
+            "steps": int(distances[i] / (0.85 if is_run[i] else 0.65)),
+        }
+        for i in range(n)
+    ]
+
+
+def generate_route_points(start: datetime, duration_min: float, distance_km: float,
+                          rng=random, interval: float = ROUTE_INTERVAL_S, segments: list = None):
+    """Generate GPS route points along a loop path (one point every ``interval`` s).
+
+    Every field is produced as a whole column (angles, noise, altitude, speed,
+    accuracy) and zipped into RoutePoint dicts once at the end. With
+    ``segments``, progress around the loop follows the distance they cover
+    (runs move faster than walks); otherwise it is uniform. An ``interval``
+    of 0 disables the route.
+    """
+    if interval <= 0:
+        return []
     total_seconds = duration_min * 60
-    interval = 30  # seconds between points
     n_points = int(total_seconds / interval)
+    if n_points <= 0:
+        return []
+    start_ts = to_apple_timestamp(start)
 
     # Start near San Francisco's Golden Gate Park
     base_lat = 37.7694
@@ -120,83 +204,123 @@ def generate_route_points(start: datetime, duration_min: float, distance_km: flo
     radius_lat = distance_km / (2 * math.pi * 111.0)  # 111 km per degree lat
     radius_lon = radius_lat * 1.3  # stretch horizontally
 
-    for i in range(n_points):
-        t = i / max(n_points - 1, 1)
-        angle = 2 * math.pi * t
-
-        # Add some noise to make it realistic
-        noise_lat = random.gauss(0, 0.00003)
-        noise_lon = random.gauss(0, 0.00003)
-
-        lat = base_lat + radius_lat * math.sin(angle) + noise_lat
-        lon = base_lon + radius_lon * math.cos(angle) + noise_lon
-
-        # Altitude varies 10-60m with gentle hills
-        alt = 25 + 20 * math.sin(angle * 3) + random.uniform(-2, 2)
-
-        ts = start + timedelta(seconds=i * interval)
-
-        # Speed: ~2.5-4 m/s running, ~1.2-1.8 m/s walking
-        # Approximate based on position in workout
-        speed = random.uniform(1.5, 3.5)
-
-        point = {
-            "latitude": round(lat, 6),
-            "longitude": round(lon, 6),
-            "altitude": round(alt, 1),
-            "timestamp": to_apple_timestamp(ts),
-            "speed": round(speed, 2),
-            "horizontalAccuracy": round(random.uniform(3, 12), 1),
+    if segments:
+        ends = [seg["endDate"] for seg in segments]
+        covered = list(accumulate(seg["distance"] for seg in segments))
+        scale = 2 * math.pi / covered[-1] if covered[-1] > 0 else 0.0
+        angles = []
+        for i in range(n_points):
+            t = start_ts + i * interval
+            k = min(bisect_left(ends, t), len(segments) - 1)
+            seg_start = segments[k]["startDate"]
+            fraction = (t - seg_start) / (ends[k] - seg_start)
+            done = covered[k - 1] if k else 0.0
+            angles.append((done + min(max(fraction, 0.0), 1.0) * segments[k]["distance"]) * scale)
+    else:
+        step = 2 * math.pi / max(n_points - 1, 1)
+        angles = [i * step for i in range(n_points)]
+    sin, cos = math.sin, math.cos
+
+    # Add some noise to make it realistic
+    rho = math.exp(-interval / GPS_NOISE_CORRELATION_S)
+    noise_lat = correlated_column(gauss_column(rng, n_points, 0, 0.00003), rho)
+    noise_lon = correlated_column(gauss_column(rng, n_points, 0, 0.00003), rho)
+    dlats = [radius_lat * sin(a) + e for a, e in zip(angles, noise_lat)]
+    dlons = [radius_lon * cos(a) + e for a, e in zip(angles, noise_lon)]
+
+    # The ellipse and the noise make the measured track longer than the
+    # loop's nominal length; scale it about the centre to cover distance_km
+    measured = route_length(array("d", (base_lat + d for d in dlats)),
+                            array("d", (base_lon + d for d in dlons)))
+    fit = distance_km * 1000 / measured if measured > 0 else 1.0
+    lats = [round(base_lat + d * fit, 6) for d in dlats]
+    lons = [round(base_lon + d * fit, 6) for d in dlons]
+
+    # Altitude varies 10-60m with gentle hills
+    alt_noise = uniform_column(rng, n_points, -2, 2)
+    alts = [round(25 + 20 * sin(a * 3) + e, 1) for a, e in zip(angles, alt_noise)]
+
+    timestamps = [start_ts + i * interval for i in range(n_points)]
+
+    # Speed: ~2.5-4 m/s running, ~1.2-1.8 m/s walking
+    speeds = [round(v, 2) for v in uniform_column(rng, n_points, 1.5, 3.5)]
+    accuracies = [round(v, 1) for v in uniform_column(rng, n_points, 3, 12)]
+
+    return [
+        {
+            "latitude": lat,
+            "longitude": lon,
+            "altitude": alt,
+            "timestamp": ts,
+            "speed": spd,
+            "horizontalAccuracy": acc,
         }
-        points.append(point)
-
-    return points
-
-
-def generate_km_splits(duration_min: float, distance_km: float):
-    """Generate per-km split times."""
-    splits = []
-    n_km = int(distance_km)
-    avg_pace_sec = (duration_min * 60) / distance_km  # seconds per km
-
-    cumulative = 0.0
-    for km in range(1, n_km + 1):
-        # Vary pace ±15% to simulate natural variation
-        split_time = avg_pace_sec * random.uniform(0.85, 1.15)
-        cumulative += split_time
-
-        splits.append({
-            "id": gen_uuid(),
-            "kmNumber": km,
-            "splitTime": round(split_time, 2),
-            "cumulativeTime": round(cumulative, 2),
-        })
-
-    return splits
+        for lat, lon, alt, ts, spd, acc in zip(lats, lons, alts, timestamps, speeds, accuracies)
+    ]
+
+
+def route_length(latitude: array, longitude: array) -> float:
+    """Haversine metres along one route, summed in order as cumulative_distance() does."""
+    routes = RouteArrays(latitude, longitude, array("d"), array("d"), array("Q", [0, len(latitude)]),
+                         array("d", [0.0]))
+    return sum(step_distances(routes))
+
+
+def generate_km_splits(route: list, segments: list, start_ts: float, rng=random):
+    """Per-km splits as the watch would have recorded them for this route.
+
+    Derived from the route by route_analysis (haversine distance, interpolated
+    km crossings), or from the segment distances for a session without one, so
+    kmSplits always agree with the rest of the session.
+    """
+    if len(route) >= 2:
+        splits = km_split_dicts(RouteArrays.from_route(route, start_ts))[0]
+    else:
+        splits = profile_km_splits(segments, start_ts)
+    return [
+        {
+            "id": gen_uuid(rng),
+            "kmNumber": split["kmNumber"],
+            "splitTime": round(split["splitTime"], 2),
+            "cumulativeTime": round(split["cumulativeTime"], 2),
+        }
+        for split in splits
+    ]
 
 
-def generate_session(duration_min: float, distance_km: float) -> dict:
+def generate_session(duration_min: float, distance_km: float, end_time: datetime = None,
+                     rng=random, route_interval: float = ROUTE_INTERVAL_S) -> dict:
     """Generate a complete TrainingSession dictionary."""
     # Workout happened "today", ending ~30 minutes ago
-    end_time = datetime.now(timezone.utc) - timedelta(minutes=30)
+    if end_time is None:
+        end_time = datetime.now(timezone.utc) - timedelta(minutes=30)
     start_time = end_time - timedelta(minutes=duration_min)
 
-    segments = generate_segments(start_time, duration_min, distance_km)
-    route = generate_route_points(start_time, duration_min, distance_km)
-    km_splits = generate_km_splits(duration_min, distance_km)
+    segments = generate_segments(start_time, duration_min, distance_km, rng)
+    route = generate_route_points(start_time, duration_min, distance_km, rng, route_interval, segments)
+    km_splits = generate_km_splits(route, segments, to_apple_timestamp(start_time), rng)
 
     total_steps = sum(s.get("steps", 0) for s in segments)
-    total_distance = sum(s.get("distance", 0) for s in segments)
+    if len(route) >= 2:
+        # Distance is what the route measures (rounded down, so it never
+        # reaches a km the splits don't); the segments share it out
+        measured = route_length(array("d", (p["latitude"] for p in route)),
+                                array("d", (p["longitude"] for p in route)))
+        total_distance = math.floor((measured + DIST_EPS) * 10) / 10
+        for seg, d in zip(segments, fit_distances([s["distance"] for s in segments], total_distance)):
+            seg["distance"] = d
+    else:
+        total_distance = sum(s.get("distance", 0) for s in segments)
 
     # Heart rate: avg ~138, max ~172
-    avg_hr = round(random.uniform(132, 144), 1)
-    max_hr = round(random.uniform(168, 178), 1)
+    avg_hr = round(rng.uniform(132, 144), 1)
+    max_hr = round(rng.uniform(168, 178), 1)
 
     # Calories: ~7-9 kcal/min for mixed run/walk
-    calories = round(duration_min * random.uniform(7.2, 8.5), 1)
+    calories = round(duration_min * rng.uniform(7.2, 8.5), 1)
 
     session = {
-        "id": gen_uuid(),
+        "id": gen_uuid(rng),
         "startDate": to_apple_timestamp(start_time),
         "endDate": to_apple_timestamp(end_time),
         "duration": duration_min * 60,
@@ -215,24 +339,150 @@ def generate_session(duration_min: float, distance_km: float) -> dict:
     return session
 
 
-def inject_session(session: dict):
-    """Read existing sessions.json, append the new session, write back."""
-    existing = []
-    if os.path.exists(SESSIONS_FILE):
-        try:
-            with open(SESSIONS_FILE, "r") as f:
-                existing = json.load(f)
-            if not isinstance(existing, list):
-                existing = []
-        except (json.JSONDecodeError, IOError):
-            existing = []
+def derive_seed(seed: int, key) -> int:
+    """Derive a stable 64-bit sub-seed for ``key`` (a session index or a name).
+
+    Uses a hash rather than Python's salted hash() so every process, and every
+    run, derives the same value.
+    """
+    digest = hashlib.blake2b(f"{seed}:{key}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
 
-    existing.append(session)
+def plan_bulk_sessions(count: int, span_days: float, rng=random, now: datetime = None):
+    """Lay out ``count`` workouts over the last ``span_days`` days.
+
+    Returns ``(end_time, duration_min, distance_km)`` tuples, oldest first. End
+    times, durations (20-120 min) and paces (5.5-8.5 min/km) are drawn as columns.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc) - timedelta(minutes=30)
+    span_seconds = span_days * 86400
+    offsets = sorted(uniform_column(rng, count, 0, span_seconds), reverse=True)
+    durations = [round(d, 1) for d in uniform_column(rng, count, 20, 120)]
+    paces = uniform_column(rng, count, 5.5, 8.5)
+    return [
+        (now - timedelta(seconds=off), dur, round(dur / pace, 2))
+        for off, dur, pace in zip(offsets, durations, paces)
+    ]
+
+
+def bulk_jobs(count: int, span_days: float, seed: int, end_time: datetime,
+              route_interval: float = ROUTE_INTERVAL_S):
+    """Plan a bulk history as self-contained per-session jobs.
+
+    The plan draws from its own derived seed and each job carries its session's
+    derived seed, so a job's output depends only on (seed, index) — never on
+    which process runs it or in what order.
+    """
+    plan = plan_bulk_sessions(count, span_days, random.Random(derive_seed(seed, "plan")), end_time)
+    return [
+        (derive_seed(seed, index), session_end, duration_min, distance_km, route_interval)
+        for index, (session_end, duration_min, distance_km) in enumerate(plan)
+    ]
+
+
+def build_job_session(job) -> dict:
+    """Generate the session for one bulk job."""
+    session_seed, end_time, duration_min, distance_km, route_interval = job
+    return generate_session(duration_min, distance_km, end_time,
+                            random.Random(session_seed), route_interval)
+
+
+def encode_job_session(job_and_style):
+    """Worker entry point: generate and JSON-encode one job's session.
+
+    Encoding happens in the worker so the parent only writes text. Returns the
+    encoded session plus the few numbers the summary needs.
+    """
+    job, pretty = job_and_style
+    session = build_job_session(job)
+    counts = (len(session["segments"]), len(session["route"]),
+              len(session["kmSplits"]), session["startDate"])
+    return encode_session(session, pretty), counts
+
+
+def run_jobs(fn, jobs, workers: int = 1):
+    """Map ``fn`` over ``jobs`` in order, fanning out over a process pool if
+    ``workers`` > 1. Results are yielded in job order either way."""
+    if workers <= 1:
+        yield from map(fn, jobs)
+        return
+    chunksize = max(1, min(64, len(jobs) // (workers * 8)))
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(fn, jobs, chunksize)
+
+
+def iter_bulk_sessions(count: int, span_days: float, seed: int, end_time: datetime = None,
+                       route_interval: float = ROUTE_INTERVAL_S, workers: int = 1):
+    """Lazily generate a multi-year synthetic history, oldest first.
+
+    Only the plan is materialised up front, so a streamed write holds a
+    handful of sessions in memory at a time.
+    """
+    jobs = bulk_jobs(count, span_days, seed, end_time, route_interval)
+    yield from run_jobs(build_job_session, jobs, workers)
+
+
+def generate_bulk_sessions(count: int, span_days: float, seed: int, end_time: datetime = None,
+                           route_interval: float = ROUTE_INTERVAL_S, workers: int = 1) -> list:
+    """Generate a multi-year synthetic history of ``count`` sessions, oldest first."""
+    return list(iter_bulk_sessions(count, span_days, seed, end_time, route_interval, workers))
+
+
+def parse_sizes(value: str) -> list:
+    """Parse a comma-separated list of session counts (accepts 1k/10k suffixes)."""
+    sizes = []
+    for part in value.split(","):
+        part = part.strip().lower()
+        scale = 1000 if part.endswith("k") else 1
+        sizes.append(int(float(part.rstrip("k")) * scale))
+    return sizes
+
+
+def inject_session(session: dict, sessions_file: str = SESSIONS_FILE, pretty: bool = False):
+    """Append the new session to sessions.json without re-reading it."""
+    return inject_sessions([session], sessions_file, pretty)
+
+
+def inject_sessions(sessions, sessions_file: str = SESSIONS_FILE, pretty: bool = False,
+                    replace: bool = False, encoded: bool = False) -> int:
+    """Stream sessions into sessions.json; returns how many were written.
+
+    By default the sessions are appended by patching the file's closing
+    bracket; ``replace`` writes a fresh array instead. Both paths write to a
+    temp file and rename it into place. A file that doesn't end like a JSON
+    array is kept as sessions_corrupt_<ts>.json (as DataManager does) and a
+    fresh file is started. With ``encoded`` the items are already-encoded
+    strings from session_io.encode_session().
+    """
+    if not replace and os.path.exists(sessions_file) and os.path.getsize(sessions_file) > 0:
+        # Check the store before any session is generated, so an error raised
+        # while generating is never mistaken for a corrupt file
+        try:
+            locate_array_tail(sessions_file)
+        except ValueError as e:
+            backup = os.path.join(
+                os.path.dirname(sessions_file), f"sessions_corrupt_{int(time.time())}.json"
+            )
+            os.replace(sessions_file, backup)
+            print(f"  Warning: {e}; moved it to {backup}")
+        else:
+            return append_sessions(sessions_file, sessions, pretty, encoded=encoded)
+    with SessionArrayWriter(sessions_file, pretty) as writer:
+        return writer.write_all(sessions, encoded)
 
-    with open(SESSIONS_FILE, "w") as f:
-        json.dump(existing, f, indent=2)
 
-    return len(existing)
+def tally_encoded(results, stats: dict):
+    """Pass encoded sessions from encode_job_session() through, counting them."""
+    for text, (segments, points, splits, start) in results:
+        stats["sessions"] += 1
+        stats["segments"] += segments
+        stats["route_points"] += points
+        stats["km_splits"] += splits
+        stats.setdefault("first_start", start)
+        stats["last_start"] = start
+        yield text
 
 
 def foreground_app():
@@ -250,7 +500,7 @@ def foreground_app():
         print(f"  Manually tap the app in the simulator to trigger reload")
 
 
-def print_summary(session: dict, total_count: int):
+def print_summary(session: dict, sessions_file: str):
     """Print a human-readable summary of the injected session."""
     duration_min = session["duration"] / 60
     segments = session["segments"]
@@ -280,7 +530,27 @@ def print_summary(session: dict, total_count: int):
     print(f"  Walk time:      {walk_time/60:.1f} min")
     print(f"  Route points:   {len(session.get('route', []))}")
     print(f"  Km splits:      {len(session.get('kmSplits', []))}")
-    print(f"  Sessions file:  {total_count} total sessions")
+    print(f"  Sessions file:  {os.path.getsize(sessions_file) / 1e6:.1f} MB")
+    print("=" * 60)
+
+
+def print_bulk_summary(stats: dict, sessions_file: str, seconds: float, workers: int):
+    """Print a summary of a bulk-generated history."""
+    first = datetime.fromtimestamp(stats["first_start"] + APPLE_REF.timestamp(), timezone.utc)
+    last = datetime.fromtimestamp(stats["last_start"] + APPLE_REF.timestamp(), timezone.utc)
+    size_mb = os.path.getsize(sessions_file) / 1e6
+
+    print("\n" + "=" * 60)
+    print("  INJECTED BULK HISTORY")
+    print("=" * 60)
+    print(f"  Sessions:       {stats['sessions']}")
+    print(f"  Date range:     {first:%Y-%m-%d} → {last:%Y-%m-%d}")
+    print(f"  Segments:       {stats['segments']}")
+    print(f"  Route points:   {stats['route_points']}")
+    print(f"  Km splits:      {stats['km_splits']}")
+    print(f"  Workers:        {workers}")
+    print(f"  Elapsed:        {seconds:.2f} s ({stats['sessions'] / seconds:.0f} sessions/s)")
+    print(f"  Sessions file:  {size_mb:.1f} MB")
     print("=" * 60)
 
 
@@ -300,32 +570,135 @@ def main():
         default=13,
         help="Total distance in kilometers (default: 13)",
     )
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=1,
+        help="Number of sessions; >1 generates a bulk history (default: 1)",
+    )
+    parser.add_argument(
+        "--span-days",
+        type=float,
+        default=5 * 365,
+        help="Days of history a bulk run is spread over (default: 1825)",
+    )
+    parser.add_argument(
+        "--route-interval",
+        type=float,
+        default=ROUTE_INTERVAL_S,
+        help=f"Seconds between GPS route points, 0 for none (default: {ROUTE_INTERVAL_S})",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Seed for reproducible output (default: random, printed after the run)",
+    )
+    parser.add_argument(
+        "--end-date",
+        type=datetime.fromisoformat,
+        help="ISO date/time the history ends at (default: now; a fixed "
+             f"{SEEDED_END_DATE:%Y-%m-%d} when --seed is given)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for bulk generation; output is identical for any value (default: 1)",
+    )
+    parser.add_argument(
+        "--output",
+        help="Write to this sessions.json instead of the simulator App Group",
+    )
+    parser.add_argument(
+        "--export-routes",
+        metavar="PATH",
+        help="Also write every route in the sessions file to a columnar file (see route_columns.py)",
+    )
+    parser.add_argument(
+        "--replace",
+        action="store_true",
+        help="Overwrite sessions.json instead of appending to it",
+    )
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Indent the JSON output (default: compact, like JSONEncoder)",
+    )
     parser.add_argument(
         "--no-foreground",
         action="store_true",
         help="Don't try to foreground the app after injection",
     )
+    add_arguments(parser)
     args = parser.parse_args()
 
+    with Instrumentation.from_args("inject_test_session", args) as inst:
+        run(args, inst)
+
+
+def run(args, inst):
+    sessions_file = args.output or SESSIONS_FILE
+
     # Verify App Group exists
-    if not os.path.isdir(APP_GROUP_PATH):
+    if not args.output and not os.path.isdir(APP_GROUP_PATH):
         print(f"ERROR: App Group directory not found at:\n  {APP_GROUP_PATH}")
         print("Make sure the iPhone simulator has the app installed.")
         sys.exit(1)
 
-    print(f"Generating {args.duration_min:.0f}-min, {args.distance_km:.0f}-km session...")
-    session = generate_session(args.duration_min, args.distance_km)
-
-    print(f"Injecting into: {SESSIONS_FILE}")
-    total = inject_session(session)
-
-    print_summary(session, total)
-
-    if not args.no_foreground:
+    seed = args.seed if args.seed is not None else random.SystemRandom().getrandbits(63)
+    end_time = args.end_date
+    if end_time is None:
+        if args.seed is not None:
+            end_time = SEEDED_END_DATE
+        else:
+            end_time = datetime.now(timezone.utc) - timedelta(minutes=30)
+    elif end_time.tzinfo is None:
+        end_time = end_time.replace(tzinfo=timezone.utc)
+
+    if args.count > 1:
+        print(f"Generating {args.count} sessions over {args.span_days:.0f} days...")
+        t0 = time.perf_counter()
+        stats = dict.fromkeys(("sessions", "segments", "route_points", "km_splits"), 0)
+        jobs = bulk_jobs(args.count, args.span_days, seed, end_time, args.route_interval)
+        results = run_jobs(encode_job_session, [(job, args.pretty) for job in jobs], args.workers)
+        print(f"Injecting into: {sessions_file}")
+        # Generation is streamed into the writer; the nested phase separates
+        # time spent producing sessions from time spent writing them
+        with inst.phase("inject"):
+            inject_sessions(tally_encoded(inst.timed_iter("generate", results), stats),
+                            sessions_file, args.pretty, args.replace, encoded=True)
+        for key in ("sessions", "segments", "route_points", "km_splits"):
+            inst.count(key, stats[key])
+        print_bulk_summary(stats, sessions_file, time.perf_counter() - t0, args.workers)
+    else:
+        print(f"Generating {args.duration_min:.0f}-min, {args.distance_km:.0f}-km session...")
+        with inst.phase("generate"):
+            session = generate_session(args.duration_min, args.distance_km, end_time,
+                                       random.Random(derive_seed(seed, 0)), args.route_interval)
+
+        print(f"Injecting into: {sessions_file}")
+        with inst.phase("inject"):
+            inject_sessions([session], sessions_file, args.pretty, args.replace)
+        inst.count("sessions")
+
+        print_summary(session, sessions_file)
+
+    if args.export_routes:
+        with inst.phase("export_routes"):
+            n_sessions, n_points = export_routes(sessions_file, args.export_routes)
+        print(f"\nExported {n_points} route points from {n_sessions} sessions to {args.export_routes}")
+
+    print(f"\nReproduce with: --seed {seed} --end-date {end_time.isoformat()}")
+
+    if not args.no_foreground and not args.output:
         print("\nForegrounding app to trigger reload...")
-        foreground_app()
+        with inst.phase("foreground"):
+            foreground_app()
 
-    print("\nDone! Open History tab to verify the session appears.")
+    if os.path.abspath(sessions_file) == os.path.abspath(SESSIONS_FILE):
+        print("\nDone! Open History tab to verify the session appears.")
+    else:
+        print("\nDone!")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Phase timers, peak-memory sampling and opt-in profiling for the Python tooling.
+
+inject_test_session.py, fix_watchkit_infoplist_keys.py and
+remove_infoplist_from_resources.py split their work into named phases (tree
+walk, pbxproj parse, JSON encode and write, ...). Each phase records wall and
+CPU seconds, how often it ran, and the process's peak RSS when it ended.
+Nested phases are recorded as "parent/child". Each phase also gets a "self"
+time that excludes its children, so the slow leaf stands out.
+
+At exit a tool can emit one JSON summary line:
+
+    --timings PATH     append the summary to PATH (JSON Lines), "-" for stderr
+    SHUTTLX_TIMINGS    default for --timings, so a shell script can set it once
+                       for every tool it runs
+    SHUTTLX_RUN_ID     stored on each line; lines sharing it are one build
+
+Opt-in extras:
+
+    --profile OUT      OUT ending in .folded: a sampling profiler writes
+                       collapsed stacks for flamegraph.pl / speedscope
+                       (every thread, 5 ms wall-clock interval).
+                       Anything else: a cProfile dump for snakeviz,
+                       flameprof or python3 -m pstats.
+    --trace-memory     tracemalloc heap peak per phase (slow, Python heap
+                       only)
+
+The summary subcommand aggregates a timings file per tool and phase.
+
+Usage:
+    SHUTTLX_TIMINGS=/tmp/t.jsonl python3 tests/fix_watchkit_infoplist_keys.py
+    python3 tests/remove_infoplist_from_resources.py --dry-run --timings -
+    python3 tests/inject_test_session.py --count 2000 --output /tmp/s.json --profile /tmp/inject.folded
+    python3 tests/instrument.py summary /tmp/t.jsonl
+    python3 tests/instrument.py summary build/.preflight/timings.jsonl --last --json
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import resource
+import signal
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+FORMAT_VERSION = 1
+TIMINGS_ENV = "SHUTTLX_TIMINGS"
+RUN_ID_ENV = "SHUTTLX_RUN_ID"
+SAMPLE_INTERVAL_S = 0.005
+
+# ru_maxrss is KiB on Linux, bytes on macOS
+_RSS_SCALE = 1 / (1024 * 1024) if sys.platform == "darwin" else 1 / 1024
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_SCALE
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add --timings, --profile and --trace-memory to a tool's parser."""
+    group = parser.add_argument_group("instrumentation")
+    group.add_argument("--timings", metavar="PATH", default=os.environ.get(TIMINGS_ENV),
+                       help=f"Append a JSON timing summary to PATH, '-' for stderr (default: ${TIMINGS_ENV})")
+    group.add_argument("--profile", metavar="OUT",
+                       help="Profile the run: OUT.folded gets sampled stacks, any other name a cProfile dump")
+    group.add_argument("--trace-memory", action="store_true",
+                       help="Record the Python heap peak of every phase (tracemalloc; slows the run)")
+
+
+# MARK: - Profilers
+
+
+class StackSampler:
+    """Wall-clock sampling of every thread's stack into collapsed-stack counts.
+
+    Driven by ITIMER_REAL, so blocking I/O (a tree walk, a large write) shows
+    up as well as CPU. The handler runs on the main thread between bytecodes
+    and reads the other threads through sys._current_frames().
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_S):
+        self.interval = interval
+        self.counts = {}
+        self._previous = None
+
+    def start(self):
+        self._previous = signal.signal(signal.SIGALRM, self._sample)
+        signal.setitimer(signal.ITIMER_REAL, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, self._previous or signal.SIG_DFL)
+
+    def _sample(self, signum, frame):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        main_ident = threading.main_thread().ident
+        for ident, top in sys._current_frames().items():
+            if ident == main_ident:
+                top = frame  # the interrupted frame, not this handler
+            stack = []
+            while top is not None:
+                code = top.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                top = top.f_back
+            if stack:
+                stack.append(names.get(ident, "thread"))
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+
+class CallProfiler:
+    """cProfile over the whole run."""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def dump(self, path: str):
+        self.profile.dump_stats(path)
+
+
+# MARK: - Instrumentation
+
+
+class Phase:
+    """Accumulated totals for one phase path."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.children = 0.0
+        self.peak_rss = 0.0
+        self.rss_growth = 0.0
+        self.heap_peak = None
+
+    def to_json(self) -> dict:
+        out = {
+            "name": self.name,
+            "calls": self.calls,
+            "wallSeconds": round(self.wall, 6),
+            "selfSeconds": round(self.wall - self.children, 6),
+            "cpuSeconds": round(self.cpu, 6),
+            "peakRssMB": round(self.peak_rss, 1),
+            "rssGrowthMB": round(self.rss_growth, 1),
+        }
+        if self.heap_peak is not None:
+            out["heapPeakMB"] = round(self.heap_peak / (1 << 20), 1)
+        return out
+
+
+class Instrumentation:
+    """Phase timers for one tool run; use as a context manager around main().
+
+    Phases are timed on the thread that opens them; open them on the main
+    thread around pool.map() rather than inside workers.
+    """
+
+    def __init__(self, tool: str, timings: str = None, profile: str = None, trace_memory: bool = False):
+        self.tool = tool
+        self.timings = timings
+        self.profile_path = profile
+        self.trace_memory = trace_memory
+        self.phases = {}
+        self.counters = {}
+        self.exit_code = None
+        self._stack = []
+        self._profiler = None
+        self._started = None
+
+    @classmethod
+    def from_args(cls, tool: str, args: argparse.Namespace) -> "Instrumentation":
+        return cls(tool, args.timings, args.profile, args.trace_memory)
+
+    def __enter__(self):
+        self._started = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.profile_path:
+            self._profiler = StackSampler() if self.profile_path.endswith(".folded") else CallProfiler()
+            self._profiler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._profiler is not None:
+            self._profiler.stop()
+            self._profiler.dump(self.profile_path)
+            print(f"📊 Profile written to {self.profile_path}", file=sys.stderr)
+        if exc_type is SystemExit:
+            code = exc.code
+            self.exit_code = code if isinstance(code, int) else (0 if code is None else 1)
+        elif exc_type is not None:
+            self.exit_code = 1
+        elif self.exit_code is None:
+            self.exit_code = 0
+        if self.trace_memory:
+            tracemalloc.stop()
+        if self.timings:
+            self.emit(self.timings)
+        return False
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as ``name`` (nested under any open phase)."""
+        path = f"{self._stack[-1][0]}/{name}" if self._stack else name
+        phase = self.phases.get(path)
+        if phase is None:
+            # Created on entry so a parent is listed before its children
+            phase = self.phases[path] = Phase(path)
+        rss0 = peak_rss_mb()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        frame = [path, 0.0]
+        self._stack.append(frame)
+        t0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - t0
+            cpu = time.process_time() - cpu0
+            self._stack.pop()
+            phase.calls += 1
+            phase.wall += wall
+            phase.cpu += cpu
+            phase.children += frame[1]
+            rss = peak_rss_mb()
+            phase.peak_rss = max(phase.peak_rss, rss)
+            phase.rss_growth += rss - rss0
+            if self.trace_memory:
+                heap = tracemalloc.get_traced_memory()[1]
+                phase.heap_peak = max(phase.heap_peak or 0, heap)
+            if self._stack:
+                self._stack[-1][1] += wall
+
+    def timed_iter(self, name: str, iterable):
+        """Yield from ``iterable``, timing only the time spent producing items.
+
+        For pipelines where generation and consumption interleave (a generator
+        feeding a streaming writer), this splits the two apart.
+        """
+        it = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            yield item
+
+    def count(self, name: str, n: int = 1):
+        """Add ``n`` to a named counter (files walked, sessions written, ...)."""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self) -> dict:
+        cpu = time.process_time() - self._cpu0
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return {
+            "version": FORMAT_VERSION,
+            "tool": self.tool,
+            "runId": os.environ.get(RUN_ID_ENV),
+            "started": self._started.isoformat(),
+            "pid": os.getpid(),
+            "argv": sys.argv[1:],
+            "exitCode": self.exit_code,
+            "wallSeconds": round(time.perf_counter() - self._t0, 6),
+            "cpuSeconds": round(cpu, 6),
+            # Includes interpreter startup and imports, which wallSeconds misses
+            "processCpuSeconds": round(own.ru_utime + own.ru_stime, 6),
+            "childCpuSeconds": round(children.ru_utime + children.ru_stime, 6),
+            "peakRssMB": round(peak_rss_mb(), 1),
+            "phases": [p.to_json() for p in self.phases.values()],
+            "counters": self.counters,
+        }
+
+    def emit(self, path: str):
+        """Append the summary as one JSON line to ``path`` ("-" for stderr).
+
+        A single write() of one line in append mode, so tools running side by
+        side do not interleave their lines.
+        """
+        line = json.dumps(self.summary(), separators=(",", ":")) + "\n"
+        if path == "-":
+            sys.stderr.write(line)
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a") as f:
+            f.write(line)
+
+
+# MARK: - Aggregation
+
+
+def load_timings(path: str) -> list:
+    """Every summary line in ``path``; unreadable lines are skipped."""
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and record.get("version") == FORMAT_VERSION:
+                records.append(record)
+    return records
+
+
+def aggregate(records: list) -> dict:
+    """Per tool: run count, wall/peak stats, and per-phase totals and medians."""
+    tools = {}
+    for record in records:
+        tool = tools.setdefault(record["tool"], {"runs": 0, "wall": [], "peakRssMB": 0.0,
+                                                 "failures": 0, "phases": {}})
+        tool["runs"] += 1
+        tool["wall"].append(record["wallSeconds"])
+        tool["peakRssMB"] = max(tool["peakRssMB"], record["peakRssMB"])
+        if record.get("exitCode"):
+            tool["failures"] += 1
+        for phase in record["phases"]:
+            entry = tool["phases"].setdefault(phase["name"], {"wall": [], "self": [], "calls": 0})
+            entry["wall"].append(phase["wallSeconds"])
+            entry["self"].append(phase["selfSeconds"])
+            entry["calls"] += phase["calls"]
+
+    out = {}
+    for name, tool in tools.items():
+        out[name] = {
+            "runs": tool["runs"],
+            "failures": tool["failures"],
+            "totalSeconds": round(sum(tool["wall"]), 6),
+            "medianSeconds": round(statistics.median(tool["wall"]), 6),
+            "maxSeconds": round(max(tool["wall"]), 6),
+            "peakRssMB": tool["peakRssMB"],
+            "phases": {
+                phase: {
+                    "calls": entry["calls"],
+                    "totalSeconds": round(sum(entry["wall"]), 6),
+                    "selfSeconds": round(sum(entry["self"]), 6),
+                    "medianSeconds": round(statistics.median(entry["wall"]), 6),
+                    "maxSeconds": round(max(entry["wall"]), 6),
+                }
+                for phase, entry in tool["phases"].items()
+            },
+        }
+    return out
+
+
+def print_aggregate(result: dict, source: str):
+    print("\n" + "=" * 72)
+    print(f"  TOOL TIMINGS  ({source})")
+    print("=" * 72)
+    grand = 0.0
+    for name, tool in result.items():
+        grand += tool["totalSeconds"]
+        failed = f", {tool['failures']} failed" if tool["failures"] else ""
+        print(f"  {name}: {tool['runs']} runs{failed}, {tool['totalSeconds']:.3f} s total, "
+              f"median {tool['medianSeconds']:.3f} s, peak {tool['peakRssMB']:.0f} MB")
+        slowest = max((p["selfSeconds"] for p in tool["phases"].values()), default=0)
+        for phase, p in tool["phases"].items():
+            depth = phase.count("/")
+            label = "  " * depth + phase.rsplit("/", 1)[-1]
+            marker = "🐢" if slowest and p["selfSeconds"] == slowest else "  "
+            print(f"    {marker} {label:<28} {p['totalSeconds']:>9.3f} s  self {p['selfSeconds']:>8.3f} s  "
+                  f"median {p['medianSeconds']:>8.3f} s  ×{p['calls']}")
+    print(f"  Total: {grand:.3f} s")
+    print("=" * 72)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate tool timing summaries")
+    sub = parser.add_subparsers(dest="command", required=True)
+    summary = sub.add_parser("summary", help="Per-tool and per-phase totals of a timings file")
+    summary.add_argument("file", help="JSON Lines file written via --timings / $SHUTTLX_TIMINGS")
+    which = summary.add_mutually_exclusive_group()
+    which.add_argument("--run", help=f"Only lines with this ${RUN_ID_ENV}")
+    which.add_argument("--last", action="store_true", help="Only the most recent run id")
+    summary.add_argument("--json", action="store_true", help="Print the aggregate as JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        print(f"❌ not found: {args.file}")
+        sys.exit(1)
+    records = load_timings(args.file)
+    run = args.run
+    if args.last and records:
+        run = records[-1].get("runId")
+    if run is not None:
+        records = [r for r in records if r.get("runId") == run]
+    if not records:
+        print("❓ No timing records found")
+        sys.exit(1)
+
+    result = aggregate(records)
+    if args.json:
+        json.dump({"runId": run, "tools": result}, sys.stdout, indent=2)
+        print()
+    else:
+        print_aggregate(result, f"run {run}" if run else args.file)
+
+
+if __name__ == "__main__":
+    main()
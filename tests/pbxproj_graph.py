@@ -0,0 +1,462 @@
+"""
+Single-pass parser and object graph for Xcode project.pbxproj files.
+
+project.pbxproj is an old-style (OpenStep) property list: nested dictionaries
+`{ key = value; }`, arrays `( a, b, )`, bare or quoted strings, and /* */
+comments that Xcode uses to label object IDs. The preflight scripts used to
+edit it with regexes and str.replace; this module tokenizes the file once,
+builds an indexed graph and serializes edits back without disturbing anything
+else:
+
+- Every dictionary entry and array item keeps the span of source text it came
+  from, together with the comment that labels it (e.g. "Foo.swift in Sources").
+- PBXProject.objects maps object ID -> PBXObject; by_isa groups them by class,
+  and refs maps an ID to every array item that mentions it (build phase
+  `files`, group `children`, target `buildPhases`, ...).
+- Edits only record which spans to drop or where to insert new lines, so a
+  removal is O(number of places the object appears) and an addition O(1).
+  serialize() copies the untouched text verbatim: a file with no edits
+  round-trips byte for byte, and an edited one differs only in the removed
+  and added lines.
+
+Usage:
+    from pbxproj_graph import PBXProject
+    project = PBXProject.load("ShuttlX.xcodeproj/project.pbxproj")
+    for build_file in project.by_isa["PBXBuildFile"]:
+        ...
+    project.remove_object(build_file.id)
+    project.save()
+"""
+
+import os
+import re
+
+from atomic_io import commit_temp, temp_sibling
+
+# Leading whitespace is part of each match and `bad` catches anything else, so
+# finditer() covers the text without gaps.
+_TOKEN = re.compile(
+    r"""
+    \s*
+    (?:
+      (?P<comment>/\*.*?\*/|//[^\n]*)
+    | (?P<string>"(?:[^"\\]|\\.)*")
+    | (?P<word>(?:[^\s{}()=;,"/]|/(?![/*]))+)
+    | (?P<punct>[{}()=;,])
+    | (?P<bad>\S)
+    )
+    """,
+    re.S | re.X,
+)
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", '"': '"', "\\": "\\", "'": "'"}
+
+
+class PBXProjError(ValueError):
+    """The file is not a well-formed old-style property list."""
+
+
+class Entry:
+    """One `key = value;` of a dictionary, with its source span and label comment."""
+
+    __slots__ = ("key", "value", "comment", "start", "end")
+
+    def __init__(self, key, value, comment, start, end):
+        self.key, self.value, self.comment, self.start, self.end = key, value, comment, start, end
+
+
+class Item:
+    """One element of an array, with its source span (including the comma)."""
+
+    __slots__ = ("value", "comment", "start", "end")
+
+    def __init__(self, value, comment, start, end):
+        self.value, self.comment, self.start, self.end = value, comment, start, end
+
+
+class PDict(dict):
+    """A parsed dictionary: behaves like {key: value}, keeps Entry records."""
+
+    def __init__(self):
+        super().__init__()
+        self.entries = {}
+
+    def add(self, entry: Entry):
+        self[entry.key] = entry.value
+        self.entries[entry.key] = entry
+
+
+class PArray(list):
+    """A parsed array: behaves like [value, ...], keeps Item records.
+
+    ``close`` is the offset of the closing parenthesis.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.items = []
+        self.close = None
+
+    def add(self, item: Item):
+        self.append(item.value)
+        self.items.append(item)
+
+
+def _unquote(token: str) -> str:
+    body = token[1:-1]
+    if "\\" not in body:
+        return body
+    return re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+_BARE = re.compile(r"[A-Za-z0-9_$./]+")
+
+
+def quote(value: str) -> str:
+    """A string as Xcode writes it: bare when safe, otherwise quoted and escaped."""
+    if _BARE.fullmatch(value):
+        return value
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+
+def _line_of(text: str, pos: int) -> int:
+    return text.count("\n", 0, pos) + 1
+
+
+class _Parser:
+    """Recursive-descent parser over one regex tokenization of the text."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = []  # (kind, value, start, end), whitespace and comments dropped
+        self.labels = {}  # token index -> text of a /* */ comment directly after it
+        append = self.tokens.append
+        tokens = self.tokens
+        labels = self.labels
+        for m in _TOKEN.finditer(text):
+            kind = m.lastgroup
+            if kind == "comment":
+                value = m.group(kind)
+                if tokens and value.startswith("/*") and len(tokens) - 1 not in labels:
+                    labels[len(tokens) - 1] = value[2:-2].strip()
+                continue
+            if kind == "bad":
+                start = m.start(kind)
+                raise PBXProjError(f"unexpected character {text[start]!r} on line {_line_of(text, start)}")
+            start, end = m.span(kind)
+            append((kind, text[start:end], start, end))
+        self.i = 0
+
+    def _error(self, message: str, token=None):
+        pos = token[2] if token else len(self.text)
+        raise PBXProjError(f"{message} on line {_line_of(self.text, pos)}")
+
+    def _next(self):
+        """Next token, or None at the end of the text."""
+        i = self.i
+        if i < len(self.tokens):
+            self.i = i + 1
+            return self.tokens[i]
+        return None
+
+    def _peek(self):
+        return self.tokens[self.i] if self.i < len(self.tokens) else None
+
+    def _label(self):
+        """The comment directly following the previous token, if any."""
+        return self.labels.get(self.i - 1)
+
+    def _expect(self, punct: str):
+        token = self._next()
+        if token is None or token[1] != punct:
+            self._error(f"expected {punct!r}", token)
+        return token
+
+    def parse_value(self, token):
+        kind, value, start, end = token
+        if kind == "string":
+            return _unquote(value), end
+        if kind == "word":
+            return value, end
+        if value == "{":
+            return self.parse_dict()
+        if value == "(":
+            return self.parse_array()
+        self._error(f"unexpected {value!r}", token)
+
+    def parse_dict(self):
+        result = PDict()
+        while True:
+            token = self._next()
+            if token is None:
+                self._error("unterminated dictionary")
+            if token[1] == "}":
+                return result, token[3]
+            if token[0] not in ("word", "string"):
+                self._error(f"expected a key, got {token[1]!r}", token)
+            key = _unquote(token[1]) if token[0] == "string" else token[1]
+            label = self._label()
+            self._expect("=")
+            value_token = self._next()
+            if value_token is None:
+                self._error("missing value")
+            value, _ = self.parse_value(value_token)
+            end = self._expect(";")[3]
+            result.add(Entry(key, value, label, token[2], end))
+
+    def parse_array(self):
+        result = PArray()
+        while True:
+            token = self._next()
+            if token is None:
+                self._error("unterminated array")
+            if token[1] == ")":
+                result.close = token[2]
+                return result, token[3]
+            value, end = self.parse_value(token)
+            label = self._label()
+            following = self._peek()
+            if following is not None and following[1] == ",":
+                end = self._next()[3]
+            elif following is None or following[1] != ")":
+                self._error("expected ',' or ')'", following)
+            result.add(Item(value, label, token[2], end))
+
+    def parse(self):
+        token = self._next()
+        if token is None or token[1] != "{":
+            self._error("expected '{' at top level", token)
+        root, _ = self.parse_dict()
+        if self._peek() is not None:
+            self._error("trailing content", self._peek())
+        return root
+
+
+class PBXObject:
+    """One entry of the `objects` dictionary."""
+
+    __slots__ = ("id", "isa", "props", "comment", "entry")
+
+    def __init__(self, oid: str, props: PDict, entry: Entry):
+        self.id = oid
+        self.props = props
+        self.isa = props.get("isa") if isinstance(props, dict) else None
+        self.comment = entry.comment
+        self.entry = entry
+
+    def get(self, key, default=None):
+        return self.props.get(key, default)
+
+    def __repr__(self):
+        return f"<{self.isa} {self.id} {self.comment or ''}>"
+
+
+class PBXProject:
+    """Indexed object graph of a project.pbxproj, editable by span deletion."""
+
+    def __init__(self, text: str, path: str = None):
+        self.path = path
+        self.text = text
+        self.root = _Parser(text).parse()
+        objects = self.root.get("objects")
+        if not isinstance(objects, PDict):
+            raise PBXProjError("no objects dictionary")
+        self.objects = {}
+        self.by_isa = {}
+        self.refs = {}  # id -> [(owner id, key, Item)]
+        for oid, entry in objects.entries.items():
+            obj = PBXObject(oid, entry.value, entry)
+            self.objects[oid] = obj
+            self.by_isa.setdefault(obj.isa, []).append(obj)
+        for obj in self.objects.values():
+            if not isinstance(obj.props, PDict):
+                continue
+            for key, value in obj.props.items():
+                if isinstance(value, PArray):
+                    for item in value.items:
+                        if isinstance(item.value, str) and item.value in self.objects:
+                            self.refs.setdefault(item.value, []).append((obj.id, key, item))
+        self._edits = []  # (start, end, replacement) over self.text; inserts have start == end
+
+    @classmethod
+    def load(cls, path: str) -> "PBXProject":
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return cls(f.read(), path)
+
+    # MARK: - Queries
+
+    def isa(self, name: str) -> list:
+        return self.by_isa.get(name, [])
+
+    def referrers(self, oid: str) -> list:
+        """(owner id, array key, Item) for every array that lists ``oid``."""
+        return self.refs.get(oid, [])
+
+    @property
+    def modified(self) -> bool:
+        return bool(self._edits)
+
+    # MARK: - Edits
+
+    def _drop(self, start: int, end: int):
+        """Delete a span, widening it to whole lines when it sits alone on its line(s)."""
+        text = self.text
+        line_start = text.rfind("\n", 0, start) + 1
+        line_end = text.find("\n", end)
+        line_end = len(text) if line_end == -1 else line_end
+        if not text[line_start:start].strip() and not text[end:line_end].strip():
+            start, end = line_start, min(line_end + 1, len(text))
+        else:
+            while end < len(text) and text[end] in " \t":
+                end += 1
+        self._edits.append((start, end, ""))
+
+    def _line_start(self, pos: int) -> int:
+        return self.text.rfind("\n", 0, pos) + 1
+
+    def _indent_at(self, pos: int) -> str:
+        line_start = self._line_start(pos)
+        line = self.text[line_start:pos]
+        return line[:len(line) - len(line.lstrip(" \t"))]
+
+    def remove_item(self, owner_id: str, key: str, item: Item):
+        """Remove one element from an array property of an object."""
+        array = self.objects[owner_id].props[key]
+        array.items.remove(item)
+        array.remove(item.value)
+        refs = self.refs.get(item.value)
+        if refs:
+            self.refs[item.value] = [r for r in refs if r[2] is not item]
+        self._drop(item.start, item.end)
+
+    def remove_object(self, oid: str) -> int:
+        """Remove an object and every array element that lists it.
+
+        Scalar references (e.g. a build file's `fileRef`) are left alone.
+        Returns the number of array references removed.
+        """
+        obj = self.objects.pop(oid)
+        self.by_isa[obj.isa].remove(obj)
+        refs = self.refs.pop(oid, [])
+        for owner_id, key, item in refs:
+            if owner_id in self.objects:
+                array = self.objects[owner_id].props[key]
+                array.items.remove(item)
+                array.remove(item.value)
+                self._drop(item.start, item.end)
+        self._drop(obj.entry.start, obj.entry.end)
+        return len(refs)
+
+    def add_item(self, owner_id: str, key: str, value: str, comment: str = None) -> Item:
+        """Append an element to an array property, on its own line before the ``)``.
+
+        The array must already exist. Added items cannot be removed again
+        before the project is saved and reloaded.
+        """
+        array = self.objects[owner_id].props[key]
+        line_start = self._line_start(array.close)
+        text = self._indent_at(array.close) + "\t" + quote(value)
+        if comment:
+            text += f" /* {comment} */"
+        self._edits.append((line_start, line_start, text + ",\n"))
+        item = Item(value, comment, line_start, line_start)
+        array.add(item)
+        if value in self.objects:
+            self.refs.setdefault(value, []).append((owner_id, key, item))
+        return item
+
+    def add_object(self, oid: str, props: list, comment: str = None) -> PBXObject:
+        """Insert a new object into its isa section, in ID order.
+
+        ``props`` is a list of ``(key, value, label)``, starting with ``isa``;
+        values are strings or lists of ``(value, label)``. PBXBuildFile and
+        PBXFileReference objects are written on one line, like Xcode does.
+        The section must already exist.
+        """
+        if oid in self.objects:
+            raise PBXProjError(f"duplicate object ID {oid}")
+        isa = props[0][1]
+        section_end = self.text.find(f"/* End {isa} section */")
+        if section_end == -1:
+            raise PBXProjError(f"no {isa} section")
+        pos = self._line_start(section_end)
+        for other in self.isa(isa):
+            if other.id > oid and other.entry.start < section_end:
+                pos = min(pos, self._line_start(other.entry.start))
+        indent = "\t\t"
+
+        def render(value, label):
+            out = quote(value)
+            return f"{out} /* {label} */" if label else out
+
+        head = quote(oid) + (f" /* {comment} */" if comment else "") + " = {"
+        parsed = PDict()
+        if isa in ("PBXBuildFile", "PBXFileReference"):
+            fields = []
+            for key, value, label in props:
+                if isinstance(value, list):
+                    value = "(" + "".join(render(v, l) + ", " for v, l in value) + ")"
+                else:
+                    value = render(value, label)
+                fields.append(f"{quote(key)} = {value}; ")
+            text = f"{indent}{head}{''.join(fields)}}};\n"
+        else:
+            lines = [indent + head]
+            for key, value, label in props:
+                if isinstance(value, list):
+                    lines.append(f"{indent}\t{quote(key)} = (")
+                    lines.extend(f"{indent}\t\t{render(v, l)}," for v, l in value)
+                    lines.append(f"{indent}\t);")
+                else:
+                    lines.append(f"{indent}\t{quote(key)} = {render(value, label)};")
+            lines.append(indent + "};")
+            text = "\n".join(lines) + "\n"
+        self._edits.append((pos, pos, text))
+
+        entry = Entry(oid, parsed, comment, pos, pos)
+        for key, value, label in props:
+            if isinstance(value, list):
+                array = PArray()
+                for v, l in value:
+                    array.add(Item(v, l, pos, pos))
+                value = array
+            parsed.add(Entry(key, value, label, pos, pos))
+        obj = PBXObject(oid, parsed, entry)
+        self.objects[oid] = obj
+        self.by_isa.setdefault(isa, []).append(obj)
+        for key, value in parsed.items():
+            if isinstance(value, PArray):
+                for item in value.items:
+                    if item.value in self.objects:
+                        self.refs.setdefault(item.value, []).append((oid, key, item))
+        return obj
+
+    # MARK: - Output
+
+    def serialize(self) -> str:
+        """The text with every recorded edit applied; untouched bytes are kept."""
+        if not self._edits:
+            return self.text
+        parts = []
+        pos = 0
+        for start, end, replacement in sorted(self._edits, key=lambda e: (e[0], e[1])):
+            if start > pos:
+                parts.append(self.text[pos:start])
+                pos = start
+            parts.append(replacement)
+            pos = max(pos, end)
+        parts.append(self.text[pos:])
+        return "".join(parts)
+
+    def save(self, path: str = None):
+        """Write the serialized project atomically (to its own path by default)."""
+        path = path or self.path
+        fd, tmp = temp_sibling(path)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                f.write(self.serialize())
+            commit_temp(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
@@ -0,0 +1,614 @@
+#!/usr/bin/env python3
+"""
+Integrity checks for ShuttlX.xcodeproj/project.pbxproj against the source tree.
+
+The project is parsed once with pbxproj_graph and indexed in one pass over
+its objects: every group's resolved directory, every file reference's path on
+disk, which build phases (and so which target) use each PBXBuildFile, and the
+folders that File System Synchronized targets (the Watch App) compile as a
+whole. Each target directory is then walked once. From those indexes it reports:
+
+- dangling-reference  an ID that names no object (build phase files, group
+                      children, fileRef/productRef, ...), and build files with
+                      neither fileRef nor productRef ("(null) in Resources")
+- orphan-build-file   a PBXBuildFile that no build phase lists
+- missing-file        a file reference whose path does not exist on disk
+- duplicate-compile   a source compiled twice by one target, via two build
+                      files, a repeated phase entry, a synchronized folder
+                      plus an explicit entry, or a ShuttlXShared package file
+                      also added to an app target
+- multiple-outputs    two inputs that produce the same product in one target
+                      ("Multiple commands produce ..."): the target's
+                      Info.plist in its Resources, two resources or embedded
+                      products with the same name, two sources with the same
+                      file name
+- not-in-target       a Swift file on disk, or a Swift file reference, that no
+                      target compiles
+- package-product     a target depends on a product the local Package.swift
+                      does not declare
+
+With --fix, dangling entries, orphan/null build files, duplicate phase
+entries and build files of missing files are removed, the Info.plist is
+dropped from Resources (or added to the synchronized folder's exceptions), and
+Swift files on disk that no target compiles are added to the target that
+owns their directory, in the nearest group, the way Xcode would.
+
+Usage:
+    python3 tests/pbxproj_integrity.py                 # report, exit 1 on errors
+    python3 tests/pbxproj_integrity.py --fix           # repair what is fixable
+    python3 tests/pbxproj_integrity.py --json --checks missing-file,not-in-target
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+from fix_watchkit_infoplist_keys import is_pruned
+from pbxproj_graph import PBXProjError, PBXProject
+from plist_rules import Finding
+
+CHECKS = (
+    "dangling-reference", "orphan-build-file", "missing-file", "duplicate-compile",
+    "multiple-outputs", "not-in-target", "package-product",
+)
+
+GROUP_ISAS = ("PBXGroup", "PBXVariantGroup", "XCVersionGroup", "PBXFileSystemSynchronizedRootGroup")
+TARGET_ISAS = ("PBXNativeTarget", "PBXAggregateTarget", "PBXLegacyTarget")
+
+# Properties that hold object IDs
+REF_ARRAYS = (
+    "children", "files", "buildPhases", "dependencies", "fileSystemSynchronizedGroups",
+    "packageProductDependencies", "exceptions", "targets", "buildConfigurations", "packageReferences",
+)
+REF_SCALARS = (
+    "fileRef", "productRef", "target", "targetProxy", "buildConfigurationList", "productReference",
+    "mainGroup", "productRefGroup", "package",
+)
+
+COMPILED_SUFFIXES = (".swift", ".m", ".mm", ".c", ".cc", ".cpp", ".metal")
+
+# Resources compiled into a shared output (Assets.car) rather than copied by name
+MERGED_RESOURCE_SUFFIXES = (".xcassets",)
+
+
+def new_id(seed: str, taken) -> str:
+    """A 24-hex-digit object ID derived from ``seed``, unique within ``taken``."""
+    salt = 0
+    while True:
+        oid = hashlib.md5(f"{seed}:{salt}".encode()).hexdigest()[:24].upper()
+        if oid not in taken:
+            return oid
+        salt += 1
+
+
+def package_products(package_dir: str) -> set:
+    """Library product names declared by the Package.swift in ``package_dir``."""
+    try:
+        with open(os.path.join(package_dir, "Package.swift"), encoding="utf-8") as f:
+            manifest = f.read()
+    except OSError:
+        return set()
+    return set(re.findall(r'\.library\(\s*name:\s*"([^"]+)"', manifest))
+
+
+def package_target_dirs(package_dir: str) -> list:
+    """Source directories of a Package.swift's (non-test) targets."""
+    try:
+        with open(os.path.join(package_dir, "Package.swift"), encoding="utf-8") as f:
+            manifest = f.read()
+    except OSError:
+        return []
+    dirs = []
+    for m in re.finditer(r'\.target\((.*?)\)\s*,?\s*(?=\.\w*[tT]arget\(|\])', manifest, re.S):
+        name = re.search(r'name:\s*"([^"]+)"', m.group(1))
+        path = re.search(r'path:\s*"([^"]+)"', m.group(1))
+        if name:
+            rel = path.group(1) if path else os.path.join("Sources", name.group(1))
+            dirs.append(os.path.normpath(os.path.join(package_dir, rel)))
+    return dirs
+
+
+class ProjectIndex:
+    """The object graph indexed for integrity checks (one pass over the objects)."""
+
+    def __init__(self, project: PBXProject, project_dir: str):
+        self.project = project
+        self.project_dir = project_dir
+        objects = project.objects
+
+        root = project.isa("PBXProject")[0]
+        self.root = root
+        self.source_root = os.path.normpath(os.path.join(project_dir, root.get("projectDirPath") or ""))
+        self.parent = {}  # child id -> group id
+        for isa in GROUP_ISAS:
+            for group in project.isa(isa):
+                for child in group.get("children", ()):
+                    self.parent[child] = group.id
+        self._paths = {}
+
+        self.targets = [t for isa in TARGET_ISAS for t in project.isa(isa)]
+        self.uses = {}  # build file id -> [(phase, Item)]
+        for obj in objects.values():
+            if obj.isa and obj.isa.endswith("BuildPhase"):
+                files = obj.get("files")
+                if files is not None:
+                    for item in files.items:
+                        self.uses.setdefault(item.value, []).append((obj, item))
+
+        # target id -> [(group id, folder, membership exceptions)]
+        self.synced = {}
+        for target in self.targets:
+            for group_id in target.get("fileSystemSynchronizedGroups", ()):
+                folder = self.path_of(group_id)
+                if folder is None:
+                    continue
+                excluded = set()
+                for exception_id in objects[group_id].get("exceptions", ()) if group_id in objects else ():
+                    exception = objects.get(exception_id)
+                    if exception is not None and exception.get("target") == target.id:
+                        excluded.update(exception.get("membershipExceptions", ()))
+                self.synced.setdefault(target.id, []).append((group_id, folder, excluded))
+
+        self.packages = {}  # XCLocalSwiftPackageReference id -> directory
+        for package in project.isa("XCLocalSwiftPackageReference"):
+            self.packages[package.id] = os.path.normpath(
+                os.path.join(self.source_root, package.get("relativePath", ".")))
+
+    def path_of(self, oid: str):
+        """Absolute path of a file reference or group, or None if not on the source tree."""
+        if oid in self._paths:
+            return self._paths[oid]
+        obj = self.project.objects.get(oid)
+        path = None
+        if obj is not None:
+            tree = obj.get("sourceTree", "<group>")
+            rel = obj.get("path", "")
+            if tree == "<group>":
+                parent = self.parent.get(oid)
+                base = self.source_root if parent is None else self.path_of(parent)
+            elif tree == "SOURCE_ROOT":
+                base = self.source_root
+            elif tree == "<absolute>":
+                base = "/"
+            else:
+                base = None  # BUILT_PRODUCTS_DIR, SDKROOT, ...
+            if base is not None:
+                path = os.path.normpath(os.path.join(base, rel)) if rel else base
+        self._paths[oid] = path
+        return path
+
+    def rel(self, path: str) -> str:
+        return os.path.relpath(path, self.source_root)
+
+    def target_phases(self, target, isa: str) -> list:
+        objects = self.project.objects
+        return [objects[p] for p in target.get("buildPhases", ()) if p in objects and objects[p].isa == isa]
+
+    def info_plists(self, target) -> set:
+        """Absolute INFOPLIST_FILE paths across the target's build configurations."""
+        objects = self.project.objects
+        config_list = objects.get(target.get("buildConfigurationList"))
+        paths = set()
+        for config_id in (config_list.get("buildConfigurations", ()) if config_list else ()):
+            config = objects.get(config_id)
+            settings = config.get("buildSettings", {}) if config else {}
+            value = settings.get("INFOPLIST_FILE")
+            if value:
+                paths.add(os.path.normpath(os.path.join(self.source_root, value.replace("$(SRCROOT)/", ""))))
+        return paths
+
+    def walk(self, top: str):
+        """Files under ``top``, skipping build output, bundles and nested packages."""
+        stack = [top]
+        while stack:
+            current = stack.pop()
+            try:
+                entries = list(os.scandir(current))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not is_pruned(entry.name):
+                        stack.append(entry.path)
+                else:
+                    yield entry.path
+
+
+class IntegrityCheck:
+    """Runs the checks over a ProjectIndex and collects Findings with fixes."""
+
+    def __init__(self, index: ProjectIndex, checks=CHECKS):
+        self.index = index
+        self.project = index.project
+        self.checks = set(checks)
+        self.findings = []
+        self.file_users = {}  # fileRef id -> [build file id] that some phase lists
+        for build_file in self.project.isa("PBXBuildFile"):
+            ref = build_file.get("fileRef")
+            if ref is not None and build_file.id in index.uses:
+                self.file_users.setdefault(ref, []).append(build_file.id)
+
+    def report(self, check: str, key: str, message: str, severity: str = "error", fix=None):
+        if check in self.checks:
+            self.findings.append(Finding(check, key, message, severity, fix))
+
+    def label(self, oid: str) -> str:
+        obj = self.project.objects.get(oid)
+        return f"{oid} ({obj.comment})" if obj is not None and obj.comment else oid
+
+    # MARK: - Fix helpers
+
+    def _remove_object(self, oid: str):
+        if oid in self.project.objects:
+            self.project.remove_object(oid)
+
+    def _remove_item(self, owner_id: str, key: str, item):
+        owner = self.project.objects.get(owner_id)
+        if owner is not None and item in owner.props[key].items:
+            self.project.remove_item(owner_id, key, item)
+
+    def _remove_phase_entry(self, phase, item):
+        """Drop one phase entry, and its build file if nothing else lists it."""
+        self._remove_item(phase.id, "files", item)
+        build_file = item.value
+        if build_file in self.project.objects and not self.project.referrers(build_file):
+            self._remove_object(build_file)
+
+    # MARK: - Checks
+
+    def run(self) -> list:
+        self.check_references()
+        self.check_build_files()
+        compiled = self.check_targets()
+        self.check_tree(compiled)
+        self.check_packages()
+        return self.findings
+
+    def check_references(self):
+        objects = self.project.objects
+        for obj in list(objects.values()):
+            props = obj.props
+            if not isinstance(props, dict):
+                continue
+            for key in REF_ARRAYS:
+                array = props.get(key)
+                if not array or not hasattr(array, "items"):
+                    continue
+                for item in array.items:
+                    if item.value not in objects:
+                        self.report(
+                            "dangling-reference", item.value,
+                            f"{self.label(obj.id)} {key} lists missing object {item.value}"
+                            + (f" ({item.comment})" if item.comment else ""),
+                            fix=lambda o=obj.id, k=key, i=item: self._remove_item(o, k, i))
+            for key in REF_SCALARS:
+                value = props.get(key)
+                if isinstance(value, str) and value not in objects:
+                    fix = None
+                    if obj.isa == "PBXBuildFile":
+                        fix = lambda o=obj.id: self._remove_object(o)
+                    self.report("dangling-reference", obj.id,
+                                f"{self.label(obj.id)} {key} = {value} names no object", fix=fix)
+
+    def check_build_files(self):
+        for build_file in self.project.isa("PBXBuildFile"):
+            if build_file.get("fileRef") is None and build_file.get("productRef") is None:
+                self.report("dangling-reference", build_file.id,
+                            f"{self.label(build_file.id)} has neither fileRef nor productRef",
+                            fix=lambda o=build_file.id: self._remove_object(o))
+            elif build_file.id not in self.index.uses:
+                self.report("orphan-build-file", build_file.id,
+                            f"{self.label(build_file.id)} is in no build phase", "warning",
+                            fix=lambda o=build_file.id: self._remove_object(o))
+
+        for ref in self.project.isa("PBXFileReference"):
+            path = self.index.path_of(ref.id)
+            if path is None or os.path.lexists(path):
+                continue
+            build_files = self.file_users.get(ref.id, [])
+            where = f" (used by {len(build_files)} build files)" if build_files else ""
+            self.report("missing-file", ref.id,
+                        f"{self.label(ref.id)} points at missing {self.index.rel(path)}{where}",
+                        "error" if build_files else "warning",
+                        fix=lambda r=ref.id, b=tuple(build_files): self._remove_missing(r, b))
+
+    def _remove_missing(self, ref_id: str, build_files: tuple):
+        for build_file in build_files:
+            self._remove_object(build_file)
+        self._remove_object(ref_id)
+
+    def check_targets(self) -> set:
+        """Per-target duplicate and output checks; returns every compiled path."""
+        index = self.index
+        objects = self.project.objects
+        compiled = set()
+        package_dirs = list(index.packages.values())
+        package_sources = [d for p in package_dirs for d in package_target_dirs(p)]
+
+        for target in index.targets:
+            name = target.get("name", target.id)
+            info_plists = index.info_plists(target)
+
+            # Explicit sources: path -> first (build file, phase, item)
+            sources = {}
+            stems = {}
+            for phase in index.target_phases(target, "PBXSourcesBuildPhase"):
+                for item in phase.get("files").items:
+                    build_file = objects.get(item.value)
+                    ref = build_file.get("fileRef") if build_file else None
+                    if ref not in objects:
+                        continue
+                    path = index.path_of(ref) or ref
+                    if path in sources:
+                        first = sources[path][0]
+                        how = "listed twice" if first == item.value else f"also via {self.label(first)}"
+                        self.report("duplicate-compile", item.value,
+                                    f"{name}: {self.index.rel(path)} compiled twice ({how})",
+                                    fix=lambda p=phase, i=item: self._remove_phase_entry(p, i))
+                        continue
+                    sources[path] = (item.value, phase, item)
+                    compiled.add(path)
+                    for package_dir in package_sources:
+                        if path.startswith(package_dir + os.sep):
+                            self.report("duplicate-compile", item.value,
+                                        f"{name}: {self.index.rel(path)} is part of the "
+                                        f"{os.path.basename(package_dir)} package and also compiled by the target",
+                                        fix=lambda p=phase, i=item: self._remove_phase_entry(p, i))
+                    stem = os.path.splitext(os.path.basename(path))[0]
+                    stems.setdefault(stem, []).append(path)
+
+            # Synchronized folders compile everything not excepted
+            for group_id, folder, excluded in index.synced.get(target.id, ()):
+                for path in index.walk(folder):
+                    rel = os.path.relpath(path, folder)
+                    if rel in excluded:
+                        continue
+                    if path in info_plists:
+                        exceptions = [
+                            objects[e] for e in objects[group_id].get("exceptions", ())
+                            if e in objects and objects[e].get("target") == target.id
+                        ]
+                        fix = None
+                        if exceptions and "membershipExceptions" in exceptions[0].props:
+                            fix = lambda e=exceptions[0].id, r=rel: self.project.add_item(e, "membershipExceptions", r)
+                        self.report("multiple-outputs", group_id,
+                                    f"{name}: synchronized folder copies {index.rel(path)}, "
+                                    f"which is also the target's INFOPLIST_FILE", fix=fix)
+                        continue
+                    if not path.endswith(COMPILED_SUFFIXES):
+                        continue
+                    if path in sources:
+                        build_file, phase, item = sources[path]
+                        self.report("duplicate-compile", build_file,
+                                    f"{name}: {index.rel(path)} is in a synchronized folder "
+                                    f"and also listed in Sources",
+                                    fix=lambda p=phase, i=item: self._remove_phase_entry(p, i))
+                        continue
+                    compiled.add(path)
+                    stems.setdefault(os.path.splitext(os.path.basename(path))[0], []).append(path)
+
+            for stem, paths in stems.items():
+                if len(paths) > 1:
+                    self.report("multiple-outputs", stem,
+                                f"{name}: {stem}.o produced by "
+                                + ", ".join(index.rel(p) for p in paths))
+
+            # Resources and embedded products: output name -> first path
+            for isa in ("PBXResourcesBuildPhase", "PBXCopyFilesBuildPhase"):
+                for phase in index.target_phases(target, isa):
+                    outputs = {}
+                    destination = (phase.get("dstSubfolderSpec"), phase.get("dstPath"))
+                    for item in phase.get("files").items:
+                        build_file = objects.get(item.value)
+                        if build_file is None:
+                            continue
+                        ref = build_file.get("fileRef")
+                        ref_obj = objects.get(ref)
+                        if ref_obj is None:
+                            continue
+                        path = index.path_of(ref)
+                        output = ref_obj.get("path") or ref_obj.get("name") or ref
+                        output = os.path.basename(output)
+                        if isa == "PBXResourcesBuildPhase" and (path in info_plists or output == "Info.plist"):
+                            self.report("multiple-outputs", item.value,
+                                        f"{name}: {index.rel(path or ref)} in {phase.comment or isa} "
+                                        f"collides with the target's own Info.plist",
+                                        fix=lambda p=phase, i=item: self._remove_phase_entry(p, i))
+                            continue
+                        if isa == "PBXResourcesBuildPhase" and output.endswith(MERGED_RESOURCE_SUFFIXES):
+                            continue
+                        key = (destination, output)
+                        if key in outputs:
+                            same = outputs[key][0] == (path or ref)
+                            self.report(
+                                "multiple-outputs", item.value,
+                                f"{name}: {output} produced twice by {phase.comment or isa}"
+                                + (" (same file listed twice)" if same else ""),
+                                fix=(lambda p=phase, i=item: self._remove_phase_entry(p, i)) if same else None)
+                            continue
+                        outputs[key] = (path or ref, item)
+        return compiled
+
+    def check_tree(self, compiled: set):
+        """Swift files on disk or in groups that no target compiles."""
+        index = self.index
+        objects = self.project.objects
+        referenced = {}
+        for ref in self.project.isa("PBXFileReference"):
+            path = index.path_of(ref.id)
+            if path is not None:
+                referenced[path] = ref.id
+                if path.endswith(".swift") and path not in compiled and os.path.exists(path):
+                    self.report("not-in-target", ref.id,
+                                f"{index.rel(path)} is in the project but no target compiles it", "warning")
+
+        # Top-level groups are the target directories (ShuttlX, Widgets, ...)
+        main_group = objects.get(index.root.get("mainGroup"))
+        roots = []
+        for child in (main_group.get("children", ()) if main_group else ()):
+            group = objects.get(child)
+            if group is not None and group.isa in GROUP_ISAS and group.get("path"):
+                roots.append(index.path_of(child))
+        synced_dirs = {folder for entries in index.synced.values() for _, folder, _ in entries}
+        for top in roots:
+            if top is None or top in synced_dirs or not os.path.isdir(top):
+                continue
+            for path in index.walk(top):
+                if path.endswith(".swift") and path not in compiled and path not in referenced:
+                    placement = self.placement(path)
+                    fix = (lambda p=path, pl=placement: self._add_source(p, *pl)) if placement else None
+                    where = f" (would add to {placement[0].get('name')})" if placement else ""
+                    self.report("not-in-target", index.rel(path),
+                                f"{index.rel(path)} is not in the project{where}", fix=fix)
+
+    def check_packages(self):
+        for dependency in self.project.isa("XCSwiftPackageProductDependency"):
+            package_dir = self.index.packages.get(dependency.get("package"))
+            if package_dir is None:
+                continue  # remote package
+            product = dependency.get("productName")
+            if product not in package_products(package_dir):
+                self.report("package-product", dependency.id,
+                            f"{product} is not a product of {self.index.rel(os.path.join(package_dir, 'Package.swift'))}")
+
+    # MARK: - Adding sources
+
+    def placement(self, path: str):
+        """(target, group, path relative to group) for a new source file, or None.
+
+        The group is the deepest one (with its own path) that contains the
+        file; the target is the one compiling the most files under that
+        group's directory, searching up the tree if none does.
+        """
+        index = self.index
+        objects = self.project.objects
+        if not hasattr(self, "_group_dirs"):
+            self._group_dirs = {}
+            for group in self.project.isa("PBXGroup"):
+                if group.get("path"):
+                    directory = index.path_of(group.id)
+                    if directory is not None:
+                        self._group_dirs.setdefault(directory, group)
+            self._target_sources = {}
+            for target in index.targets:
+                for phase in index.target_phases(target, "PBXSourcesBuildPhase"):
+                    for item in phase.get("files").items:
+                        build_file = objects.get(item.value)
+                        ref = build_file.get("fileRef") if build_file else None
+                        source = index.path_of(ref) if ref in objects else None
+                        if source is not None:
+                            self._target_sources.setdefault(target.id, []).append(source)
+
+        directory = os.path.dirname(path)
+        group = None
+        while directory.startswith(index.source_root) and directory != index.source_root:
+            if group is None:
+                group = self._group_dirs.get(directory)
+            if group is not None:
+                counts = {
+                    target_id: sum(1 for s in sources if s.startswith(directory + os.sep))
+                    for target_id, sources in self._target_sources.items()
+                }
+                best = max(counts, key=counts.get, default=None)
+                if best is not None and counts[best]:
+                    target = objects[best]
+                    group_dir = index.path_of(group.id)
+                    return target, group, os.path.relpath(path, group_dir)
+            directory = os.path.dirname(directory)
+        return None
+
+    def _add_source(self, path: str, target, group, rel_path: str):
+        project = self.project
+        phases = self.index.target_phases(target, "PBXSourcesBuildPhase")
+        if not phases:
+            return
+        filename = os.path.basename(path)
+        ref_id = new_id(f"ref:{rel_path}:{group.id}", project.objects)
+        project.add_object(ref_id, [
+            ("isa", "PBXFileReference", None),
+            ("lastKnownFileType", "sourcecode.swift", None),
+            ("path", rel_path, None),
+            ("sourceTree", "<group>", None),
+        ], filename)
+        build_id = new_id(f"build:{rel_path}:{target.id}", project.objects)
+        project.add_object(build_id, [
+            ("isa", "PBXBuildFile", None),
+            ("fileRef", ref_id, filename),
+        ], f"{filename} in Sources")
+        project.add_item(group.id, "children", ref_id, filename)
+        project.add_item(phases[0].id, "files", build_id, f"{filename} in Sources")
+
+
+def analyze(project_file: str, checks=CHECKS, fix: bool = False) -> dict:
+    """Run the checks (and optionally the fixes) on one project file."""
+    t0 = time.perf_counter()
+    project = PBXProject.load(project_file)
+    parsed = time.perf_counter()
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(project_file)))
+    checker = IntegrityCheck(ProjectIndex(project, project_dir), checks)
+    findings = checker.run()
+    checked = time.perf_counter()
+    if fix:
+        for finding in findings:
+            if finding.fix is not None:
+                finding.fix()
+                finding.fixed = True
+        if project.modified:
+            project.save()
+    return {
+        "project": project_file,
+        "objects": len(project.objects),
+        "findings": findings,
+        "written": fix and project.modified,
+        "timings": {"parseMs": (parsed - t0) * 1000, "checkMs": (checked - parsed) * 1000,
+                    "totalMs": (time.perf_counter() - t0) * 1000},
+    }
+
+
+def main():
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Check ShuttlX.xcodeproj against the source tree")
+    parser.add_argument("--project", default=os.path.join(project_dir, "ShuttlX.xcodeproj", "project.pbxproj"),
+                        help="project.pbxproj to check (default: ShuttlX.xcodeproj)")
+    parser.add_argument("--fix", action="store_true", help="Apply the available fixes")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--checks", type=lambda v: v.split(","), default=list(CHECKS),
+                        help=f"Comma-separated subset of: {', '.join(CHECKS)}")
+    args = parser.parse_args()
+
+    unknown = set(args.checks) - set(CHECKS)
+    if unknown:
+        print(f"❌ unknown checks: {', '.join(sorted(unknown))}")
+        sys.exit(2)
+
+    try:
+        result = analyze(args.project, args.checks, args.fix)
+    except (OSError, PBXProjError) as e:
+        print(f"❌ {args.project}: {e}")
+        sys.exit(1)
+
+    findings = result["findings"]
+    unresolved = [f for f in findings if f.severity == "error" and not f.fixed]
+    if args.json:
+        json.dump(dict(result, findings=[f.to_json() for f in findings]), sys.stdout, indent=2)
+        print()
+    else:
+        for f in findings:
+            icon = "✅" if f.fixed else ("⚠️" if f.severity == "warning" else "❌")
+            print(f"{icon} {f.rule}: {f.message}" + (" (fixed)" if f.fixed else ""))
+        fixed = sum(f.fixed for f in findings)
+        print(f"📋 {result['objects']} objects, {len(findings)} findings, {fixed} fixed, "
+              f"{len(unresolved)} unresolved ({result['timings']['totalMs']:.0f} ms)")
+        if result["written"]:
+            print(f"💾 Updated {args.project}")
+
+    if unresolved:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Rule engine for checking and fixing Info.plist files.
+
+Each plist is read once and parsed once into a PlistDocument, every rule that
+applies to its target type runs against that in-memory document, and fixes
+are written back in a single atomic write. XML and binary plists share one
+interface:
+
+- XML plists are tokenized, not regex-substituted: the top-level dictionary's
+  entries are indexed with their source spans, so removing a key drops exactly
+  its lines and adding one inserts it before the closing </dict> with the
+  file's own indentation. Everything else is kept byte for byte. Files are
+  decoded strictly; a file that is not valid UTF-8 is reported, not mangled.
+- Binary plists go through plistlib and are written back as binary with their
+  key order kept.
+
+Rules are small classes with a `check(doc, target)` method returning Findings;
+a Finding may carry a fix. The default rule set covers the WatchKit key
+conflict that fix_watchkit_infoplist_keys.py handles, keys that must not
+appear in a given target type and keys every target type needs.
+
+Target types: ios-app, watch-app, widget-extension, watch-widget-extension.
+
+Usage:
+    python3 tests/plist_rules.py                       # scan the project and fix
+    python3 tests/plist_rules.py --dry-run --json      # report only, as JSON
+    python3 tests/plist_rules.py "ShuttlX Watch App/Info.plist" --rules key-conflict
+"""
+
+import argparse
+import json
+import os
+import plistlib
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from atomic_io import commit_temp, temp_sibling
+
+TARGET_TYPES = ("ios-app", "watch-app", "widget-extension", "watch-widget-extension")
+
+_XML_TOKEN = re.compile(rb"<!--.*?-->|<\?.*?\?>|<!DOCTYPE[^>]*>|<(/?)([A-Za-z]+)[^>]*?(/?)>|[^<]+", re.S)
+
+
+class PlistError(ValueError):
+    """A plist could not be parsed."""
+
+
+# MARK: - Documents
+
+
+class _XMLEntry:
+    __slots__ = ("key", "start", "end", "value_start", "value_end")
+
+    def __init__(self, key, start, end, value_start, value_end):
+        self.key, self.start, self.end = key, start, end
+        self.value_start, self.value_end = value_start, value_end
+
+
+class PlistDocument:
+    """A plist's top-level dictionary, editable without losing its formatting."""
+
+    def __init__(self, path: str, data: bytes):
+        self.path = path
+        self.original = data
+        self.binary = data.startswith(b"bplist")
+        self.changed = False
+        if self.binary:
+            try:
+                self._dict = plistlib.loads(data)
+            except Exception as e:
+                raise PlistError(f"invalid binary plist: {e}") from None
+            if not isinstance(self._dict, dict):
+                raise PlistError("top-level object is not a dictionary")
+        else:
+            try:
+                data.decode("utf-8")
+            except UnicodeDecodeError as e:
+                raise PlistError(f"not valid UTF-8 at byte {e.start}") from None
+            self._data = data
+            self._index()
+
+    @property
+    def format(self) -> str:
+        return "binary" if self.binary else "xml"
+
+    def _index(self):
+        """Index the top-level <dict>'s entries (nested values are skipped)."""
+        data = self._data
+        depth = 0
+        self.entries = []
+        self._values = {}
+        self.dict_close = None
+        pending_key = None
+        value_start = None
+        for m in _XML_TOKEN.finditer(data):
+            closing, tag, empty = m.group(1), m.group(2), m.group(3)
+            if tag is None:
+                continue
+            tag = tag.decode()
+            if tag == "plist":
+                continue
+            if not closing:
+                if depth == 1:
+                    if tag == "key":
+                        key_end = data.index(b"</key>", m.end())
+                        pending_key = (_unescape(data[m.end():key_end].decode()), m.start())
+                        continue
+                    value_start = m.start()
+                if empty:
+                    if depth == 1:
+                        self._add(pending_key, value_start, m.end())
+                        pending_key = None
+                    continue
+                depth += 1
+            else:
+                if tag == "key" and depth == 1:
+                    continue
+                depth -= 1
+                if depth == 1 and pending_key is not None:
+                    self._add(pending_key, value_start, m.end())
+                    pending_key = None
+                elif depth == 0 and tag == "dict":
+                    self.dict_close = m.start()
+        if self.dict_close is None:
+            raise PlistError("no top-level <dict>")
+
+    def _add(self, pending_key, value_start, value_end):
+        if pending_key is None:
+            raise PlistError(f"value without a key at byte {value_start}")
+        key, start = pending_key
+        self.entries.append(_XMLEntry(key, start, value_end, value_start, value_end))
+
+    # MARK: Reading
+
+    def keys(self) -> list:
+        if self.binary:
+            return list(self._dict)
+        return [e.key for e in self.entries]
+
+    def __contains__(self, key) -> bool:
+        if self.binary:
+            return key in self._dict
+        return any(e.key == key for e in self.entries)
+
+    def get(self, key, default=None):
+        """The value of a top-level key (XML values are parsed on first use)."""
+        if self.binary:
+            return self._dict.get(key, default)
+        for entry in reversed(self.entries):
+            if entry.key == key:
+                if id(entry) not in self._values:
+                    fragment = self._data[entry.value_start:entry.value_end]
+                    wrapped = b"<plist><dict><key>k</key>" + fragment + b"</dict></plist>"
+                    self._values[id(entry)] = plistlib.loads(wrapped)["k"]
+                return self._values[id(entry)]
+        return default
+
+    # MARK: Editing
+
+    def remove(self, key) -> int:
+        """Remove every occurrence of a top-level key; returns how many."""
+        if self.binary:
+            if key in self._dict:
+                del self._dict[key]
+                self.changed = True
+                return 1
+            return 0
+        doomed = [e for e in self.entries if e.key == key]
+        if not doomed:
+            return 0
+        data = self._data
+        for entry in sorted(doomed, key=lambda e: e.start, reverse=True):
+            start, end = _whole_lines(data, entry.start, entry.end)
+            data = data[:start] + data[end:]
+        self._data = data
+        self.changed = True
+        self._index()
+        return len(doomed)
+
+    def set(self, key, value):
+        """Add a top-level key (at the end of the dictionary) or replace its value."""
+        if self.binary:
+            self._dict[key] = value
+            self.changed = True
+            return
+        if key in self:
+            self.remove(key)
+        indent = self._indent()
+        body = plistlib.dumps({key: value}, sort_keys=False)
+        inner = body[body.index(b"<dict>") + len(b"<dict>\n"):body.rindex(b"</dict>")]
+        inner = b"".join(indent + line[1:] + b"\n" for line in inner.splitlines())
+        at = self._data.rfind(b"\n", 0, self.dict_close) + 1
+        self._data = self._data[:at] + inner + self._data[at:]
+        self.changed = True
+        self._index()
+
+    def _indent(self) -> bytes:
+        if self.entries:
+            first = self.entries[0].start
+            line_start = self._data.rfind(b"\n", 0, first) + 1
+            return self._data[line_start:first]
+        return b"\t"
+
+    def serialize(self) -> bytes:
+        if self.binary:
+            if not self.changed:
+                return self.original
+            return plistlib.dumps(self._dict, fmt=plistlib.FMT_BINARY, sort_keys=False)
+        return self._data
+
+    def save(self):
+        """Write the document back atomically if anything changed."""
+        if not self.changed:
+            return False
+        fd, tmp = temp_sibling(self.path)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.serialize())
+            commit_temp(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return True
+
+
+def _unescape(text: str) -> str:
+    return text.replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&")
+
+
+def _whole_lines(data: bytes, start: int, end: int) -> tuple:
+    """Widen a span to whole lines when nothing else shares them."""
+    line_start = data.rfind(b"\n", 0, start) + 1
+    line_end = data.find(b"\n", end)
+    line_end = len(data) if line_end == -1 else line_end
+    if not data[line_start:start].strip() and not data[end:line_end].strip():
+        return line_start, min(line_end + 1, len(data))
+    return start, end
+
+
+# MARK: - Targets and rules
+
+
+def target_type(doc: PlistDocument) -> str:
+    """Classify a plist by what it contains and where it lives."""
+    in_watch_dir = "Watch" in os.path.dirname(doc.path)
+    if "NSExtension" in doc:
+        return "watch-widget-extension" if in_watch_dir else "widget-extension"
+    if "WKApplication" in doc or "WKWatchKitApp" in doc or in_watch_dir:
+        return "watch-app"
+    return "ios-app"
+
+
+class Finding:
+    """One rule violation; ``fix`` (if any) edits the document in place."""
+
+    def __init__(self, rule: str, key: str, message: str, severity: str = "error", fix=None):
+        self.rule, self.key, self.message, self.severity, self.fix = rule, key, message, severity, fix
+        self.fixed = False
+
+    def to_json(self) -> dict:
+        return {"rule": self.rule, "key": self.key, "severity": self.severity,
+                "message": self.message, "fixable": self.fix is not None, "fixed": self.fixed}
+
+
+class Rule:
+    """Base rule: ``targets`` limits which target types it runs on (None = all)."""
+
+    name = "rule"
+
+    def __init__(self, targets=None):
+        self.targets = set(targets) if targets else None
+
+    def applies(self, target: str) -> bool:
+        return self.targets is None or target in self.targets
+
+    def check(self, doc: PlistDocument, target: str) -> list:
+        raise NotImplementedError
+
+
+class KeyConflictRule(Rule):
+    """Two keys that must not both be present; the fix drops ``drop``."""
+
+    name = "key-conflict"
+
+    def __init__(self, keep: str, drop: str, targets=None):
+        super().__init__(targets)
+        self.keep, self.drop = keep, drop
+
+    def check(self, doc, target):
+        if self.keep in doc and self.drop in doc:
+            return [Finding(self.name, self.drop, f"both {self.keep} and {self.drop} are present",
+                            fix=lambda d: d.remove(self.drop))]
+        return []
+
+
+class ForbiddenKeyRule(Rule):
+    """Keys that must not appear in the given target types."""
+
+    name = "forbidden-key"
+
+    def __init__(self, keys, targets, reason: str = ""):
+        super().__init__(targets)
+        self.keys, self.reason = tuple(keys), reason
+
+    def check(self, doc, target):
+        return [
+            Finding(self.name, key, f"{key} is not allowed in a {target}" + (f" ({self.reason})" if self.reason else ""),
+                    fix=lambda d, k=key: d.remove(k))
+            for key in self.keys if key in doc
+        ]
+
+
+class RequiredKeyRule(Rule):
+    """A key each of the given target types needs; fixable when a default is known."""
+
+    name = "required-key"
+    _NO_DEFAULT = object()
+
+    def __init__(self, key: str, targets=None, default=_NO_DEFAULT, severity: str = "error"):
+        super().__init__(targets)
+        self.key, self.default, self.severity = key, default, severity
+
+    def check(self, doc, target):
+        if self.key in doc:
+            return []
+        fix = None if self.default is self._NO_DEFAULT else (lambda d: d.set(self.key, self.default))
+        return [Finding(self.name, self.key, f"{self.key} is missing from a {target}", self.severity, fix)]
+
+
+class DuplicateKeyRule(Rule):
+    """A top-level key written twice (plistlib and Xcode keep only the last)."""
+
+    name = "duplicate-key"
+
+    def check(self, doc, target):
+        if doc.binary:
+            return []
+        seen, findings = set(), []
+        for key in doc.keys():
+            if key in seen:
+                findings.append(Finding(self.name, key, f"{key} appears more than once", "warning"))
+            seen.add(key)
+        return findings
+
+
+EXTENSIONS = ("widget-extension", "watch-widget-extension")
+
+DEFAULT_RULES = (
+    KeyConflictRule("WKApplication", "WKWatchKitApp", targets=("watch-app",)),
+    ForbiddenKeyRule(("WKApplication", "WKWatchKitApp", "WKRunsIndependentlyOfCompanionApp"),
+                     targets=("ios-app",) + EXTENSIONS, reason="watchOS app keys"),
+    ForbiddenKeyRule(("LSRequiresIPhoneOS", "UIApplicationSceneManifest"),
+                     targets=("watch-app",) + EXTENSIONS, reason="iOS app keys"),
+    RequiredKeyRule("CFBundleIdentifier", default="$(PRODUCT_BUNDLE_IDENTIFIER)"),
+    RequiredKeyRule("CFBundleExecutable", default="$(EXECUTABLE_NAME)"),
+    RequiredKeyRule("CFBundleVersion", default="$(CURRENT_PROJECT_VERSION)"),
+    RequiredKeyRule("CFBundleShortVersionString", default="$(MARKETING_VERSION)"),
+    RequiredKeyRule("WKApplication", targets=("watch-app",), default=True),
+    RequiredKeyRule("NSExtension", targets=EXTENSIONS),
+    RequiredKeyRule("NSHealthShareUsageDescription", targets=("ios-app", "watch-app")),
+    RequiredKeyRule("NSHealthUpdateUsageDescription", targets=("ios-app", "watch-app")),
+    DuplicateKeyRule(),
+)
+
+RULE_NAMES = sorted({rule.name for rule in DEFAULT_RULES})
+
+
+def select_rules(names) -> tuple:
+    if not names:
+        return DEFAULT_RULES
+    unknown = set(names) - set(RULE_NAMES)
+    if unknown:
+        raise ValueError(f"unknown rules: {', '.join(sorted(unknown))}")
+    return tuple(rule for rule in DEFAULT_RULES if rule.name in names)
+
+
+# MARK: - Engine
+
+
+def process_file(path: str, rules=DEFAULT_RULES, dry_run: bool = False) -> dict:
+    """Read, check and (unless ``dry_run``) fix one plist; returns its report."""
+    report = {"path": path, "format": None, "target": None, "findings": [], "written": False}
+    try:
+        with open(path, "rb") as f:
+            doc = PlistDocument(path, f.read())
+    except (OSError, PlistError) as e:
+        report["error"] = str(e)
+        return report
+    target = target_type(doc)
+    report["format"], report["target"] = doc.format, target
+
+    findings = []
+    for rule in rules:
+        if rule.applies(target):
+            findings.extend(rule.check(doc, target))
+    if not dry_run:
+        for finding in findings:
+            if finding.fix is not None:
+                finding.fix(doc)
+                finding.fixed = True
+        report["written"] = doc.save()
+    report["findings"] = [f.to_json() for f in findings]
+    return report
+
+
+def process_files(paths, rules=DEFAULT_RULES, dry_run: bool = False, workers: int = 8) -> list:
+    """Run process_file over many plists on a thread pool, keeping input order."""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(lambda p: process_file(p, rules, dry_run), paths))
+
+
+def summarize(reports: list) -> dict:
+    findings = [f for r in reports for f in r["findings"]]
+    return {
+        "files": len(reports),
+        "errors": sum(1 for r in reports if "error" in r),
+        "findings": len(findings),
+        "fixed": sum(1 for f in findings if f["fixed"]),
+        "unresolved": sum(1 for f in findings if not f["fixed"] and f["severity"] == "error"),
+        "written": sum(1 for r in reports if r["written"]),
+    }
+
+
+def main():
+    from fix_watchkit_infoplist_keys import find_infoplist_files
+
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Check and fix Info.plist files with a rule set")
+    parser.add_argument("paths", nargs="*", help="Plists to process (default: every Info.plist in the project)")
+    parser.add_argument("--dry-run", action="store_true", help="Report only; exit 1 on unresolved errors")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--rules", type=lambda v: v.split(","), help=f"Comma-separated subset of: {', '.join(RULE_NAMES)}")
+    parser.add_argument("--workers", type=int, default=8, help="Threads (default: 8)")
+    args = parser.parse_args()
+
+    try:
+        rules = select_rules(args.rules)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+    paths = [os.path.abspath(os.path.join(project_dir, p)) for p in args.paths]
+    if not paths:
+        paths, _ = find_infoplist_files(project_dir)
+
+    reports = process_files(paths, rules, args.dry_run, args.workers)
+    summary = summarize(reports)
+
+    if args.json:
+        json.dump({"dryRun": args.dry_run, "summary": summary, "files": reports}, sys.stdout, indent=2)
+        print()
+    else:
+        for report in reports:
+            rel = os.path.relpath(report["path"], project_dir)
+            if "error" in report:
+                print(f"❌ {rel}: {report['error']}")
+                continue
+            for f in report["findings"]:
+                icon = "✅" if f["fixed"] else ("⚠️" if f["severity"] == "warning" else "❌")
+                print(f"{icon} {rel} [{report['target']}] {f['rule']}: {f['message']}"
+                      + (" (fixed)" if f["fixed"] else ""))
+        print(f"📋 {summary['files']} plists, {summary['findings']} findings, "
+              f"{summary['fixed']} fixed, {summary['unresolved']} unresolved")
+
+    if summary["errors"] or (args.dry_run and summary["unresolved"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
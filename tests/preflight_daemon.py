@@ -0,0 +1,665 @@
+#!/usr/bin/env python3
+"""
+Resident preflight service for the build scripts.
+
+run_preflight_checks in build_and_test_both_platforms.sh (and the preflight
+block of build_for_physical_device.sh) start fresh Python processes that
+re-parse project.pbxproj and re-walk the tree on every build. This daemon does
+that once, keeps the parsed project graph and the Watch plist results in
+memory, watches the tree and revalidates only what changed, so "is the tree
+clean?" is a dictionary lookup.
+
+"Clean" means exactly what the two scripts check: no null build files in a
+Resources phase (remove_infoplist_from_resources.py) and no Watch Info.plist
+with both WKApplication and WKWatchKitApp (fix_watchkit_infoplist_keys.py).
+
+Watching uses inotify (through ctypes) on Linux. Elsewhere, or with --poll,
+tracked files and directories are stat'ed before every answer and once a
+second, which is still cheap because the pruned directory list is small.
+
+Protocol: the daemon listens on a Unix socket and records its location and pid
+in build/.preflight/daemon.json. A client sends one JSON line, e.g.
+{"cmd": "status"}, and reads one JSON line back. Commands: ping, status, fix,
+stop.
+
+Usage:
+    python3 tests/preflight_daemon.py start            # background
+    python3 tests/preflight_daemon.py status           # exit 0 clean, 1 dirty, 3 no daemon
+    python3 tests/preflight_daemon.py fix              # apply the scripts' fixes
+    python3 tests/preflight_daemon.py check            # one-shot, no daemon
+    python3 tests/preflight_daemon.py selftest         # change tracking on a scratch tree
+    python3 tests/preflight_daemon.py stop
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import selectors
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+from fix_watchkit_infoplist_keys import WATCHKIT_RULES, find_infoplist_files, is_pruned
+from pbxproj_graph import PBXProjError, PBXProject
+from plist_rules import process_file
+from remove_infoplist_from_resources import find_null_resources
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_DIR = os.path.join(PROJECT_DIR, "build", ".preflight")
+INFO_FILE = os.path.join(STATE_DIR, "daemon.json")
+LOG_FILE = os.path.join(STATE_DIR, "daemon.log")
+PBXPROJ = os.path.join(PROJECT_DIR, "ShuttlX.xcodeproj", "project.pbxproj")
+
+POLL_INTERVAL_S = 1.0
+CLIENT_TIMEOUT_S = 5.0
+
+EXIT_CLEAN, EXIT_DIRTY, EXIT_NO_DAEMON = 0, 1, 3
+
+
+def socket_path() -> str:
+    """Socket next to the state files, or in the temp dir if that path is too long."""
+    path = os.path.join(STATE_DIR, "daemon.sock")
+    if len(path.encode()) < 100:
+        return path
+    digest = hashlib.blake2b(PROJECT_DIR.encode(), digest_size=6).hexdigest()
+    return os.path.join(tempfile.gettempdir(), f"shuttlx-preflight-{digest}.sock")
+
+
+# MARK: - Watchers
+
+
+class InotifyWatcher:
+    """Linux inotify on every tracked directory (inotify is not recursive)."""
+
+    IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE = 0x2, 0x4, 0x8
+    IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x40, 0x80, 0x100, 0x200
+    IN_DELETE_SELF, IN_MOVE_SELF, IN_Q_OVERFLOW, IN_IGNORED = 0x400, 0x800, 0x4000, 0x8000
+    IN_ISDIR = 0x40000000
+    MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+            | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}  # wd -> directory
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def watch(self, directories) -> list:
+        """Watch directories not watched yet; returns them.
+
+        Existing watch descriptors are kept, so events already queued under
+        them are still delivered. Directories no longer listed are unwatched.
+        """
+        wanted = set(directories)
+        for wd, directory in list(self._dirs.items()):
+            if directory not in wanted:
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._dirs[wd]
+        watched = set(self._dirs.values())
+        added = []
+        for directory in directories:
+            if directory in watched:
+                continue
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+            if wd >= 0:
+                self._dirs[wd] = directory
+                added.append(directory)
+        return added
+
+    def changes(self) -> tuple:
+        """Drain pending events: (changed file paths, tree structure changed)."""
+        paths, tree_changed = set(), False
+        while True:
+            try:
+                data = os.read(self._fd, 1 << 16)
+            except BlockingIOError:
+                return paths, tree_changed
+            pos = 0
+            while pos < len(data):
+                wd, mask, _, length = self.EVENT.unpack_from(data, pos)
+                name = data[pos + self.EVENT.size:pos + self.EVENT.size + length].rstrip(b"\0")
+                pos += self.EVENT.size + length
+                if mask & self.IN_Q_OVERFLOW:
+                    tree_changed = True
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None:
+                    continue
+                if mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF | self.IN_IGNORED):
+                    # Forget the descriptor so a directory recreated at the
+                    # same path gets a fresh watch on the next rescan
+                    if not mask & self.IN_IGNORED:
+                        self._libc.inotify_rm_watch(self._fd, wd)
+                    del self._dirs[wd]
+                    tree_changed = True
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_DELETE
+                                                    | self.IN_MOVED_FROM | self.IN_MOVED_TO):
+                    tree_changed = True
+                paths.add(path)
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Portable fallback: compare stat results of tracked files and directories."""
+
+    def __init__(self):
+        self._files = {}
+        self._dirs = {}
+
+    def fileno(self):
+        return None
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def watch(self, directories, files=()) -> list:
+        """Track directories and files; returns the directories that are new.
+
+        Known paths keep their last stat, so a change made since is still seen.
+        """
+        added = [d for d in directories if d not in self._dirs]
+        self._dirs = {d: self._dirs[d] if d in self._dirs else self._stat(d) for d in directories}
+        self.track(files)
+        return added
+
+    def track(self, files):
+        # A file seen for the first time has no stat yet, so the next poll
+        # checks it once more in case it was written after it was read
+        self._files = {f: self._files.get(f) for f in files}
+
+    def changes(self) -> tuple:
+        paths = set()
+        for path, before in self._files.items():
+            now = self._stat(path)
+            if now != before:
+                self._files[path] = now
+                paths.add(path)
+        tree_changed = False
+        for path, before in self._dirs.items():
+            now = self._stat(path)
+            if now is None or before is None or now[0] != before[0]:
+                self._dirs[path] = now
+                tree_changed = True
+        return paths, tree_changed
+
+    def close(self):
+        pass
+
+
+# MARK: - State
+
+
+class PreflightState:
+    """What the preflight scripts would find, kept current incrementally."""
+
+    def __init__(self, project_dir: str = PROJECT_DIR, pbxproj: str = PBXPROJ):
+        self.project_dir = project_dir
+        self.pbxproj = pbxproj
+        self.project_issues = []
+        self.plist_issues = {}  # plist path -> [messages]
+        self.plists = []
+        self.dirs = []
+        self.revalidations = 0
+
+    # Scanning
+
+    def scan_tree(self) -> set:
+        """Re-list Watch plists and the directories to watch; check new plists.
+
+        Returns the plists that were checked.
+        """
+        cache = {"dirs": {}, "files": {}}
+        plists, watch_dirs = find_infoplist_files(self.project_dir, cache)
+        self.dirs = [os.path.normpath(os.path.join(self.project_dir, rel)) for rel in cache["dirs"]]
+        self.dirs.append(os.path.dirname(self.pbxproj))
+        watched = [p for p in plists if any(d in p for d in watch_dirs)]
+        for gone in set(self.plist_issues) - set(watched):
+            del self.plist_issues[gone]
+        checked = set()
+        for plist in watched:
+            if plist not in self.plist_issues:
+                self.check_plist(plist)
+                checked.add(plist)
+        self.plists = watched
+        return checked
+
+    def check_project(self):
+        self.revalidations += 1
+        try:
+            project = PBXProject.load(self.pbxproj)
+        except (OSError, PBXProjError) as e:
+            self.project_issues = [f"cannot parse project: {e}"]
+            return
+        self.project_issues = [
+            f"null build file {b.id} in Resources" for b in find_null_resources(project)
+        ]
+
+    def check_plist(self, plist: str):
+        self.revalidations += 1
+        report = process_file(plist, WATCHKIT_RULES, dry_run=True)
+        if "error" in report:
+            self.plist_issues[plist] = [report["error"]]
+        else:
+            self.plist_issues[plist] = [f["message"] for f in report["findings"]]
+
+    def full_check(self):
+        self.plist_issues = {}
+        self.scan_tree()
+        self.check_project()
+
+    def recheck_under(self, directories) -> bool:
+        """List directories that were not watched until now; True if a rescan is due.
+
+        Anything written there between the rescan and the new watch being
+        added produced no event, so each directory is read again: its Watch
+        Info.plist is checked, and a subdirectory the rescan did not see
+        means the tree has to be scanned again.
+        """
+        known = set(self.dirs)
+        rescan = False
+        for directory in directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not is_pruned(entry.name) and entry.path not in known:
+                                rescan = True
+                        elif entry.name == "Info.plist" and "Watch" in directory:
+                            if entry.path not in self.plist_issues:
+                                self.plists.append(entry.path)
+                            self.check_plist(entry.path)
+            except OSError:
+                rescan = True
+        return rescan
+
+    def apply(self, paths, tree_changed: bool):
+        """Revalidate only what the changed paths affect; True if the tree changed."""
+        for path in paths:
+            if path in self.plist_issues:
+                tree_changed = tree_changed or not os.path.exists(path)
+            elif os.path.basename(path) == "Info.plist":
+                # A new plist: the rescan finds and checks it
+                tree_changed = True
+        checked = self.scan_tree() if tree_changed else set()
+        for path in paths:
+            if path == self.pbxproj:
+                self.check_project()
+            elif path in self.plist_issues and path not in checked:
+                self.check_plist(path)
+        return tree_changed
+
+    # Answers
+
+    def status(self) -> dict:
+        issues = [f"project.pbxproj: {m}" for m in self.project_issues]
+        for plist, messages in sorted(self.plist_issues.items()):
+            rel = os.path.relpath(plist, self.project_dir)
+            issues.extend(f"{rel}: {m}" for m in messages)
+        return {"clean": not issues, "issues": issues, "plists": len(self.plists),
+                "watchedDirs": len(self.dirs), "revalidations": self.revalidations}
+
+    def fix(self) -> list:
+        """Apply the same fixes the scripts would; returns what was done."""
+        done = []
+        project = PBXProject.load(self.pbxproj)
+        nulls = find_null_resources(project)
+        for build_file in nulls:
+            project.remove_object(build_file.id)
+            done.append(f"removed null build file {build_file.id}")
+        if nulls:
+            project.save()
+        for plist in self.plists:
+            report = process_file(plist, WATCHKIT_RULES)
+            if report.get("written"):
+                done.append(f"removed WKWatchKitApp from {os.path.relpath(plist, self.project_dir)}")
+        self.full_check()
+        return done
+
+
+# MARK: - Server
+
+
+def make_watcher(force_poll: bool):
+    if not force_poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher()
+
+
+class Monitor:
+    """A PreflightState kept current by a watcher."""
+
+    def __init__(self, state: PreflightState, watcher):
+        self.state = state
+        self.watcher = watcher
+        state.full_check()
+        self._settle(self._rewatch())
+
+    def _rewatch(self) -> list:
+        if isinstance(self.watcher, PollingWatcher):
+            return self.watcher.watch(self.state.dirs, self.state.plists + [self.state.pbxproj])
+        return self.watcher.watch(self.state.dirs)
+
+    def _settle(self, added):
+        """Catch up on directories that changed before their watch existed."""
+        while added:
+            if self.state.recheck_under(added):
+                self.state.scan_tree()
+            added = self._rewatch()
+
+    def refresh(self):
+        paths, tree_changed = self.watcher.changes()
+        if paths or tree_changed:
+            if self.state.apply(paths, tree_changed):
+                self._settle(self._rewatch())
+            elif isinstance(self.watcher, PollingWatcher):
+                self.watcher.track(self.state.plists + [self.state.pbxproj])
+
+
+def serve(force_poll: bool = False):
+    """Run the daemon in the foreground until a stop request or signal."""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    state = PreflightState()
+    t0 = time.perf_counter()
+    watcher = make_watcher(force_poll)
+    monitor = Monitor(state, watcher)
+
+    path = socket_path()
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(16)
+    with open(INFO_FILE, "w") as f:
+        json.dump({"pid": os.getpid(), "socket": path,
+                   "watcher": type(watcher).__name__, "startedAt": time.time()}, f)
+    print(f"Preflight daemon pid {os.getpid()} on {path} ({type(watcher).__name__}, "
+          f"initial check {time.perf_counter() - t0:.3f} s)", flush=True)
+
+    selector = selectors.DefaultSelector()
+    selector.register(server, selectors.EVENT_READ, "client")
+    if watcher.fileno() is not None:
+        selector.register(watcher.fileno(), selectors.EVENT_READ, "fs")
+
+    running = True
+    try:
+        while running:
+            events = selector.select(POLL_INTERVAL_S)
+            # Always catch up before answering, so a reply never lags an edit
+            monitor.refresh()
+            for key, _ in events:
+                if key.data != "client":
+                    continue
+                conn, _ = server.accept()
+                with conn:
+                    running = handle_client(conn, state, monitor.refresh)
+    finally:
+        selector.close()
+        server.close()
+        watcher.close()
+        for leftover in (path, INFO_FILE):
+            if os.path.exists(leftover):
+                os.unlink(leftover)
+
+
+def handle_client(conn, state: PreflightState, refresh) -> bool:
+    """Answer one request; returns False when asked to stop."""
+    conn.settimeout(CLIENT_TIMEOUT_S)
+    t0 = time.perf_counter()
+    try:
+        line = conn.makefile("r").readline()
+        request = json.loads(line) if line.strip() else {}
+    except (OSError, ValueError):
+        return True
+    cmd = request.get("cmd")
+    keep_running = True
+    if cmd == "ping":
+        reply = {"ok": True}
+    elif cmd == "status":
+        refresh()
+        reply = {"ok": True, **state.status()}
+    elif cmd == "fix":
+        refresh()
+        try:
+            reply = {"ok": True, "fixed": state.fix(), **state.status()}
+        except (OSError, PBXProjError) as e:
+            # Part of the fix may have landed before the error
+            state.full_check()
+            reply = {"ok": False, "error": f"fix failed: {e}", **state.status()}
+    elif cmd == "stop":
+        reply = {"ok": True}
+        keep_running = False
+    else:
+        reply = {"ok": False, "error": f"unknown command {cmd!r}"}
+    reply["ms"] = (time.perf_counter() - t0) * 1000
+    try:
+        conn.sendall((json.dumps(reply) + "\n").encode())
+    except OSError:
+        pass
+    return keep_running
+
+
+# MARK: - Self-test
+
+SELFTEST_PBXPROJ = "// !$*UTF8*$!\n{\n\tobjects = {\n\t};\n}\n"
+SELFTEST_DIRTY_PLIST = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
+<plist version="1.0">
+<dict>
+\t<key>WKApplication</key>
+\t<true/>
+\t<key>WKWatchKitApp</key>
+\t<true/>
+</dict>
+</plist>
+"""
+
+
+def self_test(force_poll: bool = False) -> list:
+    """Race a watched scratch tree against the monitor; returns the failures.
+
+    Each case edits the tree, optionally at the awkward moment right after a
+    rescan (before the new watch exists or while a plist is half written),
+    then compares the monitor's answer with a one-shot check of the same tree.
+    """
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="preflight-selftest-") as root:
+        pbxproj = os.path.join(root, "ShuttlX.xcodeproj", "project.pbxproj")
+        os.makedirs(os.path.dirname(pbxproj))
+        with open(pbxproj, "w") as f:
+            f.write(SELFTEST_PBXPROJ)
+        state = PreflightState(root, pbxproj)
+        monitor = Monitor(state, make_watcher(force_poll))
+        scan_tree = state.scan_tree
+        after_scan = []
+
+        def scan_then_edit():
+            checked = scan_tree()
+            while after_scan:
+                after_scan.pop(0)()
+            return checked
+
+        state.scan_tree = scan_then_edit
+
+        def write_plist(directory, text=SELFTEST_DIRTY_PLIST):
+            with open(os.path.join(root, directory, "Info.plist"), "w") as f:
+                f.write(text)
+
+        def expect(case: str):
+            monitor.refresh()
+            fresh = PreflightState(root, pbxproj)
+            fresh.full_check()
+            got, want = state.status()["issues"], fresh.status()["issues"]
+            if got != want:
+                failures.append(f"{case}: daemon reports {got}, one-shot check {want}")
+
+        try:
+            os.mkdir(os.path.join(root, "BackToBackWatch"))
+            write_plist("BackToBackWatch")
+            expect("directory and plist created back to back")
+
+            os.mkdir(os.path.join(root, "AfterScanWatch"))
+            after_scan.append(lambda: write_plist("AfterScanWatch"))
+            expect("plist written after the rescan, before the watch")
+
+            os.mkdir(os.path.join(root, "NestedWatch"))
+            after_scan.append(lambda: (os.mkdir(os.path.join(root, "NestedWatch", "Sub")),
+                                       write_plist(os.path.join("NestedWatch", "Sub"))))
+            expect("subdirectory created after the rescan, before the watch")
+
+            os.mkdir(os.path.join(root, "MidWriteWatch"))
+            monitor.refresh()
+            half = len(SELFTEST_DIRTY_PLIST) // 2
+            f = open(os.path.join(root, "MidWriteWatch", "Info.plist"), "w")
+            f.write(SELFTEST_DIRTY_PLIST[:half])
+            f.flush()
+
+            def finish():
+                f.write(SELFTEST_DIRTY_PLIST[half:])
+                f.close()
+
+            after_scan.append(finish)
+            monitor.refresh()
+            expect("plist read while half written")
+        finally:
+            monitor.watcher.close()
+    return failures
+
+
+# MARK: - Client
+
+
+def request(cmd: str, timeout: float = CLIENT_TIMEOUT_S):
+    """Send one command to a running daemon; None if none is reachable."""
+    try:
+        with open(INFO_FILE) as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(info["socket"])
+            sock.sendall((json.dumps({"cmd": cmd}) + "\n").encode())
+            return json.loads(sock.makefile("r").readline())
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def start_background(force_poll: bool) -> bool:
+    if request("ping") is not None:
+        print("Preflight daemon already running")
+        return True
+    os.makedirs(STATE_DIR, exist_ok=True)
+    args = [sys.executable, os.path.abspath(__file__), "start", "--foreground"]
+    if force_poll:
+        args.append("--poll")
+    with open(LOG_FILE, "a") as log:
+        subprocess.Popen(args, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                         start_new_session=True, cwd=PROJECT_DIR)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        if request("ping", timeout=0.5) is not None:
+            print(f"✅ Preflight daemon started (log: {LOG_FILE})")
+            return True
+        time.sleep(0.05)
+    print(f"❌ Preflight daemon did not start; see {LOG_FILE}")
+    return False
+
+
+def print_status(reply: dict):
+    if reply["clean"]:
+        print(f"✅ Tree is clean ({reply['plists']} Watch plists, answered in {reply['ms']:.1f} ms)")
+    else:
+        for issue in reply["issues"]:
+            print(f"  ❌ {issue}")
+        print(f"❌ Preflight issues found ({len(reply['issues'])})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident preflight checker for the build scripts")
+    sub = parser.add_subparsers(dest="command", required=True)
+    start = sub.add_parser("start", help="Start the daemon")
+    start.add_argument("--foreground", action="store_true", help="Do not detach")
+    start.add_argument("--poll", action="store_true", help="Use stat polling instead of inotify")
+    status = sub.add_parser("status", help="Ask the daemon whether the tree is clean")
+    status.add_argument("--json", action="store_true", help="Print the raw reply")
+    status.add_argument("--quiet", action="store_true", help="No output; exit code only")
+    sub.add_parser("fix", help="Apply the preflight fixes through the daemon")
+    check = sub.add_parser("check", help="One-shot check without a daemon")
+    check.add_argument("--json", action="store_true", help="Print the result as JSON")
+    sub.add_parser("stop", help="Stop the daemon")
+    selftest = sub.add_parser("selftest", help="Check change tracking against a scratch tree")
+    selftest.add_argument("--poll", action="store_true", help="Use stat polling instead of inotify")
+    args = parser.parse_args()
+
+    if args.command == "start":
+        if args.foreground:
+            serve(args.poll)
+        else:
+            sys.exit(0 if start_background(args.poll) else 1)
+    elif args.command == "check":
+        state = PreflightState()
+        t0 = time.perf_counter()
+        state.full_check()
+        reply = {**state.status(), "ms": (time.perf_counter() - t0) * 1000}
+        if args.json:
+            print(json.dumps(reply, indent=2))
+        else:
+            print_status(reply)
+        sys.exit(EXIT_CLEAN if reply["clean"] else EXIT_DIRTY)
+    elif args.command == "selftest":
+        failures = self_test(args.poll)
+        for failure in failures:
+            print(f"  ❌ {failure}")
+        print(f"❌ {len(failures)} change-tracking failure(s)" if failures
+              else "✅ Change tracking agrees with a one-shot check")
+        sys.exit(1 if failures else 0)
+    else:
+        reply = request(args.command)
+        if reply is None:
+            if not getattr(args, "quiet", False):
+                print("❓ No preflight daemon running (start one with: preflight_daemon.py start)")
+            sys.exit(EXIT_NO_DAEMON)
+        if args.command == "stop":
+            print("🛑 Preflight daemon stopped")
+        elif args.command == "fix":
+            if not reply["ok"]:
+                print(f"❌ {reply['error']}")
+                sys.exit(EXIT_DIRTY)
+            for line in reply["fixed"]:
+                print(f"  ✅ {line}")
+            print_status(reply)
+            sys.exit(EXIT_CLEAN if reply["clean"] else EXIT_DIRTY)
+        else:
+            if args.json:
+                print(json.dumps(reply, indent=2))
+            elif not args.quiet:
+                print_status(reply)
+            sys.exit(EXIT_CLEAN if reply["clean"] else EXIT_DIRTY)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,755 @@
+#!/usr/bin/env python3
+"""
+Replay recorded HR/activity streams through the watch's segmentation logic.
+
+RecoverySegmenter, ActivityClassifier and SegmentHygiene only ever run live on
+the watch. This module ports them line for line (snake_case, same structure) and
+drives them from stored sensor streams as
+WatchWorkoutManager does, faster than real time and in parallel across files:
+
+- every activity sample goes through ActivityClassifier.ingest, every HR and
+  cadence sample updates the held value;
+- once per second the classifier is evaluated (opening/closing segments on a
+  commit) and RecoverySegmenter.tick runs with the held HR and committed
+  activity; its events build HRRCapture rows exactly as processRecoveryEvents
+  does;
+- at the end the raw segment timeline goes through SegmentHygiene.finalize.
+
+Each session yields a RecoveryReport-shaped dict (sets, captures, avgWorkHR,
+avgRestHR), hygiene counts, and agreement with the stream's ground truth
+(`truth` on activity samples), plus throughput numbers for the whole run.
+
+Input is sensor_stream.py output: JSON Lines (optionally .gz), or the columnar
+form written by `columnar`, which loads several times faster. Without files,
+--generate N replays N seeded streams straight from the generator.
+
+Recorded streams carry no Start/End Station taps, so the cardiacRehab profile
+replays with manualStationsOnly off (the motion auto-detect path) unless
+--set manualStationsOnly=true is given.
+
+Usage:
+    python3 tests/recovery_replay.py run /data/streams/*.jsonl.gz --workers 8
+    python3 tests/recovery_replay.py run --generate 1000 --profile gym --hours 1 --workers 8 --json > gym.json
+    python3 tests/recovery_replay.py run --generate 200 --profile rehab --set walkStopConfirmDuration=10
+    python3 tests/recovery_replay.py columnar /data/streams/*.jsonl.gz --out /data/columns
+"""
+
+import argparse
+import gzip
+import heapq
+import json
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import timedelta
+
+from inject_test_session import SEEDED_END_DATE, derive_seed, run_jobs
+from sensor_stream import StreamSpec, iter_stream, read_stream
+
+# Stream profile -> SegmenterProfile. Gym Recovery mode builds its segmenter
+# with .cardiacRehab; gymStrength is the original motion model.
+PROFILE_MODELS = {"gym": "gymStrength", "rehab": "cardiacRehab", "runwalk": "gymStrength"}
+
+CONFIDENCE = {"low": 0, "medium": 1, "high": 2}
+ACTIVITY_DEBOUNCE_S = 5.0  # WatchWorkoutManager.activityDebounceInterval
+
+
+# MARK: - RecoverySegmenter
+
+class SegmenterConfig:
+    """SegmenterConfig, snake_case; ``set()`` also takes the Swift names."""
+
+    DEFAULTS = {
+        "work_hr_threshold": 0.55,
+        "min_work_peak_hr": 80,
+        "min_work_duration": 12.0,
+        "rest_entry_delay": 4.0,
+        "rest_timeout_duration": 300.0,
+        "hrr_window1": 60.0,
+        "hrr_window2": 120.0,
+        "hrr_tolerance": 3.0,
+        "profile": "gymStrength",
+        "stationary_confirm_duration": 15.0,
+        "hr_rise_for_work": 6,
+        "work_fallback_duration": 45.0,
+        "walk_stop_confirm_duration": 15.0,
+        "manual_stations_only": True,
+    }
+
+    def __init__(self, **overrides):
+        for key, value in self.DEFAULTS.items():
+            setattr(self, key, value)
+        for key, value in overrides.items():
+            self.set(key, value)
+
+    @staticmethod
+    def field_name(name: str) -> str:
+        """`minWorkPeakHR` / `hrrWindow1` -> `min_work_peak_hr` / `hrr_window1`."""
+        return re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", name).lower()
+
+    def set(self, name: str, value):
+        key = self.field_name(name)
+        if key not in self.DEFAULTS:
+            raise ValueError(f"unknown SegmenterConfig field {name!r}")
+        default = self.DEFAULTS[key]
+        if isinstance(value, str):
+            if isinstance(default, bool):
+                value = value.lower() in ("1", "true", "yes")
+            elif isinstance(default, (int, float)):
+                value = type(default)(float(value))
+        setattr(self, key, value)
+
+    def to_json(self) -> dict:
+        return {key: getattr(self, key) for key in self.DEFAULTS}
+
+
+class RecoverySegmenter:
+    """Port of RecoverySegmenter. Events are tuples:
+
+    ("enteredWork", setNumber), ("enteredRest", peakHR, setNumber, restEntryTime),
+    ("hrrCapture", minuteMark, hrDrop), ("restExited", duration).
+    """
+
+    def __init__(self, config: SegmenterConfig = None):
+        self.config = config or SegmenterConfig()
+        self.state = "idle"
+        self.set_number = 0
+        self.work_start_time = None
+        self.work_candidate_start = None
+        self.peak_hr_during_work = 0
+        self.last_motion_active_time = None
+        self.rest_start_time = None
+        self.peak_hr_at_rest_entry = 0
+        self.hrr1_captured = False
+        self.hrr2_captured = False
+        self.hr_at_candidate_start = 0
+        self.not_walking_candidate_start = None
+
+    def manual_start_station(self, hr: int, now: float) -> list:
+        events = []
+        if self.state == "work":
+            return events
+        if self.state == "rest":
+            if self.rest_start_time is not None:
+                events.append(("restExited", now - self.rest_start_time))
+            self.rest_start_time = None
+            self.not_walking_candidate_start = None
+        self.state = "work"
+        self.work_start_time = now
+        self.set_number += 1
+        self.peak_hr_during_work = max(hr, 0)
+        events.append(("enteredWork", self.set_number))
+        return events
+
+    def manual_end_station(self, hr: int, now: float) -> list:
+        if self.state != "work":
+            return []
+        if hr > self.peak_hr_during_work:
+            self.peak_hr_during_work = hr
+        self.not_walking_candidate_start = None
+        return [self._enter_rest(now)]
+
+    def tick(self, hr: int, activity: str, max_hr: float, now: float) -> list:
+        if self.config.profile == "cardiacRehab":
+            return self._tick_cardiac_rehab(hr, activity, now)
+        return self._tick_gym_strength(hr, activity, max_hr, now)
+
+    def _enter_rest(self, now: float) -> tuple:
+        peak = self.peak_hr_during_work
+        self.rest_start_time = now
+        self.peak_hr_at_rest_entry = peak
+        self.hrr1_captured = False
+        self.hrr2_captured = False
+        self.state = "rest"
+        self.work_start_time = None
+        self.work_candidate_start = None
+        self.peak_hr_during_work = 0
+        return ("enteredRest", peak, self.set_number, now)
+
+    def _rest_elapsed(self, hr: int, now: float, events: list):
+        """The shared rest prologue (timeout, then HRR captures); returns
+        restElapsed, or None once rest has ended."""
+        if self.rest_start_time is None:
+            self.state = "idle"
+            return None
+        rest_elapsed = now - self.rest_start_time
+        if rest_elapsed > self.config.rest_timeout_duration:
+            self.state = "idle"
+            self.rest_start_time = None
+            events.append(("restExited", rest_elapsed))
+            return None
+        events += self._capture_hrr(hr, rest_elapsed)
+        return rest_elapsed
+
+    def _tick_gym_strength(self, hr: int, activity: str, max_hr: float, now: float) -> list:
+        c = self.config
+        events = []
+        work_hr_min = int(max_hr * c.work_hr_threshold)
+        is_motion_active = activity != "stationary" and activity != "unknown"
+        is_hr_elevated = hr >= work_hr_min
+
+        if self.state == "idle":
+            if is_hr_elevated and is_motion_active:
+                if self.work_candidate_start is None:
+                    self.work_candidate_start = now
+                    self.peak_hr_during_work = hr
+                else:
+                    if hr > self.peak_hr_during_work:
+                        self.peak_hr_during_work = hr
+                    if now - self.work_candidate_start >= c.min_work_duration:
+                        self.state = "work"
+                        self.work_start_time = now
+                        self.last_motion_active_time = now
+                        self.set_number += 1
+                        events.append(("enteredWork", self.set_number))
+            else:
+                self.work_candidate_start = None
+
+        elif self.state == "work":
+            if hr > self.peak_hr_during_work:
+                self.peak_hr_during_work = hr
+            if is_motion_active:
+                self.last_motion_active_time = now
+            since_motion = 0 if self.last_motion_active_time is None else now - self.last_motion_active_time
+            if not is_motion_active and since_motion >= c.rest_entry_delay and self.peak_hr_during_work >= c.min_work_peak_hr:
+                events.append(self._enter_rest(now))
+
+        else:
+            rest_elapsed = self._rest_elapsed(hr, now, events)
+            if rest_elapsed is not None and is_motion_active:
+                self.state = "work"
+                self.work_start_time = now
+                self.rest_start_time = None
+                self.work_candidate_start = now
+                self.peak_hr_during_work = hr
+                self.last_motion_active_time = now
+                self.set_number += 1
+                events.append(("restExited", rest_elapsed))
+                events.append(("enteredWork", self.set_number))
+        return events
+
+    def _tick_cardiac_rehab(self, hr: int, activity: str, now: float) -> list:
+        c = self.config
+        events = []
+        is_walking = activity == "walking"
+        is_on_machine = activity == "stationary" or activity == "unknown"
+
+        if c.manual_stations_only:
+            if self.state == "work":
+                if hr > self.peak_hr_during_work:
+                    self.peak_hr_during_work = hr
+            elif self.state == "rest":
+                self._rest_elapsed(hr, now, events)
+            return events
+
+        if self.state == "idle":
+            if is_on_machine:
+                if self.work_candidate_start is None:
+                    self.work_candidate_start = now
+                    self.hr_at_candidate_start = hr
+                    self.peak_hr_during_work = hr
+                else:
+                    if hr > self.peak_hr_during_work:
+                        self.peak_hr_during_work = hr
+                    elapsed = now - self.work_candidate_start
+                    dual = elapsed >= c.stationary_confirm_duration and hr - self.hr_at_candidate_start >= c.hr_rise_for_work
+                    if dual or elapsed >= c.work_fallback_duration:
+                        self.state = "work"
+                        self.work_start_time = now
+                        self.set_number += 1
+                        events.append(("enteredWork", self.set_number))
+            else:
+                self.work_candidate_start = None
+                self.hr_at_candidate_start = 0
+
+        elif self.state == "work":
+            if hr > self.peak_hr_during_work:
+                self.peak_hr_during_work = hr
+            if is_walking:
+                self.not_walking_candidate_start = None
+                events.append(self._enter_rest(now))
+
+        else:
+            rest_elapsed = self._rest_elapsed(hr, now, events)
+            if rest_elapsed is None:
+                self.not_walking_candidate_start = None
+            elif not is_walking:
+                if self.not_walking_candidate_start is None:
+                    self.not_walking_candidate_start = now
+                elif now - self.not_walking_candidate_start >= c.walk_stop_confirm_duration:
+                    self.state = "work"
+                    self.work_start_time = now
+                    self.rest_start_time = None
+                    self.not_walking_candidate_start = None
+                    self.peak_hr_during_work = hr
+                    self.work_candidate_start = None
+                    self.set_number += 1
+                    events.append(("restExited", rest_elapsed))
+                    events.append(("enteredWork", self.set_number))
+            else:
+                self.not_walking_candidate_start = None
+        return events
+
+    def _capture_hrr(self, hr: int, rest_elapsed: float) -> list:
+        c = self.config
+        events = []
+        if not self.hrr1_captured and abs(rest_elapsed - c.hrr_window1) <= c.hrr_tolerance:
+            self.hrr1_captured = True
+            events.append(("hrrCapture", 1, max(0, self.peak_hr_at_rest_entry - hr)))
+        if not self.hrr2_captured and abs(rest_elapsed - c.hrr_window2) <= c.hrr_tolerance:
+            self.hrr2_captured = True
+            events.append(("hrrCapture", 2, max(0, self.peak_hr_at_rest_entry - hr)))
+        return events
+
+
+# MARK: - ActivityClassifier
+
+RUN_CADENCE_FLOOR = 140
+WALK_CADENCE_CEILING = 130
+STATIONARY_CADENCE_CEILING = 20
+STATIONARY_CADENCE_CONTRADICTION = 40
+
+
+def cadence_check(activity: str, cadence) -> str:
+    if cadence is None:
+        return "inconclusive"
+    if activity == "running":
+        if cadence >= RUN_CADENCE_FLOOR:
+            return "agrees"
+        return "contradicts" if cadence < WALK_CADENCE_CEILING else "inconclusive"
+    if activity == "walking":
+        if cadence > RUN_CADENCE_FLOOR:
+            return "contradicts"
+        return "agrees" if STATIONARY_CADENCE_CEILING <= cadence <= WALK_CADENCE_CEILING else "inconclusive"
+    if activity == "stationary":
+        if cadence <= STATIONARY_CADENCE_CEILING:
+            return "agrees"
+        return "contradicts" if cadence > STATIONARY_CADENCE_CONTRADICTION else "inconclusive"
+    return "inconclusive"
+
+
+class ActivityClassifier:
+    """Port of ActivityClassifier: confidence, debounce and cadence gates."""
+
+    def __init__(self, debounce_interval: float = ACTIVITY_DEBOUNCE_S):
+        self.debounce_interval = debounce_interval
+        self.committed = "unknown"
+        self.needs_reconfirmation = True
+        self.pending = None  # [activity, since, minConfidence, holdReported]
+
+    def ingest(self, activity: str, confidence: int, now: float):
+        if activity == "unknown" or confidence < CONFIDENCE["medium"]:
+            return
+        if activity == self.committed and not self.needs_reconfirmation:
+            self.pending = None
+            return
+        pending = self.pending
+        if pending is not None and pending[0] == activity:
+            pending[2] = min(pending[2], confidence)
+            return
+        self.pending = [activity, now, confidence, False]
+
+    def evaluate(self, cadence, now: float):
+        """Returns the newly committed activity, or None."""
+        pending = self.pending
+        if pending is None or now - pending[1] < self.debounce_interval:
+            return None
+        if cadence_check(pending[0], cadence) == "contradicts" and pending[2] < CONFIDENCE["high"]:
+            pending[3] = True
+            return None
+        self.committed = pending[0]
+        self.needs_reconfirmation = False
+        self.pending = None
+        return self.committed
+
+
+# MARK: - SegmentHygiene
+
+MINIMUM_SEGMENT_DURATION = 10.0
+CONTIGUITY_TOLERANCE = 1.0
+
+
+def _sum(a, b):
+    return None if a is None and b is None else (a or 0) + (b or 0)
+
+
+def _contiguous(lhs: dict, rhs: dict) -> bool:
+    return lhs.get("endDate") is not None and rhs["startDate"] - lhs["endDate"] <= CONTIGUITY_TOLERANCE
+
+
+def _absorb(into: dict, other: dict):
+    into["steps"] = _sum(into.get("steps"), other.get("steps"))
+    into["distance"] = _sum(into.get("distance"), other.get("distance"))
+
+
+def finalize_segments(raw: list, minimum_duration: float, now: float) -> dict:
+    """Port of SegmentHygiene.finalize; returns {segments, absorbed, coalesced}."""
+    closed = []
+    for index, segment in enumerate(raw):
+        s = dict(segment)
+        if s.get("endDate") is None:
+            s["endDate"] = raw[index + 1]["startDate"] if index + 1 < len(raw) else now
+        if s["endDate"] > s["startDate"]:
+            closed.append(s)
+
+    if minimum_duration <= 0 or len(closed) <= 1:
+        return {"segments": closed, "absorbed": 0, "coalesced": 0}
+
+    kept, leading, absorbed = [], [], 0
+    for segment in closed:
+        if segment["endDate"] - segment["startDate"] < minimum_duration:
+            if kept and _contiguous(kept[-1], segment):
+                kept[-1]["endDate"] = segment["endDate"]
+                _absorb(kept[-1], segment)
+                absorbed += 1
+            else:
+                leading.append(segment)
+            continue
+        s = segment
+        if leading:
+            if _contiguous(leading[-1], s):
+                s["startDate"] = leading[0]["startDate"]
+            for blip in leading:
+                _absorb(s, blip)
+            absorbed += len(leading)
+            leading = []
+        kept.append(s)
+
+    if kept and leading:
+        kept.extend(leading)
+        leading = []
+
+    if not kept and leading:
+        totals = {}
+        merged = {"activityType": leading[0]["activityType"], "startDate": leading[0]["startDate"],
+                  "endDate": leading[-1]["endDate"], "steps": None, "distance": None}
+        for blip in leading:
+            totals[blip["activityType"]] = totals.get(blip["activityType"], 0.0) + blip["endDate"] - blip["startDate"]
+            _absorb(merged, blip)
+        merged["activityType"] = max(totals, key=totals.get)
+        return {"segments": [merged], "absorbed": max(0, len(leading) - 1), "coalesced": 0}
+
+    merged, coalesced = [], 0
+    for segment in kept:
+        if merged and merged[-1]["activityType"] == segment["activityType"] and _contiguous(merged[-1], segment):
+            merged[-1]["endDate"] = segment["endDate"]
+            _absorb(merged[-1], segment)
+            coalesced += 1
+        else:
+            merged.append(segment)
+    return {"segments": merged, "absorbed": absorbed, "coalesced": coalesced}
+
+
+# MARK: - Stream input
+
+def _open_text(path: str, mode: str = "r"):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def is_columnar(path: str) -> bool:
+    return path.endswith((".columns.json", ".columns.json.gz"))
+
+
+def _tuples(samples):
+    """Stream dicts -> (t, kind, value, confidence, truth) tuples for the replay loop."""
+    for s in samples:
+        kind = s["kind"]
+        if kind == "hr":
+            yield s["t"], "hr", s["bpm"], None, None
+        elif kind == "cadence":
+            yield s["t"], "cadence", s["spm"], None, None
+        elif kind == "activity":
+            yield s["t"], "activity", s["activity"], CONFIDENCE.get(s.get("confidence"), 0), s.get("truth")
+        elif kind == "tap":
+            yield s["t"], "tap", s["action"], None, None
+
+
+def write_columns(header: dict, samples, path: str) -> int:
+    """Write the replay-relevant channels column-wise; returns the sample count."""
+    cols = {"hr": {"t": [], "bpm": []}, "cadence": {"t": [], "spm": []},
+            "activity": {"t": [], "activity": [], "confidence": [], "truth": []}}
+    count = 0
+    for s in samples:
+        col = cols.get(s["kind"])
+        if col is None:
+            continue
+        for key, values in col.items():
+            values.append(s.get(key))
+        count += 1
+    with _open_text(path, "w") as f:
+        json.dump({"header": header, "columns": cols}, f, separators=(",", ":"))
+    return count
+
+
+def read_columns(path: str) -> tuple:
+    """Return ``(header, tuples)`` for a columnar stream, time-ordered."""
+    with _open_text(path) as f:
+        doc = json.load(f)
+    cols = doc["columns"]
+    hr, cad, act = cols["hr"], cols["cadence"], cols["activity"]
+    conf = [CONFIDENCE.get(c, 0) for c in act["confidence"]]
+    channels = [
+        zip(hr["t"], ["hr"] * len(hr["t"]), hr["bpm"], [None] * len(hr["t"]), [None] * len(hr["t"])),
+        zip(cad["t"], ["cadence"] * len(cad["t"]), cad["spm"], [None] * len(cad["t"]), [None] * len(cad["t"])),
+        zip(act["t"], ["activity"] * len(act["t"]), act["activity"], conf, act["truth"]),
+    ]
+    return doc["header"], heapq.merge(*channels, key=lambda s: s[0])
+
+
+def open_source(source) -> tuple:
+    """A job is a stream path or a ("generate", profile, hours, seed, maxHR) tuple."""
+    if isinstance(source, tuple):
+        _, profile, hours, seed, max_hr = source
+        start = SEEDED_END_DATE - timedelta(hours=hours)
+        spec = StreamSpec(profile, hours, seed, start, max_hr, {"gps": 0.0})
+        return spec.header(), _tuples(iter_stream(spec))
+    if is_columnar(source):
+        return read_columns(source)
+    header, samples = read_stream(source)
+    return header, _tuples(samples)
+
+
+# MARK: - Replay
+
+def replay_session(header: dict, samples, config: SegmenterConfig, name: str = "") -> dict:
+    """Drive classifier, segmenter and hygiene over one stream as the watch would."""
+    start, end = header["start"], header["end"]
+    max_hr = header.get("maxHR", 185.0)
+    rng = random.Random(derive_seed(header.get("seed", 0), f"replay:{name}"))
+
+    classifier = ActivityClassifier()
+    segmenter = RecoverySegmenter(config)
+    hr, cadence, truth = 0, None, None
+    current_activity = "unknown"
+    segments = []
+    awaiting_open = True
+    captures = []
+    work_hr = [0, 0]  # sum, count
+    rest_hr = [0, 0]
+    agree = ticks = state_agree = 0
+    work_truth = "stationary" if config.profile == "cardiacRehab" else "walking"
+    n_samples = 0
+
+    def on_events(events):
+        for event in events:
+            kind = event[0]
+            if kind == "enteredRest":
+                _, peak, set_number, entry = event
+                captures.append({"id": str(uuid.UUID(int=rng.getrandbits(128), version=4)).upper(),
+                                 "setNumber": set_number, "peakHR": peak, "hrAt60s": None,
+                                 "hrAt120s": None, "restDuration": 0.0, "restEntryTime": entry})
+            elif kind == "hrrCapture" and captures:
+                _, minute, drop = event
+                captures[-1]["hrAt60s" if minute == 1 else "hrAt120s"] = max(0, captures[-1]["peakHR"] - drop)
+            elif kind == "restExited" and captures:
+                captures[-1]["restDuration"] = event[1]
+
+    next_tick = start + 1.0
+    pending = None
+    samples = iter(samples)
+    while True:
+        sample = pending if pending is not None else next(samples, None)
+        pending = None
+        if sample is not None and sample[0] <= next_tick:
+            n_samples += 1
+            t, kind, value, confidence, sample_truth = sample
+            if kind == "hr":
+                hr = value
+            elif kind == "cadence":
+                cadence = value
+            elif kind == "activity":
+                truth = sample_truth
+                classifier.ingest(value, confidence, t)
+            elif value == "start":
+                on_events(segmenter.manual_start_station(hr, t))
+            else:
+                on_events(segmenter.manual_end_station(hr, t))
+            continue
+        if next_tick > end:
+            break
+        pending = sample
+        now = next_tick
+        next_tick += 1.0
+
+        committed = classifier.evaluate(cadence, now)
+        if committed is not None:
+            if awaiting_open:
+                segments.append({"activityType": committed, "startDate": start, "endDate": None,
+                                 "steps": None, "distance": None})
+                awaiting_open = False
+            else:
+                segments[-1]["endDate"] = now
+                segments.append({"activityType": committed, "startDate": now, "endDate": None,
+                                 "steps": None, "distance": None})
+            current_activity = committed
+
+        on_events(segmenter.tick(hr, current_activity, max_hr, now))
+        if segmenter.state == "work":
+            work_hr[0] += hr
+            work_hr[1] += 1
+        elif segmenter.state == "rest":
+            rest_hr[0] += hr
+            rest_hr[1] += 1
+        if truth is not None:
+            ticks += 1
+            agree += current_activity == truth
+            state_agree += (segmenter.state == "work") == (truth == work_truth)
+
+    hygiene = finalize_segments(segments, MINIMUM_SEGMENT_DURATION, end)
+    report = {
+        "sets": len(captures),
+        "captures": captures,
+        "avgWorkHR": work_hr[0] / work_hr[1] if work_hr[1] else None,
+        "avgRestHR": rest_hr[0] / rest_hr[1] if rest_hr[1] else None,
+    }
+    hrr1 = [c["peakHR"] - c["hrAt60s"] for c in captures if c["hrAt60s"] is not None]
+    hrr2 = [c["peakHR"] - c["hrAt120s"] for c in captures if c["hrAt120s"] is not None]
+    report["averageHRR1"] = sum(hrr1) / len(hrr1) if hrr1 else None
+    report["averageHRR2"] = sum(hrr2) / len(hrr2) if hrr2 else None
+    return {
+        "source": name,
+        "profile": header.get("profile"),
+        "durationSeconds": end - start,
+        "samples": n_samples,
+        "recoveryReport": report,
+        "segments": {"raw": len(segments), "kept": len(hygiene["segments"]),
+                     "absorbed": hygiene["absorbed"], "coalesced": hygiene["coalesced"]},
+        "finalizedSegments": hygiene["segments"],
+        "activityAgreement": agree / ticks if ticks else None,
+        "stateAgreement": state_agree / ticks if ticks else None,
+    }
+
+
+def replay_job(job) -> dict:
+    """Process-pool entry point: ``(source, config overrides, keep_detail)``."""
+    source, overrides, keep_detail = job
+    t0 = time.perf_counter()
+    header, samples = open_source(source)
+    name = source if isinstance(source, str) else f"generated:{source[1]}:{source[3]}"
+    profile = overrides.get("profile") or PROFILE_MODELS.get(header.get("profile"), "gymStrength")
+    defaults = {"manual_stations_only": False} if profile == "cardiacRehab" else {}
+    config = SegmenterConfig(**{**defaults, **overrides, "profile": profile})
+    result = replay_session(header, samples, config, name)
+    result["wallSeconds"] = time.perf_counter() - t0
+    if not keep_detail:
+        result.pop("finalizedSegments")
+    return result
+
+
+def run(sources: list, overrides: dict = None, workers: int = 1, keep_detail: bool = False) -> dict:
+    """Replay every source; returns per-session results plus aggregate throughput."""
+    jobs = [(source, overrides or {}, keep_detail) for source in sources]
+    t0 = time.perf_counter()
+    sessions = list(run_jobs(replay_job, jobs, workers))
+    wall = time.perf_counter() - t0
+    recorded = sum(s["durationSeconds"] for s in sessions)
+    samples = sum(s["samples"] for s in sessions)
+    captures = [c for s in sessions for c in s["recoveryReport"]["captures"]]
+
+    def mean(values):
+        values = [v for v in values if v is not None]
+        return sum(values) / len(values) if values else None
+
+    return {
+        "sessions": sessions,
+        "summary": {
+            "files": len(sessions),
+            "workers": workers,
+            "wallSeconds": wall,
+            "recordedHours": recorded / 3600,
+            "samples": samples,
+            "samplesPerSecond": samples / wall if wall else None,
+            "speedup": recorded / wall if wall else None,
+            "sets": len(captures),
+            "hrr1Captured": sum(c["hrAt60s"] is not None for c in captures),
+            "hrr2Captured": sum(c["hrAt120s"] is not None for c in captures),
+            "averageHRR1": mean(s["recoveryReport"]["averageHRR1"] for s in sessions),
+            "averageHRR2": mean(s["recoveryReport"]["averageHRR2"] for s in sessions),
+            "segmentsAbsorbed": sum(s["segments"]["absorbed"] for s in sessions),
+            "segmentsCoalesced": sum(s["segments"]["coalesced"] for s in sessions),
+            "activityAgreement": mean(s["activityAgreement"] for s in sessions),
+            "stateAgreement": mean(s["stateAgreement"] for s in sessions),
+        },
+    }
+
+
+def print_summary(result: dict):
+    s = result["summary"]
+    fmt = lambda v, spec: "n/a" if v is None else format(v, spec)
+    print("\n" + "=" * 70)
+    print("  RECOVERY REPLAY")
+    print("=" * 70)
+    print(f"  Sessions:          {s['files']} ({s['recordedHours']:.1f} h recorded, {s['samples']} samples)")
+    print(f"  Sets detected:     {s['sets']} (HRR1 {s['hrr1Captured']}, HRR2 {s['hrr2Captured']})")
+    print(f"  Average HRR1/2:    {fmt(s['averageHRR1'], '.1f')} / {fmt(s['averageHRR2'], '.1f')} bpm")
+    print(f"  Hygiene:           {s['segmentsAbsorbed']} absorbed, {s['segmentsCoalesced']} coalesced")
+    print(f"  Agreement:         activity {fmt(s['activityAgreement'], '.1%')}, "
+          f"work/rest {fmt(s['stateAgreement'], '.1%')} vs ground truth")
+    print(f"  Throughput:        {s['wallSeconds']:.2f} s wall on {s['workers']} worker(s), "
+          f"{fmt(s['samplesPerSecond'], ',.0f')} samples/s, {fmt(s['speedup'], ',.0f')}x real time")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay sensor streams through RecoverySegmenter and SegmentHygiene")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    r = sub.add_parser("run", help="Replay stream files (or generated streams) and report")
+    r.add_argument("streams", nargs="*", help="Stream files: .jsonl[.gz] or .columns.json[.gz]")
+    r.add_argument("--generate", type=int, default=0, help="Replay N generated streams instead of files")
+    r.add_argument("--profile", choices=sorted(PROFILE_MODELS), default="gym", help="Generated stream profile (default: gym)")
+    r.add_argument("--hours", type=float, default=1.0, help="Generated stream length (default: 1)")
+    r.add_argument("--max-hr", type=float, default=185.0, help="Generated max HR (default: 185)")
+    r.add_argument("--seed", type=int, default=0, help="First generated seed (default: 0)")
+    r.add_argument("--set", action="append", default=[], metavar="FIELD=VALUE",
+                   help="SegmenterConfig override, e.g. minWorkDuration=10 (repeatable)")
+    r.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes (default: all cores)")
+    r.add_argument("--segments", action="store_true", help="Include finalized segments in --json output")
+    r.add_argument("--json", action="store_true", help="Print per-session results and summary as JSON")
+
+    c = sub.add_parser("columnar", help="Convert JSON Lines streams to the columnar replay format")
+    c.add_argument("streams", nargs="+", help="JSON Lines stream files")
+    c.add_argument("--out", required=True, help="Output directory")
+
+    args = parser.parse_args()
+
+    if args.command == "columnar":
+        os.makedirs(args.out, exist_ok=True)
+        for path in args.streams:
+            header, samples = read_stream(path)
+            base = os.path.basename(path).split(".")[0]
+            out = os.path.join(args.out, base + ".columns.json.gz")
+            count = write_columns(header, samples, out)
+            print(f"✅ {path} -> {out} ({count} samples)")
+        return
+
+    overrides = {}
+    for item in args.set:
+        key, _, value = item.partition("=")
+        try:
+            SegmenterConfig().set(key, value)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(2)
+        overrides[SegmenterConfig.field_name(key)] = value
+
+    sources = list(args.streams)
+    sources += [("generate", args.profile, args.hours, args.seed + i, args.max_hr) for i in range(args.generate)]
+    if not sources:
+        parser.error("give stream files or --generate N")
+
+    result = run(sources, overrides, args.workers, args.segments)
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    else:
+        print_summary(result)
+
+
+if __name__ == "__main__":
+    main()
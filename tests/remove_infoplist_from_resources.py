@@ -16,23 +16,64 @@ building successfully. The specific error was:
   - note: Target has process command with output '[path]/Info.plist'
 
 The fix works by:
-1. Finding null resource references in the PBXBuildFile section
-2. Identifying resources build phases that contain these null references
-3. Removing the null references from the resources phase
-4. Also removing the null build file entries from the project file
+1. Parsing project.pbxproj once into an object graph (pbxproj_graph.py)
+2. Finding null build files: PBXBuildFile objects with no fileRef, shown by
+   Xcode as "(null) in Resources"
+3. Removing them from every Resources build phase that lists them
+4. Also removing the null build file entries themselves
+
+Every other byte of the project file is left exactly as it was.
 
 Usage:
     ./tests/remove_infoplist_from_resources.py
+    ./tests/remove_infoplist_from_resources.py --dry-run   # report only, exit 1 if dirty
+    ./tests/remove_infoplist_from_resources.py --dry-run --timings -   # plus per-phase timings
 
 After running this script, the build should succeed without the duplicate Info.plist error.
 """
 
+import argparse
 import os
-import re
 import sys
 from pathlib import Path
 
+from instrument import Instrumentation, add_arguments
+from pbxproj_graph import PBXProject, PBXProjError
+
+
+def find_null_resources(project: PBXProject) -> list:
+    """Build files in a Resources phase that reference no file or package product."""
+    nulls = []
+    listed = set()
+    for phase in project.isa("PBXResourcesBuildPhase"):
+        for file_id in phase.get("files", ()):
+            build_file = project.objects.get(file_id)
+            if build_file is None or build_file.isa != "PBXBuildFile" or file_id in listed:
+                continue
+            if "fileRef" not in build_file.props and "productRef" not in build_file.props:
+                # A build file listed twice is still removed only once
+                listed.add(file_id)
+                nulls.append(build_file)
+    # Null build files that no phase lists any more are dead too
+    for build_file in project.isa("PBXBuildFile"):
+        if (build_file.id not in listed and build_file.comment == "(null) in Resources"
+                and "fileRef" not in build_file.props):
+            nulls.append(build_file)
+    return nulls
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Remove null references from Resources phases")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only report null references; exit 1 if any are found")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with Instrumentation.from_args("remove_infoplist_from_resources", args) as inst:
+        run(args, inst)
+
+
+def run(args, inst):
     print("🔧 ShuttlX - Remove null references from Resources phase")
     print("======================================================")
 
@@ -45,71 +86,58 @@ def main():
         sys.exit(1)
 
     print(f"📂 Found project file: {project_file}")
-    
+
     # Load project file
-    with open(project_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    original_content = content
-
-    # Find all null resource references in PBXBuildFile section
-    null_resources = re.findall(r'(\w+) /\* \(null\) in Resources \*/ = {isa = PBXBuildFile; };', content)
-    
+    try:
+        with inst.phase("read"), open(project_file, "r", encoding="utf-8", newline="") as f:
+            text = f.read()
+        # Tokenizer regexes and object graph
+        with inst.phase("parse"):
+            project = PBXProject(text, str(project_file))
+    except PBXProjError as e:
+        print(f"❌ Cannot parse project file: {e}")
+        sys.exit(1)
+
+    # Find all null resource references
+    with inst.phase("scan"):
+        null_resources = find_null_resources(project)
+    inst.count("objects", len(project.objects))
+    inst.count("nullResources", len(null_resources))
+
     if not null_resources:
         print("❓ No null resources found in PBXBuildFile section")
         print("✅ No changes needed")
         return
     else:
-        print(f"🔍 Found {len(null_resources)} null resource references: {', '.join(null_resources)}")
-    
+        print(f"🔍 Found {len(null_resources)} null resource references: "
+              f"{', '.join(b.id for b in null_resources)}")
+
+    if args.dry_run:
+        for build_file in null_resources:
+            for owner_id, _, _ in project.referrers(build_file.id):
+                print(f"  ⚠️  {build_file.id} is listed in resources phase {owner_id}")
+        print("❌ Project has null resource references (dry run, nothing changed)")
+        sys.exit(1)
+
     # Create backup
     backup_path = str(project_file) + ".infoplist_duplicate_backup"
-    with open(backup_path, 'w', encoding='utf-8') as f:
-        f.write(original_content)
+    with inst.phase("backup"), open(backup_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(project.text)
     print(f"📂 Created backup at {backup_path}")
-    
-    # Remove null references from Resources build phase
-    resources_phase_pattern = r'(\w+) /\* Resources \*/ = {\s*isa = PBXResourcesBuildPhase;.*?files = \((.*?)\);'
-    resources_phases = re.findall(resources_phase_pattern, content, re.DOTALL)
-    
-    modified = False
-    for phase_id, files_section in resources_phases:
-        print(f"📋 Examining resources phase: {phase_id}")
-        
-        # Check for null references in this phase
-        phase_modified = False
-        modified_files_section = files_section
-        
-        for null_ref in null_resources:
-            pattern = rf'{null_ref} /\* \(null\) in Resources \*/,?\s*'
-            if re.search(pattern, files_section):
-                modified_files_section = re.sub(pattern, '', modified_files_section)
-                print(f"  ✅ Removed null reference {null_ref} from resources phase")
-                phase_modified = True
-                modified = True
-        
-        if phase_modified:
-            # Update the content with modified files section
-            old_section = f"files = ({files_section});"
-            new_section = f"files = ({modified_files_section});"
-            content = content.replace(old_section, new_section)
-    
-    # Also remove the null resource build file entries
-    for null_ref in null_resources:
-        pattern = rf'{null_ref} /\* \(null\) in Resources \*/ = {{isa = PBXBuildFile; }};'
-        if re.search(pattern, content):
-            content = re.sub(pattern, '', content)
-            print(f"  ✅ Removed null build file entry {null_ref}")
-            modified = True
-    
-    if not modified:
-        print("❓ No changes were made to the project file")
-        return
-    
+
+    # Remove null references from Resources build phases and the build file entries
+    with inst.phase("edit"):
+        for build_file in null_resources:
+            for owner_id, _, _ in project.referrers(build_file.id):
+                print(f"📋 Examining resources phase: {owner_id}")
+                print(f"  ✅ Removed null reference {build_file.id} from resources phase")
+            project.remove_object(build_file.id)
+            print(f"  ✅ Removed null build file entry {build_file.id}")
+
     # Write the modified content
-    with open(project_file, 'w', encoding='utf-8') as f:
-        f.write(content)
-    
+    with inst.phase("save"):
+        project.save()
+
     print("\n✅ Successfully removed null references from resources phase")
     print("📋 This should fix the 'Multiple commands produce ... Info.plist' error")
     print("\n📝 Manual steps if build still fails:")
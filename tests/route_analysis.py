@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Whole-array route analysis: distance, km splits, segment pace and elevation.
+
+The app derives everything distance-shaped from the route: RouteMapView walks
+it with haversine to place km markers, ElevationProfileView sums altitude
+deltas, and the watch cuts a KmSplit each time cumulative distance passes a
+whole km. This module computes the same quantities for fixtures and
+exported files, over whole columns rather than point by point:
+
+- routes live in a RouteArrays batch: flat latitude/longitude/timestamp/
+  altitude columns plus a per-session offsets index, the route_columns
+  layout. One session is simply a batch of one; a RouteColumns file can be
+  analysed in place.
+- cumulative_distance() runs haversine over every consecutive pair with
+  map()/operator passes (no per-point bytecode) and restarts at 0 for each
+  session.
+- km_crossings() bisects the (monotonic) cumulative distance for every whole
+  km and interpolates the crossing time linearly between the two fixes, the
+  continuous version of WatchWorkoutManager's km split detection.
+- segment_pace() interpolates cumulative distance at each segment's start and
+  end; elevation_gain() sums rises and falls over present altitudes, like
+  ElevationProfileView and AnalyticsEngine.elevationSummary.
+
+Usage:
+    python3 tests/route_analysis.py show sessions.json --session <UUID>
+    python3 tests/route_analysis.py check sessions.json
+    python3 tests/route_analysis.py bench --points 1000000 --sessions 1000
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, islice
+from operator import add, mul, sub
+
+from session_io import iter_sessions
+
+EARTH_RADIUS_M = 6371000.0  # RouteMapView/ElevationProfileView use 6371 km
+KM = 1000.0
+NAN = float("nan")
+
+# Slack for float sums of distances that add up to a whole km exactly
+DIST_EPS = 1e-6
+
+_HALF_RADIAN = math.pi / 360.0
+
+
+class RouteArrays:
+    """Routes of one or more sessions as flat columns plus an offsets index.
+
+    Session ``i`` owns points ``offsets[i]:offsets[i + 1]``. ``starts`` holds
+    each session's startDate (cumulative split times are measured from it).
+    Missing altitudes are NaN.
+    """
+
+    def __init__(self, latitude, longitude, timestamp, altitude, offsets, starts=None):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.timestamp = timestamp
+        self.altitude = altitude
+        self.offsets = offsets
+        n = len(offsets) - 1
+        if starts is None:
+            starts = array("d", (timestamp[offsets[i]] if offsets[i] < offsets[i + 1] else NAN
+                                 for i in range(n)))
+        self.starts = starts
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def point_count(self) -> int:
+        return self.offsets[-1]
+
+    @classmethod
+    def from_sessions(cls, sessions) -> "RouteArrays":
+        """Batch the routes of session dicts (sessions without a route get none)."""
+        lat, lon, ts, alt = array("d"), array("d"), array("d"), array("d")
+        offsets, starts = array("Q", [0]), array("d")
+        for session in sessions:
+            route = session.get("route") or ()
+            lat.extend([p["latitude"] for p in route])
+            lon.extend([p["longitude"] for p in route])
+            ts.extend([p["timestamp"] for p in route])
+            alt.extend([NAN if p.get("altitude") is None else p["altitude"] for p in route])
+            offsets.append(len(lat))
+            starts.append(session["startDate"])
+        return cls(lat, lon, ts, alt, offsets, starts)
+
+    @classmethod
+    def from_route(cls, route: list, start: float = None) -> "RouteArrays":
+        """A batch of one from a RoutePoint list."""
+        session = {"route": route, "startDate": start if start is not None
+                   else (route[0]["timestamp"] if route else NAN)}
+        return cls.from_sessions([session])
+
+    @classmethod
+    def from_columns(cls, columns) -> "RouteArrays":
+        """Wrap a route_columns.RouteColumns without copying its columns."""
+        c = columns.columns
+        return cls(c["latitude"], c["longitude"], c["timestamp"], c["altitude"], columns.offsets)
+
+
+# MARK: - Distance
+
+
+def step_distances(routes: RouteArrays) -> array:
+    """Haversine metres from each point's predecessor; 0 at every session start."""
+    lat, lon = routes.latitude, routes.longitude
+    n = len(lat)
+    if n == 0:
+        return array("d")
+    cos_lat = list(map(math.cos, map(math.radians, lat)))
+    sin_dlat = list(map(math.sin, map(_HALF_RADIAN.__mul__, map(sub, islice(lat, 1, None), lat))))
+    sin_dlon = list(map(math.sin, map(_HALF_RADIAN.__mul__, map(sub, islice(lon, 1, None), lon))))
+    # a = sin²(Δφ/2) + cos φ1 cos φ2 sin²(Δλ/2); d = 2R asin(√a) (= 2R atan2(√a, √(1−a)))
+    a = map(add, map(mul, sin_dlat, sin_dlat),
+            map(mul, map(mul, cos_lat, islice(cos_lat, 1, None)), map(mul, sin_dlon, sin_dlon)))
+    steps = array("d", [0.0])
+    steps.extend(map((2 * EARTH_RADIUS_M).__mul__, map(math.asin, map(math.sqrt, a))))
+    for start in islice(routes.offsets, 1, len(routes)):
+        if start < n:
+            steps[start] = 0.0
+    return steps
+
+
+def cumulative_distance(routes: RouteArrays, steps: array = None) -> array:
+    """Metres travelled at each point since its session's first point."""
+    steps = step_distances(routes) if steps is None else steps
+    cumulative = array("d")
+    offsets = routes.offsets
+    for i in range(len(routes)):
+        cumulative.extend(accumulate(steps[offsets[i]:offsets[i + 1]]))
+    return cumulative
+
+
+def session_distances(routes: RouteArrays, cumulative: array) -> array:
+    """Total route metres per session."""
+    offsets = routes.offsets
+    return array("d", (cumulative[offsets[i + 1] - 1] if offsets[i] < offsets[i + 1] else 0.0
+                       for i in range(len(routes))))
+
+
+# MARK: - Km splits
+
+
+def km_crossings(cumulative, timestamps, offsets, unit: float = KM) -> tuple:
+    """Times at which each session's cumulative distance reaches every whole ``unit``.
+
+    Returns ``(times, crossing_offsets)``: session ``i``'s crossings of 1, 2,
+    ... units are ``times[crossing_offsets[i]:crossing_offsets[i + 1]]``.
+    Cumulative distance never decreases within a session, so each crossing
+    is a bisect rather than a scan. Works on any (cumulative, timestamp)
+    profile, not just GPS fixes. A total within DIST_EPS of a whole unit
+    counts as reaching it, so the last km is split even at the final point.
+    """
+    times = array("d")
+    crossing_offsets = array("Q", [0])
+    for i in range(len(offsets) - 1):
+        lo, hi = offsets[i], offsets[i + 1]
+        if hi - lo >= 2:
+            for k in range(1, int((cumulative[hi - 1] + DIST_EPS) / unit) + 1):
+                target = k * unit
+                j = min(bisect_left(cumulative, target - DIST_EPS, lo + 1, hi), hi - 1)
+                d0, d1 = cumulative[j - 1], cumulative[j]
+                t0, t1 = timestamps[j - 1], timestamps[j]
+                times.append(t0 + min((target - d0) / (d1 - d0), 1.0) * (t1 - t0))
+        crossing_offsets.append(len(times))
+    return times, crossing_offsets
+
+
+def split_times(times, crossing_offsets, starts) -> tuple:
+    """``(split, cumulative)`` seconds per crossing, as KmSplitData measures them:
+    cumulative from the session start, split from the previous crossing."""
+    cumulative = array("d")
+    split = array("d")
+    for i in range(len(crossing_offsets) - 1):
+        a, b = crossing_offsets[i], crossing_offsets[i + 1]
+        if a == b:
+            continue
+        elapsed = list(map(starts[i].__rsub__, times[a:b]))
+        cumulative.extend(elapsed)
+        split.extend(map(sub, elapsed, [0.0] + elapsed[:-1]))
+    return split, cumulative
+
+
+def km_split_dicts(routes: RouteArrays, cumulative: array = None) -> list:
+    """Per session, KmSplitData-shaped dicts (without ids) derived from the route."""
+    cumulative = cumulative_distance(routes) if cumulative is None else cumulative
+    times, crossing_offsets = km_crossings(cumulative, routes.timestamp, routes.offsets)
+    split, elapsed = split_times(times, crossing_offsets, routes.starts)
+    return [
+        [{"kmNumber": k - crossing_offsets[i] + 1, "splitTime": split[k], "cumulativeTime": elapsed[k]}
+         for k in range(crossing_offsets[i], crossing_offsets[i + 1])]
+        for i in range(len(routes))
+    ]
+
+
+def profile_km_splits(segments: list, start: float) -> list:
+    """KmSplitData-shaped dicts from segment distances alone (for routeless sessions).
+
+    Distance is taken to accrue evenly within each segment.
+    """
+    times = array("d", [start])
+    distance = array("d", [0.0])
+    for seg in segments:
+        if seg.get("endDate") is None or not seg.get("distance"):
+            continue
+        times.append(seg["endDate"])
+        distance.append(distance[-1] + seg["distance"])
+    crossings, offsets = km_crossings(distance, times, array("Q", [0, len(times)]))
+    split, elapsed = split_times(crossings, offsets, array("d", [start]))
+    return [{"kmNumber": k + 1, "splitTime": split[k], "cumulativeTime": elapsed[k]}
+            for k in range(len(split))]
+
+
+# MARK: - Segments and elevation
+
+
+def _distance_at(t: float, timestamps, cumulative, lo: int, hi: int) -> float:
+    """Cumulative distance at time ``t``, interpolated within points ``lo:hi``."""
+    j = bisect_right(timestamps, t, lo, hi)
+    if j <= lo:
+        return 0.0 if hi > lo else NAN
+    if j >= hi:
+        return cumulative[hi - 1]
+    t0, t1 = timestamps[j - 1], timestamps[j]
+    d0, d1 = cumulative[j - 1], cumulative[j]
+    return d0 + (t - t0) / (t1 - t0) * (d1 - d0) if t1 > t0 else d1
+
+
+def segment_pace(routes: RouteArrays, cumulative: array, segments_per_session, now: float = None) -> list:
+    """Per session, ``(route metres, seconds per km or None)`` for each segment.
+
+    An open segment (no endDate) runs to ``now`` (as in RouteMapView), or to
+    the last fix when ``now`` is None.
+    """
+    ts, offsets = routes.timestamp, routes.offsets
+    result = []
+    for i, segments in enumerate(segments_per_session):
+        lo, hi = offsets[i], offsets[i + 1]
+        rows = []
+        for seg in segments or ():
+            start = seg["startDate"]
+            end = seg.get("endDate")
+            if end is None:
+                end = now if now is not None else (ts[hi - 1] if hi > lo else start)
+            metres = _distance_at(end, ts, cumulative, lo, hi) - _distance_at(start, ts, cumulative, lo, hi)
+            metres = 0.0 if metres != metres else metres
+            rows.append((metres, (end - start) / (metres / KM) if metres > 0 else None))
+        result.append(rows)
+    return result
+
+
+def elevation_gain(routes: RouteArrays) -> tuple:
+    """``(ascent, descent)`` metres per session over the present altitudes.
+
+    Rises and falls telescope: ascent - descent is last - first and
+    ascent + descent is the summed absolute change, so one abs pass gives both.
+    """
+    alt, offsets = routes.altitude, routes.offsets
+    ascent, descent = array("d"), array("d")
+    for i in range(len(routes)):
+        present = alt[offsets[i]:offsets[i + 1]]
+        if math.isnan(math.fsum(present)):
+            present = [a for a in present if a == a]
+        if len(present) < 2:
+            ascent.append(0.0)
+            descent.append(0.0)
+            continue
+        travel = math.fsum(map(abs, map(sub, islice(present, 1, None), present)))
+        net = present[-1] - present[0]
+        ascent.append((travel + net) / 2)
+        descent.append((travel - net) / 2)
+    return ascent, descent
+
+
+# MARK: - Whole sessions
+
+
+def analyze_batch(routes: RouteArrays, segments_per_session=None) -> dict:
+    """Every derived column for a batch; segment pace only if segments are given."""
+    cumulative = cumulative_distance(routes)
+    times, crossing_offsets = km_crossings(cumulative, routes.timestamp, routes.offsets)
+    split, elapsed = split_times(times, crossing_offsets, routes.starts)
+    ascent, descent = elevation_gain(routes)
+    result = {
+        "cumulative": cumulative,
+        "distance": session_distances(routes, cumulative),
+        "splitOffsets": crossing_offsets,
+        "splitTimes": split,
+        "cumulativeTimes": elapsed,
+        "ascent": ascent,
+        "descent": descent,
+    }
+    if segments_per_session is not None:
+        result["segments"] = segment_pace(routes, cumulative, segments_per_session)
+    return result
+
+
+def analyze_session(session: dict) -> dict:
+    """Route-derived numbers for one session dict, JSON-ready."""
+    routes = RouteArrays.from_sessions([session])
+    segments = session.get("segments") or []
+    result = analyze_batch(routes, [segments])
+    return {
+        "id": session.get("id"),
+        "routePoints": routes.point_count,
+        "distanceMeters": result["distance"][0],
+        "kmSplits": km_split_dicts(routes, result["cumulative"])[0],
+        "segments": [
+            {"id": seg.get("id"), "activityType": seg.get("activityType"),
+             "routeMeters": metres, "secondsPerKm": pace}
+            for seg, (metres, pace) in zip(segments, result["segments"][0])
+        ],
+        "ascent": result["ascent"][0],
+        "descent": result["descent"][0],
+    }
+
+
+def compare_splits(session: dict, tolerance: float = 1.0) -> dict:
+    """How a session's stored kmSplits differ from its route-derived ones.
+
+    A session without a route is compared with its segment profile instead.
+    Either way there must be one split per whole km of the session's
+    ``distance``.
+    """
+    stored = session.get("kmSplits") or []
+    if len(session.get("route") or ()) >= 2:
+        derived = km_split_dicts(RouteArrays.from_sessions([session]))[0]
+    else:
+        derived = profile_km_splits(session.get("segments") or [], session["startDate"])
+    diffs = [abs(s["splitTime"] - d["splitTime"]) for s, d in zip(stored, derived)]
+    worst = max(diffs) if diffs else 0.0
+    distance = session.get("distance")
+    expected = math.floor((distance + DIST_EPS) / KM) if distance is not None else len(stored)
+    return {
+        "id": session.get("id"),
+        "stored": len(stored),
+        "derived": len(derived),
+        "expected": expected,
+        "maxSplitDiff": worst,
+        "agrees": len(stored) == len(derived) == expected and worst <= tolerance,
+    }
+
+
+# MARK: - Benchmark
+
+
+def synthetic_batch(points: int, sessions: int) -> RouteArrays:
+    """``points`` 1 Hz fixes on a loop, split evenly over ``sessions``."""
+    per = max(points // sessions, 1)
+    step = 2 * math.pi / per
+    angles = [(i % per) * step for i in range(points)]
+    lat = array("d", map((0.005).__mul__, map(math.sin, angles)))
+    lat = array("d", map((37.7694).__add__, lat))
+    lon = array("d", map((-122.4862).__add__, map((0.0065).__mul__, map(math.cos, angles))))
+    ts = array("d", map(float, range(points)))
+    alt = array("d", map((25.0).__add__, map((20.0).__mul__, map(math.sin, map((3.0).__mul__, angles)))))
+    offsets = array("Q", list(range(0, points, per))[:sessions] + [points])
+    return RouteArrays(lat, lon, ts, alt, offsets)
+
+
+def benchmark(points: int, sessions: int, repeat: int = 3) -> dict:
+    """Best-of-``repeat`` seconds for each stage on a synthetic batch."""
+    routes = synthetic_batch(points, sessions)
+    stages = {}
+
+    def timed(name, fn):
+        best = math.inf
+        value = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            value = fn()
+            best = min(best, time.perf_counter() - t0)
+        stages[name] = best
+        return value
+
+    steps = timed("stepDistances", lambda: step_distances(routes))
+    cumulative = timed("cumulative", lambda: cumulative_distance(routes, steps))
+    times, offsets = timed("kmCrossings", lambda: km_crossings(cumulative, routes.timestamp, routes.offsets))
+    timed("splitTimes", lambda: split_times(times, offsets, routes.starts))
+    timed("elevation", lambda: elevation_gain(routes))
+    timed("total", lambda: analyze_batch(routes))
+    return {"points": routes.point_count, "sessions": len(routes), "splits": len(times),
+            "stages": stages, "pointsPerSecond": routes.point_count / stages["total"]}
+
+
+# MARK: - CLI
+
+
+def print_check(rows: list, tolerance: float):
+    bad = [r for r in rows if not r["agrees"]]
+    print("\n" + "=" * 60)
+    print("  KM SPLITS vs ROUTE")
+    print("=" * 60)
+    print(f"  Sessions checked:    {len(rows)}")
+    print(f"  Agree (±{tolerance:g} s):       {len(rows) - len(bad)}")
+    for r in bad[:10]:
+        print(f"  ❌ {r['id']}: {r['stored']} stored / {r['derived']} derived / "
+              f"{r['expected']} by distance, "
+              f"max split diff {r['maxSplitDiff']:.1f} s")
+    if len(bad) > 10:
+        print(f"     ... {len(bad) - 10} more")
+    print("=" * 60)
+    print(f"  {'✅ all splits match their routes' if not bad else f'⚠️  {len(bad)} session(s) disagree'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Route-derived distance, km splits, pace and elevation")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    show = sub.add_parser("show", help="Analyse sessions' routes")
+    show.add_argument("sessions_file")
+    show.add_argument("--session", help="Only this session UUID")
+
+    check = sub.add_parser("check", help="Compare stored kmSplits with route-derived ones and distance")
+    check.add_argument("sessions_file")
+    check.add_argument("--tolerance", type=float, default=1.0,
+                       help="Largest split difference still counted as agreeing, seconds (default: 1)")
+    check.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    bench = sub.add_parser("bench", help="Time every stage on a synthetic batch")
+    bench.add_argument("--points", type=int, default=1_000_000, help="Route points (default: 1000000)")
+    bench.add_argument("--sessions", type=int, default=1, help="Sessions sharing them (default: 1)")
+    bench.add_argument("--repeat", type=int, default=3, help="Timing repeats (default: 3)")
+    bench.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    args = parser.parse_args()
+
+    if args.command == "show":
+        wanted = args.session.upper() if args.session else None
+        found = False
+        for session in iter_sessions(args.sessions_file):
+            if wanted and str(session.get("id")).upper() != wanted:
+                continue
+            found = True
+            print(json.dumps(analyze_session(session), indent=2))
+        if wanted and not found:
+            print(f"❌ session {args.session} not found")
+            sys.exit(1)
+    elif args.command == "check":
+        rows = [compare_splits(s, args.tolerance) for s in iter_sessions(args.sessions_file)]
+        if args.json:
+            json.dump(rows, sys.stdout, indent=2)
+            print()
+        else:
+            print_check(rows, args.tolerance)
+        sys.exit(0 if all(r["agrees"] for r in rows) else 1)
+    else:
+        result = benchmark(args.points, args.sessions, args.repeat)
+        if args.json:
+            json.dump(result, sys.stdout, indent=2)
+            print()
+            return
+        print("\n" + "=" * 60)
+        print(f"  ROUTE ANALYSIS — {result['points']} points, {result['sessions']} session(s), "
+              f"{result['splits']} splits")
+        print("=" * 60)
+        for name, seconds in result["stages"].items():
+            print(f"  {name:<16} {seconds * 1000:>9.1f} ms")
+        print(f"  throughput       {result['pointsPerSecond'] / 1e6:>9.2f} M points/s")
+        print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
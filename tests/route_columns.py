@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Columnar, memory-mappable export of session routes.
+
+Every RoutePoint in sessions.json is a verbose JSON object, and at a real 1 Hz
+GPS rate routes dominate both file size and decode time. This module stores the
+routes of a sessions.json as one flat file of contiguous little-endian arrays
+plus a per-session offset index, so a reader can mmap the file and slice one
+session's route without touching any other bytes.
+
+File layout (all little-endian, every section 8-byte aligned):
+
+    header    32 bytes   magic b"SXRT", u32 version, u64 sessions, u64 points, 8 pad
+    ids       16 * S     session UUIDs (raw bytes), in file order
+    offsets   8 * (S+1)  u64 first-point index per session; last entry = points
+    timestamp 8 * P      f64, Apple reference-date seconds
+    latitude  8 * P      f64
+    longitude 8 * P      f64
+    altitude  4 * P      f32, NaN when nil
+    speed     4 * P      f32, NaN when nil
+    accuracy  4 * P      f32 (horizontalAccuracy), NaN when nil
+
+Usage:
+    python3 tests/route_columns.py export sessions.json routes.sxrt
+    python3 tests/route_columns.py show routes.sxrt --session <UUID>
+    python3 tests/route_columns.py bench sessions.json
+"""
+
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+import uuid
+from array import array
+
+from atomic_io import commit_temp, temp_sibling
+from session_io import iter_sessions
+
+MAGIC = b"SXRT"
+VERSION = 1
+HEADER = struct.Struct("<4sIQQ8x")
+
+# (RoutePoint key, array typecode) in on-disk order; f64 columns first keeps
+# every column naturally aligned
+COLUMNS = (
+    ("timestamp", "d"),
+    ("latitude", "d"),
+    ("longitude", "d"),
+    ("altitude", "f"),
+    ("speed", "f"),
+    ("horizontalAccuracy", "f"),
+)
+
+NAN = float("nan")
+
+if sys.byteorder != "little":
+    raise ImportError("route_columns assumes a little-endian host")
+
+
+class RouteColumnsWriter:
+    """Streams session routes into a columnar route file.
+
+    Each column is spooled to its own temp file as sessions arrive, then the
+    spools are concatenated behind the header and index on close — memory use
+    is one session's route, whatever the total size. The result replaces
+    ``path`` atomically.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.ids = []
+        self.offsets = array("Q", [0])
+        self._spool_dir = tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path)))
+        self._spools = [
+            open(os.path.join(self._spool_dir.name, key), "wb") for key, _ in COLUMNS
+        ]
+
+    def add(self, session_id: str, route):
+        """Append one session's route (a list of RoutePoint dicts, or None)."""
+        route = route or []
+        for (key, code), spool in zip(COLUMNS, self._spools):
+            column = array(code, [NAN if p.get(key) is None else p[key] for p in route])
+            column.tofile(spool)
+        self.ids.append(uuid.UUID(session_id).bytes)
+        self.offsets.append(self.offsets[-1] + len(route))
+
+    def close(self):
+        """Assemble the final file from the header, index and column spools."""
+        for spool in self._spools:
+            spool.close()
+        fd, tmp_path = temp_sibling(self.path)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(HEADER.pack(MAGIC, VERSION, len(self.ids), self.offsets[-1]))
+                out.write(b"".join(self.ids))
+                self.offsets.tofile(out)
+                for spool in self._spools:
+                    with open(spool.name, "rb") as f:
+                        while chunk := f.read(1 << 20):
+                            out.write(chunk)
+                out.flush()
+                os.fsync(out.fileno())
+            commit_temp(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        finally:
+            self._spool_dir.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for spool in self._spools:
+                spool.close()
+            self._spool_dir.cleanup()
+        return False
+
+
+class RouteColumns:
+    """Read-only, memory-mapped view of a columnar route file.
+
+    Columns are exposed as typed memoryviews over the mapping; nothing is
+    copied until a caller asks for Python values.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        magic, version, n_sessions, n_points = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} route columns file")
+        self.session_count = n_sessions
+        self.point_count = n_points
+
+        pos = HEADER.size
+        self._ids = view[pos:pos + 16 * n_sessions]
+        pos += 16 * n_sessions
+        self.offsets = view[pos:pos + 8 * (n_sessions + 1)].cast("Q")
+        pos += 8 * (n_sessions + 1)
+        self.columns = {}
+        for key, code in COLUMNS:
+            width = array(code).itemsize
+            self.columns[key] = view[pos:pos + width * n_points].cast(code)
+            pos += width * n_points
+        self._index = None
+
+    def session_id(self, i: int) -> str:
+        """Uppercase UUID string of the i-th session."""
+        return str(uuid.UUID(bytes=bytes(self._ids[16 * i:16 * i + 16]))).upper()
+
+    def index_of(self, session_id: str) -> int:
+        """Position of a session by UUID (the id index is built on first use)."""
+        if self._index is None:
+            raw = self._ids.tobytes()
+            self._index = {raw[16 * i:16 * i + 16]: i for i in range(self.session_count)}
+        return self._index[uuid.UUID(session_id).bytes]
+
+    def slice(self, i: int) -> dict:
+        """Zero-copy column slices for the i-th session's route."""
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return {key: column[start:end] for key, column in self.columns.items()}
+
+    def route(self, i: int) -> list:
+        """The i-th session's route as RoutePoint dicts (nil fields omitted)."""
+        cols = self.slice(i)
+        keys = list(cols)
+        points = []
+        for values in zip(*(cols[k].tolist() for k in keys)):
+            points.append({k: v for k, v in zip(keys, values) if not math.isnan(v)})
+        return points
+
+    def close(self):
+        for column in self.columns.values():
+            column.release()
+        self.offsets.release()
+        self._ids.release()
+        self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return self.session_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def export_routes(sessions_file: str, routes_file: str) -> tuple:
+    """Write the routes of every session in ``sessions_file`` to ``routes_file``.
+
+    Streams the JSON, so memory stays at one session. Returns
+    ``(sessions, points)``.
+    """
+    with RouteColumnsWriter(routes_file) as writer:
+        for session in iter_sessions(sessions_file):
+            writer.add(session["id"], session.get("route"))
+        return len(writer.ids), writer.offsets[-1]
+
+
+def benchmark(sessions_file: str, routes_file: str = None) -> dict:
+    """Compare route size and parse time: JSON vs the columnar file.
+
+    JSON numbers cover just the route arrays (re-encoded compactly, as
+    JSONEncoder would) so both sides hold the same data. Raises ValueError
+    if the file has no route points to compare.
+    """
+    cleanup = routes_file is None
+    if cleanup:
+        fd, routes_file = tempfile.mkstemp(suffix=".sxrt")
+        os.close(fd)
+
+    t0 = time.perf_counter()
+    n_sessions, n_points = export_routes(sessions_file, routes_file)
+    export_s = time.perf_counter() - t0
+    if n_points == 0:
+        if cleanup:
+            os.unlink(routes_file)
+        raise ValueError(f"{sessions_file}: no routed sessions to benchmark")
+
+    routes_json = json.dumps(
+        [s.get("route") or [] for s in iter_sessions(sessions_file)], separators=(",", ":")
+    )
+    json_bytes = len(routes_json.encode())
+
+    t0 = time.perf_counter()
+    decoded = json.loads(routes_json)
+    json_all_s = time.perf_counter() - t0
+    middle = n_sessions // 2
+    t0 = time.perf_counter()
+    json_one = json.loads(routes_json)[middle]
+    json_one_s = time.perf_counter() - t0
+    del decoded
+
+    t0 = time.perf_counter()
+    with RouteColumns(routes_file) as cols:
+        columnar_all = [
+            {key: column.tolist() for key, column in cols.slice(i).items()}
+            for i in range(len(cols))
+        ]
+    columnar_all_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    with RouteColumns(routes_file) as cols:
+        columnar_one = cols.route(middle)
+    columnar_one_s = time.perf_counter() - t0
+    del columnar_all
+
+    if len(columnar_one) != len(json_one):
+        raise AssertionError("columnar route does not match JSON route")
+
+    result = {
+        "sessions": n_sessions,
+        "points": n_points,
+        "jsonBytes": json_bytes,
+        "columnarBytes": os.path.getsize(routes_file),
+        "exportSeconds": export_s,
+        "jsonParseAllSeconds": json_all_s,
+        "columnarMapAllSeconds": columnar_all_s,
+        "jsonOneSessionSeconds": json_one_s,
+        "columnarOneSessionSeconds": columnar_one_s,
+    }
+    if cleanup:
+        os.unlink(routes_file)
+    return result
+
+
+def print_benchmark(result: dict):
+    """Print a benchmark() result as a small table."""
+    ratio = result["jsonBytes"] / max(result["columnarBytes"], 1)
+    print("\n" + "=" * 60)
+    print("  ROUTE ENCODING: JSON vs COLUMNAR")
+    print("=" * 60)
+    print(f"  Sessions / points:   {result['sessions']} / {result['points']}")
+    print(f"  JSON size:           {result['jsonBytes'] / 1e6:.2f} MB")
+    print(f"  Columnar size:       {result['columnarBytes'] / 1e6:.2f} MB ({ratio:.1f}x smaller)")
+    print(f"  Parse all (JSON):    {result['jsonParseAllSeconds'] * 1000:.1f} ms")
+    print(f"  Read all (columnar): {result['columnarMapAllSeconds'] * 1000:.1f} ms")
+    print(f"  One route (JSON):    {result['jsonOneSessionSeconds'] * 1000:.1f} ms")
+    print(f"  One route (columnar):{result['columnarOneSessionSeconds'] * 1000:.3f} ms")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar route export for sessions.json")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Write the routes of a sessions.json to a columnar file")
+    export.add_argument("sessions_file")
+    export.add_argument("routes_file")
+
+    show = sub.add_parser("show", help="Print one session's route from a columnar file")
+    show.add_argument("routes_file")
+    show.add_argument("--session", help="Session UUID (default: first session)")
+
+    bench = sub.add_parser("bench", help="Compare size and parse time against JSON")
+    bench.add_argument("sessions_file")
+    bench.add_argument("--json", action="store_true", help="Print the result as JSON")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        t0 = time.perf_counter()
+        n_sessions, n_points = export_routes(args.sessions_file, args.routes_file)
+        print(f"Exported {n_points} points from {n_sessions} sessions to {args.routes_file} "
+              f"in {time.perf_counter() - t0:.2f} s")
+    elif args.command == "show":
+        with RouteColumns(args.routes_file) as cols:
+            i = cols.index_of(args.session) if args.session else 0
+            print(json.dumps({"id": cols.session_id(i), "route": cols.route(i)}, indent=2))
+    elif args.command == "bench":
+        try:
+            result = benchmark(args.sessions_file)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            print_benchmark(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,587 @@
+#!/usr/bin/env python3
+"""
+Route compaction: simplification, downsampling and a delta+varint encoding.
+
+Every RoutePoint a watch records travels as a verbose JSON object through
+WatchConnectivity, the CloudKit jsonData asset (CloudKitSyncManager.makeRecord)
+and sessions.json. The only reduction today is WatchWorkoutManager's memory
+cap, which halves the older half of the route whenever it reaches 2000
+points. This module measures what smarter options would buy:
+
+- Simplifiers, all on a local equirectangular projection in metres:
+    dp:T        Douglas–Peucker, keeps every point further than T m from the
+                simplified line
+    vw:T        Visvalingam–Whyatt, drops points whose triangle is under T² m²
+    max:N       Visvalingam–Whyatt down to at most N points
+    bucket:S    time buckets, first fix of every S seconds (plus the last)
+    watch[:N]   the watch's halving cap as it behaves today (default 2000)
+    none        keep everything
+  Steps chain with '+', e.g. bucket:5+dp:3.
+- encode_route() packs a route as zigzag varint deltas per column, quantised
+  to 1 ms, 1e-7 degrees (~1 cm), 1 cm altitude, 1 cm/s speed and 0.1 m
+  accuracy; decode_route() restores RoutePoint dicts.
+- `report` sweeps configurations over a route corpus (any sessions.json, or
+  generated) and prints bytes vs error: route distance and ascent change
+  (route_analysis), and the time-synchronised horizontal and altitude
+  deviation of every original fix from the compacted route. Note that
+  simplifiers drop altitude jitter too, so on noisy tracks a large ascent
+  change is mostly noise removed, not relief lost.
+
+Usage:
+    python3 tests/route_compact.py report sessions.json
+    python3 tests/route_compact.py report --generate 200 --route-interval 1 --configs dp:2,vw:2,bucket:5
+    python3 tests/route_compact.py apply sessions.json -o compact.json --config bucket:2+dp:3
+"""
+
+import argparse
+import heapq
+import json
+import math
+import sys
+import time
+import zlib
+from bisect import bisect_right
+from itertools import islice
+
+from inject_test_session import SEEDED_END_DATE, iter_bulk_sessions, run_jobs
+from route_analysis import RouteArrays, cumulative_distance, elevation_gain, session_distances
+from session_io import SessionArrayWriter, iter_sessions
+
+EARTH_RADIUS_M = 6371000.0
+WATCH_MAX_ROUTE_POINTS = 2000  # WatchWorkoutManager.maxRoutePoints
+
+MAGIC = b"SXRC"
+VERSION = 1
+# (RoutePoint key, quantisation scale, optional) in encoded order
+FIELDS = (
+    ("timestamp", 1000, False),
+    ("latitude", 10_000_000, False),
+    ("longitude", 10_000_000, False),
+    ("altitude", 100, True),
+    ("speed", 100, True),
+    ("horizontalAccuracy", 10, True),
+)
+
+DEFAULT_CONFIGS = ("none", "watch", "bucket:5", "bucket:15", "dp:1", "dp:3", "dp:10",
+                   "vw:1", "vw:3", "vw:10", "max:500", "bucket:5+dp:3")
+BATCH = 256
+
+
+# MARK: - Geometry
+
+
+def project(route: list) -> tuple:
+    """Local planar ``(xs, ys)`` in metres around the first fix."""
+    if not route:
+        return [], []
+    lat0 = math.radians(route[0]["latitude"])
+    lon0 = math.radians(route[0]["longitude"])
+    kx = EARTH_RADIUS_M * math.cos(lat0)
+    xs = [kx * (math.radians(p["longitude"]) - lon0) for p in route]
+    ys = [EARTH_RADIUS_M * (math.radians(p["latitude"]) - lat0) for p in route]
+    return xs, ys
+
+
+def _segment_distance2(px, py, ax, ay, bx, by) -> float:
+    """Squared distance from P to segment AB."""
+    dx, dy = bx - ax, by - ay
+    px, py = px - ax, py - ay
+    length2 = dx * dx + dy * dy
+    if length2 > 0:
+        t = (px * dx + py * dy) / length2
+        if t > 1:
+            t = 1.0
+        elif t < 0:
+            t = 0.0
+        px, py = px - t * dx, py - t * dy
+    return px * px + py * py
+
+
+# MARK: - Simplifiers (each returns sorted indices to keep)
+
+
+def douglas_peucker(xs: list, ys: list, tolerance: float) -> list:
+    """Douglas–Peucker with an explicit stack (no recursion limit on long routes)."""
+    n = len(xs)
+    if n < 3:
+        return list(range(n))
+    keep = bytearray(n)
+    keep[0] = keep[n - 1] = 1
+    limit = tolerance * tolerance
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        ax, ay, bx, by = xs[a], ys[a], xs[b], ys[b]
+        worst, at = limit, -1
+        for i in range(a + 1, b):
+            d2 = _segment_distance2(xs[i], ys[i], ax, ay, bx, by)
+            if d2 > worst:
+                worst, at = d2, i
+        if at >= 0:
+            keep[at] = 1
+            stack.append((a, at))
+            stack.append((at, b))
+    return [i for i in range(n) if keep[i]]
+
+
+def visvalingam(xs: list, ys: list, tolerance: float = None, max_points: int = None) -> list:
+    """Visvalingam–Whyatt: drop the point with the smallest triangle until every
+    remaining one is at least ``tolerance``² m² and there are at most ``max_points``."""
+    n = len(xs)
+    if n < 3:
+        return list(range(n))
+    limit = tolerance * tolerance if tolerance is not None else None
+
+    def area(p, i, q):
+        return abs((xs[p] - xs[i]) * (ys[q] - ys[i]) - (xs[q] - xs[i]) * (ys[p] - ys[i])) / 2
+
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+    current = [math.inf] * n
+    heap = []
+    for i in range(1, n - 1):
+        current[i] = area(i - 1, i, i + 1)
+        heap.append((current[i], i))
+    heapq.heapify(heap)
+
+    count = n
+    removed = bytearray(n)
+    floor = 0.0
+    while heap:
+        a, i = heap[0]
+        if removed[i] or a != current[i]:
+            heapq.heappop(heap)
+            continue
+        over_tolerance = limit is not None and a < limit
+        over_count = max_points is not None and count > max_points
+        if not (over_tolerance or over_count):
+            break
+        heapq.heappop(heap)
+        removed[i] = 1
+        count -= 1
+        # Effective areas never drop below the last removed one
+        floor = max(floor, a)
+        p, q = prev[i], nxt[i]
+        nxt[p], prev[q] = q, p
+        for j in (p, q):
+            if 0 < j < n - 1:
+                current[j] = max(area(prev[j], j, nxt[j]), floor)
+                heapq.heappush(heap, (current[j], j))
+    return [i for i in range(n) if not removed[i]]
+
+
+def time_buckets(timestamps: list, seconds: float) -> list:
+    """The first fix in every ``seconds`` window, plus the last fix."""
+    n = len(timestamps)
+    if n < 3 or seconds <= 0:
+        return list(range(n))
+    t0 = timestamps[0]
+    keep = []
+    last_bucket = None
+    for i, t in enumerate(timestamps):
+        bucket = int((t - t0) // seconds)
+        if bucket != last_bucket:
+            keep.append(i)
+            last_bucket = bucket
+    if keep[-1] != n - 1:
+        keep.append(n - 1)
+    return keep
+
+
+def watch_cap(n: int, cap: int = WATCH_MAX_ROUTE_POINTS) -> list:
+    """Indices the watch's in-memory cap would keep from ``n`` fixes arriving one by one."""
+    kept = []
+    for i in range(n):
+        if len(kept) >= cap:
+            half = len(kept) // 2
+            kept = kept[:half:2] + kept[half:]
+        kept.append(i)
+    return kept
+
+
+def parse_config(spec: str) -> list:
+    """``"bucket:5+dp:3"`` -> ``[("bucket", 5.0), ("dp", 3.0)]``."""
+    steps = []
+    for part in spec.split("+"):
+        name, _, value = part.strip().partition(":")
+        if name not in ("none", "watch", "bucket", "dp", "vw", "max"):
+            raise ValueError(f"unknown compaction step {name!r}")
+        if name in ("bucket", "dp", "vw", "max") and not value:
+            raise ValueError(f"{name} needs a value, e.g. {name}:5")
+        steps.append((name, float(value) if value else None))
+    return steps
+
+
+def compact(route: list, steps: list) -> list:
+    """Apply parsed compaction steps in order; returns the kept RoutePoints."""
+    for name, value in steps:
+        if len(route) < 3 or name == "none":
+            continue
+        if name == "watch":
+            keep = watch_cap(len(route), int(value) if value else WATCH_MAX_ROUTE_POINTS)
+        elif name == "bucket":
+            keep = time_buckets([p["timestamp"] for p in route], value)
+        else:
+            xs, ys = project(route)
+            if name == "dp":
+                keep = douglas_peucker(xs, ys, value)
+            elif name == "vw":
+                keep = visvalingam(xs, ys, tolerance=value)
+            else:
+                keep = visvalingam(xs, ys, max_points=int(value))
+        route = [route[i] for i in keep]
+    return route
+
+
+# MARK: - Delta + varint encoding
+
+
+def _zigzag_varints(out: bytearray, values):
+    """Append each value's delta from the previous one as a zigzag varint."""
+    prev = 0
+    append = out.append
+    for v in values:
+        d = v - prev
+        prev = v
+        z = d << 1 if d >= 0 else (-d << 1) - 1
+        while z >= 0x80:
+            append((z & 0x7F) | 0x80)
+            z >>= 7
+        append(z)
+
+
+def _read_varints(data: bytes, pos: int, count: int) -> tuple:
+    """Undo _zigzag_varints for ``count`` values; returns ``(values, pos)``."""
+    values = []
+    prev = 0
+    for _ in range(count):
+        z = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            z |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        prev += (z >> 1) if not z & 1 else -((z + 1) >> 1)
+        values.append(prev)
+    return values, pos
+
+
+def _write_uvarint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_uvarint(data: bytes, pos: int) -> tuple:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_route(route: list) -> bytes:
+    """Pack RoutePoints column by column as quantised zigzag varint deltas.
+
+    Layout: magic, version byte, uvarint point count, then per column an
+    optional presence bitmap (only for nullable columns that have a nil)
+    followed by the varints of the present values.
+    """
+    out = bytearray(MAGIC)
+    out.append(VERSION)
+    _write_uvarint(out, len(route))
+    for key, scale, optional in FIELDS:
+        raw = [p.get(key) for p in route]
+        if optional:
+            missing = any(v is None for v in raw)
+            out.append(1 if missing else 0)
+            if missing:
+                bitmap = bytearray((len(raw) + 7) // 8)
+                for i, v in enumerate(raw):
+                    if v is not None:
+                        bitmap[i >> 3] |= 1 << (i & 7)
+                out += bitmap
+                raw = [v for v in raw if v is not None]
+        _zigzag_varints(out, [round(v * scale) for v in raw])
+    return bytes(out)
+
+
+def decode_route(data: bytes) -> list:
+    """RoutePoint dicts from encode_route() output (nil fields omitted)."""
+    if data[:4] != MAGIC or data[4] != VERSION:
+        raise ValueError(f"not a version {VERSION} compact route")
+    n, pos = _read_uvarint(data, 5)
+    points = [{} for _ in range(n)]
+    for key, scale, optional in FIELDS:
+        present = range(n)
+        if optional:
+            has_bitmap = data[pos]
+            pos += 1
+            if has_bitmap:
+                size = (n + 7) // 8
+                bitmap = data[pos:pos + size]
+                pos += size
+                present = [i for i in range(n) if bitmap[i >> 3] >> (i & 7) & 1]
+        values, pos = _read_varints(data, pos, len(present))
+        for i, v in zip(present, values):
+            points[i][key] = v / scale
+    return points
+
+
+def route_json_bytes(route: list) -> bytes:
+    """The route as JSONEncoder would emit it (compact)."""
+    return json.dumps(route, separators=(",", ":")).encode()
+
+
+# MARK: - Error measurement
+
+
+def deviation(route: list, kept: list) -> tuple:
+    """``(max, rms, max altitude)`` metres between every original fix and the
+    compacted route at the same instant (time-synchronised distance)."""
+    if len(route) < 2 or len(kept) < 1:
+        return 0.0, 0.0, 0.0
+    xs, ys = project(route)
+    lat0 = math.radians(route[0]["latitude"])
+    lon0 = math.radians(route[0]["longitude"])
+    kx = EARTH_RADIUS_M * math.cos(lat0)
+    kt = [p["timestamp"] for p in kept]
+    kxs = [kx * (math.radians(p["longitude"]) - lon0) for p in kept]
+    kys = [EARTH_RADIUS_M * (math.radians(p["latitude"]) - lat0) for p in kept]
+    kzs = [p.get("altitude") for p in kept]
+    worst = total = worst_z = 0.0
+    last = len(kt) - 1
+    for p, x, y in zip(route, xs, ys):
+        t = p["timestamp"]
+        j = min(max(bisect_right(kt, t), 1), last) if last else 0
+        t0, t1 = kt[j - 1], kt[j]
+        f = min(max((t - t0) / (t1 - t0), 0.0), 1.0) if t1 > t0 else 0.0
+        ex = kxs[j - 1] + f * (kxs[j] - kxs[j - 1])
+        ey = kys[j - 1] + f * (kys[j] - kys[j - 1])
+        d2 = (x - ex) ** 2 + (y - ey) ** 2
+        total += d2
+        if d2 > worst:
+            worst = d2
+        z, z0, z1 = p.get("altitude"), kzs[j - 1], kzs[j]
+        if z is not None and z0 is not None and z1 is not None:
+            worst_z = max(worst_z, abs(z - (z0 + f * (z1 - z0))))
+    return math.sqrt(worst), math.sqrt(total / len(route)), worst_z
+
+
+def _distance_and_ascent(route: list) -> tuple:
+    routes = RouteArrays.from_route(route)
+    distance = session_distances(routes, cumulative_distance(routes))[0]
+    ascent, _ = elevation_gain(routes)
+    return distance, ascent[0]
+
+
+def _relative(value: float, reference: float) -> float:
+    return abs(value - reference) / reference * 100 if reference > 0 else 0.0
+
+
+def evaluate_route(route: list, configs: list) -> dict:
+    """Per config: points, bytes and error of compacting one route."""
+    json_bytes = route_json_bytes(route)
+    distance, ascent = _distance_and_ascent(route)
+    result = {
+        "points": len(route),
+        "jsonBytes": len(json_bytes),
+        "zlibBytes": len(zlib.compress(json_bytes, 6)),
+        "configs": {},
+    }
+    for spec, steps in configs:
+        kept = compact(route, steps)
+        encoded = encode_route(kept)
+        kept_distance, kept_ascent = _distance_and_ascent(kept)
+        worst, rms, worst_z = deviation(route, kept)
+        result["configs"][spec] = (
+            len(kept), len(route_json_bytes(kept)), len(encoded),
+            _relative(kept_distance, distance), _relative(kept_ascent, ascent), worst, rms, worst_z,
+        )
+    return result
+
+
+def _evaluate_job(job):
+    route, configs = job
+    return evaluate_route(route, [(spec, parse_config(spec)) for spec in configs])
+
+
+class CorpusReport:
+    """Running totals of evaluate_route() results, per config."""
+
+    def __init__(self, configs: list):
+        self.configs = list(configs)
+        self.routes = 0
+        self.points = 0
+        self.json_bytes = 0
+        self.zlib_bytes = 0
+        self.rows = {spec: {"points": 0, "jsonBytes": 0, "encodedBytes": 0,
+                            "distanceErrorPct": [], "ascentErrorPct": [],
+                            "maxDeviation": 0.0, "rmsDeviation": [], "maxAltitudeDeviation": 0.0}
+                     for spec in self.configs}
+
+    def add(self, result: dict):
+        self.routes += 1
+        self.points += result["points"]
+        self.json_bytes += result["jsonBytes"]
+        self.zlib_bytes += result["zlibBytes"]
+        for spec, (points, json_bytes, encoded, d_err, a_err, worst, rms, worst_z) in result["configs"].items():
+            row = self.rows[spec]
+            row["points"] += points
+            row["jsonBytes"] += json_bytes
+            row["encodedBytes"] += encoded
+            row["distanceErrorPct"].append(d_err)
+            row["ascentErrorPct"].append(a_err)
+            row["maxDeviation"] = max(row["maxDeviation"], worst)
+            row["rmsDeviation"].append(rms)
+            row["maxAltitudeDeviation"] = max(row["maxAltitudeDeviation"], worst_z)
+
+    def to_json(self) -> dict:
+        def summary(values):
+            if not values:
+                return {"mean": 0.0, "p95": 0.0, "max": 0.0}
+            ordered = sorted(values)
+            return {"mean": math.fsum(values) / len(values),
+                    "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                    "max": ordered[-1]}
+
+        rows = {}
+        for spec, row in self.rows.items():
+            rows[spec] = {
+                "points": row["points"],
+                "pointsKeptPct": row["points"] / self.points * 100 if self.points else 0.0,
+                "jsonBytes": row["jsonBytes"],
+                "encodedBytes": row["encodedBytes"],
+                "ratio": self.json_bytes / row["encodedBytes"] if row["encodedBytes"] else None,
+                "distanceErrorPct": summary(row["distanceErrorPct"]),
+                "ascentErrorPct": summary(row["ascentErrorPct"]),
+                "maxDeviation": row["maxDeviation"],
+                "rmsDeviation": summary(row["rmsDeviation"]),
+                "maxAltitudeDeviation": row["maxAltitudeDeviation"],
+            }
+        return {
+            "routes": self.routes,
+            "points": self.points,
+            "jsonBytes": self.json_bytes,
+            "zlibBytes": self.zlib_bytes,
+            "zlibRatio": self.json_bytes / self.zlib_bytes if self.zlib_bytes else None,
+            "configs": rows,
+        }
+
+
+def _batches(items, size: int):
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def report(sessions, configs: list, workers: int = 1, limit: int = None) -> dict:
+    """Evaluate every config over the routes of ``sessions`` (an iterable of dicts)."""
+    for spec in configs:
+        parse_config(spec)
+    corpus = CorpusReport(configs)
+    t0 = time.perf_counter()
+    routes = (s.get("route") for s in sessions)
+    routes = (r for r in routes if r and len(r) >= 2)
+    if limit:
+        routes = islice(routes, limit)
+    for batch in _batches(routes, BATCH):
+        for result in run_jobs(_evaluate_job, [(r, configs) for r in batch], workers):
+            corpus.add(result)
+    result = corpus.to_json()
+    result["seconds"] = time.perf_counter() - t0
+    return result
+
+
+def print_report(result: dict):
+    print("\n" + "=" * 104)
+    print(f"  ROUTE COMPACTION — {result['routes']} routes, {result['points']} points, "
+          f"{result['jsonBytes'] / 1e6:.2f} MB as JSON")
+    print("=" * 104)
+    print(f"  {'config':<16}{'kept':>7}{'varint MB':>11}{'ratio':>8}"
+          f"{'dist err %':>12}{'asc err %':>11}{'rms m':>8}{'max m':>8}{'alt m':>8}")
+    print(f"  {'':<16}{'':>7}{'':>11}{'':>8}{'mean/max':>12}{'mean/max':>11}{'p95':>8}{'':>8}{'max':>8}")
+    for spec, row in result["configs"].items():
+        d, a = row["distanceErrorPct"], row["ascentErrorPct"]
+        print(f"  {spec:<16}{row['pointsKeptPct']:>6.1f}%{row['encodedBytes'] / 1e6:>11.3f}"
+              f"{row['ratio']:>7.1f}x{d['mean']:>6.2f}/{d['max']:<5.1f}{a['mean']:>5.2f}/{a['max']:<5.1f}"
+              f"{row['rmsDeviation']['p95']:>8.2f}{row['maxDeviation']:>8.1f}{row['maxAltitudeDeviation']:>8.1f}")
+    print(f"  {'json + zlib':<16}{100.0:>6.1f}%{result['zlibBytes'] / 1e6:>11.3f}{result['zlibRatio']:>7.1f}x"
+          f"{'lossless':>12}")
+    print("=" * 104)
+    print(f"  ratio = JSON route bytes / delta+varint bytes after compaction; {result['seconds']:.1f} s")
+
+
+# MARK: - CLI
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Route simplification, downsampling and compact encoding")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rep = sub.add_parser("report", help="Compression vs error for a sweep of configurations")
+    rep.add_argument("files", nargs="*", help="sessions.json-shaped route corpora")
+    rep.add_argument("--generate", type=int, help="Use this many generated sessions instead")
+    rep.add_argument("--route-interval", type=float, default=1,
+                     help="Seconds between generated route points (default: 1, the watch's rate)")
+    rep.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    rep.add_argument("--configs", default=",".join(DEFAULT_CONFIGS),
+                     help="Comma-separated configurations (default: a standard sweep)")
+    rep.add_argument("--limit", type=int, help="Stop after this many routes")
+    rep.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1)")
+    rep.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    app = sub.add_parser("apply", help="Write a copy of a sessions file with compacted routes")
+    app.add_argument("sessions_file")
+    app.add_argument("-o", "--output", required=True)
+    app.add_argument("--config", required=True, help="e.g. bucket:2+dp:3")
+    app.add_argument("--pretty", action="store_true", help="Indent the output")
+
+    args = parser.parse_args()
+
+    if args.command == "report":
+        configs = [c.strip() for c in args.configs.split(",") if c.strip()]
+        try:
+            for spec in configs:
+                parse_config(spec)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.generate:
+            sessions = iter_bulk_sessions(args.generate, max(30, args.generate / 1.2), args.seed,
+                                          SEEDED_END_DATE, args.route_interval, args.workers)
+        elif args.files:
+            sessions = (s for path in args.files for s in iter_sessions(path))
+        else:
+            parser.error("give sessions files or --generate N")
+        result = report(sessions, configs, args.workers, args.limit)
+        if args.json:
+            json.dump(result, sys.stdout, indent=2)
+            print()
+        else:
+            print_report(result)
+    else:
+        try:
+            steps = parse_config(args.config)
+        except ValueError as e:
+            parser.error(str(e))
+        before = after = 0
+        with SessionArrayWriter(args.output, args.pretty) as writer:
+            for session in iter_sessions(args.sessions_file):
+                route = session.get("route")
+                if route:
+                    before += len(route)
+                    session["route"] = compact(route, steps)
+                    after += len(session["route"])
+                writer.write(session)
+        print(f"✅ {writer.count} sessions -> {args.output}: {before} -> {after} route points "
+              f"({after / before * 100 if before else 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Generate realistic per-sample sensor streams for arbitrarily long sessions.
+
+inject_test_session.py only produces session-level aggregates and a coarse
+route. The watch's segmentation logic (ActivityClassifier, RecoverySegmenter
+.tick, SegmentMetricsLedger) consumes per-second HR, cadence, GPS and motion
+readings instead. This module produces those as a lazy, time-ordered stream:
+
+    {"t": ..., "kind": "hr", "bpm": 151}
+    {"t": ..., "kind": "cadence", "spm": 166}
+    {"t": ..., "kind": "gps", "latitude": ..., "longitude": ..., "altitude": ...,
+     "speed": ..., "horizontalAccuracy": ...}
+    {"t": ..., "kind": "activity", "activity": "running", "confidence": "high",
+     "truth": "running"}
+
+`t` is Apple reference-date seconds, GPS keys match RoutePoint, and activity
+values are DetectedActivity raw values (confidence mirrors
+ActivityClassifier.Confidence; `truth` is the generator's ground truth, for
+scoring classifiers). A stream file starts with one {"kind": "header", ...}
+line recording the profile, maxHR and rates.
+
+Every channel is its own generator over the same seeded phase schedule and the
+channels are merged with heapq.merge, so memory stays constant no matter how
+long the session is — a 10-hour ultra is just more iterations.
+
+Usage:
+    python3 tests/sensor_stream.py write --hours 10 --out /tmp/ultra.jsonl.gz
+    python3 tests/sensor_stream.py write --profile gym --hours 1 --seed 3 --out /tmp/gym.jsonl
+    python3 tests/sensor_stream.py replay /tmp/gym.jsonl --speed 60
+    python3 tests/sensor_stream.py replay --profile rehab --hours 1 --speed 0 | head
+"""
+
+import argparse
+import gzip
+import heapq
+import json
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from inject_test_session import SEEDED_END_DATE, derive_seed, to_apple_timestamp
+
+# Phase lengths in seconds per profile: (activity, min, max) cycled in order.
+# runwalk mirrors the injector's segments; gym follows RecoverySegmenter's
+# gymStrength model (motion = set, stationary = rest); rehab follows
+# cardiacRehab (stationary on a machine = work, walking between machines = rest).
+PROFILES = {
+    "runwalk": (("running", 180, 480), ("walking", 60, 240)),
+    "gym": (("walking", 30, 70), ("stationary", 60, 150)),
+    "rehab": (("stationary", 180, 360), ("walking", 30, 90)),
+}
+
+# Steady-state HR as a fraction of maxHR for each (profile, activity)
+HR_TARGETS = {
+    "runwalk": {"running": 0.82, "walking": 0.66},
+    "gym": {"walking": 0.74, "stationary": 0.50},
+    "rehab": {"stationary": 0.62, "walking": 0.52},
+}
+
+# Cadence (spm) range per activity; stationary reads ~0 with pedometer lag
+CADENCE = {"running": (158, 176), "walking": (98, 124), "stationary": (0, 6)}
+
+# Ground speed (m/s) per activity
+SPEED = {"running": (2.6, 3.6), "walking": (1.2, 1.7), "stationary": (0.0, 0.2)}
+
+# HR time constants (s): rises are faster than recoveries
+HR_TAU_RISE = 25.0
+HR_TAU_FALL = 55.0
+
+# Slow cardiac drift over long sessions, as a fraction of maxHR per hour
+HR_DRIFT_PER_HOUR = 0.015
+
+DEFAULT_RATES = {"hr": 1.0, "cadence": 1.0, "gps": 1.0, "activity": 0.4}
+
+
+class StreamSpec:
+    """Everything needed to regenerate a stream deterministically."""
+
+    def __init__(self, profile: str, hours: float, seed: int, start: datetime,
+                 max_hr: float = 185.0, rates: dict = None):
+        if profile not in PROFILES:
+            raise ValueError(f"unknown profile {profile!r}; choose from {', '.join(PROFILES)}")
+        self.profile = profile
+        self.hours = hours
+        self.seed = seed
+        self.start = to_apple_timestamp(start)
+        self.max_hr = max_hr
+        self.rates = {**DEFAULT_RATES, **(rates or {})}
+
+    @property
+    def end(self) -> float:
+        return self.start + self.hours * 3600
+
+    def header(self) -> dict:
+        return {
+            "kind": "header",
+            "profile": self.profile,
+            "seed": self.seed,
+            "start": self.start,
+            "end": self.end,
+            "maxHR": self.max_hr,
+            "rates": self.rates,
+        }
+
+    def rng(self, channel: str) -> random.Random:
+        """Independent RNG per channel, so rates can change without reshuffling others."""
+        return random.Random(derive_seed(self.seed, f"{self.profile}:{channel}"))
+
+
+def iter_phases(spec: StreamSpec):
+    """Yield ``(activity, start_t, end_t)`` phases forever, from the shared seed.
+
+    Each channel calls this itself; the same seed yields the same schedule, so
+    channels agree on the ground truth without sharing state.
+    """
+    rng = spec.rng("phases")
+    t = spec.start
+    cycle = PROFILES[spec.profile]
+    i = 0
+    while True:
+        activity, lo, hi = cycle[i % len(cycle)]
+        duration = rng.uniform(lo, hi)
+        yield activity, t, t + duration
+        t += duration
+        i += 1
+
+
+def _sample_times(spec: StreamSpec, channel: str):
+    """Sample times for a channel, computed by index to avoid float drift."""
+    rate = spec.rates[channel]
+    if rate <= 0:
+        return
+    step = 1.0 / rate
+    i = 0
+    while True:
+        t = spec.start + i * step
+        if t >= spec.end:
+            return
+        yield t
+        i += 1
+
+
+def _with_truth(spec: StreamSpec, channel: str):
+    """Pair each of a channel's sample times with the ground-truth activity."""
+    phases = iter_phases(spec)
+    activity, _, phase_end = next(phases)
+    for t in _sample_times(spec, channel):
+        while t >= phase_end:
+            activity, _, phase_end = next(phases)
+        yield t, activity
+
+
+def hr_channel(spec: StreamSpec):
+    """Heart rate: first-order lag toward an activity-dependent target, plus
+    slow drift and beat-to-beat noise."""
+    rng = spec.rng("hr")
+    targets = HR_TARGETS[spec.profile]
+    step = 1.0 / spec.rates["hr"] if spec.rates["hr"] > 0 else 1.0
+    rise = 1 - math.exp(-step / HR_TAU_RISE)
+    fall = 1 - math.exp(-step / HR_TAU_FALL)
+    hr = spec.max_hr * 0.45
+    for t, activity in _with_truth(spec, "hr"):
+        drift = HR_DRIFT_PER_HOUR * (t - spec.start) / 3600
+        target = spec.max_hr * (targets.get(activity, 0.5) + drift)
+        hr += (target - hr) * (rise if target > hr else fall)
+        yield {"t": t, "kind": "hr", "bpm": int(round(hr + rng.gauss(0, 1.5)))}
+
+
+def cadence_channel(spec: StreamSpec):
+    """Step cadence with a few seconds of pedometer lag after each transition."""
+    rng = spec.rng("cadence")
+    lagged = None
+    for t, activity in _with_truth(spec, "cadence"):
+        lo, hi = CADENCE[activity]
+        target = rng.uniform(lo, hi)
+        lagged = target if lagged is None else lagged + (target - lagged) * 0.35
+        yield {"t": t, "kind": "cadence", "spm": int(round(lagged))}
+
+
+def gps_channel(spec: StreamSpec):
+    """GPS fixes from dead-reckoning a wandering heading at activity speed."""
+    rng = spec.rng("gps")
+    lat, lon, alt = 37.7694, -122.4862, 25.0
+    heading = rng.uniform(0, 2 * math.pi)
+    prev_t = spec.start
+    for t, activity in _with_truth(spec, "gps"):
+        dt = t - prev_t
+        prev_t = t
+        lo, hi = SPEED[activity]
+        speed = rng.uniform(lo, hi)
+        heading += rng.gauss(0, 0.08)
+        dist = speed * dt
+        lat += dist * math.cos(heading) / 111_320.0
+        lon += dist * math.sin(heading) / (111_320.0 * math.cos(math.radians(lat)))
+        alt = min(max(alt + rng.gauss(0, 0.15), 0.0), 120.0)
+        yield {
+            "t": t,
+            "kind": "gps",
+            "latitude": round(lat, 7),
+            "longitude": round(lon, 7),
+            "altitude": round(alt, 1),
+            "speed": round(speed, 2),
+            "horizontalAccuracy": round(rng.uniform(3, 12), 1),
+        }
+
+
+def activity_channel(spec: StreamSpec, noise: float = 0.08):
+    """Motion readings: mostly the true activity at medium/high confidence,
+    with some low-confidence and mislabelled readings mixed in."""
+    rng = spec.rng("activity")
+    labels = ("running", "walking", "stationary")
+    for t, truth in _with_truth(spec, "activity"):
+        roll = rng.random()
+        if roll < noise:
+            reported, confidence = rng.choice(labels), "low"
+        elif roll < noise * 1.5:
+            reported, confidence = rng.choice(labels), "medium"
+        else:
+            reported, confidence = truth, ("high" if rng.random() < 0.7 else "medium")
+        yield {"t": t, "kind": "activity", "activity": reported,
+               "confidence": confidence, "truth": truth}
+
+
+CHANNELS = {
+    "hr": hr_channel,
+    "cadence": cadence_channel,
+    "gps": gps_channel,
+    "activity": activity_channel,
+}
+
+
+def iter_stream(spec: StreamSpec):
+    """All enabled channels merged into one time-ordered stream (lazy)."""
+    channels = [CHANNELS[name](spec) for name, rate in spec.rates.items() if rate > 0]
+    return heapq.merge(*channels, key=lambda sample: sample["t"])
+
+
+def _open_text(path: str, mode: str):
+    if path == "-":
+        return sys.stdout if "w" in mode else sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_stream(spec: StreamSpec, path: str) -> int:
+    """Write the header and every sample as JSON Lines; returns the sample count."""
+    count = 0
+    out = _open_text(path, "w")
+    try:
+        out.write(json.dumps(spec.header(), separators=(",", ":")) + "\n")
+        for sample in iter_stream(spec):
+            out.write(json.dumps(sample, separators=(",", ":")) + "\n")
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return count
+
+
+def read_stream(path: str):
+    """Return ``(header, samples)`` for a JSON Lines stream; samples is lazy."""
+    f = _open_text(path, "r")
+    header = json.loads(f.readline())
+    if header.get("kind") != "header":
+        raise ValueError(f"{path}: first line is not a stream header")
+
+    def samples():
+        try:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+    return header, samples()
+
+
+def replay(samples, speed: float = 1.0, clock=time.monotonic, sleep=time.sleep):
+    """Re-yield samples paced to their timestamps.
+
+    ``speed`` 1 is wall-clock, 60 is a minute per second, 0 is as fast as
+    possible. Lateness is never made up by skipping samples.
+    """
+    start_wall = None
+    start_t = None
+    for sample in samples:
+        if speed > 0:
+            if start_wall is None:
+                start_wall, start_t = clock(), sample["t"]
+            delay = start_wall + (sample["t"] - start_t) / speed - clock()
+            if delay > 0:
+                sleep(delay)
+        yield sample
+
+
+def _spec_from_args(args) -> StreamSpec:
+    seed = args.seed if args.seed is not None else random.SystemRandom().getrandbits(63)
+    end = SEEDED_END_DATE if args.seed is not None else datetime.now(timezone.utc)
+    start = end - timedelta(hours=args.hours)
+    rates = {
+        "hr": args.hr_hz,
+        "cadence": args.cadence_hz,
+        "gps": args.gps_hz,
+        "activity": args.activity_hz,
+    }
+    return StreamSpec(args.profile, args.hours, seed, start, args.max_hr, rates)
+
+
+def _add_spec_args(parser):
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="runwalk",
+                        help="Phase model (default: runwalk)")
+    parser.add_argument("--hours", type=float, default=1.0, help="Session length (default: 1)")
+    parser.add_argument("--seed", type=int, help="Seed (default: random)")
+    parser.add_argument("--max-hr", type=float, default=185.0, help="Max HR in BPM (default: 185)")
+    for channel, rate in DEFAULT_RATES.items():
+        parser.add_argument(f"--{channel}-hz", type=float, default=rate,
+                            help=f"{channel} samples per second, 0 to disable (default: {rate})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate or replay per-sample sensor streams")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    write = sub.add_parser("write", help="Generate a stream to a JSON Lines file (.gz compresses)")
+    _add_spec_args(write)
+    write.add_argument("--out", required=True, help="Output path, or - for stdout")
+
+    play = sub.add_parser("replay", help="Print a stream to stdout paced in time")
+    play.add_argument("stream", nargs="?", help="Stream file to replay (default: generate one)")
+    _add_spec_args(play)
+    play.add_argument("--speed", type=float, default=1.0,
+                      help="Playback speed; 1 = wall clock, 0 = unthrottled (default: 1)")
+
+    args = parser.parse_args()
+
+    if args.command == "write":
+        spec = _spec_from_args(args)
+        t0 = time.perf_counter()
+        count = write_stream(spec, args.out)
+        if args.out != "-":
+            elapsed = time.perf_counter() - t0
+            print(f"Wrote {count} samples ({args.hours:g} h, {spec.profile}, seed {spec.seed}) "
+                  f"to {args.out} in {elapsed:.1f} s ({count / elapsed:.0f} samples/s)")
+    else:
+        if args.stream:
+            header, samples = read_stream(args.stream)
+        else:
+            spec = _spec_from_args(args)
+            header, samples = spec.header(), iter_stream(spec)
+        print(json.dumps(header, separators=(",", ":")), flush=True)
+        try:
+            for sample in replay(samples, args.speed):
+                print(json.dumps(sample, separators=(",", ":")), flush=args.speed > 0)
+        except BrokenPipeError:
+            pass
+
+
+if __name__ == "__main__":
+    main()
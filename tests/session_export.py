@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+Streaming bulk export of sessions.json and sessions_archive.json.
+
+Converts a whole history to GPX or TCX files (one per session) or to flat CSV
+tables, without ever decoding the full [TrainingSession] array:
+
+- Inputs are streamed with session_io.iter_sessions, one session at a time.
+  With --dir, the App Group's sessions.json is read first and
+  sessions_archive.json second; a session ID seen twice is exported once
+  (first copy wins, so the live file beats a stale archived copy).
+- Sessions are handed to a worker pool in fixed-size batches; while one
+  batch renders, the parent decodes the next, and nothing more is in
+  flight. Workers render the output (and for GPX/TCX write the file
+  themselves); the parent only reads, dedupes and appends CSV text. Memory
+  is bounded by the batch size, not the history.
+- Apple reference-date seconds become ISO 8601 UTC times. Route points are
+  split between ActivitySegments by time (each point belongs to the last
+  segment started at or before it): one GPX <trkseg> or TCX <Lap> per
+  segment, so nothing is dropped. TCX laps carry the segment's distance,
+  calories and average HR, and trackpoints carry cumulative route distance
+  (route_analysis).
+- CSV writes three normalised tables, sessions.csv, segments.csv and
+  points.csv, joined on session_id: the column layout a Parquet export
+  would use.
+
+Progress (sessions/s, MB/s, % of input) goes to stderr; the final report
+gives throughput and peak memory.
+
+Usage:
+    python3 tests/session_export.py --dir "$APP_GROUP" --format gpx -o /tmp/export
+    python3 tests/session_export.py sessions.json sessions_archive.json --format csv -o /tmp/export --workers 4
+"""
+
+import argparse
+import csv
+import io
+import json
+import math
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import uuid
+from bisect import bisect_right
+from itertools import islice
+from xml.sax.saxutils import escape
+
+from atomic_io import commit_temp, temp_sibling
+from route_analysis import RouteArrays, cumulative_distance
+from session_io import iter_sessions
+
+UNIX_OFFSET = 978307200.0  # 2001-01-01T00:00:00Z as Unix time
+BATCH = 64
+PROGRESS_INTERVAL_S = 1.0
+FORMATS = ("gpx", "tcx", "csv")
+
+TCX_SPORTS = {"running": "Running", "cycling": "Biking"}
+
+SESSION_COLUMNS = ("session_id", "start", "end", "duration_s", "distance", "average_hr", "max_hr",
+                   "calories", "total_steps", "sport", "program", "segments", "route_points", "km_splits")
+SEGMENT_COLUMNS = ("session_id", "index", "segment_id", "activity", "start", "end", "duration_s",
+                   "distance_m", "steps", "average_hr", "estimated_calories", "active_energy_calories")
+POINT_COLUMNS = ("session_id", "index", "segment_index", "time", "latitude", "longitude", "altitude",
+                 "speed", "horizontal_accuracy", "distance_m")
+
+
+# MARK: - Conversion helpers
+
+
+def iso_time(apple_ts: float) -> str:
+    """Apple reference-date seconds as ISO 8601 UTC with milliseconds."""
+    unix = apple_ts + UNIX_OFFSET
+    whole = math.floor(unix)
+    ms = round((unix - whole) * 1000)
+    if ms == 1000:
+        whole, ms = whole + 1, 0
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(whole)) + f".{ms:03d}Z"
+
+
+def _blank(value) -> str:
+    return "" if value is None else value
+
+
+def segment_of_points(session: dict) -> list:
+    """Index into ``segments`` for every route point (0 when there are none)."""
+    route = session.get("route") or []
+    starts = [seg["startDate"] for seg in session.get("segments") or []]
+    if not starts:
+        return [0] * len(route)
+    return [max(bisect_right(starts, p["timestamp"]) - 1, 0) for p in route]
+
+
+def _route_distance(route: list) -> list:
+    if len(route) < 2:
+        return [0.0] * len(route)
+    return cumulative_distance(RouteArrays.from_route(route)).tolist()
+
+
+def export_name(session: dict, extension: str) -> str:
+    """``<year>/<date>_<HHMM>_<id>.<ext>``: sortable, unique, <1k files per directory."""
+    stamp = iso_time(session["startDate"])
+    return os.path.join(stamp[:4], f"{stamp[:10]}_{stamp[11:13]}{stamp[14:16]}_{session['id'].upper()}.{extension}")
+
+
+# MARK: - GPX / TCX
+
+
+def render_gpx(session: dict) -> str:
+    route = session.get("route") or []
+    name = escape(session.get("programName") or f"{session.get('sportType') or 'workout'} session")
+    desc = []
+    if session.get("averageHeartRate") is not None:
+        desc.append(f"Avg HR {session['averageHeartRate']:.0f} bpm")
+    if session.get("maxHeartRate") is not None:
+        desc.append(f"max HR {session['maxHeartRate']:.0f} bpm")
+    out = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        '<gpx version="1.1" creator="ShuttlX" xmlns="http://www.topografix.com/GPX/1/1">\n',
+        f"  <metadata><name>{name}</name><time>{iso_time(session['startDate'])}</time></metadata>\n",
+        f"  <trk>\n    <name>{name}</name>\n",
+    ]
+    if desc:
+        out.append(f"    <desc>{escape(', '.join(desc))}</desc>\n")
+    out.append(f"    <type>{escape(session.get('sportType') or 'running')}</type>\n")
+    owners = segment_of_points(session)
+    current = None
+    for point, owner in zip(route, owners):
+        if owner != current:
+            if current is not None:
+                out.append("    </trkseg>\n")
+            out.append("    <trkseg>\n")
+            current = owner
+        ele = f"<ele>{point['altitude']:.1f}</ele>" if point.get("altitude") is not None else ""
+        out.append(f'      <trkpt lat="{point["latitude"]:.7f}" lon="{point["longitude"]:.7f}">'
+                   f"{ele}<time>{iso_time(point['timestamp'])}</time></trkpt>\n")
+    if current is not None:
+        out.append("    </trkseg>\n")
+    out.append("  </trk>\n</gpx>\n")
+    return "".join(out)
+
+
+def _tcx_lap(out: list, start: float, seconds: float, metres: float, calories, avg_hr, max_hr,
+             resting: bool, points: list, distances: list):
+    out.append(f'      <Lap StartTime="{iso_time(start)}">\n'
+               f"        <TotalTimeSeconds>{seconds:.1f}</TotalTimeSeconds>\n"
+               f"        <DistanceMeters>{metres:.1f}</DistanceMeters>\n"
+               f"        <Calories>{int(round(calories or 0))}</Calories>\n")
+    if avg_hr is not None:
+        out.append(f"        <AverageHeartRateBpm><Value>{int(round(avg_hr))}</Value></AverageHeartRateBpm>\n")
+    if max_hr is not None:
+        out.append(f"        <MaximumHeartRateBpm><Value>{int(round(max_hr))}</Value></MaximumHeartRateBpm>\n")
+    out.append(f"        <Intensity>{'Resting' if resting else 'Active'}</Intensity>\n"
+               "        <TriggerMethod>Manual</TriggerMethod>\n")
+    if points:
+        out.append("        <Track>\n")
+        for point, metres_so_far in zip(points, distances):
+            alt = (f"<AltitudeMeters>{point['altitude']:.1f}</AltitudeMeters>"
+                   if point.get("altitude") is not None else "")
+            out.append(f"          <Trackpoint><Time>{iso_time(point['timestamp'])}</Time>"
+                       f"<Position><LatitudeDegrees>{point['latitude']:.7f}</LatitudeDegrees>"
+                       f"<LongitudeDegrees>{point['longitude']:.7f}</LongitudeDegrees></Position>"
+                       f"{alt}<DistanceMeters>{metres_so_far:.1f}</DistanceMeters></Trackpoint>\n")
+        out.append("        </Track>\n")
+    out.append("      </Lap>\n")
+
+
+def render_tcx(session: dict) -> str:
+    route = session.get("route") or []
+    segments = session.get("segments") or []
+    distances = _route_distance(route)
+    sport = TCX_SPORTS.get(session.get("sportType") or "running", "Other")
+    out = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        '<TrainingCenterDatabase xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2">\n',
+        f'  <Activities>\n    <Activity Sport="{sport}">\n',
+        f"      <Id>{iso_time(session['startDate'])}</Id>\n",
+    ]
+    if not segments:
+        metres = distances[-1] if distances else 0.0
+        _tcx_lap(out, session["startDate"], session["duration"], metres, session.get("caloriesBurned"),
+                 session.get("averageHeartRate"), session.get("maxHeartRate"), False, route, distances)
+    else:
+        owners = segment_of_points(session)
+        by_segment = [[] for _ in segments]
+        for i, owner in enumerate(owners):
+            by_segment[owner].append(i)
+        for seg, indexes in zip(segments, by_segment):
+            end = seg.get("endDate")
+            seconds = (end - seg["startDate"]) if end is not None else 0.0
+            points = [route[i] for i in indexes]
+            lap_distances = [distances[i] for i in indexes]
+            metres = seg.get("distance")
+            if metres is None:
+                metres = (lap_distances[-1] - lap_distances[0]) if lap_distances else 0.0
+            calories = seg.get("activeEnergyCalories")
+            if calories is None:
+                calories = seg.get("estimatedCalories")
+            _tcx_lap(out, seg["startDate"], seconds, metres, calories, seg.get("averageHeartRate"), None,
+                     seg.get("activityType") in ("walking", "stationary"), points, lap_distances)
+    if session.get("programName"):
+        out.append(f"      <Notes>{escape(session['programName'])}</Notes>\n")
+    out.append("    </Activity>\n  </Activities>\n</TrainingCenterDatabase>\n")
+    return "".join(out)
+
+
+def _write_file(path: str, text: str) -> int:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = text.encode()
+    fd, tmp = temp_sibling(path)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    commit_temp(tmp, path)
+    return len(data)
+
+
+# MARK: - CSV
+
+
+def render_csv(session: dict) -> tuple:
+    """``(sessions rows, segments rows, points rows)`` as CSV text, no headers."""
+    sid = session["id"].upper()
+    route = session.get("route") or []
+    segments = session.get("segments") or []
+    end = session.get("endDate")
+
+    buffers = [io.StringIO(), io.StringIO(), io.StringIO()]
+    sessions_w, segments_w, points_w = (csv.writer(b, lineterminator="\n") for b in buffers)
+    sessions_w.writerow((
+        sid, iso_time(session["startDate"]), iso_time(end) if end is not None else "",
+        session["duration"], _blank(session.get("distance")), _blank(session.get("averageHeartRate")),
+        _blank(session.get("maxHeartRate")), _blank(session.get("caloriesBurned")),
+        _blank(session.get("totalSteps")), _blank(session.get("sportType")),
+        _blank(session.get("programName")), len(segments), len(route), len(session.get("kmSplits") or ()),
+    ))
+    segments_w.writerows(
+        (sid, i, seg["id"].upper(), seg["activityType"], iso_time(seg["startDate"]),
+         iso_time(seg["endDate"]) if seg.get("endDate") is not None else "",
+         (seg["endDate"] - seg["startDate"]) if seg.get("endDate") is not None else "",
+         _blank(seg.get("distance")), _blank(seg.get("steps")), _blank(seg.get("averageHeartRate")),
+         _blank(seg.get("estimatedCalories")), _blank(seg.get("activeEnergyCalories")))
+        for i, seg in enumerate(segments)
+    )
+    points_w.writerows(
+        (sid, i, owner, iso_time(p["timestamp"]), p["latitude"], p["longitude"], _blank(p.get("altitude")),
+         _blank(p.get("speed")), _blank(p.get("horizontalAccuracy")), round(metres, 2))
+        for i, (p, owner, metres) in enumerate(zip(route, segment_of_points(session), _route_distance(route)))
+    )
+    return tuple(b.getvalue() for b in buffers)
+
+
+class CsvTables:
+    """sessions.csv, segments.csv and points.csv, each written atomically."""
+
+    NAMES = (("sessions.csv", SESSION_COLUMNS), ("segments.csv", SEGMENT_COLUMNS), ("points.csv", POINT_COLUMNS))
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.paths = [os.path.join(directory, name) for name, _ in self.NAMES]
+        self._files = []
+        for path, (_, columns) in zip(self.paths, self.NAMES):
+            fd, tmp = temp_sibling(path)
+            f = os.fdopen(fd, "w", encoding="utf-8", newline="", buffering=1 << 20)
+            f.write(",".join(columns) + "\n")
+            self._files.append((f, tmp))
+        self.bytes = 0
+
+    def write(self, parts: tuple):
+        for (f, _), text in zip(self._files, parts):
+            f.write(text)
+            self.bytes += len(text)
+
+    def close(self):
+        for (f, tmp), path in zip(self._files, self.paths):
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+            commit_temp(tmp, path)
+
+    def abort(self):
+        for f, tmp in self._files:
+            f.close()
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+
+# MARK: - Pipeline
+
+
+def _export_job(job) -> tuple:
+    """Worker entry point: render one session; files are written here."""
+    session, fmt, out_dir = job
+    points = len(session.get("route") or ())
+    if fmt == "csv":
+        return render_csv(session), points
+    path = os.path.join(out_dir, export_name(session, fmt))
+    text = render_gpx(session) if fmt == "gpx" else render_tcx(session)
+    return _write_file(path, text), points
+
+
+class Progress:
+    """Throttled stderr progress line over a known input size."""
+
+    def __init__(self, total_bytes: int, enabled: bool = True):
+        self.total = max(total_bytes, 1)
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.last = 0.0
+
+    def update(self, sessions: int, position: int, final: bool = False):
+        now = time.perf_counter()
+        if not self.enabled or (not final and now - self.last < PROGRESS_INTERVAL_S):
+            return
+        self.last = now
+        elapsed = max(now - self.start, 1e-9)
+        print(f"\r  {sessions:>9,} sessions  {sessions / elapsed:>8,.0f}/s  "
+              f"{position / elapsed / 1e6:>6.1f} MB/s  {min(position / self.total, 1) * 100:>5.1f}%",
+              end="\n" if final else "", file=sys.stderr, flush=True)
+
+
+def _peak_rss_mb() -> tuple:
+    """Peak RSS of this process and of the largest worker, MB (Linux reports KiB)."""
+    scale = 1 / 1024 if sys.platform != "darwin" else 1 / (1024 * 1024)
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return own, children
+
+
+def export(paths: list, out_dir: str, fmt: str, workers: int = 1, progress: bool = True) -> dict:
+    """Export every unique session in ``paths`` to ``out_dir``; returns the report."""
+    t0 = time.perf_counter()
+    sizes = [os.path.getsize(p) for p in paths]
+    meter = Progress(sum(sizes), progress)
+    seen = set()
+    stats = {"sessions": 0, "duplicates": 0, "points": 0, "bytes": 0, "files": 0}
+    tables = CsvTables(out_dir) if fmt == "csv" else None
+
+    def sessions():
+        done = 0
+        for path, size in zip(paths, sizes):
+            for offset, session in iter_sessions(path, with_offsets=True):
+                key = uuid.UUID(session["id"]).bytes
+                if key in seen:
+                    stats["duplicates"] += 1
+                    continue
+                seen.add(key)
+                yield session, done + offset
+            done += size
+
+    def consume(results, position):
+        for result, points in results:
+            if tables is not None:
+                tables.write(result)
+            else:
+                stats["bytes"] += result
+                stats["files"] += 1
+            stats["points"] += points
+            stats["sessions"] += 1
+        meter.update(stats["sessions"], position)
+
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        stream = sessions()
+        pending = None
+        # One batch renders in the pool while the next is read and decoded
+        while True:
+            batch = list(islice(stream, BATCH * max(workers, 1)))
+            if pending is not None:
+                consume(*pending)
+                pending = None
+            if not batch:
+                break
+            jobs = [(session, fmt, out_dir) for session, _ in batch]
+            if pool is None:
+                consume(map(_export_job, jobs), batch[-1][1])
+            else:
+                pending = (pool.imap(_export_job, jobs, BATCH // 4), batch[-1][1])
+        if tables is not None:
+            tables.close()
+            stats["bytes"] = sum(os.path.getsize(p) for p in tables.paths)
+            stats["files"] = len(tables.paths)
+    except BaseException:
+        if tables is not None:
+            tables.abort()
+        raise
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    meter.update(stats["sessions"], sum(sizes), final=True)
+
+    seconds = time.perf_counter() - t0
+    own_mb, worker_mb = _peak_rss_mb()
+    return {
+        "format": fmt,
+        "inputs": paths,
+        "inputBytes": sum(sizes),
+        "output": out_dir,
+        **stats,
+        "seconds": seconds,
+        "sessionsPerSecond": stats["sessions"] / seconds if seconds else None,
+        "inputMBPerSecond": sum(sizes) / seconds / 1e6 if seconds else None,
+        "peakRssMB": own_mb,
+        "peakWorkerRssMB": worker_mb,
+        "workers": workers,
+    }
+
+
+def find_inputs(directory: str) -> list:
+    """sessions.json, then sessions_archive.json, whichever exist."""
+    names = ("sessions.json", "sessions_archive.json")
+    return [os.path.join(directory, n) for n in names if os.path.exists(os.path.join(directory, n))]
+
+
+def print_report(result: dict):
+    print("\n" + "=" * 60)
+    print(f"  SESSION EXPORT ({result['format'].upper()})")
+    print("=" * 60)
+    for path in result["inputs"]:
+        print(f"  Input:               {path}")
+    print(f"  Sessions:            {result['sessions']:,} ({result['duplicates']:,} duplicate IDs skipped)")
+    print(f"  Route points:        {result['points']:,}")
+    print(f"  Written:             {result['files']:,} file(s), {result['bytes'] / 1e6:.1f} MB -> {result['output']}")
+    print(f"  Time:                {result['seconds']:.1f} s on {result['workers']} worker(s)")
+    print(f"  Throughput:          {result['sessionsPerSecond']:,.0f} sessions/s, "
+          f"{result['inputMBPerSecond']:.1f} MB/s of input")
+    workers = f", {result['peakWorkerRssMB']:.0f} MB worker" if result["workers"] > 1 else ""
+    print(f"  Peak memory:         {result['peakRssMB']:.0f} MB reader{workers}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export sessions to GPX, TCX or CSV tables, streaming")
+    parser.add_argument("files", nargs="*", help="sessions.json-shaped inputs, in priority order")
+    parser.add_argument("--dir", help="App Group directory: sessions.json + sessions_archive.json")
+    parser.add_argument("--format", choices=FORMATS, default="gpx", help="Output format (default: gpx)")
+    parser.add_argument("-o", "--output", required=True, help="Output directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--quiet", action="store_true", help="No progress line")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    paths = list(args.files) + (find_inputs(args.dir) if args.dir else [])
+    if not paths:
+        parser.error("give input files or --dir")
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        print(f"❌ not found: {', '.join(missing)}")
+        sys.exit(1)
+
+    try:
+        result = export(paths, args.output, args.format, args.workers, not args.quiet)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
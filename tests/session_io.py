@@ -0,0 +1,276 @@
+"""
+Streaming read/write helpers for sessions.json-shaped files.
+
+sessions.json (and sessions_archive.json) is a single top-level JSON array of
+TrainingSession objects, encoded by Swift's JSONEncoder with the default
+deferredToDate strategy (seconds since 2001-01-01). The helpers here let the
+Python tooling produce those files without ever holding the whole array in
+memory:
+
+- SessionArrayWriter streams sessions into a fresh array. Output goes to a temp
+  file in the target directory and replaces the target with os.replace() on
+  close, the same all-or-nothing semantics as Data.write(options: .atomic) in
+  DataManager.saveSessionsToAppGroup().
+- append_sessions() adds sessions to an existing array by patching its closing
+  bracket, without parsing what is already there.
+- iter_sessions() yields the sessions of an array one at a time, reading the
+  file in chunks, so memory is bounded by the largest single session.
+
+Output is compact (like JSONEncoder) by default; pretty=True matches
+json.dump(..., indent=2) byte for byte.
+"""
+
+import codecs
+import json
+import os
+import shutil
+
+from atomic_io import commit_temp, temp_sibling
+
+# Write buffer for streamed output; large enough that json.dumps chunks are
+# coalesced into few syscalls
+WRITE_BUFFER = 1 << 20
+
+# Read size for streamed input
+READ_CHUNK = 1 << 20
+
+# How far back to look for the closing bracket before giving up
+TAIL_SCAN_LIMIT = 1 << 16
+
+_WHITESPACE = b" \t\r\n"
+
+
+class _ArrayFormat:
+    """Separators for one output style of a top-level JSON array."""
+
+    def __init__(self, pretty: bool):
+        if pretty:
+            self.open, self.first, self.sep, self.close = "[", "\n", ",\n", "\n]"
+            self.encode = lambda obj: "  " + json.dumps(obj, indent=2).replace("\n", "\n  ")
+        else:
+            self.open, self.first, self.sep, self.close = "[", "", ",", "]"
+            self.encode = lambda obj: json.dumps(obj, separators=(",", ":"))
+
+
+def encode_session(session: dict, pretty: bool = False) -> str:
+    """Encode one session exactly as the writers below would emit it.
+
+    Lets callers (e.g. worker processes) do the JSON encoding themselves and
+    hand the writers ready-made text with ``encoded=True``.
+    """
+    return _ArrayFormat(pretty).encode(session)
+
+
+class SessionArrayWriter:
+    """Streams sessions into a top-level JSON array, written atomically.
+
+    Usage:
+        with SessionArrayWriter(path) as writer:
+            for session in sessions:
+                writer.write(session)
+
+    Nothing at ``path`` changes until the block exits cleanly; on an exception
+    the temp file is discarded and the previous file is left untouched.
+    """
+
+    def __init__(self, path: str, pretty: bool = False):
+        self.path = path
+        self.count = 0
+        self._format = _ArrayFormat(pretty)
+        fd, self._tmp_path = temp_sibling(path)
+        self._file = os.fdopen(fd, "w", encoding="utf-8", buffering=WRITE_BUFFER)
+        self._file.write(self._format.open)
+
+    def write(self, session: dict):
+        """Append one session to the array."""
+        self.write_encoded(self._format.encode(session))
+
+    def write_encoded(self, text: str):
+        """Append one session already encoded with encode_session()."""
+        self._file.write(self._format.sep if self.count else self._format.first)
+        self._file.write(text)
+        self.count += 1
+
+    def write_all(self, sessions, encoded: bool = False) -> int:
+        """Append every session from an iterable; returns how many were written."""
+        before = self.count
+        write = self.write_encoded if encoded else self.write
+        for session in sessions:
+            write(session)
+        return self.count - before
+
+    def close(self):
+        """Finish the array, flush it to disk and move it into place."""
+        self._file.write(self._format.close if self.count else "]")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        commit_temp(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discard everything written so far."""
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.unlink(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def locate_array_tail(path: str):
+    """Find where new elements go in the top-level array in ``path``.
+
+    Returns ``(offset, is_empty)``. ``offset`` is the byte position just past
+    the last element (so the closing ``]`` and any whitespace before it are
+    rewritten), or of the opening ``[`` when the array is empty. Only the tail
+    of the file is read. Raises ValueError if the file does not end like a
+    JSON array.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        window = min(size, TAIL_SCAN_LIMIT)
+        f.seek(size - window)
+        tail = f.read(window)
+
+    end = len(tail.rstrip(_WHITESPACE))
+    if end == 0 or tail[end - 1:end] != b"]":
+        raise ValueError(f"{path} does not end with a JSON array")
+    before = tail[:end - 1].rstrip(_WHITESPACE)
+    if not before:
+        if window < size:
+            raise ValueError(f"{path}: no content within {TAIL_SCAN_LIMIT} bytes of the closing bracket")
+        raise ValueError(f"{path} has a closing bracket but no opening one")
+    if before.endswith(b"["):
+        return size - window + len(before) - 1, True
+    return size - window + len(before), False
+
+
+def append_sessions(path: str, sessions, pretty: bool = False, atomic: bool = True,
+                    encoded: bool = False) -> int:
+    """Append sessions to the array in ``path`` without parsing existing content.
+
+    The closing bracket is located from the end of the file, truncated away and
+    rewritten after the new elements. With ``atomic`` (the default) the patch
+    is applied to a byte copy that then replaces ``path``, so readers never see
+    a half-written array; ``atomic=False`` patches the file itself, which
+    avoids the copy for very large fixtures.
+
+    With ``encoded`` the items are strings from encode_session(). A missing or
+    empty file is created. Raises ValueError if ``path`` exists
+    but does not end like a JSON array. Returns the number of sessions written.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        with SessionArrayWriter(path, pretty) as writer:
+            return writer.write_all(sessions, encoded)
+
+    offset, is_empty = locate_array_tail(path)
+    fmt = _ArrayFormat(pretty)
+    encode = str if encoded else fmt.encode
+
+    target = path
+    if atomic:
+        fd, target = temp_sibling(path)
+        os.close(fd)
+        shutil.copyfile(path, target)
+
+    count = 0
+    try:
+        with open(target, "r+b") as raw:
+            raw.seek(offset)
+            raw.truncate()
+            with open(raw.fileno(), "w", encoding="utf-8", buffering=WRITE_BUFFER, closefd=False) as out:
+                if is_empty:
+                    out.write(fmt.open)
+                for session in sessions:
+                    out.write(fmt.first if (is_empty and count == 0) else fmt.sep)
+                    out.write(encode(session))
+                    count += 1
+                out.write("]" if (is_empty and count == 0) else fmt.close)
+            raw.flush()
+            os.fsync(raw.fileno())
+        if atomic:
+            commit_temp(target, path)
+    except BaseException:
+        if atomic and os.path.exists(target):
+            os.unlink(target)
+        raise
+    return count
+
+
+def iter_sessions(path: str, chunk_size: int = READ_CHUNK, with_offsets: bool = False):
+    """Yield each element of the top-level JSON array in ``path``, in order.
+
+    The file is decoded chunk by chunk with JSONDecoder.raw_decode, so only the
+    unconsumed tail of the buffer is held in memory. Raises ValueError (with
+    the byte-ish character offset) on malformed or truncated input. With
+    ``with_offsets``, yields ``(offset, element)`` pairs, the offset being the
+    character position where the element starts.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as f:
+        buf = ""
+        pos = 0
+        consumed = 0  # characters dropped from the front of buf
+        eof = False
+
+        def fill(min_chunk):
+            nonlocal buf, pos, consumed, eof
+            data = f.read(min_chunk)
+            if not data:
+                eof = True
+                buf = buf[pos:] + utf8.decode(b"", final=True)
+            else:
+                buf = buf[pos:] + utf8.decode(data)
+            consumed += pos
+            pos = 0
+
+        def skip_ws():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill(chunk_size)
+
+        skip_ws()
+        if pos >= len(buf) or buf[pos] != "[":
+            raise ValueError(f"{path}: expected '[' at offset {consumed + pos}")
+        pos += 1
+        first = True
+        while True:
+            skip_ws()
+            if pos >= len(buf):
+                raise ValueError(f"{path}: truncated array at offset {consumed + pos}")
+            if buf[pos] == "]":
+                return
+            if not first:
+                if buf[pos] != ",":
+                    raise ValueError(f"{path}: expected ',' at offset {consumed + pos}")
+                pos += 1
+                skip_ws()
+            read_size = chunk_size
+            while True:
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                    break
+                except json.JSONDecodeError as e:
+                    if eof:
+                        # e.msg may itself end in "at" ("Unterminated string starting at")
+                        raise ValueError(f"{path}: {e.msg} (offset {consumed + e.pos})") from None
+                    # Most likely the element runs past the buffer; read more,
+                    # growing the read so huge elements don't go quadratic
+                    fill(read_size)
+                    read_size *= 2
+            start = consumed + pos
+            pos = end
+            first = False
+            yield (start, obj) if with_offsets else obj
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Diff and merge sessions.json-shaped files by session ID.
+
+The app dedupes sessions by UUID (DataManager.mergeLoadedSessions,
+processedSessionIds) and resolves conflicting copies "newest wins by
+modifiedDate, fallback to startDate" (CloudKitSyncManager.mergeSessions) —
+a copy only replaces an earlier one if its date is strictly later. The Python
+fixture path (inject_session) appends blindly, so duplicates accumulate in
+fixtures. This tool applies the same rule across any number of files.
+
+Files are streamed with session_io.iter_sessions, so the full payload is never
+held in memory. The first pass builds an index keyed by the 16 raw UUID bytes:
+per copy, which file and position it came from, its effective modifiedDate and
+a short hash of its canonical JSON (to tell "same date, different content"
+conflicts from exact duplicates). `merge` then streams the inputs a second
+time and writes only the winning copies, in input order. Memory is bounded by
+the index (a few hundred bytes per session copy).
+
+Usage:
+    python3 tests/session_merge.py diff sessions.json other.json
+    python3 tests/session_merge.py merge sessions.json sessions_archive.json -o merged.json
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+import uuid
+
+from inject_test_session import run_jobs
+from session_io import SessionArrayWriter, iter_sessions
+
+DIGEST_SIZE = 8
+
+
+def effective_date(session: dict) -> float:
+    """modifiedDate ?? startDate, as in CloudKitSyncManager.mergeSessions."""
+    modified = session.get("modifiedDate")
+    return session["startDate"] if modified is None else modified
+
+
+def content_digest(session: dict) -> bytes:
+    """Hash of the session's canonical JSON (key order and spacing ignored)."""
+    canonical = json.dumps(session, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode(), digest_size=DIGEST_SIZE).digest()
+
+
+def index_file(path: str) -> list:
+    """One file's copies as (uuid bytes, ordinal, effective date, digest) tuples.
+
+    Raises ValueError naming the file and session index for a session without
+    a UUID id or a startDate.
+    """
+    entries = []
+    for ordinal, session in enumerate(iter_sessions(path)):
+        try:
+            key = uuid.UUID(session["id"]).bytes
+        except (KeyError, TypeError, AttributeError, ValueError):
+            raise ValueError(f"{path}: session {ordinal} has no valid UUID id") from None
+        try:
+            date = effective_date(session)
+        except KeyError:
+            raise ValueError(f"{path}: session {ordinal} has no startDate") from None
+        entries.append((key, ordinal, date, content_digest(session)))
+    return entries
+
+
+class SessionIndex:
+    """Every copy of every session ID across the input files.
+
+    ``copies[id]`` lists ``(file, ordinal, date, digest)`` in input order;
+    winner() picks the copy that survives last-writer-wins.
+    """
+
+    def __init__(self, paths: list):
+        self.paths = list(paths)
+        self.copies = {}
+        self.counts = [0] * len(self.paths)
+
+    def add_file(self, file_no: int, entries: list):
+        copies = self.copies
+        for key, ordinal, date, digest in entries:
+            entry = (file_no, ordinal, date, digest)
+            existing = copies.get(key)
+            if existing is None:
+                copies[key] = [entry]
+            else:
+                existing.append(entry)
+        self.counts[file_no] = len(entries)
+
+    @classmethod
+    def build(cls, paths: list, workers: int = 1) -> "SessionIndex":
+        """Index every file (files are indexed in parallel with ``workers`` > 1)."""
+        index = cls(paths)
+        for file_no, entries in enumerate(run_jobs(index_file, index.paths, min(workers, len(paths)))):
+            index.add_file(file_no, entries)
+        return index
+
+    @staticmethod
+    def winner(copies: list) -> tuple:
+        """The surviving copy: a later copy wins only with a strictly newer date."""
+        best = copies[0]
+        for entry in copies[1:]:
+            if entry[2] > best[2]:
+                best = entry
+        return best
+
+    def keep_sets(self) -> list:
+        """Per file, the set of ordinals whose copy survives the merge."""
+        keep = [set() for _ in self.paths]
+        for copies in self.copies.values():
+            file_no, ordinal, _, _ = self.winner(copies)
+            keep[file_no].add(ordinal)
+        return keep
+
+    def diff(self, limit: int = 20) -> dict:
+        """Summarise how the files overlap.
+
+        ``conflicts`` are IDs whose copies differ in content; ``staleCopies``
+        counts copies a merge would drop, per file. Up to ``limit`` example
+        IDs are listed per category.
+        """
+        n = len(self.paths)
+        only_in = [0] * n
+        stale = [0] * n
+        identical = conflicts = same_date_conflicts = 0
+        examples = {"conflicts": [], "sameDateConflicts": []}
+        for key, copies in self.copies.items():
+            if len(copies) == 1:
+                only_in[copies[0][0]] += 1
+                continue
+            best = self.winner(copies)
+            for c in copies:
+                if c is not best:
+                    stale[c[0]] += 1
+            if len({c[3] for c in copies}) == 1:
+                identical += 1
+                continue
+            conflicts += 1
+            label = str(uuid.UUID(bytes=key)).upper()
+            if len(examples["conflicts"]) < limit:
+                examples["conflicts"].append({
+                    "id": label,
+                    "copies": [{"file": self.paths[c[0]], "index": c[1], "date": c[2]} for c in copies],
+                    "winner": self.paths[best[0]],
+                })
+            if any(c is not best and c[2] == best[2] and c[3] != best[3] for c in copies):
+                same_date_conflicts += 1
+                if len(examples["sameDateConflicts"]) < limit:
+                    examples["sameDateConflicts"].append(label)
+        return {
+            "files": [
+                {"path": p, "sessions": self.counts[i], "onlyHere": only_in[i], "staleCopies": stale[i]}
+                for i, p in enumerate(self.paths)
+            ],
+            "uniqueIds": len(self.copies),
+            "identicalDuplicates": identical,
+            "conflicts": conflicts,
+            "sameDateConflicts": same_date_conflicts,
+            "examples": examples,
+        }
+
+
+def merge_files(paths: list, output: str, pretty: bool = False, workers: int = 1,
+                index: SessionIndex = None) -> tuple:
+    """Write the last-writer-wins union of ``paths`` to ``output``.
+
+    Returns ``(written, dropped)``. ``output`` may be one of the inputs; it is
+    only replaced once the merged array is complete.
+    """
+    if index is None:
+        index = SessionIndex.build(paths, workers)
+    keep = index.keep_sets()
+    dropped = sum(index.counts) - len(index.copies)
+    with SessionArrayWriter(output, pretty) as writer:
+        for file_no, path in enumerate(index.paths):
+            wanted = keep[file_no]
+            for ordinal, session in enumerate(iter_sessions(path)):
+                if ordinal in wanted:
+                    writer.write(session)
+        written = writer.count
+    return written, dropped
+
+
+def print_diff(report: dict):
+    print("\n" + "=" * 60)
+    print("  SESSION DIFF")
+    print("=" * 60)
+    for f in report["files"]:
+        print(f"  {f['path']}")
+        print(f"      {f['sessions']} sessions, {f['onlyHere']} only here, "
+              f"{f['staleCopies']} stale copies")
+    print(f"  Unique IDs:            {report['uniqueIds']}")
+    print(f"  Identical duplicates:  {report['identicalDuplicates']}")
+    print(f"  Conflicting copies:    {report['conflicts']}")
+    print(f"  Same-date conflicts:   {report['sameDateConflicts']} (first copy kept)")
+    for c in report["examples"]["conflicts"]:
+        print(f"    ⚠️  {c['id']} -> {c['winner']}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff/merge sessions.json files by session ID")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    diff = sub.add_parser("diff", help="Report overlap and conflicts between files")
+    diff.add_argument("files", nargs="+")
+    diff.add_argument("--limit", type=int, default=20, help="Example IDs per category (default: 20)")
+    diff.add_argument("--json", action="store_true", help="Print the report as JSON")
+    diff.add_argument("--workers", type=int, default=1, help="Files indexed in parallel (default: 1)")
+
+    merge = sub.add_parser("merge", help="Write the last-writer-wins union of the files")
+    merge.add_argument("files", nargs="+")
+    merge.add_argument("-o", "--output", required=True, help="Merged sessions file")
+    merge.add_argument("--pretty", action="store_true", help="Indent the output")
+    merge.add_argument("--workers", type=int, default=1, help="Files indexed in parallel (default: 1)")
+
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    try:
+        index = SessionIndex.build(args.files, args.workers)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    index_s = time.perf_counter() - t0
+
+    if args.command == "diff":
+        report = index.diff(args.limit)
+        report["indexSeconds"] = index_s
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_diff(report)
+            print(f"Indexed {sum(index.counts)} sessions in {index_s:.2f} s")
+    else:
+        written, dropped = merge_files(args.files, args.output, args.pretty, index=index)
+        print(f"Merged {sum(index.counts)} sessions from {len(args.files)} files into "
+              f"{args.output}: {written} written, {dropped} duplicates dropped "
+              f"({time.perf_counter() - t0:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Salvage sessions from corrupt sessions.json backups into a clean file.
+
+When sessions.json fails to decode, DataManager and PhoneSyncCoordinator move
+it aside as sessions_corrupt_<unix ts>.json and start empty, and
+purgeOldCorruptBackups deletes those backups eventually. This tool gets the
+history back:
+
+1. Each input is walked by a resilient scanner instead of a strict parser.
+   At every '{' it tries to decode one object; a session-shaped object
+   (id, startDate, segments) is taken whole and the scan resumes after it,
+   anything else (a nested segment, a truncated or mangled session) advances
+   the scan by one brace. Truncated tails, spliced writes, garbage between
+   elements and invalid UTF-8 only cost the sessions they touch.
+2. Every recovered session is checked against the Codable models
+   (session_schema); one that would still fail JSONDecoder is rejected
+   rather than written back into a file the app cannot load.
+3. Copies are deduped across all inputs by id, newest modifiedDate ??
+   startDate winning (session_merge.SessionIndex, the app's own rule). The
+   live file is listed first, then backups newest first, so ties keep the
+   most recent copy.
+4. The winners are streamed into the output with an atomic write.
+
+Memory is bounded: the scanner holds one chunk plus the object being decoded,
+reading ahead at most --max-session-mb before it calls an object damaged, and
+the index keeps ~100 bytes per session.
+
+Usage:
+    python3 tests/session_salvage.py --dir "$APP_GROUP" -o /tmp/sessions.json
+    python3 tests/session_salvage.py sessions_corrupt_1767225600.json sessions.json -o recovered.json
+    python3 tests/session_salvage.py --dir "$APP_GROUP" --dry-run --json
+"""
+
+import argparse
+import codecs
+import glob
+import json
+import os
+import re
+import sys
+import time
+import uuid
+
+from inject_test_session import run_jobs
+from session_io import READ_CHUNK, SessionArrayWriter
+from session_merge import SessionIndex, effective_date
+from session_schema import compile_models
+
+MAX_SESSION_CHARS = 64 << 20
+DAMAGE_EXAMPLES = 20
+SESSION_KEYS = ("id", "startDate", "segments")
+BACKUP_RE = re.compile(r"sessions_corrupt_(\d+)\.json$")
+
+_checkers = None
+
+
+def _check_session(session: dict):
+    """Decode errors for ``session`` (warnings are fine), or None."""
+    global _checkers
+    if _checkers is None:
+        _checkers = compile_models()
+    found = _checkers["TrainingSession"](session)
+    errors = [f for f in found or () if f[3] == "error"]
+    return errors or None
+
+
+def _is_session(obj) -> bool:
+    return type(obj) is dict and all(key in obj for key in SESSION_KEYS)
+
+
+class ScanReport:
+    """What the scanner found in one file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.recovered = 0
+        self.rejected = []   # (offset, id, first error)
+        self.damage = []     # (start, end, reason), first DAMAGE_EXAMPLES only
+        self.damaged_regions = 0
+        self.damaged_chars = 0
+        self.chars = 0
+
+    def add_damage(self, start: int, end: int, reason: str):
+        self.damaged_regions += 1
+        self.damaged_chars += end - start
+        if len(self.damage) < DAMAGE_EXAMPLES:
+            self.damage.append((start, end, reason))
+
+    def to_json(self) -> dict:
+        return {
+            "path": self.path,
+            "chars": self.chars,
+            "recovered": self.recovered,
+            "rejected": len(self.rejected),
+            "rejectedExamples": [{"offset": o, "id": i, "error": e} for o, i, e in self.rejected[:DAMAGE_EXAMPLES]],
+            "damagedRegions": self.damaged_regions,
+            "damagedChars": self.damaged_chars,
+            "damage": [{"start": s, "end": e, "reason": r} for s, e, r in self.damage],
+        }
+
+
+def iter_salvaged(path: str, report: ScanReport = None, chunk_size: int = READ_CHUNK,
+                  max_session_chars: int = MAX_SESSION_CHARS):
+    """Yield ``(offset, session)`` for every intact, decodable session in ``path``.
+
+    Never raises on malformed content; what was skipped is recorded on
+    ``report``. Offsets are character positions, as in iter_sessions.
+    """
+    report = report or ScanReport(path)
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(path, "rb") as f:
+        buf = ""
+        pos = 0
+        consumed = 0
+        eof = False
+        damaged_from = None
+        last_end = 0
+
+        def fill(size):
+            nonlocal buf, pos, consumed, eof
+            data = f.read(size)
+            if not data:
+                eof = True
+                buf = buf[pos:] + utf8.decode(b"", final=True)
+            else:
+                buf = buf[pos:] + utf8.decode(data)
+            consumed += pos
+            pos = 0
+
+        while True:
+            brace = buf.find("{", pos)
+            if brace < 0:
+                if eof:
+                    break
+                if damaged_from is None and buf[pos:].strip(" \t\r\n,[]"):
+                    damaged_from = consumed + pos
+                pos = len(buf)
+                fill(chunk_size)
+                continue
+            if damaged_from is None and brace > pos and buf[pos:brace].strip(" \t\r\n,["):
+                damaged_from = consumed + pos
+            pos = brace
+
+            obj = None
+            read_size = chunk_size
+            while True:
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                    break
+                except json.JSONDecodeError:
+                    # The object may just run past the buffer, and a cut
+                    # inside a literal or number (tr|ue, 1e|5) fails anywhere
+                    # near the end, so read more on any error; it is only
+                    # damage once the whole file or the per-session cap is in.
+                    if eof or len(buf) - pos >= max_session_chars:
+                        break
+                    fill(read_size)
+                    read_size *= 2
+
+            if obj is not None and _is_session(obj):
+                start = consumed + pos
+                if damaged_from is not None:
+                    report.add_damage(damaged_from, start, "unparseable")
+                    damaged_from = None
+                errors = _check_session(obj)
+                if errors:
+                    path_, _, message, _ = errors[0]
+                    report.rejected.append((start, obj.get("id"), f"{path_.lstrip('.')}: {message}"))
+                else:
+                    report.recovered += 1
+                    yield start, obj
+                pos = end
+                last_end = consumed + pos
+            else:
+                if damaged_from is None:
+                    damaged_from = consumed + pos
+                pos += 1
+
+        total = consumed + len(buf)
+        report.chars = total
+        if damaged_from is not None:
+            report.add_damage(damaged_from, total, "truncated" if damaged_from >= last_end else "unparseable")
+
+
+def salvage_index(job: tuple) -> tuple:
+    """Pass 1 for one ``(path, max_session_chars)``: index entries (shaped as
+    session_merge.index_file's) plus the file's report."""
+    path, max_session_chars = job
+    report = ScanReport(path)
+    # No content digest: only SessionIndex.diff() reads it, and hashing every
+    # session's canonical JSON would double the scan time.
+    entries = [
+        (uuid.UUID(session["id"]).bytes, ordinal, effective_date(session), None)
+        for ordinal, (_, session) in enumerate(iter_salvaged(path, report, max_session_chars=max_session_chars))
+    ]
+    return entries, report
+
+
+def find_inputs(directory: str) -> list:
+    """The live sessions.json first, then its corrupt backups newest first."""
+    live = os.path.join(directory, "sessions.json")
+    backups = [p for p in glob.glob(os.path.join(directory, "sessions_corrupt_*.json")) if BACKUP_RE.search(p)]
+    backups.sort(key=lambda p: int(BACKUP_RE.search(p).group(1)), reverse=True)
+    return ([live] if os.path.exists(live) else []) + backups
+
+
+def salvage(paths: list, output: str = None, pretty: bool = False, workers: int = 1,
+            max_session_chars: int = MAX_SESSION_CHARS) -> dict:
+    """Recover, dedupe and (unless ``output`` is None) write the sessions in ``paths``."""
+    t0 = time.perf_counter()
+    index = SessionIndex(paths)
+    reports = []
+    jobs = [(path, max_session_chars) for path in index.paths]
+    for file_no, (entries, report) in enumerate(run_jobs(salvage_index, jobs, min(workers, len(paths)))):
+        index.add_file(file_no, entries)
+        reports.append(report)
+    scan_s = time.perf_counter() - t0
+
+    written = 0
+    if output is not None:
+        keep = index.keep_sets()
+        with SessionArrayWriter(output, pretty) as writer:
+            for file_no, path in enumerate(index.paths):
+                wanted = keep[file_no]
+                for ordinal, (_, session) in enumerate(iter_salvaged(path, max_session_chars=max_session_chars)):
+                    if ordinal in wanted:
+                        writer.write(session)
+            written = writer.count
+
+    recovered = sum(r.recovered for r in reports)
+    return {
+        "files": [r.to_json() for r in reports],
+        "recovered": recovered,
+        "unique": len(index.copies),
+        "duplicatesDropped": recovered - len(index.copies),
+        "rejected": sum(len(r.rejected) for r in reports),
+        "output": output,
+        "written": written,
+        "scanSeconds": scan_s,
+        "totalSeconds": time.perf_counter() - t0,
+    }
+
+
+def print_report(result: dict):
+    print("\n" + "=" * 60)
+    print("  SESSION SALVAGE")
+    print("=" * 60)
+    for f in result["files"]:
+        icon = "✅" if not f["damagedRegions"] and not f["rejected"] else "⚠️ "
+        print(f"  {icon} {f['path']}")
+        print(f"      {f['recovered']} recovered, {f['rejected']} rejected, "
+              f"{f['damagedRegions']} damaged regions ({f['damagedChars']} chars)")
+        for d in f["damage"][:5]:
+            print(f"        {d['reason']} {d['start']}–{d['end']}")
+        for r in f["rejectedExamples"][:5]:
+            print(f"        rejected {r['id']} @ {r['offset']}: {r['error']}")
+    print(f"  Unique sessions:     {result['unique']}")
+    print(f"  Duplicates dropped:  {result['duplicatesDropped']}")
+    if result["output"]:
+        print(f"  Written:             {result['written']} -> {result['output']}")
+    print(f"  Time:                {result['totalSeconds']:.2f} s")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recover sessions from corrupt sessions.json backups")
+    parser.add_argument("files", nargs="*", help="Inputs in priority order (ties keep the first copy)")
+    parser.add_argument("--dir", help="App Group directory: use sessions.json + sessions_corrupt_*.json")
+    parser.add_argument("-o", "--output", help="Clean sessions file to write")
+    parser.add_argument("--dry-run", action="store_true", help="Scan and report only")
+    parser.add_argument("--pretty", action="store_true", help="Indent the output")
+    parser.add_argument("--workers", type=int, default=1, help="Files scanned in parallel (default: 1)")
+    parser.add_argument("--max-session-mb", type=float, default=MAX_SESSION_CHARS / (1 << 20),
+                        help="Largest single session to attempt (default: 64)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    paths = list(args.files) + (find_inputs(args.dir) if args.dir else [])
+    if not paths:
+        parser.error("give input files or --dir")
+    if not args.output and not args.dry_run:
+        parser.error("-o/--output is required unless --dry-run")
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        print(f"❌ not found: {', '.join(missing)}")
+        sys.exit(1)
+
+    result = salvage(paths, None if args.dry_run else args.output, args.pretty, args.workers,
+                     int(args.max_session_mb * (1 << 20)))
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+"""
+Validate sessions.json files against the app's Codable models, streaming.
+
+DataManager.loadSessionsFromAppGroup decodes sessions.json with a plain
+JSONDecoder; one bad value anywhere fails the whole decode, the file is backed
+up as sessions_corrupt_*.json and the app starts empty. This validator applies
+the same rules the decoder does, without loading the file at once:
+
+- Date is the default `.deferredToDate` strategy: a finite number of seconds
+  since 2001-01-01 (a value past 1.5e9 decodes, but is almost certainly a Unix
+  timestamp and is flagged as a warning);
+- UUID is a 36-character string (JSONEncoder writes uppercase; lowercase
+  decodes but breaks string comparisons, so it is a warning);
+- Int must be integral, Double must be finite (NaN/Infinity literals fail);
+- enums (DetectedActivity, WorkoutSport, SessionMode, IntervalType) must be
+  one of their raw values;
+- non-optional fields must be present and non-null; unknown keys are ignored.
+
+Every finding carries the session index, its id, the character offset of the
+session in the file and the path inside it, e.g.
+`[1234].segments[2].activityType`. A few semantic checks (duplicate ids,
+inverted date ranges) are reported as warnings.
+
+MODELS mirrors the Swift structs field for field; `models` re-parses the Swift
+sources and reports any drift, so the mirror cannot silently fall behind.
+
+Usage:
+    python3 tests/session_schema.py validate sessions.json
+    python3 tests/session_schema.py validate export/*.json --json --max-errors 50
+    python3 tests/session_schema.py models
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+
+from plist_rules import Finding
+from session_io import iter_sessions
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Stored properties, in declaration order, as Swift spells their types.
+MODELS = {
+    "TrainingSession": {
+        "id": "UUID",
+        "startDate": "Date",
+        "endDate": "Date?",
+        "duration": "TimeInterval",
+        "averageHeartRate": "Double?",
+        "maxHeartRate": "Double?",
+        "caloriesBurned": "Double?",
+        "distance": "Double?",
+        "totalSteps": "Int?",
+        "segments": "[ActivitySegment]",
+        "route": "[RoutePoint]?",
+        "kmSplits": "[KmSplitData]?",
+        "templateID": "UUID?",
+        "completedIntervalResults": "[CompletedInterval]?",
+        "modifiedDate": "Date?",
+        "sportType": "WorkoutSport?",
+        "planID": "UUID?",
+        "planDayIndex": "Int?",
+        "deviceID": "UUID?",
+        "deviceName": "String?",
+        "estimatedCalories": "Double?",
+        "averageCadence": "Double?",
+        "maxCadence": "Int?",
+        "sessionMode": "SessionMode?",
+        "recoveryReport": "RecoveryReport?",
+        "programID": "UUID?",
+        "programName": "String?",
+        "completedIntervals": "[LegacyCompletedInterval]?",
+    },
+    "ActivitySegment": {
+        "id": "UUID",
+        "activityType": "DetectedActivity",
+        "startDate": "Date",
+        "endDate": "Date?",
+        "steps": "Int?",
+        "distance": "Double?",
+        "averageHeartRate": "Double?",
+        "estimatedCalories": "Double?",
+        "activeEnergyCalories": "Double?",
+    },
+    "RoutePoint": {
+        "latitude": "Double",
+        "longitude": "Double",
+        "altitude": "Double?",
+        "timestamp": "Date",
+        "speed": "Double?",
+        "horizontalAccuracy": "Double?",
+    },
+    "KmSplitData": {
+        "id": "UUID",
+        "kmNumber": "Int",
+        "splitTime": "TimeInterval",
+        "cumulativeTime": "TimeInterval",
+    },
+    "CompletedInterval": {
+        "id": "UUID",
+        "intervalType": "IntervalType",
+        "label": "String?",
+        "targetDuration": "TimeInterval",
+        "actualDuration": "TimeInterval",
+        "averageHeartRate": "Double?",
+        "distance": "Double?",
+    },
+    "LegacyCompletedInterval": {
+        "id": "UUID",
+        "intervalID": "UUID",
+        "actualDuration": "TimeInterval",
+        "averageHeartRate": "Double?",
+        "maxHeartRate": "Double?",
+    },
+    "RecoveryReport": {
+        "sets": "Int",
+        "captures": "[HRRCapture]",
+        "avgWorkHR": "Double?",
+        "avgRestHR": "Double?",
+    },
+    "HRRCapture": {
+        "id": "UUID",
+        "setNumber": "Int",
+        "peakHR": "Int",
+        "hrAt60s": "Int?",
+        "hrAt120s": "Int?",
+        "restDuration": "TimeInterval",
+        "restEntryTime": "Date",
+    },
+}
+
+ENUMS = {
+    "DetectedActivity": ("running", "walking", "stationary", "unknown"),
+    "WorkoutSport": ("running", "walking", "cycling", "swimming", "hiking", "elliptical", "crossTraining", "other"),
+    "SessionMode": ("standard", "gymRecovery"),
+    "IntervalType": ("warmup", "work", "rest", "cooldown"),
+}
+
+# Where each mirrored type is declared (iOS target copy for app-target models).
+SOURCES = {
+    "TrainingSession": "ShuttlX/Models/TrainingSession.swift",
+    "KmSplitData": "ShuttlX/Models/TrainingSession.swift",
+    "CompletedInterval": "ShuttlX/Models/TrainingSession.swift",
+    "LegacyCompletedInterval": "ShuttlX/Models/TrainingSession.swift",
+    "RecoveryReport": "ShuttlX/Models/TrainingSession.swift",
+    "HRRCapture": "ShuttlX/Models/TrainingSession.swift",
+    "ActivitySegment": "Shared/ActivitySegment.swift",
+    "RoutePoint": "Shared/RoutePoint.swift",
+    "DetectedActivity": "Shared/DetectedActivity.swift",
+    "WorkoutSport": "Shared/WorkoutSport.swift",
+    "SessionMode": "Shared/SessionMode.swift",
+    "IntervalType": "ShuttlX/Models/WorkoutTemplate.swift",
+}
+
+UNIX_TIMESTAMP_FLOOR = 1.5e9  # 2048 as an Apple date, 2017 as a Unix one
+INT64 = (-(1 << 63), (1 << 63) - 1)
+UUID_RE = re.compile(r"[0-9A-Fa-f]{8}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{12}")
+
+_MISSING = object()
+
+
+def describe(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "a boolean"
+    if isinstance(value, (int, float)):
+        return f"number {value!r}"
+    if isinstance(value, str):
+        return f"string {value[:40]!r}"
+    return "an array" if isinstance(value, list) else "an object"
+
+
+# MARK: - Compiled checkers
+#
+# A checker takes a decoded value and returns None when it decodes, or a list
+# of (relative path, rule, message, severity). Paths are only built on failure,
+# so a clean file costs one call per value.
+
+def _check_double(v):
+    t = type(v)
+    if t is float:
+        if v != v or v in (math.inf, -math.inf):
+            return [("", "type", f"expected Double, found non-finite {v!r}", "error")]
+        return None
+    if t is int:
+        return None
+    return [("", "type", f"expected Double, found {describe(v)}", "error")]
+
+
+def _check_int(v):
+    t = type(v)
+    if t is int:
+        if INT64[0] <= v <= INT64[1]:
+            return None
+        return [("", "type", f"Int out of range: {v}", "error")]
+    if t is float and v.is_integer():
+        return None
+    return [("", "type", f"expected Int, found {describe(v)}", "error")]
+
+
+def _check_date(v):
+    error = _check_double(v)
+    if error:
+        error[0] = ("", "type", "expected Date (seconds since 2001), found " + error[0][2].split("found ", 1)[1], "error")
+        return error
+    if v > UNIX_TIMESTAMP_FLOOR:
+        return [("", "date-epoch", f"{v} looks like a Unix timestamp (decodes as year "
+                                   f"{2001 + int(v // 31_557_600)})", "warning")]
+    if v < 0:
+        return [("", "date-epoch", f"{v} is before 2001", "warning")]
+    return None
+
+
+def _check_string(v):
+    return None if type(v) is str else [("", "type", f"expected String, found {describe(v)}", "error")]
+
+
+def _check_uuid(v):
+    if type(v) is not str or len(v) != 36 or not UUID_RE.fullmatch(v):
+        return [("", "type", f"expected UUID string, found {describe(v)}", "error")]
+    if v != v.upper():
+        return [("", "uuid-case", f"lowercase UUID {v}; JSONEncoder writes uppercase", "warning")]
+    return None
+
+
+SCALARS = {
+    "Double": _check_double,
+    "TimeInterval": _check_double,
+    "Int": _check_int,
+    "Date": _check_date,
+    "String": _check_string,
+    "UUID": _check_uuid,
+}
+
+
+def _enum_checker(name: str, values: tuple):
+    allowed = frozenset(values)
+
+    def check(v):
+        if type(v) is str and v in allowed:
+            return None
+        return [("", "enum", f"expected {name} ({', '.join(values)}), found {describe(v)}", "error")]
+    return check
+
+
+def _array_checker(type_name: str, element):
+    def check(v):
+        if type(v) is not list:
+            return [("", "type", f"expected [{type_name}], found {describe(v)}", "error")]
+        errors = None
+        for i, item in enumerate(v):
+            found = element(item)
+            if found:
+                errors = errors or []
+                errors.extend((f"[{i}]{path}", rule, message, severity) for path, rule, message, severity in found)
+        return errors
+    return check
+
+
+def _model_checker(name: str, fields: list):
+    """``fields`` is [(key, optional, checker)], filled in after all models exist."""
+    def check(v):
+        if type(v) is not dict:
+            return [("", "type", f"expected {name} object, found {describe(v)}", "error")]
+        errors = None
+        for key, optional, checker in fields:
+            value = v.get(key, _MISSING)
+            if value is _MISSING or value is None:
+                if not optional:
+                    errors = errors or []
+                    rule = "missing" if value is _MISSING else "null"
+                    errors.append((f".{key}", rule, f"{name}.{key} is required "
+                                   f"({'keyNotFound' if value is _MISSING else 'valueNotFound'})", "error"))
+                continue
+            found = checker(value)
+            if found:
+                errors = errors or []
+                errors.extend((f".{key}{path}", rule, message, severity) for path, rule, message, severity in found)
+        return errors
+    return check
+
+
+# MARK: - Fast path
+#
+# The checkers above allocate nothing on success but still cost a call per
+# value, which adds up over hundreds of thousands of route points. Each model
+# also gets a generated straight-line predicate that answers "decodes cleanly,
+# no warnings?" with inline type tests; only when it says no does the detailed
+# checker run to explain why. The predicate is deliberately conservative: any
+# doubt falls through to the detailed checker.
+
+_FAST_TESTS = {
+    # x - x == 0.0 rules out NaN and ±inf
+    "Double": "(t is float and x - x == 0.0 or t is int)",
+    "Int": f"(t is int and {INT64[0]} <= x <= {INT64[1]} or t is float and x.is_integer())",
+    "Date": f"((t is float and x - x == 0.0 or t is int) and 0 <= x <= {UNIX_TIMESTAMP_FLOOR!r})",
+    "String": "t is str",
+    "UUID": "(t is str and _uuid(x) is not None)",
+}
+_FAST_TESTS["TimeInterval"] = _FAST_TESTS["Double"]
+_UPPER_UUID_RE = re.compile(r"[0-9A-F]{8}-[0-9A-F]{4}-[0-9A-F]{4}-[0-9A-F]{4}-[0-9A-F]{12}")
+
+
+def _fast_source(name: str, fields: dict) -> str:
+    lines = [f"def ok_{name}(v):", "    if type(v) is not dict:", "        return False", "    g = v.get"]
+    for key, type_name in fields.items():
+        optional = type_name.endswith("?")
+        base = type_name.rstrip("?")
+        if base.startswith("["):
+            test = f"(t is list and all(map(ok_{base[1:-1]}, x)))"
+        elif base in _FAST_TESTS:
+            test = _FAST_TESTS[base]
+        elif base in ENUMS:
+            test = f"x in _enum_{base}"
+        else:
+            test = f"ok_{base}(x)"
+        lines.append(f"    x = g({key!r})")
+        lines.append("    t = type(x)")
+        lines.append(f"    if not ({'x is None or ' if optional else ''}{test}):")
+        lines.append("        return False")
+    lines.append("    return True")
+    return "\n".join(lines)
+
+
+def _compile_fast(models: dict, enums: dict) -> dict:
+    namespace = {"_uuid": _UPPER_UUID_RE.fullmatch}
+    for name, values in enums.items():
+        namespace[f"_enum_{name}"] = frozenset(values)
+    # Scalar element types (e.g. [String]) get a trivial predicate too.
+    for base, test in _FAST_TESTS.items():
+        exec(f"def ok_{base}(x):\n    t = type(x)\n    return {test}", namespace)
+    for name, fields in models.items():
+        exec(_fast_source(name, fields), namespace)
+    return {name: namespace[f"ok_{name}"] for name in models}
+
+
+def compile_models(models: dict = MODELS, enums: dict = ENUMS) -> dict:
+    """Build a checker for every model and enum name; model checkers take the
+    fast path first."""
+    checkers = dict(SCALARS)
+    for name, values in enums.items():
+        checkers[name] = _enum_checker(name, values)
+    field_lists = {}
+    for name in models:
+        field_lists[name] = []
+        checkers[name] = _model_checker(name, field_lists[name])
+
+    def resolve(type_name: str):
+        if type_name.startswith("["):
+            inner = type_name[1:-1]
+            return _array_checker(inner, resolve(inner))
+        if type_name not in checkers:
+            raise KeyError(f"no checker for type {type_name}")
+        return checkers[type_name]
+
+    for name, fields in models.items():
+        for key, type_name in fields.items():
+            optional = type_name.endswith("?")
+            field_lists[name].append((key, optional, resolve(type_name.rstrip("?"))))
+
+    fast = _compile_fast(models, enums)
+    for name in models:
+        detailed, ok = checkers[name], fast[name]
+        checkers[name] = lambda v, ok=ok, detailed=detailed: None if ok(v) else detailed(v)
+    return checkers
+
+
+# MARK: - Validation
+
+def _semantic_checks(session: dict) -> list:
+    """Warnings the decoder would accept but the app would mishandle."""
+    found = []
+    start, end = session.get("startDate"), session.get("endDate")
+    if isinstance(start, (int, float)) and isinstance(end, (int, float)) and end < start:
+        found.append((".endDate", "date-order", f"endDate {end} is before startDate {start}", "warning"))
+    segments = session.get("segments")
+    if isinstance(segments, list):
+        for i, seg in enumerate(segments):
+            if not isinstance(seg, dict):
+                continue
+            s, e = seg.get("startDate"), seg.get("endDate")
+            if isinstance(s, (int, float)) and isinstance(e, (int, float)) and e < s:
+                found.append((f".segments[{i}].endDate", "date-order", f"segment ends {e} before it starts {s}",
+                              "warning"))
+    return found
+
+
+def validate_file(path: str, max_errors: int = 100, checkers: dict = None) -> dict:
+    """Stream ``path`` and validate every session.
+
+    Returns a result dict with counts and a list of (Finding, context) pairs,
+    context being ``{"session": index, "id": ..., "offset": ...}``; at most
+    ``max_errors`` findings are kept (counts stay exact).
+    """
+    check = (checkers or compile_models())["TrainingSession"]
+    t0 = time.perf_counter()
+    findings = []
+    counts = {"error": 0, "warning": 0}
+    seen = {}
+    index = -1
+
+    def add(rule, key, message, severity, context):
+        counts[severity] += 1
+        if len(findings) < max_errors:
+            findings.append((Finding(rule, key, message, severity), context))
+
+    try:
+        for index, (offset, session) in enumerate(iter_sessions(path, with_offsets=True)):
+            found = check(session)
+            sid = session.get("id") if isinstance(session, dict) else None
+            if isinstance(session, dict):
+                found = (found or []) + _semantic_checks(session)
+                if isinstance(sid, str):
+                    if sid.upper() in seen:
+                        found.append((".id", "duplicate-id", f"id also used by session [{seen[sid.upper()]}]",
+                                      "warning"))
+                    else:
+                        seen[sid.upper()] = index
+            if found:
+                context = {"session": index, "id": sid, "offset": offset}
+                for rel, rule, message, severity in found:
+                    add(rule, f"[{index}]{rel}", message, severity, context)
+    except ValueError as e:
+        # iter_sessions names the file; the report already does
+        message = str(e)
+        if message.startswith(f"{path}: "):
+            message = message[len(path) + 2:]
+        add("syntax", f"[{index + 1}]", message, "error", {"session": index + 1, "id": None, "offset": None})
+    except OSError as e:
+        add("io", "", str(e), "error", {"session": None, "id": None, "offset": None})
+
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    elapsed = time.perf_counter() - t0
+    return {
+        "path": path,
+        "sessions": index + 1,
+        "bytes": size,
+        "seconds": elapsed,
+        "mbPerSecond": size / elapsed / 1e6 if elapsed else None,
+        "errors": counts["error"],
+        "warnings": counts["warning"],
+        "findings": findings,
+    }
+
+
+# MARK: - Swift drift check
+
+_STRUCT_RE = re.compile(r"^\s*(?:public\s+)?struct\s+(\w+)\s*:[^{]*\bCodable\b[^{]*\{")
+_ENUM_RE = re.compile(r"^\s*(?:public\s+)?enum\s+(\w+)\s*:\s*String\b[^{]*\bCodable\b[^{]*\{")
+_PROPERTY_RE = re.compile(r"^\s*(?:public\s+)?(?:private\(set\)\s+)?(?:let|var)\s+(\w+)\s*:\s*([^={]+?)\s*(?:=.*)?$")
+_CASE_RE = re.compile(r"^\s*case\s+(.+)$")
+
+
+def parse_swift(text: str) -> tuple:
+    """Stored properties of Codable structs and raw values of String enums."""
+    structs, enums = {}, {}
+    current, kind, depth = None, None, 0
+    for line in text.splitlines():
+        code = line.split("//", 1)[0]
+        if current is None:
+            match = _STRUCT_RE.match(code) or _ENUM_RE.match(code)
+            if match:
+                current, depth = match.group(1), 1
+                kind = "struct" if _STRUCT_RE.match(code) else "enum"
+                (structs if kind == "struct" else enums)[current] = {} if kind == "struct" else []
+            continue
+        if depth == 1 and "static " not in code and "{" not in code:
+            if kind == "struct":
+                match = _PROPERTY_RE.match(code)
+                if match:
+                    structs[current][match.group(1)] = match.group(2).strip()
+            else:
+                match = _CASE_RE.match(code)
+                if match:
+                    for case in match.group(1).split(","):
+                        name, _, raw = case.partition("=")
+                        raw = raw.strip().strip('"')
+                        enums[current].append(raw or name.strip())
+        depth += code.count("{") - code.count("}")
+        if depth <= 0:
+            current = None
+    return structs, enums
+
+
+def check_models(root: str = PROJECT_ROOT) -> list:
+    """Compare MODELS/ENUMS with the Swift declarations; returns drift messages."""
+    drift = []
+    parsed = {}
+    for name, rel in SOURCES.items():
+        if rel not in parsed:
+            with open(os.path.join(root, rel), encoding="utf-8") as f:
+                parsed[rel] = parse_swift(f.read())
+        structs, enums = parsed[rel]
+        if name in MODELS:
+            swift = structs.get(name)
+            if swift is None:
+                drift.append(f"{name}: no Codable struct in {rel}")
+                continue
+            for key in swift.keys() | MODELS[name].keys():
+                ours, theirs = MODELS[name].get(key), swift.get(key)
+                if ours != theirs:
+                    drift.append(f"{name}.{key}: Swift {theirs or '(absent)'}, mirror {ours or '(absent)'}")
+        else:
+            swift = enums.get(name)
+            if swift is None:
+                drift.append(f"{name}: no String Codable enum in {rel}")
+            elif tuple(swift) != ENUMS[name]:
+                drift.append(f"{name}: Swift {', '.join(swift)}, mirror {', '.join(ENUMS[name])}")
+    return drift
+
+
+# MARK: - CLI
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate sessions.json against the Codable models")
+    sub = parser.add_subparsers(dest="command", required=True)
+    v = sub.add_parser("validate", help="Validate session files")
+    v.add_argument("files", nargs="+", help="sessions.json / sessions_archive.json / exports")
+    v.add_argument("--max-errors", type=int, default=100, help="Findings to list per file (default: 100)")
+    v.add_argument("--strict", action="store_true", help="Fail on warnings too")
+    v.add_argument("--json", action="store_true", help="Print results as JSON")
+    sub.add_parser("models", help="Check the mirrored models against the Swift sources")
+    args = parser.parse_args()
+
+    if args.command == "models":
+        drift = check_models()
+        for line in drift:
+            print(f"❌ {line}")
+        if drift:
+            sys.exit(1)
+        print(f"✅ {len(MODELS)} models and {len(ENUMS)} enums match the Swift sources")
+        return
+
+    checkers = compile_models()
+    results = [validate_file(path, args.max_errors, checkers) for path in args.files]
+    failed = any(r["errors"] or (args.strict and r["warnings"]) for r in results)
+
+    if args.json:
+        out = [dict(r, findings=[dict(f.to_json(), **ctx) for f, ctx in r["findings"]]) for r in results]
+        json.dump(out, sys.stdout, indent=2)
+        print()
+    else:
+        for r in results:
+            for f, ctx in r["findings"]:
+                icon = "❌" if f.severity == "error" else "⚠️ "
+                where = f"session {ctx['session']}" + (f" ({ctx['id']})" if ctx["id"] else "")
+                if ctx["offset"] is not None:
+                    where += f" @ {ctx['offset']}"
+                print(f"{icon} {r['path']}: {where}: {f.key}: {f.message}")
+            listed = len(r["findings"])
+            if listed < r["errors"] + r["warnings"]:
+                print(f"   … {r['errors'] + r['warnings'] - listed} more")
+            icon = "❌" if r["errors"] else "✅"
+            print(f"{icon} {r['path']}: {r['sessions']} sessions, {r['errors']} errors, {r['warnings']} warnings "
+                  f"({r['bytes'] / 1e6:.1f} MB in {r['seconds']:.2f} s)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
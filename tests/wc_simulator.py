@@ -0,0 +1,746 @@
+#!/usr/bin/env python3
+"""
+Simulate the watch→phone WatchConnectivity channel to load-test session delivery.
+
+inject_test_session.py writes sessions.json directly, so nothing exercises
+the sync path the app actually uses. This models it end to end on an asyncio
+event loop:
+
+- WatchSim mirrors WatchSyncCoordinator: sendSessionToiOS with the in-flight
+  guard, size routing (transferUserInfo + sendMessage up to 60 KB of base64,
+  transferFile plus a "lastSessionID" tap above it), pendingSessions, the 15 s
+  retry tick, the 1/3/8 s retry burst, the didFinish handlers and the
+  "requestAllSessions" reply (36 KB inline budget, the rest re-sent).
+  LiveMetricsBroadcaster's 3 s liveMetrics snapshots go out over sendMessage
+  (when reachable) and updateApplicationContext.
+- PhoneSim mirrors PhoneSyncCoordinator: handleReceivedSession's dedup against
+  syncedSessions, "lastSessionID" pulls, requestSessionsFromWatch with 3
+  retries 1.5 s apart, and the debounced auto-pull on reachability changes
+  (skipped while a workout is live).
+- WCLink is the channel: one-way latency with jitter, a bandwidth term for
+  payload size, a drop rate (dropped messages fail after a timeout, dropped
+  transfers finish with an error), reachability flaps, and FIFO outboxes for
+  userInfo and file transfers with a bounded depth. applicationContext keeps
+  only the latest value.
+
+Sessions come from inject_test_session's bulk generator and finish on the
+watch while the phone is offline; live metrics are replayed from a
+sensor_stream run starting when the phone comes back. Time is virtual —
+VirtualTimeLoop jumps straight to the next timer — so an hour of flapping
+with hundreds of queued sessions simulates in about a second and a given
+--seed always gives the same report: first-delivery latency percentiles,
+drain time after reconnect, duplicate deliveries per channel, dedup scan
+cost, retries and live-metric staleness.
+
+Usage:
+    python3 tests/wc_simulator.py --sessions 300 --offline 600
+    python3 tests/wc_simulator.py --sessions 500 --drop 0.05 --up 60 --down 15 --json
+    python3 tests/wc_simulator.py --sessions 200 --route-interval 5 --queue-depth 50
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import selectors
+import sys
+import time
+from collections import Counter, deque
+from datetime import timedelta
+
+from inject_test_session import SEEDED_END_DATE, derive_seed, iter_bulk_sessions
+from sensor_stream import StreamSpec, iter_stream
+
+# WatchSyncCoordinator / PhoneSyncCoordinator / LiveMetricsBroadcaster constants
+RETRY_TICK_S = 15.0
+RETRY_BURST_S = (1.0, 3.0, 8.0)
+MAX_INLINE_PAYLOAD = 65_536 - 5_536
+REPLY_INLINE_BUDGET = 36_000
+REQUEST_RETRIES = 3
+REQUEST_RETRY_DELAY_S = 1.5
+AUTO_PULL_DEBOUNCE_S = 300.0
+LIVE_METRICS_INTERVAL_S = 3.0
+
+
+def base64_length(n: int) -> int:
+    return ((n + 2) // 3) * 4
+
+
+def percentiles(values: list, points=(50, 90, 99)) -> dict:
+    """Nearest-rank percentiles plus max, or {} for no values."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    out = {f"p{p}": ordered[min(len(ordered) - 1, max(0, -(-p * len(ordered) // 100) - 1))] for p in points}
+    out["max"] = ordered[-1]
+    return out
+
+
+# MARK: - Virtual time
+
+class _VirtualSelector(selectors.BaseSelector):
+    """Polls real file descriptors without blocking, then advances the clock.
+
+    asyncio asks the selector to wait exactly until the next timer is due, so
+    advancing virtual time by that timeout replaces the sleep.
+    """
+
+    def __init__(self, clock: list):
+        self._inner = selectors.DefaultSelector()
+        self._clock = clock
+
+    def register(self, fileobj, events, data=None):
+        return self._inner.register(fileobj, events, data)
+
+    def unregister(self, fileobj):
+        return self._inner.unregister(fileobj)
+
+    def get_map(self):
+        return self._inner.get_map()
+
+    def close(self):
+        self._inner.close()
+
+    def select(self, timeout=None):
+        events = self._inner.select(0)
+        if not events:
+            if timeout is None:
+                raise RuntimeError("simulation deadlocked: nothing is scheduled")
+            self._clock[0] += max(timeout, 0.0)
+        return events
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """An event loop whose clock only moves when every task is waiting."""
+
+    def __init__(self):
+        self._virtual_now = [0.0]
+        super().__init__(_VirtualSelector(self._virtual_now))
+
+    def time(self) -> float:
+        return self._virtual_now[0]
+
+
+# MARK: - Channel
+
+class WCError(Exception):
+    """A WatchConnectivity error (notReachable, messageReplyTimedOut, ...)."""
+
+
+class LinkConfig:
+    """Channel behaviour; all times in seconds."""
+
+    def __init__(self, latency: float = 0.25, jitter: float = 0.5, bandwidth: float = 50_000.0,
+                 drop: float = 0.02, timeout: float = 5.0, offline: float = 600.0,
+                 up: float = 120.0, down: float = 20.0, queue_depth: int = 500):
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.drop = drop
+        self.timeout = timeout
+        self.offline = offline
+        self.up = up
+        self.down = down
+        self.queue_depth = queue_depth
+
+
+class Transfer:
+    __slots__ = ("kind", "payload", "size", "on_finish", "queued_at")
+
+    def __init__(self, kind, payload, size, on_finish, queued_at):
+        self.kind, self.payload, self.size, self.on_finish, self.queued_at = kind, payload, size, on_finish, queued_at
+
+
+class WCLink:
+    """The watch↔phone channel with reachability flaps and FIFO outboxes."""
+
+    def __init__(self, config: LinkConfig, rng: random.Random, stats: Counter):
+        self.config = config
+        self.rng = rng
+        self.stats = stats
+        self.watch = None
+        self.phone = None
+        self.reachable = False
+        self.online = asyncio.Event()
+        self.outboxes = {"userInfo": deque(), "file": deque()}
+        self._queued = {kind: asyncio.Event() for kind in self.outboxes}
+        self.peak_depth = Counter()
+        self.context = None
+        self._context_ready = asyncio.Event()
+        self.tasks = []
+
+    def now(self) -> float:
+        return asyncio.get_running_loop().time()
+
+    def delay(self, size: int = 0) -> float:
+        c = self.config
+        return max(0.0, self.rng.gauss(c.latency, c.latency * c.jitter)) + size / c.bandwidth
+
+    def dropped(self) -> bool:
+        return self.rng.random() < self.config.drop
+
+    def start(self):
+        self.tasks = [asyncio.ensure_future(coro) for coro in (
+            self._flap(), self._deliver("userInfo"), self._deliver("file"), self._deliver_context())]
+
+    def stop(self):
+        for task in self.tasks:
+            task.cancel()
+
+    def _set_reachable(self, value: bool):
+        self.reachable = value
+        if value:
+            self.online.set()
+        else:
+            self.online.clear()
+        self.stats["reachabilityChanges"] += 1
+        self.watch.reachability_changed(value)
+        self.phone.reachability_changed(value)
+
+    async def _flap(self):
+        c = self.config
+        await asyncio.sleep(c.offline)
+        self._set_reachable(True)
+        if c.down <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.rng.expovariate(1.0 / c.up))
+            self._set_reachable(False)
+            await asyncio.sleep(self.rng.expovariate(1.0 / c.down))
+            self._set_reachable(True)
+
+    # sendMessage
+
+    async def send_message(self, receiver, payload: dict, size: int):
+        """Deliver a message and return the reply; WCError if unreachable or dropped."""
+        if not self.reachable:
+            self.stats["messageNotReachable"] += 1
+            raise WCError("notReachable")
+        started = self.now()
+        await asyncio.sleep(self.delay(size))
+        if not self.reachable or self.dropped():
+            self.stats["messageDropped"] += 1
+            await asyncio.sleep(max(0.0, started + self.config.timeout - self.now()))
+            raise WCError("messageReplyTimedOut")
+        reply = await receiver.did_receive_message(payload)
+        await asyncio.sleep(self.delay(reply.get("_size", 0) if reply else 0))
+        return reply
+
+    # transferUserInfo / transferFile
+
+    def transfer(self, kind: str, payload: dict, size: int, on_finish):
+        """Queue a transfer; ``on_finish(error)`` runs on the sender like didFinish."""
+        outbox = self.outboxes[kind]
+        if len(outbox) >= self.config.queue_depth:
+            self.stats[f"{kind}QueueFull"] += 1
+            asyncio.get_running_loop().call_soon(on_finish, WCError("transferQueueFull"))
+            return
+        outbox.append(Transfer(kind, payload, size, on_finish, self.now()))
+        self.stats[f"{kind}Queued"] += 1
+        self.peak_depth[kind] = max(self.peak_depth[kind], len(outbox))
+        self._queued[kind].set()
+
+    def outstanding(self, kind: str) -> list:
+        return [t.payload for t in self.outboxes[kind]]
+
+    async def _deliver(self, kind: str):
+        outbox = self._queued[kind]
+        queue = self.outboxes[kind]
+        loop = asyncio.get_running_loop()
+        while True:
+            if not queue:
+                outbox.clear()
+                await outbox.wait()
+                continue
+            transfer = queue[0]
+            while True:
+                await self.online.wait()
+                await asyncio.sleep(self.delay(transfer.size))
+                if self.reachable:
+                    break
+                self.stats[f"{kind}Interrupted"] += 1  # the OS retries it on reconnect
+            queue.popleft()
+            if self.dropped():
+                self.stats[f"{kind}Failed"] += 1
+                loop.call_later(self.delay(), transfer.on_finish, WCError("transferFailed"))
+                continue
+            if kind == "file":
+                self.phone.did_receive_file(transfer.payload)
+            else:
+                self.phone.did_receive_user_info(transfer.payload)
+            loop.call_later(self.delay(), transfer.on_finish, None)
+
+    # updateApplicationContext
+
+    def update_application_context(self, payload: dict):
+        if self.context is not None:
+            self.stats["contextSuperseded"] += 1
+        self.context = payload
+        self._context_ready.set()
+
+    async def _deliver_context(self):
+        while True:
+            await self._context_ready.wait()
+            await self.online.wait()
+            await asyncio.sleep(self.delay(400))
+            if not self.reachable or self.context is None:
+                continue
+            payload, self.context = self.context, None
+            self._context_ready.clear()
+            self.phone.did_receive_application_context(payload)
+
+
+# MARK: - Endpoints
+
+class WatchSim:
+    """WatchSyncCoordinator's send/retry/in-flight logic."""
+
+    def __init__(self, link: WCLink, metrics: "Metrics"):
+        self.link = link
+        self.metrics = metrics
+        self.store = {}  # session id -> raw JSON bytes, in save order
+        self.pending = {}  # pendingSessions, insertion ordered
+        self.in_flight = set()
+        self.burst_scheduled = False
+
+    def now(self) -> float:
+        return self.link.now()
+
+    def finish_workout(self, session_id: str, raw_size: int):
+        self.store[session_id] = raw_size
+        self.metrics.created[session_id] = self.now()
+        self.send_session(session_id)
+
+    def start(self):
+        return asyncio.ensure_future(self._retry_tick())
+
+    async def _retry_tick(self):
+        while True:
+            await asyncio.sleep(RETRY_TICK_S)
+            self.retry_pending()
+
+    def retry_pending(self):
+        if self.pending:
+            self.metrics.stats["retryPasses"] += 1
+        for session_id in list(self.pending):
+            self.send_session(session_id)
+
+    def queue_pending(self, session_id: str):
+        self.pending.setdefault(session_id, None)
+
+    def send_session(self, session_id: str):
+        stats = self.metrics.stats
+        if session_id in self.in_flight:
+            stats["sendSkippedInFlight"] += 1
+            return
+        self.in_flight.add(session_id)
+        stats["sends"] += 1
+        size = base64_length(self.store[session_id])
+        if size > MAX_INLINE_PAYLOAD:
+            self.queue_pending(session_id)
+            self.link.transfer("file", {"action": "saveSession", "sessionID": session_id}, size,
+                               lambda error, s=session_id: self._file_finished(s, error))
+            self.link.transfer("userInfo", {"action": "lastSessionID", "sessionID": session_id}, 120,
+                               lambda error, s=session_id: self._user_info_finished(s, "lastSessionID", error))
+        else:
+            payload = {"action": "saveSession", "sessionID": session_id}
+            self.link.transfer("userInfo", payload, size,
+                               lambda error, s=session_id: self._user_info_finished(s, "saveSession", error))
+            if self.link.reachable:
+                asyncio.ensure_future(self._send_via_message(session_id, size))
+            else:
+                self.queue_pending(session_id)
+        self.schedule_burst()
+
+    async def _send_via_message(self, session_id: str, size: int):
+        try:
+            await self.link.send_message(self.link.phone, {"action": "saveSession", "sessionID": session_id}, size)
+        except WCError:
+            self.queue_pending(session_id)
+        else:
+            self.pending.pop(session_id, None)
+
+    def schedule_burst(self):
+        if self.burst_scheduled:
+            return
+        self.burst_scheduled = True
+        loop = asyncio.get_running_loop()
+        for i, delay in enumerate(RETRY_BURST_S):
+            loop.call_later(delay, self._burst, i == len(RETRY_BURST_S) - 1)
+
+    def _burst(self, last: bool):
+        self.retry_pending()
+        if last:
+            self.burst_scheduled = False
+
+    def _user_info_finished(self, session_id: str, action: str, error):
+        # Only saveSession transfers own the in-flight marker; success of any
+        # transfer carrying the ID (the lastSessionID tap included) clears it
+        # from pending, exactly as didFinish userInfoTransfer does.
+        if action == "saveSession":
+            self.in_flight.discard(session_id)
+        if error is not None:
+            self.queue_pending(session_id)
+        else:
+            self.pending.pop(session_id, None)
+
+    def _file_finished(self, session_id: str, error):
+        self.in_flight.discard(session_id)
+        if error is not None:
+            self.queue_pending(session_id)
+        else:
+            self.pending.pop(session_id, None)
+
+    def reachability_changed(self, reachable: bool):
+        if reachable:
+            self.retry_pending()
+
+    async def did_receive_message(self, message: dict) -> dict:
+        if message.get("action") != "requestAllSessions":
+            return {}
+        # planSessionsReply: inline up to a cumulative raw-JSON budget, route the rest
+        inline, routed, used = [], [], 0
+        for session_id, raw in self.store.items():
+            if used + raw > REPLY_INLINE_BUDGET:
+                routed.append(session_id)
+            else:
+                inline.append(session_id)
+                used += raw
+        for session_id in routed:
+            self.send_session(session_id)
+        return {"status": "ok", "count": len(self.store), "sessions": inline,
+                "oversizedCount": len(routed), "_size": base64_length(used)}
+
+    def broadcast_live_metrics(self, snapshot: dict):
+        self.metrics.live["sent"] += 1
+        if self.link.reachable:
+            asyncio.ensure_future(self._send_live(snapshot))
+        self.link.update_application_context(snapshot)
+
+    async def _send_live(self, snapshot: dict):
+        try:
+            await self.link.send_message(self.link.phone, snapshot, 400)
+        except WCError:
+            self.metrics.live["messageFailed"] += 1
+
+
+class PhoneSim:
+    """PhoneSyncCoordinator's receive/dedup/pull logic."""
+
+    def __init__(self, link: WCLink, metrics: "Metrics"):
+        self.link = link
+        self.metrics = metrics
+        self.synced = set()  # syncedSessions (the app scans an array; see dedupScans)
+        self.last_auto_pull = None
+        self.workout_active_until = -1.0
+
+    def now(self) -> float:
+        return self.link.now()
+
+    def handle_received_session(self, session_id: str, channel: str):
+        m = self.metrics
+        m.stats["dedupScans"] += len(self.synced)
+        m.deliveries[channel] += 1
+        if session_id in self.synced:
+            m.duplicates[channel] += 1
+            return
+        self.synced.add(session_id)
+        m.first_delivery[session_id] = self.now()
+        if len(m.first_delivery) == len(m.created) == m.expected:
+            m.all_delivered.set()
+
+    def did_receive_user_info(self, payload: dict):
+        action = payload["action"]
+        if action == "saveSession":
+            self.handle_received_session(payload["sessionID"], "userInfo")
+        elif action == "lastSessionID" and payload["sessionID"] not in self.synced:
+            self.metrics.stats["lastSessionIDPulls"] += 1
+            asyncio.ensure_future(self.request_sessions_from_watch())
+
+    def did_receive_file(self, payload: dict):
+        self.handle_received_session(payload["sessionID"], "file")
+
+    async def did_receive_message(self, message: dict) -> dict:
+        action = message.get("action")
+        if action == "saveSession":
+            self.handle_received_session(message["sessionID"], "message")
+        elif action == "liveMetrics":
+            self.handle_live_metrics(message, "message")
+        return {"status": "received"}
+
+    def did_receive_application_context(self, context: dict):
+        if context.get("action") == "liveMetrics":
+            self.handle_live_metrics(context, "context")
+
+    def handle_live_metrics(self, snapshot: dict, channel: str):
+        m = self.metrics
+        m.live[f"via_{channel}"] += 1
+        seq = snapshot["seq"]
+        if seq in m.live_seen:
+            m.live["duplicate"] += 1
+            return
+        if seq < m.live_last_seq:
+            m.live["outOfOrder"] += 1
+        m.live_seen.add(seq)
+        m.live_last_seq = max(m.live_last_seq, seq)
+        m.live_ages.append(self.now() - snapshot["sentAt"])
+        m.live_arrivals.append(self.now())
+        self.workout_active_until = self.now() + 2 * LIVE_METRICS_INTERVAL_S
+
+    def reachability_changed(self, reachable: bool):
+        if not reachable:
+            return
+        now = self.now()
+        if now < self.workout_active_until:
+            self.metrics.stats["autoPullSkippedWorkout"] += 1
+            return
+        if self.last_auto_pull is not None and now - self.last_auto_pull < AUTO_PULL_DEBOUNCE_S:
+            self.metrics.stats["autoPullDebounced"] += 1
+            return
+        self.last_auto_pull = now
+        self.metrics.stats["autoPulls"] += 1
+        asyncio.ensure_future(self.request_sessions_from_watch())
+
+    async def request_sessions_from_watch(self) -> int:
+        stats = self.metrics.stats
+        for attempt in range(REQUEST_RETRIES + 1):
+            stats["pullAttempts"] += 1
+            try:
+                reply = await self.link.send_message(self.link.watch, {"action": "requestAllSessions"}, 64)
+            except WCError:
+                if attempt == REQUEST_RETRIES:
+                    stats["pullFailures"] += 1
+                    return 0
+                await asyncio.sleep(REQUEST_RETRY_DELAY_S)
+                continue
+            before = len(self.synced)
+            for session_id in reply.get("sessions", ()):
+                self.handle_received_session(session_id, "pullReply")
+            return len(self.synced) - before
+        return 0
+
+
+# MARK: - Scenario
+
+class Metrics:
+    def __init__(self, expected: int):
+        self.expected = expected
+        self.created = {}
+        self.first_delivery = {}
+        self.deliveries = Counter()
+        self.duplicates = Counter()
+        self.stats = Counter()
+        self.live = Counter()
+        self.live_seen = set()
+        self.live_last_seq = -1
+        self.live_ages = []
+        self.live_arrivals = []
+        self.all_delivered = asyncio.Event()
+
+
+def session_sizes(count: int, seed: int, route_interval: float, span_days: float = 30.0) -> list:
+    """``(session id, raw JSON bytes)`` for a generated history, oldest first."""
+    return [
+        (s["id"], len(json.dumps(s, separators=(",", ":"))))
+        for s in iter_bulk_sessions(count, span_days, seed, SEEDED_END_DATE, route_interval)
+    ]
+
+
+def live_snapshots(seconds: float, seed: int):
+    """3 s liveMetrics payloads distilled from a runwalk sensor stream.
+
+    Yields ``(offset seconds, payload)``; the payload keys follow
+    LiveMetricsBroadcaster.
+    """
+    spec = StreamSpec("runwalk", seconds / 3600.0, seed, SEEDED_END_DATE - timedelta(seconds=seconds))
+    latest = {"hr": 0, "spm": 0, "activity": "unknown", "lat": None, "lon": None}
+    distance = 0.0
+    last_gps_t = None
+    next_emit = spec.start + LIVE_METRICS_INTERVAL_S
+    seq = 0
+    for sample in iter_stream(spec):
+        while sample["t"] >= next_emit:
+            offset = next_emit - spec.start
+            yield offset, {
+                "action": "liveMetrics", "seq": seq, "elapsedTime": offset,
+                "heartRate": latest["hr"], "distance": distance, "cadence": latest["spm"],
+                "currentActivity": latest["activity"], "isPaused": False,
+                "latitude": latest["lat"], "longitude": latest["lon"],
+            }
+            seq += 1
+            next_emit += LIVE_METRICS_INTERVAL_S
+        kind = sample["kind"]
+        if kind == "hr":
+            latest["hr"] = sample["bpm"]
+        elif kind == "cadence":
+            latest["spm"] = sample["spm"]
+        elif kind == "activity":
+            latest["activity"] = sample["activity"]
+        elif kind == "gps":
+            if last_gps_t is not None:
+                distance += sample["speed"] * (sample["t"] - last_gps_t)
+            last_gps_t = sample["t"]
+            latest["lat"], latest["lon"] = sample["latitude"], sample["longitude"]
+
+
+async def _replay_live(watch: WatchSim, snapshots: list, start: float):
+    loop = asyncio.get_running_loop()
+    for offset, payload in snapshots:
+        await asyncio.sleep(max(0.0, start + offset - loop.time()))
+        watch.broadcast_live_metrics(dict(payload, sentAt=loop.time()))
+
+
+async def _finish_workouts(watch: WatchSim, sessions: list, finish_times: list):
+    loop = asyncio.get_running_loop()
+    for (session_id, raw), at in zip(sessions, finish_times):
+        await asyncio.sleep(max(0.0, at - loop.time()))
+        watch.finish_workout(session_id, raw)
+
+
+async def simulate(sessions: list, config: LinkConfig, seed: int = 1, live: list = (),
+                   max_time: float = 7200.0, settle: float = 60.0) -> dict:
+    """Run one scenario on the current loop and return the report.
+
+    Sessions finish on the watch evenly spread over the initial offline
+    window; live snapshots start when the phone first becomes reachable.
+    """
+    loop = asyncio.get_running_loop()
+    rng = random.Random(derive_seed(seed, "wc_simulator"))
+    metrics = Metrics(len(sessions))
+    link = WCLink(config, rng, metrics.stats)
+    watch = WatchSim(link, metrics)
+    phone = PhoneSim(link, metrics)
+    link.watch, link.phone = watch, phone
+
+    spread = config.offline
+    finish_times = [spread * i / max(1, len(sessions)) for i in range(len(sessions))]
+    link.start()
+    tasks = [
+        watch.start(),
+        asyncio.ensure_future(_finish_workouts(watch, sessions, finish_times)),
+        asyncio.ensure_future(_replay_live(watch, live, config.offline)),
+    ]
+    started_wall = time.perf_counter()
+    timed_out = False
+    try:
+        await asyncio.wait_for(metrics.all_delivered.wait(), max_time)
+        await asyncio.sleep(settle)
+    except asyncio.TimeoutError:
+        timed_out = True
+    end = loop.time()
+    link.stop()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*link.tasks, *tasks, return_exceptions=True)
+
+    latencies = [metrics.first_delivery[s] - metrics.created[s] for s in metrics.first_delivery]
+    arrivals = list(metrics.first_delivery.values())
+    total = sum(metrics.deliveries.values())
+    dupes = sum(metrics.duplicates.values())
+    gaps = [b - a for a, b in zip(metrics.live_arrivals, metrics.live_arrivals[1:])]
+    return {
+        "sessions": len(sessions),
+        "delivered": len(metrics.first_delivery),
+        "undelivered": len(sessions) - len(metrics.first_delivery),
+        "timedOut": timed_out,
+        "simulatedSeconds": end,
+        "wallSeconds": time.perf_counter() - started_wall,
+        "drainSeconds": (max(arrivals) - config.offline) if arrivals else None,
+        "latency": percentiles(latencies),
+        "deliveries": dict(metrics.deliveries),
+        "duplicates": dict(metrics.duplicates),
+        "duplicateRate": dupes / total if total else 0.0,
+        "pendingAtEnd": len(watch.pending),
+        "peakOutbox": dict(link.peak_depth),
+        "stats": dict(metrics.stats),
+        "liveMetrics": {
+            **dict(metrics.live),
+            "unique": len(metrics.live_seen),
+            "age": percentiles(metrics.live_ages),
+            "maxGap": max(gaps) if gaps else None,
+        },
+    }
+
+
+def run(sessions: list, config: LinkConfig, **kwargs) -> dict:
+    """simulate() on a fresh VirtualTimeLoop."""
+    loop = VirtualTimeLoop()
+    try:
+        return loop.run_until_complete(simulate(sessions, config, **kwargs))
+    finally:
+        loop.close()
+
+
+def print_report(report: dict, config: LinkConfig):
+    def fmt(p):
+        return ", ".join(f"{k} {v:.1f}s" for k, v in p.items()) if p else "n/a"
+
+    print("\n" + "=" * 60)
+    print("  WATCHCONNECTIVITY SIMULATION")
+    print("=" * 60)
+    print(f"  Link:          latency {config.latency}s ±{config.jitter:.0%}, drop {config.drop:.1%}, "
+          f"up ~{config.up}s / down ~{config.down}s, depth {config.queue_depth}")
+    print(f"  Sessions:      {report['delivered']}/{report['sessions']} delivered"
+          + (" (TIMED OUT)" if report["timedOut"] else ""))
+    drain = report["drainSeconds"]
+    print(f"  Drain:         {drain:.1f}s after reconnect" if drain is not None else "  Drain:         n/a")
+    print(f"  Latency:       {fmt(report['latency'])}")
+    print(f"  Deliveries:    {report['deliveries']}")
+    print(f"  Duplicates:    {report['duplicates']} ({report['duplicateRate']:.1%} of deliveries)")
+    print(f"  Peak outbox:   {report['peakOutbox']}")
+    stats = report["stats"]
+    print(f"  Sends:         {stats.get('sends', 0)} ({stats.get('sendSkippedInFlight', 0)} skipped in flight, "
+          f"{stats.get('retryPasses', 0)} retry passes)")
+    print(f"  Pulls:         {stats.get('pullAttempts', 0)} attempts, {stats.get('pullFailures', 0)} failed, "
+          f"{stats.get('lastSessionIDPulls', 0)} from lastSessionID")
+    print(f"  Dedup scans:   {stats.get('dedupScans', 0)} array comparisons")
+    live = report["liveMetrics"]
+    if live.get("sent"):
+        gap = live["maxGap"]
+        print(f"  Live metrics:  {live['unique']}/{live['sent']} seen, {live.get('duplicate', 0)} duplicate, "
+              f"{stats.get('contextSuperseded', 0)} contexts superseded, age {fmt(live['age'])}"
+              + (f", max gap {gap:.1f}s" if gap is not None else ""))
+    print(f"  Simulated {report['simulatedSeconds']:.0f}s in {report['wallSeconds']:.2f}s")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate watch→phone session delivery over WatchConnectivity")
+    parser.add_argument("--sessions", type=int, default=300, help="Sessions finished while offline (default: 300)")
+    parser.add_argument("--route-interval", type=float, default=30,
+                        help="Seconds between route points; smaller means bigger payloads (default: 30)")
+    parser.add_argument("--offline", type=float, default=600, help="Seconds before the phone is first reachable (default: 600)")
+    parser.add_argument("--latency", type=float, default=0.25, help="Mean one-way latency in seconds (default: 0.25)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Latency std-dev as a fraction of the mean (default: 0.5)")
+    parser.add_argument("--bandwidth", type=float, default=50_000, help="Bytes per second (default: 50000)")
+    parser.add_argument("--drop", type=float, default=0.02, help="Drop probability per message/transfer (default: 0.02)")
+    parser.add_argument("--timeout", type=float, default=5.0, help="sendMessage error delay when dropped (default: 5)")
+    parser.add_argument("--up", type=float, default=120, help="Mean seconds reachable between flaps (default: 120)")
+    parser.add_argument("--down", type=float, default=20, help="Mean seconds unreachable per flap, 0 = no flaps (default: 20)")
+    parser.add_argument("--queue-depth", type=int, default=500, help="Outbox capacity per transfer kind (default: 500)")
+    parser.add_argument("--live", type=float, default=600, help="Seconds of live metrics after reconnect, 0 = none (default: 600)")
+    parser.add_argument("--max-time", type=float, default=7200, help="Simulated-time cap in seconds (default: 7200)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed (default: 1)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    config = LinkConfig(args.latency, args.jitter, args.bandwidth, args.drop, args.timeout,
+                        args.offline, args.up, args.down, args.queue_depth)
+    t0 = time.perf_counter()
+    sessions = session_sizes(args.sessions, args.seed, args.route_interval)
+    live = list(live_snapshots(args.live, args.seed)) if args.live > 0 else []
+    generate_s = time.perf_counter() - t0
+
+    report = run(sessions, config, seed=args.seed, live=live, max_time=args.max_time)
+    report["generateSeconds"] = generate_s
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report, config)
+    if report["undelivered"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,685 @@
+#!/usr/bin/env python3
+"""
+Precomputed widget snapshot: format, incremental builder and verifier.
+
+WidgetDataProvider.loadSessions() decodes the whole of sessions.json on every
+timeline reload (and saveSessionsToAppGroup() reloads every timeline on every
+save), only to derive a handful of numbers: this week's session count, the
+current streak, whether today has a workout, and the last session. This tool
+defines a small snapshot those widgets could read instead, and builds and
+checks it from sessions.json.
+
+The snapshot stores aggregates that do not go stale as the clock moves, and
+the reader derives the time-dependent views from them:
+
+    days         per local day: sessions, duration, distance, calories, for
+                 the DAY_WINDOW days ending at the latest session's day. Enough
+                 for this week (and the previous eight) on any later "now"
+    streak       the maximal run of consecutive workout days ending at the
+                 latest session's day; the current streak when that run
+                 reaches today or yesterday, like currentStreak()
+    lastSession  the summary MediumWidget/SmallWidget show, with displayName
+                 resolved exactly as TrainingSession.displayName
+    totals       all-time sessions, duration, distance, calories
+    sports       the same per sportType ("runWalk" when it is unset)
+    calendar     time zone and firstWeekday the days were bucketed with; a
+                 reader on a different calendar must fall back to the full path
+    source       how much of sessions.json has been folded in
+
+Every element of the array counts, duplicates included, as with
+JSONDecoder().decode([TrainingSession].self). Days are local calendar days in
+calendar.timeZone and weeks start on calendar.firstWeekday (1 = Sunday, as in
+Calendar). Sessions are assumed not to start after "now".
+
+Incremental builds: new sessions are appended by patching the array's closing
+bracket (session_io.append_sessions), so the bytes before the old closing
+bracket do not change. The snapshot records that prefix's length and a digest
+of its first and last PREFIX_SAMPLE bytes. When both still match, only the
+appended bytes are decoded and folded in. Anything else falls back to a full
+build: a rewritten file (DataManager saves re-encode the whole array), a
+changed calendar, or a session old enough to need days outside the window.
+
+Usage:
+    python3 tests/widget_snapshot.py build /tmp/sessions.json                # -> widget_snapshot.json beside it
+    python3 tests/widget_snapshot.py build sessions.json -o snap.json --tz Europe/Berlin --first-weekday 2
+    python3 tests/widget_snapshot.py verify sessions.json snap.json          # exit 1 on mismatch
+    python3 tests/widget_snapshot.py show snap.json --now 2026-01-02T09:00
+    python3 tests/widget_snapshot.py bench /tmp/big.json --now 2026-01-02T09:00 --json
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from atomic_io import commit_temp, temp_sibling
+from instrument import Instrumentation, add_arguments
+from session_io import iter_sessions, locate_array_tail
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+FORMAT_VERSION = 1
+SNAPSHOT_NAME = "widget_snapshot.json"
+
+# Nine weeks: this week plus the eight before it, whatever weekday "now" is
+DAY_WINDOW = 63
+
+# Bytes hashed from each end of the already-folded prefix
+PREFIX_SAMPLE = 1 << 16
+
+# Unix time of the Apple reference date (2001-01-01 UTC)
+APPLE_EPOCH = 978307200
+
+DEFAULT_SPORT = "runWalk"
+SPORT_NAMES = {
+    "running": "Running", "walking": "Walking", "cycling": "Cycling", "swimming": "Swimming",
+    "hiking": "Hiking", "elliptical": "Elliptical", "crossTraining": "Cross Training", "other": "Other",
+}
+
+
+class NeedsRebuild(Exception):
+    """The snapshot cannot be brought up to date incrementally."""
+
+
+# MARK: - Calendar
+
+
+def local_zone_name() -> str:
+    """IANA name of the local time zone ($TZ, else /etc/localtime), or UTC."""
+    name = os.environ.get("TZ", "").lstrip(":")
+    if name:
+        return name
+    try:
+        target = os.path.realpath("/etc/localtime")
+    except OSError:
+        return "UTC"
+    marker = "zoneinfo/"
+    return target.split(marker, 1)[1] if marker in target else "UTC"
+
+
+class WidgetCalendar:
+    """Calendar.current as far as the widgets use it: local days and week starts."""
+
+    def __init__(self, time_zone: str = "UTC", first_weekday: int = 1):
+        if not 1 <= first_weekday <= 7:
+            raise ValueError(f"firstWeekday must be 1-7, got {first_weekday}")
+        self.time_zone = time_zone
+        self.first_weekday = first_weekday
+        if time_zone == "UTC":
+            self.tz = timezone.utc
+        elif ZoneInfo is None:
+            raise ValueError("time zones other than UTC need Python 3.9+ (zoneinfo)")
+        else:
+            try:
+                self.tz = ZoneInfo(time_zone)
+            except (ZoneInfoNotFoundError, ValueError):
+                raise ValueError(f"unknown time zone {time_zone!r}") from None
+
+    def to_json(self) -> dict:
+        return {"timeZone": self.time_zone, "firstWeekday": self.first_weekday}
+
+    @classmethod
+    def from_json(cls, obj: dict) -> "WidgetCalendar":
+        return cls(obj["timeZone"], obj["firstWeekday"])
+
+    def day(self, apple_ts: float) -> date:
+        """Local calendar day of a Date (seconds since 2001-01-01)."""
+        return datetime.fromtimestamp(apple_ts + APPLE_EPOCH, self.tz).date()
+
+    def week_start(self, day: date) -> date:
+        """First day of the week containing ``day`` (dateInterval(of: .weekOfYear))."""
+        weekday = day.isoweekday() % 7 + 1  # Calendar numbering: Sunday = 1
+        return day - timedelta(days=(weekday - self.first_weekday) % 7)
+
+
+# MARK: - Session summaries
+
+
+def display_name(session: dict) -> str:
+    """TrainingSession.displayName."""
+    if session.get("programName") is not None:
+        return session["programName"]
+    if session.get("sessionMode") == "gymRecovery":
+        return "Gym Recovery"
+    sport = session.get("sportType")
+    return SPORT_NAMES.get(sport, "Run+Walk") if sport is not None else "Run+Walk"
+
+
+def session_summary(session: dict) -> dict:
+    """What MediumWidget and SmallWidget show of one session."""
+    return {
+        "id": session["id"],
+        "startDate": session["startDate"],
+        "duration": session.get("duration", 0.0),
+        "distance": session.get("distance"),
+        "caloriesBurned": session.get("caloriesBurned"),
+        "averageHeartRate": session.get("averageHeartRate"),
+        "sportType": session.get("sportType"),
+        "displayName": display_name(session),
+    }
+
+
+def _bucket() -> dict:
+    return {"sessions": 0, "duration": 0.0, "distance": 0.0, "calories": 0.0}
+
+
+def _add(bucket: dict, session: dict):
+    bucket["sessions"] += 1
+    bucket["duration"] += session.get("duration") or 0.0
+    bucket["distance"] += session.get("distance") or 0.0
+    bucket["calories"] += session.get("caloriesBurned") or 0.0
+
+
+# MARK: - Snapshot
+
+
+class Snapshot:
+    """The widget snapshot, in memory.
+
+    ``days`` maps date -> bucket. While building it may hold days outside the
+    window; to_json() only writes the window.
+    """
+
+    def __init__(self, calendar: WidgetCalendar):
+        self.calendar = calendar
+        self.totals = _bucket()
+        self.sports = {}
+        self.days = {}
+        self.latest_day = None
+        self.streak = None          # (start, end) dates
+        self.last_session = None
+        self.prefix_bytes = 0
+        self.prefix_digest = None
+        self.generated_at = None
+
+    @property
+    def window_start(self):
+        return None if self.latest_day is None else self.latest_day - timedelta(days=DAY_WINDOW - 1)
+
+    def add(self, session: dict):
+        """Fold one session into the totals, sports, days and lastSession."""
+        day = self.calendar.day(session["startDate"])
+        _add(self.totals, session)
+        _add(self.sports.setdefault(session.get("sportType") or DEFAULT_SPORT, _bucket()), session)
+        _add(self.days.setdefault(day, _bucket()), session)
+        if self.last_session is None or session["startDate"] > self.last_session["startDate"]:
+            self.last_session = session_summary(session)
+        return day
+
+    def finish(self, old_window_start=date.min, old_streak=None):
+        """Recompute latestDay and the streak run, then drop days outside the window.
+
+        For a full build every workout day is in ``days``. For an incremental
+        one ``days`` only covers the old window plus the new sessions' days, and
+        the old streak run stands in for what lies before the old window;
+        anything else raises NeedsRebuild.
+        """
+        if not self.days:
+            self.latest_day = self.streak = None
+            return
+        self.latest_day = max(self.days)
+        day = self.latest_day
+        while True:
+            if day in self.days:
+                day -= timedelta(days=1)
+            elif day >= old_window_start:
+                break
+            elif old_streak is not None and old_streak[0] <= day <= old_streak[1]:
+                day = old_streak[0] - timedelta(days=1)
+            elif old_streak is not None and day == old_streak[0] - timedelta(days=1):
+                break  # the old run was maximal
+            else:
+                raise NeedsRebuild("streak reaches before the day window")
+        self.streak = (day + timedelta(days=1), self.latest_day)
+        start = self.window_start
+        self.days = {d: b for d, b in self.days.items() if d >= start}
+
+    def to_json(self) -> dict:
+        return {
+            "version": FORMAT_VERSION,
+            "generatedAt": self.generated_at,
+            "calendar": self.calendar.to_json(),
+            "source": {"prefixBytes": self.prefix_bytes, "prefixDigest": self.prefix_digest},
+            "totals": self.totals,
+            "sports": dict(sorted(self.sports.items())),
+            "latestDay": self.latest_day.isoformat() if self.latest_day else None,
+            "days": [dict(day=d.isoformat(), **self.days[d]) for d in sorted(self.days)],
+            "streak": ({"start": self.streak[0].isoformat(), "end": self.streak[1].isoformat()}
+                       if self.streak else None),
+            "lastSession": self.last_session,
+        }
+
+    @classmethod
+    def from_json(cls, obj: dict) -> "Snapshot":
+        if obj.get("version") != FORMAT_VERSION:
+            raise NeedsRebuild(f"snapshot version {obj.get('version')} != {FORMAT_VERSION}")
+        snap = cls(WidgetCalendar.from_json(obj["calendar"]))
+        snap.generated_at = obj["generatedAt"]
+        snap.prefix_bytes = obj["source"]["prefixBytes"]
+        snap.prefix_digest = obj["source"]["prefixDigest"]
+        snap.totals = obj["totals"]
+        snap.sports = obj["sports"]
+        snap.latest_day = date.fromisoformat(obj["latestDay"]) if obj["latestDay"] else None
+        snap.days = {date.fromisoformat(d.pop("day")): d for d in (dict(d) for d in obj["days"])}
+        streak = obj["streak"]
+        snap.streak = (date.fromisoformat(streak["start"]), date.fromisoformat(streak["end"])) if streak else None
+        snap.last_session = obj["lastSession"]
+        return snap
+
+
+def load_snapshot(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_snapshot(snapshot_json: dict, path: str):
+    """Atomic, compact write (the widget reads it whole)."""
+    fd, tmp_path = temp_sibling(path)
+    with os.fdopen(fd, "w") as f:
+        json.dump(snapshot_json, f, separators=(",", ":"))
+    commit_temp(tmp_path, path)
+
+
+# MARK: - Building
+
+
+def prefix_digest(path: str, length: int) -> str:
+    """Digest of the first and last PREFIX_SAMPLE bytes of ``path[:length]``."""
+    h = hashlib.blake2b(str(length).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        h.update(f.read(min(length, PREFIX_SAMPLE)))
+        if length > PREFIX_SAMPLE:
+            f.seek(max(PREFIX_SAMPLE, length - PREFIX_SAMPLE))
+            h.update(f.read(length - max(PREFIX_SAMPLE, length - PREFIX_SAMPLE)))
+    return h.hexdigest()
+
+
+def _source_end(path: str) -> int:
+    """Byte offset just past the last element (0 for an empty array)."""
+    offset, is_empty = locate_array_tail(path)
+    return 0 if is_empty else offset
+
+
+def build_full(path: str, calendar: WidgetCalendar, inst: Instrumentation = None) -> tuple:
+    """Snapshot of every session in ``path``; returns (snapshot, sessions read)."""
+    inst = inst or Instrumentation("widget_snapshot")
+    snap = Snapshot(calendar)
+    with inst.phase("locate"):
+        end = _source_end(path)
+    count = 0
+    with inst.phase("decode"):
+        for session in iter_sessions(path):
+            snap.add(session)
+            count += 1
+    with inst.phase("finish"):
+        snap.finish()
+        snap.prefix_bytes = end
+        snap.prefix_digest = prefix_digest(path, end)
+    return snap, count
+
+
+def read_appended(path: str, start: int, end: int) -> list:
+    """Decode the elements in bytes ``[start, end)``, which follow an existing one."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    body = text.lstrip(" \t\r\n")
+    if not body.startswith(","):
+        raise NeedsRebuild("appended bytes do not continue the array")
+    try:
+        return json.loads("[" + body[1:] + "]")
+    except ValueError as e:
+        raise NeedsRebuild(f"appended bytes do not decode: {e}") from None
+
+
+def update(path: str, snapshot_json: dict, calendar: WidgetCalendar, inst: Instrumentation = None) -> tuple:
+    """Bring ``snapshot_json`` up to date with ``path`` by folding in appended sessions.
+
+    Returns (snapshot, sessions read); raises NeedsRebuild if only a full
+    build can do it.
+    """
+    inst = inst or Instrumentation("widget_snapshot")
+    snap = Snapshot.from_json(snapshot_json)
+    if snap.calendar.to_json() != calendar.to_json():
+        raise NeedsRebuild("calendar changed")
+    with inst.phase("check"):
+        end = _source_end(path)
+        if snap.prefix_bytes == 0:
+            raise NeedsRebuild("snapshot of an empty array")
+        if end < snap.prefix_bytes:
+            raise NeedsRebuild("sessions file shrank")
+        if prefix_digest(path, snap.prefix_bytes) != snap.prefix_digest:
+            raise NeedsRebuild("sessions file was rewritten")
+    if end == snap.prefix_bytes:
+        return snap, 0
+
+    with inst.phase("decode"):
+        sessions = read_appended(path, snap.prefix_bytes, end)
+    with inst.phase("finish"):
+        old_window_start, old_streak = snap.window_start, snap.streak
+        for session in sessions:
+            snap.add(session)
+        snap.finish(old_window_start, old_streak)
+        snap.prefix_bytes = end
+        snap.prefix_digest = prefix_digest(path, end)
+    return snap, len(sessions)
+
+
+def build(path: str, output: str, calendar: WidgetCalendar, full: bool = False,
+          inst: Instrumentation = None) -> dict:
+    """Write an up-to-date snapshot of ``path`` to ``output``; returns the report."""
+    inst = inst or Instrumentation("widget_snapshot")
+    t0 = time.perf_counter()
+    mode, reason = "full", "--full" if full else "no snapshot"
+    snap = None
+    if not full and os.path.exists(output):
+        try:
+            snap, count = update(path, load_snapshot(output), calendar, inst)
+            mode, reason = ("incremental", None) if count else ("unchanged", None)
+        except NeedsRebuild as e:
+            reason = str(e)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            reason = f"unreadable snapshot ({e})"
+    if snap is None:
+        snap, count = build_full(path, calendar, inst)
+    if mode != "unchanged":
+        snap.generated_at = time.time() - APPLE_EPOCH
+        with inst.phase("write"):
+            write_snapshot(snap.to_json(), output)
+    inst.count("sessionsRead", count)
+    return {
+        "sessions": path,
+        "snapshot": output,
+        "mode": mode,
+        "reason": reason,
+        "sessionsRead": count,
+        "totalSessions": snap.totals["sessions"],
+        "snapshotBytes": os.path.getsize(output),
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+# MARK: - Verifying
+
+
+def _diff(expected, actual, path: str = "") -> list:
+    """Paths where two snapshot JSON values differ (floats within 1e-9 relative)."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        out = []
+        for key in sorted(set(expected) | set(actual)):
+            out += _diff(expected.get(key), actual.get(key), f"{path}.{key}")
+        return out
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [f"{path}: {len(actual)} items, expected {len(expected)}"]
+        return [d for i, (e, a) in enumerate(zip(expected, actual)) for d in _diff(e, a, f"{path}[{i}]")]
+    if (isinstance(expected, (int, float)) and isinstance(actual, (int, float))
+            and not isinstance(expected, bool) and not isinstance(actual, bool)):
+        if math.isclose(expected, actual, rel_tol=1e-9, abs_tol=1e-6):
+            return []
+    elif expected == actual:
+        return []
+    return [f"{path}: {actual!r}, expected {expected!r}"]
+
+
+def verify(path: str, snapshot_path: str) -> dict:
+    """Rebuild from scratch with the snapshot's calendar and compare."""
+    actual = load_snapshot(snapshot_path)
+    calendar = WidgetCalendar.from_json(actual["calendar"])
+    expected = build_full(path, calendar)[0].to_json()
+    expected["generatedAt"] = actual.get("generatedAt")
+    problems = _diff(expected, actual)
+    return {"sessions": path, "snapshot": snapshot_path, "ok": not problems, "problems": problems}
+
+
+# MARK: - Widget views
+
+
+def widget_view(snapshot_json: dict, now: datetime) -> dict:
+    """What WidgetDataProvider would answer at ``now``, from the snapshot alone."""
+    calendar = WidgetCalendar.from_json(snapshot_json["calendar"])
+    today = now.astimezone(calendar.tz).date()
+    days = {d["day"]: d for d in snapshot_json["days"]}
+    latest = snapshot_json["latestDay"]
+    window_start = (date.fromisoformat(latest) - timedelta(days=DAY_WINDOW - 1)) if latest else None
+    streak = snapshot_json["streak"]
+    run = (date.fromisoformat(streak["start"]), date.fromisoformat(streak["end"])) if streak else None
+
+    week_start = calendar.week_start(today)
+    week_count = sum(d["sessions"] for key, d in days.items() if date.fromisoformat(key) >= week_start)
+
+    def active(day):
+        if day.isoformat() in days:
+            return True
+        return run is not None and day < window_start and run[0] <= day <= run[1]
+
+    count = 0
+    day = today if active(today) else today - timedelta(days=1)
+    while active(day):
+        if run is not None and day < window_start:
+            count += (day - run[0]).days + 1
+            break
+        count += 1
+        day -= timedelta(days=1)
+
+    last = snapshot_json["lastSession"]
+    trained_today = last is not None and calendar.day(last["startDate"]) == today
+    return {
+        "thisWeekSessionCount": week_count,
+        "currentStreak": count,
+        "trainedToday": trained_today,
+        "todaySessionId": last["id"] if trained_today else None,
+        "lastSession": last,
+    }
+
+
+def widget_view_full(sessions: list, calendar: WidgetCalendar, now: datetime) -> dict:
+    """The same view the way WidgetDataProvider computes it: from every session."""
+    ordered = sorted(sessions, key=lambda s: s["startDate"], reverse=True)
+    today = now.astimezone(calendar.tz).date()
+    week_start = calendar.week_start(today)
+    day_of = [calendar.day(s["startDate"]) for s in ordered]
+
+    workout_days = set(day_of)
+    count = 0
+    day = today if today in workout_days else today - timedelta(days=1)
+    while day in workout_days:
+        count += 1
+        day -= timedelta(days=1)
+
+    today_session = next((s for s, d in zip(ordered, day_of) if d == today), None)
+    return {
+        "thisWeekSessionCount": sum(1 for d in day_of if d >= week_start),
+        "currentStreak": count,
+        "trainedToday": today_session is not None,
+        "todaySessionId": today_session["id"] if today_session else None,
+        "lastSession": session_summary(ordered[0]) if ordered else None,
+    }
+
+
+def bench(path: str, calendar: WidgetCalendar, now: datetime, repeat: int = 3) -> dict:
+    """Widget reload cost with and without the snapshot, best of ``repeat``."""
+    fd, snapshot_path = temp_sibling(path)
+    os.close(fd)
+    try:
+        t0 = time.perf_counter()
+        build_full_report = build(path, snapshot_path, calendar, full=True)
+        full_build_s = time.perf_counter() - t0
+
+        def best(fn):
+            times, result = [], None
+            for _ in range(repeat):
+                t = time.perf_counter()
+                result = fn()
+                times.append(time.perf_counter() - t)
+            return min(times), result
+
+        def full_path():
+            with open(path, "rb") as f:
+                return widget_view_full(json.load(f), calendar, now)
+
+        def snapshot_read():
+            return widget_view(load_snapshot(snapshot_path), now)
+
+        full_s, full_view = best(full_path)
+        snap_s, snap_view = best(snapshot_read)
+        check_s, _ = best(lambda: build(path, snapshot_path, calendar))
+        problems = _diff(full_view, snap_view)
+        return {
+            "sessions": path,
+            "sessionCount": build_full_report["totalSessions"],
+            "sessionsBytes": os.path.getsize(path),
+            "snapshotBytes": build_full_report["snapshotBytes"],
+            "now": now.isoformat(),
+            "fullReloadSeconds": full_s,
+            "snapshotReloadSeconds": snap_s,
+            "speedup": full_s / snap_s if snap_s else None,
+            "fullBuildSeconds": full_build_s,
+            "upToDateCheckSeconds": check_s,
+            "viewsAgree": not problems,
+            "problems": problems,
+            "view": snap_view,
+        }
+    finally:
+        if os.path.exists(snapshot_path):
+            os.unlink(snapshot_path)
+
+
+# MARK: - CLI
+
+
+def print_view(view: dict, snapshot_path: str, now: datetime):
+    print("\n" + "=" * 60)
+    print(f"  WIDGET VIEW  ({snapshot_path} @ {now:%Y-%m-%d %H:%M %Z})")
+    print("=" * 60)
+    print(f"  This week:      {view['thisWeekSessionCount']} sessions")
+    print(f"  Streak:         {view['currentStreak']} days")
+    print(f"  Trained today:  {'yes' if view['trainedToday'] else 'no'}")
+    last = view["lastSession"]
+    if last:
+        started = datetime.fromtimestamp(last["startDate"] + APPLE_EPOCH, timezone.utc)
+        print(f"  Last session:   {last['displayName']}, {started:%Y-%m-%d %H:%M} UTC, "
+              f"{last['duration'] / 60:.0f} min ({last['id']})")
+    else:
+        print("  Last session:   none")
+    print("=" * 60)
+
+
+def print_bench(result: dict):
+    print("\n" + "=" * 60)
+    print("  WIDGET RELOAD COST")
+    print("=" * 60)
+    print(f"  Sessions:            {result['sessionCount']} ({result['sessionsBytes'] / 1e6:.1f} MB)")
+    print(f"  Snapshot:            {result['snapshotBytes']} bytes")
+    print(f"  Full decode reload:  {result['fullReloadSeconds'] * 1000:.1f} ms")
+    print(f"  Snapshot reload:     {result['snapshotReloadSeconds'] * 1000:.3f} ms "
+          f"({result['speedup']:.0f}× faster)")
+    print(f"  Full build:          {result['fullBuildSeconds'] * 1000:.1f} ms")
+    print(f"  Up-to-date check:    {result['upToDateCheckSeconds'] * 1000:.3f} ms")
+    if result["viewsAgree"]:
+        print("  ✅ Snapshot view matches the full-decode view")
+    else:
+        print("  ❌ Snapshot view differs from the full-decode view:")
+        for problem in result["problems"]:
+            print(f"      {problem}")
+    print("=" * 60)
+
+
+def parse_now(value: str, calendar_tz) -> datetime:
+    now = datetime.fromisoformat(value) if value else datetime.now(timezone.utc)
+    return now if now.tzinfo else now.replace(tzinfo=calendar_tz)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and verify the precomputed widget snapshot")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def calendar_args(p):
+        p.add_argument("--tz", default=local_zone_name(), help="IANA time zone days are bucketed in (default: local)")
+        p.add_argument("--first-weekday", type=int, default=1, help="Calendar.firstWeekday, 1 = Sunday (default: 1)")
+
+    p_build = sub.add_parser("build", help="Create or incrementally update the snapshot")
+    p_build.add_argument("sessions", help="sessions.json")
+    p_build.add_argument("-o", "--output", help=f"Snapshot path (default: {SNAPSHOT_NAME} beside sessions.json)")
+    p_build.add_argument("--full", action="store_true", help="Rebuild from scratch")
+    p_build.add_argument("--json", action="store_true", help="Print the report as JSON")
+    calendar_args(p_build)
+    add_arguments(p_build)
+
+    p_verify = sub.add_parser("verify", help="Rebuild from scratch and compare; exit 1 on mismatch")
+    p_verify.add_argument("sessions")
+    p_verify.add_argument("snapshot")
+    p_verify.add_argument("--json", action="store_true")
+
+    p_show = sub.add_parser("show", help="Print the widget view a snapshot gives")
+    p_show.add_argument("snapshot")
+    p_show.add_argument("--now", help="ISO date/time to evaluate at (default: now)")
+    p_show.add_argument("--json", action="store_true")
+
+    p_bench = sub.add_parser("bench", help="Widget reload cost with and without the snapshot")
+    p_bench.add_argument("sessions")
+    p_bench.add_argument("--now", help="ISO date/time to evaluate at (default: now)")
+    p_bench.add_argument("--repeat", type=int, default=3, help="Best of N (default: 3)")
+    p_bench.add_argument("--json", action="store_true")
+    calendar_args(p_bench)
+
+    args = parser.parse_args()
+    for attr in ("sessions", "snapshot"):
+        value = getattr(args, attr, None)
+        if value and not os.path.exists(value):
+            print(f"❌ not found: {value}")
+            sys.exit(1)
+
+    if args.command == "build":
+        output = args.output or os.path.join(os.path.dirname(os.path.abspath(args.sessions)), SNAPSHOT_NAME)
+        with Instrumentation.from_args("widget_snapshot", args) as inst:
+            result = build(args.sessions, output, WidgetCalendar(args.tz, args.first_weekday), args.full, inst)
+        if args.json:
+            json.dump(result, sys.stdout, indent=2)
+            print()
+        else:
+            why = f" ({result['reason']})" if result["reason"] else ""
+            print(f"✅ {result['mode']} build{why}: read {result['sessionsRead']} of "
+                  f"{result['totalSessions']} sessions in {result['seconds'] * 1000:.1f} ms, "
+                  f"{result['snapshotBytes']} bytes -> {output}")
+    elif args.command == "verify":
+        result = verify(args.sessions, args.snapshot)
+        if args.json:
+            json.dump(result, sys.stdout, indent=2)
+            print()
+        elif result["ok"]:
+            print(f"✅ {args.snapshot} matches a full rebuild of {args.sessions}")
+        else:
+            print(f"❌ {args.snapshot} differs from a full rebuild of {args.sessions}:")
+            for problem in result["problems"][:20]:
+                print(f"    {problem}")
+        sys.exit(0 if result["ok"] else 1)
+    elif args.command == "show":
+        snapshot = load_snapshot(args.snapshot)
+        now = parse_now(args.now, WidgetCalendar.from_json(snapshot["calendar"]).tz)
+        view = widget_view(snapshot, now)
+        if args.json:
+            json.dump(view, sys.stdout, indent=2)
+            print()
+        else:
+            print_view(view, args.snapshot, now)
+    else:
+        calendar = WidgetCalendar(args.tz, args.first_weekday)
+        result = bench(args.sessions, calendar, parse_now(args.now, calendar.tz), args.repeat)
+        if args.json:
+            json.dump(result, sys.stdout, indent=2)
+            print()
+        else:
+            print_bench(result)
+        sys.exit(0 if result["viewsAgree"] else 1)
+
+
+if __name__ == "__main__":
+    main()